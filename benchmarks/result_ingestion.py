@@ -0,0 +1,153 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import resource
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from multiprocessing.queues import Queue
+
+QUERY = "SELECT ?br ?title ?n WHERE { ?br <http://purl.org/dc/terms/title> ?title }"
+OP_ITEM = {
+    "url": "/bench",
+    "sparql": QUERY,
+    "method": "get",
+    "field_type": "str(br) str(title) int(n)",
+}
+
+
+FORMATS = ["csv", "tsv", "json"]
+MEDIA_TYPES = {
+    "text/csv": "csv",
+    "text/tab-separated-values": "tsv",
+    "application/sparql-results+json": "json",
+}
+
+
+def _body(result_format: str, rows: int) -> bytes:
+    brs = (f"https://w3id.org/oc/meta/br/0601{i}" for i in range(rows))
+    if result_format == "csv":
+        lines = ["br,title,n"]
+        lines.extend(f"{br},Title of bibliographic resource {i},{i}" for i, br in enumerate(brs))
+        return ("\r\n".join(lines) + "\r\n").encode()
+    if result_format == "tsv":
+        lines = ["?br\t?title\t?n"]
+        lines.extend(f'<{br}>\t"Title of bibliographic resource {i}"\t{i}' for i, br in enumerate(brs))
+        return ("\n".join(lines) + "\n").encode()
+    integer = "http://www.w3.org/2001/XMLSchema#integer"
+    bindings = [
+        {
+            "br": {"type": "uri", "value": br},
+            "title": {"type": "literal", "value": f"Title of bibliographic resource {i}"},
+            "n": {"type": "literal", "datatype": integer, "value": str(i)},
+        }
+        for i, br in enumerate(brs)
+    ]
+    return json.dumps({"head": {"vars": ["br", "title", "n"]}, "results": {"bindings": bindings}}).encode()
+
+
+def _serve(rows: int, formats: list[str], ports: Queue[int]) -> None:
+    # Bodies are built before the port is published, so that no measurement waits for them.
+    bodies = {result_format: _body(result_format, rows) for result_format in formats}
+
+    class Handler(BaseHTTPRequestHandler):
+        def _answer(self) -> None:
+            body = bodies[MEDIA_TYPES[self.headers.get("Accept", "text/csv")]]
+            self.send_response(200)
+            self.send_header("Content-Type", self.headers.get("Accept", "text/csv"))
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self) -> None:
+            self._answer()
+
+        def do_POST(self) -> None:
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            self._answer()
+
+        def log_message(self, format: str, *args: object) -> None:  # noqa: A002
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    ports.put(server.server_address[1])
+    server.serve_forever()
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere.
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def _measure(endpoint: str, result_format: str, mode: str, results: Queue[tuple[float, float, int]]) -> None:
+    from ramose import Operation, OperationConfig  # noqa: PLC0415
+    from ramose.endpoints import EndpointOptions  # noqa: PLC0415
+
+    config = OperationConfig(
+        sparql_endpoint=endpoint,
+        endpoint_options={endpoint: EndpointOptions(result_format=result_format)},
+        retry_wait=0,
+    )
+    op = Operation("/bench", r"/bench", OP_ITEM, config)
+    baseline = _peak_rss_mb()
+    start = time.perf_counter()
+    if mode == "parse":
+        size = len(op._run_sparql_dicts(endpoint, QUERY))  # noqa: SLF001
+    else:
+        _, body, _, _ = op.exec(content_type="text/csv")
+        size = len(body)
+    results.put((time.perf_counter() - start, _peak_rss_mb() - baseline, size))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Time and peak memory of ingesting a large SPARQL response.")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="rows in the backend response")
+    parser.add_argument(
+        "--format",
+        choices=[*FORMATS, "all"],
+        default="csv",
+        help="result format requested from the backend (the result_format endpoint option)",
+    )
+    parser.add_argument(
+        "--mode",
+        choices=["parse", "exec", "both"],
+        default="both",
+        help="parse: response to rows as used by multi-source steps; exec: full Operation.exec to CSV output",
+    )
+    args = parser.parse_args()
+
+    # Server and measurements run in separate processes, so each peak RSS only covers RAMOSE's own work.
+    formats = FORMATS if args.format == "all" else [args.format]
+    context = multiprocessing.get_context("spawn")
+    ports: Queue[int] = context.Queue()
+    server = context.Process(target=_serve, args=(args.rows, formats, ports), daemon=True)
+    server.start()
+    endpoint = f"http://127.0.0.1:{ports.get()}/sparql"
+    try:
+        for result_format in formats:
+            for mode in ["parse", "exec"] if args.mode == "both" else [args.mode]:
+                results: Queue[tuple[float, float, int]] = context.Queue()
+                worker = context.Process(target=_measure, args=(endpoint, result_format, mode, results))
+                worker.start()
+                elapsed, peak_mb, size = results.get()
+                worker.join()
+                print(
+                    f"{result_format:4} {mode:5} rows={args.rows} time={elapsed:.2f}s "
+                    f"peak_rss_delta={peak_mb:.0f}MB output={size}"
+                )
+    finally:
+        server.terminate()
+
+
+if __name__ == "__main__":
+    main()
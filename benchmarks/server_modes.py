@@ -0,0 +1,196 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import multiprocessing
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.client import HTTPConnection
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from multiprocessing.queues import Queue
+
+SPEC = """#url /bench
+#type api
+#base http://localhost
+#endpoint {endpoint}
+#method get
+#title Server modes benchmark
+#description Operation answered by a local stub endpoint.
+#version 0.0.1
+#license ISC
+#contacts bench@example.org
+
+#url /rows/{{n}}
+#type operation
+#n str(\\d+)
+#method get
+#description Rows of the stub endpoint.
+#call /rows/1
+#field_type str(br) str(title) int(n)
+#output_json []
+#sparql SELECT ?br ?title ?n WHERE {{ ?br <http://purl.org/dc/terms/title> ?title . BIND([[n]] AS ?n) }}
+"""
+MODES = ["flask", "asgi"]
+
+
+def _serve(rows: int, latency: float, ports: Queue[int]) -> None:
+    lines = ["br,title,n"]
+    lines.extend(f"https://w3id.org/oc/meta/br/0601{i},Title of bibliographic resource {i},{i}" for i in range(rows))
+    body = ("\r\n".join(lines) + "\r\n").encode()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _answer(self) -> None:
+            time.sleep(latency)
+            self.send_response(200)
+            self.send_header("Content-Type", "text/csv")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self) -> None:
+            self._answer()
+
+        def do_POST(self) -> None:
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            self._answer()
+
+        def log_message(self, format: str, *args: object) -> None:  # noqa: A002
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    ports.put(server.server_address[1])
+    server.serve_forever()
+
+
+def _free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def _accepts(port: int) -> bool:
+    try:
+        with socket.create_connection(("127.0.0.1", port), timeout=1):
+            return True
+    except OSError:
+        return False
+
+
+def _start_ramose(mode: str, spec: Path, port: int) -> subprocess.Popen[bytes]:
+    command = [sys.executable, "-m", "ramose", "-s", str(spec), "-w", f"127.0.0.1:{port}", "--no-cache"]
+    if mode == "asgi":
+        command.append("--asgi")
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, cwd=spec.parent)  # noqa: S603
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if _accepts(port):
+            return process
+        time.sleep(0.1)
+    process.terminate()
+    message = f"the {mode} server did not start on port {port}"
+    raise SystemExit(message)
+
+
+def _get(connection: HTTPConnection, number: int) -> bool:
+    try:
+        connection.request("GET", f"/bench/rows/{number}", headers={"Accept": "application/json"})
+        response = connection.getresponse()
+        response.read()
+    except OSError:
+        connection.close()
+        return False
+    return response.status == 200  # noqa: PLR2004
+
+
+def _load(port: int, concurrency: int, duration: float) -> tuple[list[float], int]:
+    # Every client keeps one connection open and sends its requests one after the other, as a pool of
+    # keep-alive clients does. A connection that fails is opened again by its next request.
+    latencies: list[float] = []
+    errors = [0]
+    lock = threading.Lock()
+    stop = time.monotonic() + duration
+
+    def client(number: int) -> None:
+        connection = HTTPConnection("127.0.0.1", port, timeout=60)
+        own: list[float] = []
+        failed = 0
+        while time.monotonic() < stop:
+            start = time.perf_counter()
+            if not _get(connection, number):
+                failed += 1
+            own.append(time.perf_counter() - start)
+        connection.close()
+        with lock:
+            latencies.extend(own)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=client, args=(number,)) for number in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors[0]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Requests per second and latency of the Flask server and the ASGI server under the same load."
+    )
+    parser.add_argument("--concurrency", type=int, default=32, help="clients sending requests at the same time")
+    parser.add_argument("--duration", type=float, default=10, help="seconds of load per server mode")
+    parser.add_argument("--rows", type=int, default=100, help="rows in every endpoint response")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds the stub endpoint waits per query")
+    parser.add_argument("--mode", choices=[*MODES, "all"], default="all")
+    args = parser.parse_args()
+    modes = MODES if args.mode == "all" else [args.mode]
+    if "asgi" in modes and importlib.util.find_spec("uvicorn") is None:
+        message = "uvicorn not installed. Install with: pip install ramose[asgi]"
+        raise SystemExit(message)
+
+    context = multiprocessing.get_context("spawn")
+    ports: Queue[int] = context.Queue()
+    endpoint_server = context.Process(target=_serve, args=(args.rows, args.latency, ports), daemon=True)
+    endpoint_server.start()
+    endpoint = f"http://127.0.0.1:{ports.get()}/sparql"
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            spec = Path(directory) / "bench.hf"
+            spec.write_text(SPEC.format(endpoint=endpoint), encoding="utf-8")
+            for mode in modes:
+                port = _free_port()
+                ramose = _start_ramose(mode, spec, port)
+                try:
+                    _load(port, args.concurrency, 1)
+                    latencies, errors = _load(port, args.concurrency, args.duration)
+                finally:
+                    ramose.terminate()
+                    ramose.wait()
+                p99 = statistics.quantiles(latencies, n=100)[-1] if len(latencies) > 1 else latencies[0]
+                rps = len(latencies) / args.duration
+                print(
+                    f"{mode:5} rps={rps:.1f} p50={statistics.median(latencies) * 1000:.1f}ms "
+                    f"p99={p99 * 1000:.1f}ms errors={errors} concurrency={args.concurrency} "
+                    f"latency={args.latency * 1000:.0f}ms rows={args.rows}"
+                )
+    finally:
+        endpoint_server.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import multiprocessing
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from multiprocessing.queues import Queue
+
+OP_ITEM = {
+    "url": "/bench",
+    "sparql": "@@with engine=sparql-anything\nSELECT ?id WHERE { }",
+    "method": "get",
+    "field_type": "str(id)",
+}
+MODES = ["per-operation", "pooled", "pooled-warm"]
+
+
+def _query(location: Path) -> str:
+    return (
+        "PREFIX xyz: <http://sparql.xyz/facade-x/data/>\n"
+        "SELECT ?id WHERE {\n"
+        f"  SERVICE <x-sparql-anything:location={location},csv.headers=true> {{ ?row xyz:id ?id }}\n"
+        "}"
+    )
+
+
+def _measure(mode: str, calls: int, location: Path, results: Queue[list[float]]) -> None:
+    from pysparql_anything import SparqlAnything  # noqa: PLC0415  # pyright: ignore[reportMissingImports]
+
+    from ramose import Operation, OperationConfig  # noqa: PLC0415
+    from ramose.engine_pool import engine_pool  # noqa: PLC0415
+
+    query = _query(location)
+    if mode == "pooled-warm":
+        # As the web server does at startup through APIManager.warm_up.
+        engine_pool(SparqlAnything, 1).warm_up()
+    latencies: list[float] = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        if mode == "per-operation":
+            # What every request did before the pool: APIManager.get_op builds a new Operation, which started
+            # its own engine on its first SPARQL Anything step.
+            SparqlAnything().select(output_type=dict, query=query)
+        else:
+            op = Operation("/bench", r"/bench", OP_ITEM, OperationConfig(retry_wait=0))
+            op._run_sparql_anything_dicts(query)  # noqa: SLF001
+        latencies.append(time.perf_counter() - start)
+    results.put(latencies)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Latency of SPARQL Anything queries with and without the pool.")
+    parser.add_argument("--calls", type=int, default=50, help="queries per mode, each as a new operation")
+    parser.add_argument("--rows", type=int, default=100, help="rows in the queried CSV document")
+    parser.add_argument("--mode", choices=[*MODES, "all"], default="all")
+    args = parser.parse_args()
+    if importlib.util.find_spec("pysparql_anything") is None:
+        message = "pysparql_anything not installed. Install with: pip install ramose[sparql-anything]"
+        raise SystemExit(message)
+
+    modes = MODES if args.mode == "all" else [args.mode]
+    # Each mode runs in a fresh process, so that its first call starts the JVM as a new server would.
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as directory:
+        location = Path(directory) / "rows.csv"
+        location.write_text("id\n" + "".join(f"row{i}\n" for i in range(args.rows)), encoding="utf-8")
+        for mode in modes:
+            results: Queue[list[float]] = context.Queue()
+            worker = context.Process(target=_measure, args=(mode, args.calls, location, results))
+            worker.start()
+            first, *steady = results.get()
+            worker.join()
+            steady = steady or [first]
+            p95 = statistics.quantiles(steady, n=20)[-1] if len(steady) > 1 else steady[0]
+            print(
+                f"{mode:13} first={first * 1000:.0f}ms steady_median={statistics.median(steady) * 1000:.1f}ms "
+                f"steady_p95={p95 * 1000:.1f}ms calls={args.calls}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -10,13 +10,16 @@
 from __future__ import annotations
 
 import importlib.resources
+import importlib.util
 import os
 from argparse import ArgumentParser, Namespace
 from csv import writer
+from functools import partial
 from http import HTTPStatus
 from io import StringIO
 from json import dumps
 from pathlib import Path
+from typing import TYPE_CHECKING
 from urllib.parse import unquote
 
 from flask import Flask, Response, make_response, request
@@ -24,10 +27,19 @@ from flask_swagger_ui import get_swaggerui_blueprint
 
 from ramose._constants import _backend_auth
 from ramose.api_manager import APIManager
+from ramose.asgi import build_asgi_app
 from ramose.auth import TokenStore
 from ramose.html_documentation import HTMLDocumentationHandler
+from ramose.metrics import PROMETHEUS_CONTENT_TYPE, registry
 from ramose.openapi_documentation import SWAGGER_MARKDOWN_CSS_FIX, OpenAPIDocumentationHandler
 from ramose.operation import Operation
+from ramose.prefork import PreforkServer, listen_socket, serve_asgi, serve_wsgi
+
+if TYPE_CHECKING:
+    import socket
+    from collections.abc import Callable
+
+    from ramose.asgi import ASGIApp
 
 
 def _parse_args() -> Namespace:  # pragma: no cover
@@ -91,6 +103,32 @@ def _parse_args() -> Namespace:  # pragma: no cover
         default=False,
         help="The host:port where to deploy a Flask webserver for testing the API.",
     )
+    arg_parser.add_argument(
+        "--asgi",
+        dest="asgi",
+        default=False,
+        action="store_true",
+        help="Serve the API given with '-w' as an ASGI application under uvicorn instead of the Flask server "
+        "(requires: pip install ramose[asgi]).",
+    )
+    arg_parser.add_argument(
+        "--workers",
+        dest="workers",
+        type=int,
+        default=0,
+        help="Worker processes forked by the web server given with '-w', which share its socket. The spec files are "
+        "loaded once, before forking; dead workers are restarted and SIGHUP reloads the spec files gracefully. "
+        "Endpoint limits such as max_concurrent_queries and max_rate apply to each worker "
+        "(default: 0, a single process).",
+    )
+    arg_parser.add_argument(
+        "--threads",
+        dest="threads",
+        type=int,
+        default=64,
+        help="Threads of each worker that handle requests with --workers, or that run operations with --asgi "
+        "(default: 64).",
+    )
     arg_parser.add_argument(
         "-css",
         "--css",
@@ -127,6 +165,13 @@ def _parse_args() -> Namespace:  # pragma: no cover
         default=86400,
         help="Cache TTL in seconds (default: 86400 = 1 day).",
     )
+    arg_parser.add_argument(
+        "--count-cache-ttl",
+        dest="count_cache_ttl",
+        type=int,
+        default=3600,
+        help="Seconds the row counts of #pushdown operations stay cached (default: 3600).",
+    )
     arg_parser.add_argument(
         "--retry-attempts",
         dest="retry_attempts",
@@ -148,6 +193,49 @@ def _parse_args() -> Namespace:  # pragma: no cover
         default=2.0,
         help="Multiplier applied between SPARQL read retry waits (default: 2.0).",
     )
+    arg_parser.add_argument(
+        "--pipeline-workers",
+        dest="pipeline_workers",
+        type=int,
+        default=1,
+        help="Threads used to fetch independent queries of a multi-source operation concurrently (default: 1).",
+    )
+    arg_parser.add_argument(
+        "--timeout",
+        dest="timeout",
+        type=float,
+        default=0,
+        help="Seconds an operation call may take across all its backend requests and retries before it fails "
+        "with 504 (default: 0, no limit).",
+    )
+    arg_parser.add_argument(
+        "--sparql-anything-engines",
+        dest="sparql_anything_engines",
+        type=int,
+        default=1,
+        help="SPARQL Anything engines kept in the process-wide pool, started when the web server starts (default: 1).",
+    )
+    arg_parser.add_argument(
+        "--document-cache-dir",
+        dest="document_cache_dir",
+        default=None,
+        help="Directory for local copies of the remote documents read by SPARQL Anything queries "
+        "(default: none, documents are fetched by every query).",
+    )
+    arg_parser.add_argument(
+        "--document-cache-ttl",
+        dest="document_cache_ttl",
+        type=int,
+        default=3600,
+        help="Seconds a cached document is used before it is revalidated with its server (default: 3600).",
+    )
+    arg_parser.add_argument(
+        "--document-cache-mb",
+        dest="document_cache_mb",
+        type=int,
+        default=1024,
+        help="Megabytes of cached documents kept before the least recently used are deleted (default: 1024).",
+    )
     arg_parser.add_argument(
         "--auth-db",
         dest="auth_db",
@@ -192,6 +280,16 @@ def _parse_args() -> Namespace:  # pragma: no cover
         "preferred for secrets since CLI arguments are visible in the process list. The credential is sent "
         "only to its endpoint, never to any other.",
     )
+    arg_parser.add_argument(
+        "--endpoint-option",
+        dest="endpoint_options",
+        action="append",
+        metavar="'ENDPOINT KEY=VALUE ...'",
+        help="Per-endpoint backend options, as an endpoint URL (or a #sources name) followed by key=value "
+        "settings, e.g. 'https://host/sparql values_max_tuples=500 values_parallelism=4', or "
+        "'https://host/sparql dialect=qlever' for the options of a triple store. Repeatable. "
+        "Overrides the #endpoint_options declared in the spec files.",
+    )
 
     return arg_parser.parse_args()
 
@@ -337,6 +435,12 @@ def _build_app(  # pragma: no cover
     def home() -> str:
         return html_handler.get_index(css_path)
 
+    @app.route("/metrics")
+    def metrics() -> Response:
+        response = make_response(registry.render())
+        response.headers.set("Content-Type", PROMETHEUS_CONTENT_TYPE)
+        return response
+
     @app.route("/<path:api_url>", methods=["GET", "POST", "PUT", "DELETE"])
     def doc(api_url: str) -> Response | tuple[str, int] | str:
         if api_url.endswith(("openapi.yaml", "openapi.yml")):
@@ -354,6 +458,12 @@ def _build_app(  # pragma: no cover
     return app
 
 
+def _host_and_port(webserver: str) -> tuple[str, int]:  # pragma: no cover
+    host_name = webserver.rsplit(":", 1)[0] if ":" in webserver else "127.0.0.1"
+    port = webserver.rsplit(":", 1)[1] if ":" in webserver else "8080"
+    return host_name, int(port)
+
+
 def _run_webserver(  # pragma: no cover
     api_manager: APIManager,
     html_handler: HTMLDocumentationHandler,
@@ -363,12 +473,75 @@ def _run_webserver(  # pragma: no cover
 ) -> None:
     html_handler.logger_ramose()
 
-    host_name = args.webserver.rsplit(":", 1)[0] if ":" in args.webserver else "127.0.0.1"
-    port = args.webserver.rsplit(":", 1)[1] if ":" in args.webserver else "8080"
+    host_name, port = _host_and_port(args.webserver)
 
     token_store = TokenStore(args.auth_db)
+    if args.asgi:
+        _run_asgi_server(
+            build_asgi_app(api_manager, html_handler, openapi_handler, css_path, token_store, threads=args.threads),
+            host_name,
+            port,
+            debug=args.debug,
+        )
+        return
+    api_manager.warm_up()
     app = _build_app(api_manager, html_handler, openapi_handler, css_path, token_store)
-    app.run(host=str(host_name), debug=args.debug, port=int(port))
+    app.run(host=host_name, debug=args.debug, port=port)
+
+
+def _worker_serve(  # pragma: no cover
+    api_manager: APIManager,
+    html_handler: HTMLDocumentationHandler,
+    openapi_handler: OpenAPIDocumentationHandler,
+    css_path: str | None,
+    args: Namespace,
+) -> Callable[[socket.socket], None]:
+    token_store = TokenStore(args.auth_db)
+    # Each worker opens its own SQLite connections.
+    api_manager.close()
+    token_store.close()
+    if args.asgi:
+        asgi_app = build_asgi_app(
+            api_manager, html_handler, openapi_handler, css_path, token_store, threads=args.threads
+        )
+        return partial(serve_asgi, asgi_app, debug=args.debug)
+    app = _build_app(api_manager, html_handler, openapi_handler, css_path, token_store)
+
+    def serve(sock: socket.socket) -> None:
+        api_manager.warm_up()
+        serve_wsgi(app, sock, args.threads)
+
+    return serve
+
+
+def _run_prefork_server(args: Namespace) -> None:  # pragma: no cover
+    if args.debug:
+        message = "--debug cannot be used with --workers"
+        raise SystemExit(message)
+    if not hasattr(os, "fork"):
+        message = "--workers needs os.fork, which this platform does not provide"
+        raise SystemExit(message)
+    if args.asgi and importlib.util.find_spec("uvicorn") is None:
+        message = "uvicorn not installed. Install with: pip install ramose[asgi]"
+        raise SystemExit(message)
+    css_path = args.css or None
+    loaded = [_load_api(args)]
+    loaded[0][1].logger_ramose()
+
+    def load() -> Callable[[socket.socket], None]:
+        # The spec files loaded at startup serve the first workers; every SIGHUP loads them again.
+        return _worker_serve(*(loaded.pop() if loaded else _load_api(args)), css_path, args)
+
+    PreforkServer(listen_socket(*_host_and_port(args.webserver)), args.workers, load).run()
+
+
+def _run_asgi_server(app: ASGIApp, host: str, port: int, *, debug: bool) -> None:  # pragma: no cover
+    try:
+        import uvicorn  # noqa: PLC0415  # pyright: ignore[reportMissingImports]
+    except ImportError:
+        message = "uvicorn not installed. Install with: pip install ramose[asgi]"
+        raise SystemExit(message) from None
+    uvicorn.run(app, host=host, port=port, log_level="debug" if debug else "info")
 
 
 def _run_cli(  # pragma: no cover
@@ -410,6 +583,29 @@ def _handle_token_management(args: Namespace) -> None:  # pragma: no cover
             print(f"{label}\tcreated={created_at}\texpires={expires_at}\trevoked={bool(revoked)}")
 
 
+def _load_api(  # pragma: no cover
+    args: Namespace,
+) -> tuple[APIManager, HTMLDocumentationHandler, OpenAPIDocumentationHandler]:
+    cache_dir = None if args.no_cache else args.cache_dir
+    api_manager = APIManager(
+        args.spec,
+        cache_dir=cache_dir,
+        cache_ttl=args.cache_ttl,
+        count_cache_ttl=args.count_cache_ttl,
+        retry_attempts=args.retry_attempts,
+        retry_wait=args.retry_wait,
+        retry_backoff=args.retry_backoff,
+        endpoint_options=args.endpoint_options,
+        pipeline_workers=args.pipeline_workers,
+        timeout=args.timeout,
+        sparql_anything_engines=args.sparql_anything_engines,
+        document_cache_dir=args.document_cache_dir,
+        document_cache_ttl=args.document_cache_ttl,
+        document_cache_bytes=args.document_cache_mb * 1024 * 1024,
+    )
+    return api_manager, HTMLDocumentationHandler(api_manager), OpenAPIDocumentationHandler(api_manager)
+
+
 def main() -> None:  # pragma: no cover
     args = _parse_args()
 
@@ -423,17 +619,11 @@ def main() -> None:  # pragma: no cover
 
     _backend_auth.update(parse_backend_auth(args.backend_auth, os.environ.get("RAMOSE_BACKEND_AUTH")))
 
-    cache_dir = None if args.no_cache else args.cache_dir
-    api_manager = APIManager(
-        args.spec,
-        cache_dir=cache_dir,
-        cache_ttl=args.cache_ttl,
-        retry_attempts=args.retry_attempts,
-        retry_wait=args.retry_wait,
-        retry_backoff=args.retry_backoff,
-    )
-    html_handler = HTMLDocumentationHandler(api_manager)
-    openapi_handler = OpenAPIDocumentationHandler(api_manager)
+    if args.webserver and args.workers:
+        _run_prefork_server(args)
+        return
+
+    api_manager, html_handler, openapi_handler = _load_api(args)
     css_path = args.css or None
 
     if args.webserver:
@@ -11,7 +11,6 @@ from requests import Session as _RequestsSession
 
 FIELD_TYPE_RE = r"([^\(\s]+)\(([^\)]+)\)"
 PARAM_NAME = r"{([^{}\(\)]+)}"
-DEFAULT_HTTP_TIMEOUT = 60
 FORMAT_PARTS_WITH_MEDIA_TYPE = 3
 
 FORMAT_MEDIA_TYPES = {
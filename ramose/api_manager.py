@@ -18,17 +18,36 @@ from sys import maxsize, path
 from typing import TYPE_CHECKING, TypedDict
 from urllib.parse import urlsplit
 
-from ramose._constants import FORMAT_PARTS_WITH_MEDIA_TYPE, PARAM_NAME
+from ramose._constants import FORMAT_PARTS_WITH_MEDIA_TYPE, PARAM_NAME, _http_session
 from ramose.cache import ResultCache
+from ramose.documents import DocumentCache
+from ramose.endpoints import build_endpoint_options, mount_endpoint_pools, parse_endpoint_options
+from ramose.engine_pool import engine_pool
 from ramose.filters import load_filters_config
-from ramose.hash_format import parse_auth, parse_custom_params, parse_disable_params, read_spec_file
-from ramose.operation import Operation, OperationConfig
+from ramose.hash_format import (
+    parse_auth,
+    parse_custom_params,
+    parse_disable_params,
+    parse_pushdown,
+    read_spec_file,
+)
+from ramose.operation import (
+    Operation,
+    OperationConfig,
+    SparqlAnything,  # pyright: ignore[reportAttributeAccessIssue]
+)
+from ramose.planner import DEFAULT_BIND_JOIN_THRESHOLD, parse_optimizations
+from ramose.replicas import split_replicas
 
 if TYPE_CHECKING:
     import types
+    from collections.abc import Mapping
 
+    from ramose.endpoints import EndpointOptions
     from ramose.filters import FiltersConfig
 
+_SPARQL_ANYTHING_ENGINE = "engine=sparql-anything"
+
 
 class APIConfig(TypedDict):
     conf: OrderedDict[str, list[dict[str, str]]]
@@ -38,6 +57,8 @@ class APIConfig(TypedDict):
     update_endpoint: str
     website: str
     sources_map: dict[str, str]
+    replicas: dict[str, tuple[str, ...]]
+    endpoint_options: dict[str, EndpointOptions]
     disable_params: set[str]
     auth_required: bool
     addon: types.ModuleType | None
@@ -65,11 +86,44 @@ class APIManager:
             return import_module(addon_path.name)
         return import_module(addon_name)
 
+    @staticmethod
+    def _resolve_endpoint_options(
+        item: dict[str, str],
+        tp: str,
+        sources_map: dict[str, str],
+        cli_endpoint_options: dict[str, dict[str, str]],
+        replicas: dict[str, tuple[str, ...]],
+    ) -> dict[str, EndpointOptions]:
+        spec_options = parse_endpoint_options([item["endpoint_options"]]) if "endpoint_options" in item else {}
+        merged: dict[str, dict[str, str]] = {}
+        for key, values in (*spec_options.items(), *cli_endpoint_options.items()):
+            if key in sources_map:
+                url = sources_map[key]
+            elif key == item.get("endpoint"):
+                url = tp
+            else:
+                url = key
+            merged.setdefault(url, {}).update(values)
+        options = {url: build_endpoint_options(values) for url, values in merged.items()}
+        # Replicas share the options of their endpoint, unless they are given their own.
+        resolved = {replica: value for url, value in options.items() for replica in replicas.get(url, ())}
+        resolved.update(options)
+        return resolved
+
+    @staticmethod
+    def _primary_endpoint(value: str, replicas: dict[str, tuple[str, ...]]) -> str:
+        """The first URL of an endpoint declared as 'url1|url2|...', recording the others as its replicas."""
+        urls = split_replicas(value or "")
+        if len(urls) > 1:
+            replicas[urls[0]] = urls
+        return urls[0] if urls else ""
+
     @staticmethod
     def _process_api_metadata(
         conf_json: list[dict[str, str]],
         conf_file: str,
         endpoint_override: str | None,
+        cli_endpoint_options: dict[str, dict[str, str]] | None = None,
     ) -> APIConfig:
         item = conf_json[0]
         base_url = item["url"]
@@ -78,8 +132,9 @@ class APIManager:
         if not website_parsed.scheme or not website_parsed.netloc:
             msg = "API #base must be an absolute URL"
             raise ValueError(msg)
-        tp = endpoint_override or item["endpoint"]
-        update_endpoint = endpoint_override or ""
+        replicas: dict[str, tuple[str, ...]] = {}
+        tp = APIManager._primary_endpoint(endpoint_override or item["endpoint"], replicas)
+        update_endpoint = tp if endpoint_override else ""
         if not endpoint_override and "update_endpoint" in item:
             update_endpoint = item["update_endpoint"]
         sources_map: dict[str, str] = {}
@@ -89,7 +144,10 @@ class APIManager:
                 if not pair:
                     continue
                 name, url = pair.split("=", 1)
-                sources_map[name.strip()] = url.strip()
+                sources_map[name.strip()] = APIManager._primary_endpoint(url, replicas)
+        endpoint_options = APIManager._resolve_endpoint_options(
+            item, tp, sources_map, cli_endpoint_options or {}, replicas
+        )
         disable_params_api = parse_disable_params(item["disable_params"]) if "disable_params" in item else set()
         auth_required = parse_auth(item["auth"]) if "auth" in item else False
         addon = APIManager._load_addon(item["addon"], conf_file) if "addon" in item else None
@@ -103,10 +161,12 @@ class APIManager:
             "conf": conf,
             "conf_json": conf_json,
             "base_url": base_url,
-            "tp": tp or "",
+            "tp": tp,
             "update_endpoint": update_endpoint,
             "website": website,
             "sources_map": sources_map,
+            "replicas": replicas,
+            "endpoint_options": endpoint_options,
             "disable_params": disable_params_api,
             "auth_required": auth_required,
             "addon": addon,
@@ -114,7 +174,7 @@ class APIManager:
             "conf_file": conf_file,
         }
 
-    def __init__(  # noqa: PLR0913
+    def __init__(  # noqa: PLR0913, PLR0917
         self,
         conf_files: list[str],
         endpoint_override: str | None = None,
@@ -123,6 +183,15 @@ class APIManager:
         retry_attempts: int = 3,
         retry_wait: float = 0.5,
         retry_backoff: float = 2.0,
+        *,
+        endpoint_options: list[str] | None = None,
+        pipeline_workers: int = 1,
+        timeout: float = 0,
+        sparql_anything_engines: int = 1,
+        document_cache_dir: str | None = None,
+        document_cache_ttl: int = 3600,
+        document_cache_bytes: int = 1 << 30,
+        count_cache_ttl: int = 3600,
     ) -> None:
         """This is the constructor of the APIManager class. It takes in input a list of API configuration files, each
         defined according to the Hash Format or YAML mirror format, and stores all the operations defined within a
@@ -146,15 +215,45 @@ class APIManager:
 
         In addition, it also defines additional structure, such as the functions to be used for interpreting the
         values returned by a SPARQL query, some operations that can be used for filtering the results, and the
-        HTTP methods to call for making the request to the SPARQL endpoint specified in the configuration file."""
+        HTTP methods to call for making the request to the SPARQL endpoint specified in the configuration file.
+
+        The options that follow retry_backoff are keyword-only.
+
+        The optional endpoint_options entries ('<endpoint> key=value ...') tune how RAMOSE talks to each SPARQL
+        endpoint. They take precedence over the #endpoint_options declared in the configuration files.
+
+        With pipeline_workers greater than 1, multi-source operations fetch the queries that do not read the
+        accumulator concurrently, on up to that many threads.
+
+        A timeout greater than 0 is the default time budget, in seconds, of each operation call: all its backend
+        requests, retries and steps must complete within it, or the call fails with HTTP 504. Operations can
+        override it with #timeout.
+
+        sparql_anything_engines is the size of the process-wide pool of SPARQL Anything engines: up to that many
+        engine=sparql-anything queries run at the same time. warm_up starts them before the first request.
+
+        With document_cache_dir, the remote documents read by SPARQL Anything queries are kept in that directory
+        and shared by all requests: copies older than document_cache_ttl seconds are revalidated, and the least
+        recently used are deleted when they exceed document_cache_bytes.
+
+        count_cache_ttl is how long, in seconds, the cache keeps the row counts of #pushdown operations, which
+        give the total_items of their pages. Operations can override it with #count_cache_duration."""
         APIManager.__max_size_csv()
 
         self._cache = ResultCache(cache_dir) if cache_dir else None
         self._cache_ttl = cache_ttl
+        self._count_cache_ttl = count_cache_ttl
         self._config_cache: dict[str, FiltersConfig] = {}
         self._retry_attempts = retry_attempts
         self._retry_wait = retry_wait
         self._retry_backoff = retry_backoff
+        self._pipeline_workers = pipeline_workers
+        self._timeout = timeout
+        self._sparql_anything_engines = sparql_anything_engines
+        self._document_cache = (
+            DocumentCache(document_cache_dir, document_cache_ttl, document_cache_bytes) if document_cache_dir else None
+        )
+        cli_endpoint_options = parse_endpoint_options(endpoint_options or [])
 
         self.all_conf: OrderedDict[str, APIConfig] = OrderedDict()
         self.base_url: list[str] = []
@@ -162,12 +261,34 @@ class APIManager:
             conf_json = read_spec_file(conf_file)
             if not conf_json:
                 continue
-            api_conf = APIManager._process_api_metadata(conf_json, conf_file, endpoint_override)
+            api_conf = APIManager._process_api_metadata(conf_json, conf_file, endpoint_override, cli_endpoint_options)
             self.base_url.append(api_conf["base_url"])
             self.all_conf[api_conf["base_url"]] = api_conf
+            mount_endpoint_pools(_http_session, api_conf["endpoint_options"])
 
         self._operation_prefixes = APIManager._build_operation_prefixes(self.all_conf)
 
+    def uses_sparql_anything(self) -> bool:
+        return any(
+            _SPARQL_ANYTHING_ENGINE in item.get("sparql", "")
+            for api_data in self.all_conf.values()
+            for items in api_data["conf"].values()
+            for item in items
+        )
+
+    def warm_up(self) -> None:
+        """Start the SPARQL Anything engines of the pool, when an operation uses them, so that the first
+        requests do not pay for the JVM bridge."""
+        if SparqlAnything is None or not self.uses_sparql_anything():
+            return
+        engine_pool(SparqlAnything, self._sparql_anything_engines).warm_up()
+
+    def close(self) -> None:
+        """Close the result cache connection of this process, as the pre-fork server does before forking its
+        workers. The cache reopens it when it is next used."""
+        if self._cache is not None:
+            self._cache.close()
+
     @staticmethod
     def _build_operation_prefixes(
         all_conf: OrderedDict[str, APIConfig],
@@ -288,16 +409,32 @@ class APIManager:
                 format_map=op_format_map,
                 format_media_types=op_format_media_types,
                 sources_map=conf["sources_map"],
+                replicas=conf["replicas"],
+                endpoint_options=conf["endpoint_options"],
                 custom_params=custom_params_map,
                 disabled_params=effective_disabled,
                 requires_auth=requires_auth,
                 cache=self._cache,
+                document_cache=self._document_cache,
                 default_cache_ttl=self._cache_ttl,
                 custom_param_configs=self._resolve_custom_param_configs(conf, custom_params_map),
                 public_base_url=conf["website"],
                 retry_attempts=retry_attempts,
                 retry_wait=retry_wait,
                 retry_backoff=retry_backoff,
+                pipeline_workers=(
+                    int(op_conf["pipeline_workers"]) if "pipeline_workers" in op_conf else self._pipeline_workers
+                ),
+                optimizations=parse_optimizations(op_conf.get("optimize", "")),
+                bind_join_threshold=(
+                    int(op_conf["bind_join_threshold"])
+                    if "bind_join_threshold" in op_conf
+                    else DEFAULT_BIND_JOIN_THRESHOLD
+                ),
+                timeout=float(op_conf["timeout"]) if "timeout" in op_conf else self._timeout,
+                sparql_anything_engines=self._sparql_anything_engines,
+                pushdown=parse_pushdown(op_conf["pushdown"]) if "pushdown" in op_conf else False,
+                count_cache_ttl=self._count_cache_ttl,
             )
             return Operation(op_complete_url, op, op_conf, config)
 
@@ -322,3 +459,21 @@ class APIManager:
                 return 400, msg, "text/plain"
 
         return 404, "HTTP status code 404: the operation requested does not exist", "text/plain"
+
+    async def aget_op(self, op_complete_url: str, method: str = "get") -> Operation | tuple[int, str, str]:
+        """get_op for asyncio callers. Matching the URL to an operation does no I/O, so it runs on the loop."""
+        return self.get_op(op_complete_url, method)
+
+    async def aexec(
+        self,
+        op_complete_url: str,
+        method: str = "get",
+        content_type: str = "application/json",
+        body_params: Mapping[str, object] | None = None,
+    ) -> tuple[int, str, str, dict[str, str]]:
+        """Run the operation called by op_complete_url with Operation.aexec, on a thread of the event loop's
+        default executor, or return the error of get_op when no operation matches it."""
+        operation = await self.aget_op(op_complete_url, method)
+        if not isinstance(operation, Operation):
+            return (*operation, {})
+        return await operation.aexec(method, content_type, body_params)
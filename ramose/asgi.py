@@ -0,0 +1,286 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+from __future__ import annotations
+
+import asyncio
+import importlib.resources
+import json
+import mimetypes
+from concurrent.futures import ThreadPoolExecutor
+from csv import writer
+from http import HTTPStatus
+from io import BytesIO, StringIO
+from typing import TYPE_CHECKING, NamedTuple, cast
+from urllib.parse import unquote
+
+from jinja2 import Template
+from werkzeug.wrappers import Request
+
+from ramose.metrics import PROMETHEUS_CONTENT_TYPE, registry
+from ramose.openapi_documentation import SWAGGER_MARKDOWN_CSS_FIX
+from ramose.operation import Operation
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable, MutableMapping
+
+    from ramose.api_manager import APIManager
+    from ramose.auth import TokenStore
+    from ramose.html_documentation import HTMLDocumentationHandler
+    from ramose.openapi_documentation import OpenAPIDocumentationHandler
+
+    Message = MutableMapping[str, object]
+    Receive = Callable[[], Awaitable[Message]]
+    Send = Callable[[Message], Awaitable[None]]
+    ASGIApp = Callable[[Message, Receive, Send], Awaitable[None]]
+
+SWAGGER_URL = "/docs"
+_SWAGGER_UI = importlib.resources.files("flask_swagger_ui")
+_API_METHODS = frozenset({"GET", "HEAD", "POST", "PUT", "DELETE"})
+_HTML = "text/html; charset=utf-8"
+_CORS = {"Access-Control-Allow-Origin": "*", "Access-Control-Allow-Credentials": "true"}
+
+
+class _Response(NamedTuple):
+    status: int
+    body: str | bytes
+    headers: dict[str, str]
+
+
+def _html(page: str, status: int = HTTPStatus.OK) -> _Response:
+    return _Response(status, page, {"Content-Type": _HTML})
+
+
+def _wsgi_environ(scope: Message, body: bytes) -> dict[str, object]:
+    # The WSGI environ of the request, so that werkzeug parses its arguments, form, JSON body and Accept header
+    # as it does for the Flask server.
+    server = cast("tuple[str, int] | None", scope.get("server")) or ("localhost", 80)
+    environ: dict[str, object] = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": cast("str", scope.get("root_path", "")).encode().decode("latin-1"),
+        "PATH_INFO": cast("str", scope["path"]).encode().decode("latin-1"),
+        "QUERY_STRING": cast("bytes", scope["query_string"]).decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": BytesIO(body),
+    }
+    for raw_name, raw_value in cast("list[tuple[bytes, bytes]]", scope["headers"]):
+        name = raw_name.decode("latin-1").upper().replace("-", "_")
+        value = raw_value.decode("latin-1")
+        if name == "CONTENT_LENGTH":
+            continue
+        key = name if name == "CONTENT_TYPE" else f"HTTP_{name}"
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+async def _read_body(receive: Receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            break
+        chunks.append(cast("bytes", message.get("body", b"")))
+        if not message.get("more_body"):
+            break
+    return b"".join(chunks)
+
+
+async def _send_response(send: Send, response: _Response, *, head: bool = False) -> None:
+    body = response.body.encode() if isinstance(response.body, str) else response.body
+    headers = [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in response.headers.items()]
+    headers.append((b"content-length", str(len(body)).encode()))
+    await send({"type": "http.response.start", "status": response.status, "headers": headers})
+    await send({"type": "http.response.body", "body": b"" if head else body})
+
+
+async def _lifespan(receive: Receive, send: Send, api_manager: APIManager, threads: int) -> None:
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            # The default executor of asyncio has min(32, CPUs + 4) threads: too few for operations that mostly
+            # wait for their endpoints.
+            executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="ramose")
+            asyncio.get_running_loop().set_default_executor(executor)
+            await asyncio.to_thread(api_manager.warm_up)
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+def _error_response(status_code: int, error_message: str, content_type: str) -> _Response:
+    if content_type == "text/csv":
+        csv_buffer = StringIO()
+        writer(csv_buffer).writerows([["error", "message"], [str(status_code), str(error_message)]])
+        headers = {"Content-Type": content_type, "Content-Disposition": "attachment; filename=error.csv"}
+        return _Response(status_code, csv_buffer.getvalue(), headers)
+    return _Response(
+        status_code, json.dumps({"error": status_code, "message": error_message}), {"Content-Type": content_type}
+    )
+
+
+def _is_authorized(request: Request, token_store: TokenStore) -> bool:
+    header = request.headers.get("Authorization")
+    if not header or not header.startswith("Bearer "):
+        return False
+    return token_store.validate(header[len("Bearer ") :])
+
+
+def _read_body_params(request: Request, method: str) -> dict[str, str] | None:
+    if method not in ("post", "put", "delete"):
+        return None
+    params = request.args.to_dict()
+    if request.is_json:
+        payload = request.get_json(silent=True)
+        if isinstance(payload, dict):
+            params.update(payload)
+    else:
+        params.update(request.form.to_dict())
+    return params
+
+
+async def _api_call(request: Request, api_url: str, api_manager: APIManager, token_store: TokenStore) -> _Response:
+    method = "get" if request.method == "HEAD" else request.method.lower()
+    query = unquote(request.query_string.decode("utf8"))
+    full_call = "/" + api_url + ("?" + query if query else "")
+    operation = await api_manager.aget_op(full_call, method)
+    content_type = "application/json"
+    if isinstance(operation, Operation):
+        if operation.requires_auth and not await asyncio.to_thread(_is_authorized, request, token_store):
+            return _error_response(401, "HTTP status code 401: missing or invalid bearer token", content_type)
+        body_params = _read_body_params(request, method)
+        fmt = request.args.get("format")
+        if fmt is not None:
+            if "csv" in fmt:
+                content_type = "text/csv"
+        else:
+            candidates = operation.media_type_to_format()
+            best = request.accept_mimetypes.best_match(list(candidates))
+            if best is not None:
+                content_type = "text/csv" if best == "text/csv" else "application/json"
+                negotiated = await api_manager.aget_op(
+                    full_call + ("&" if query else "?") + "format=" + candidates[best], method
+                )
+                if isinstance(negotiated, Operation):
+                    operation = negotiated
+        status_code, body, response_content_type, headers = await operation.aexec(method, content_type, body_params)
+    else:
+        status_code, body, response_content_type = operation
+        headers = {}
+
+    if status_code == HTTPStatus.OK:
+        response = _Response(status_code, body, {"Content-Type": response_content_type, **headers})
+    else:
+        response = _error_response(status_code, body, content_type)
+    response.headers.update(_CORS)
+    return response
+
+
+def _swagger_ui(request: Request, path: str, spec_urls: list[dict[str, str]]) -> _Response:
+    # The pages of the flask_swagger_ui blueprint that the Flask server mounts at SWAGGER_URL.
+    if path == "index.css":
+        base_css = _SWAGGER_UI.joinpath("dist/index.css").read_text(encoding="utf-8")
+        return _Response(HTTPStatus.OK, base_css + SWAGGER_MARKDOWN_CSS_FIX, {"Content-Type": "text/css"})
+    if path in ("", "index.html"):
+        config = {
+            "dom_id": "#swagger-ui",
+            "url": "",
+            "layout": "StandaloneLayout",
+            "deepLinking": True,
+            "urls": spec_urls,
+            "oauth2RedirectUrl": request.host_url + SWAGGER_URL.lstrip("/") + "/oauth2-redirect.html",
+        }
+        template = Template(_SWAGGER_UI.joinpath("templates/index.template.html").read_text(encoding="utf-8"))
+        page = template.render(base_url=SWAGGER_URL, app_name="Swagger UI", config_json=json.dumps(config))
+        return _html(page)
+    asset = _SWAGGER_UI.joinpath("dist", path)
+    if "/" in path or path.startswith(".") or not asset.is_file():
+        return _html("Not Found", HTTPStatus.NOT_FOUND)
+    content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    return _Response(HTTPStatus.OK, asset.read_bytes(), {"Content-Type": content_type})
+
+
+class _Application:
+    def __init__(  # noqa: PLR0913
+        self,
+        api_manager: APIManager,
+        html_handler: HTMLDocumentationHandler,
+        openapi_handler: OpenAPIDocumentationHandler,
+        css_path: str | None,
+        token_store: TokenStore,
+        *,
+        threads: int,
+    ) -> None:
+        self.threads = threads
+        self.api_manager = api_manager
+        self.html_handler = html_handler
+        self.openapi_handler = openapi_handler
+        self.css_path = css_path
+        self.token_store = token_store
+        self.spec_urls = [{"name": base.lstrip("/"), "url": f"{base}/openapi.yaml"} for base in api_manager.all_conf]
+
+    async def __call__(self, scope: Message, receive: Receive, send: Send) -> None:
+        if scope["type"] == "lifespan":
+            await _lifespan(receive, send, self.api_manager, self.threads)
+            return
+        if scope["type"] != "http":
+            return
+        request = Request(_wsgi_environ(scope, await _read_body(receive)))
+        response = self._server_page(request) or await self._api_page(request)
+        await _send_response(send, response, head=request.method == "HEAD")
+
+    def _server_page(self, request: Request) -> _Response | None:
+        path = request.path
+        if path == "/":
+            return _html(self.html_handler.get_index(self.css_path))
+        if path == "/metrics":
+            return _Response(HTTPStatus.OK, registry.render(), {"Content-Type": PROMETHEUS_CONTENT_TYPE})
+        if path == SWAGGER_URL:
+            return _Response(HTTPStatus.PERMANENT_REDIRECT, "", {"Location": SWAGGER_URL + "/"})
+        if path.startswith(SWAGGER_URL + "/"):
+            return _swagger_ui(request, path[len(SWAGGER_URL) + 1 :], self.spec_urls)
+        if request.method not in _API_METHODS:
+            return _html("Method Not Allowed", HTTPStatus.METHOD_NOT_ALLOWED)
+        return None
+
+    async def _api_page(self, request: Request) -> _Response:
+        path = request.path
+        api_url = path[1:]
+        all_conf = self.api_manager.all_conf
+        if api_url.endswith(("openapi.yaml", "openapi.yml")):
+            base = api_url.rsplit("/", 1)[0]
+            if "/" + base not in all_conf:
+                return _html(self.html_handler.get_index(self.css_path), HTTPStatus.NOT_FOUND)
+            status, yaml_content = self.openapi_handler.get_documentation(base_url=base)
+            return _Response(status, yaml_content, {"Content-Type": "application/yaml", **_CORS})
+
+        if not any(api_base in path for api_base in all_conf):
+            return _html(self.html_handler.get_index(self.css_path), HTTPStatus.NOT_FOUND)
+
+        if any(api_base == path for api_base in all_conf):
+            status, page = self.html_handler.get_documentation(self.css_path, api_url)
+            return _html(page, status)
+
+        return await _api_call(request, api_url, self.api_manager, self.token_store)
+
+
+def build_asgi_app(  # noqa: PLR0913
+    api_manager: APIManager,
+    html_handler: HTMLDocumentationHandler,
+    openapi_handler: OpenAPIDocumentationHandler,
+    css_path: str | None,
+    token_store: TokenStore,
+    *,
+    threads: int = 64,
+) -> ASGIApp:
+    """The ASGI application serving the routes of the Flask server: the dashboard, the documentation of each
+    API, its openapi.yaml, Swagger UI at /docs, /metrics and the API calls. The operations run through
+    APIManager.aexec, on the threads of the event loop's default executor, so that the loop is never blocked
+    by the endpoints. When the server starts, the loop gets an executor of threads threads and the SPARQL
+    Anything engines are started."""
+    return _Application(api_manager, html_handler, openapi_handler, css_path, token_store, threads=threads)
@@ -5,6 +5,7 @@
 from __future__ import annotations
 
 import hashlib
+import os
 import secrets
 import sqlite3
 import time
@@ -15,7 +16,9 @@ class TokenStore:
     def __init__(self, directory: str) -> None:
         db_dir = Path(directory)
         db_dir.mkdir(parents=True, exist_ok=True)
-        self._conn = sqlite3.connect(str(db_dir / "auth.db"), check_same_thread=False)
+        self._path = db_dir / "auth.db"
+        self._pid = 0
+        self._connection: sqlite3.Connection | None = None
         self._conn.execute(
             "CREATE TABLE IF NOT EXISTS tokens "
             "(token_hash TEXT PRIMARY KEY, label TEXT, created_at REAL NOT NULL, "
@@ -23,6 +26,21 @@ class TokenStore:
         )
         self._conn.commit()
 
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        # An SQLite connection must not be used across fork(): every process, such as the workers of the
+        # pre-fork server, opens its own.
+        if self._connection is None or self._pid != os.getpid():
+            self._connection = sqlite3.connect(str(self._path), check_same_thread=False)
+            self._pid = os.getpid()
+        return self._connection
+
+    def close(self) -> None:
+        """Close the connection of this process; the next call opens a new one."""
+        if self._connection is not None and self._pid == os.getpid():
+            self._connection.close()
+        self._connection = None
+
     @staticmethod
     def _hash(token: str) -> str:
         return hashlib.sha256(token.encode("utf-8")).hexdigest()
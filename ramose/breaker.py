@@ -0,0 +1,143 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+from __future__ import annotations
+
+import time
+from threading import Lock, get_ident
+from typing import TYPE_CHECKING
+
+from ramose.metrics import Sample, registry
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from ramose.endpoints import EndpointOptions
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+_STATE_VALUES = {CLOSED: 0, OPEN: 1, HALF_OPEN: 2}
+
+
+class CircuitBreaker:
+    """Failure detector for one backend endpoint.
+
+    The breaker starts closed and counts consecutive failed attempts. When the count reaches failure_threshold it
+    opens, and every call is refused without touching the network. After reset_timeout seconds it turns
+    half-open and lets a single probe through: a success closes it again, a failure opens it for another
+    reset_timeout. A probe that ends without reaching the endpoint is released with record_abandoned, so that
+    the next call probes instead."""
+
+    def __init__(
+        self,
+        failure_threshold: int,
+        reset_timeout: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._probe_thread = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._refresh()
+            return self._state
+
+    def _refresh(self) -> None:
+        if self._state == OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+            self._probe_in_flight = False
+
+    def retry_after(self) -> float:
+        """Seconds until an open breaker lets the next probe through."""
+        with self._lock:
+            if self._state != OPEN:
+                return 0.0
+            return max(0.0, self.reset_timeout - (self._clock() - self._opened_at))
+
+    def allow(self) -> bool:
+        with self._lock:
+            self._refresh()
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                self._probe_thread = get_ident()
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == OPEN:
+                return
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = OPEN
+                self._opened_at = self._clock()
+                self._probe_in_flight = False
+
+    def record_abandoned(self) -> None:
+        """Release the probe this thread was let through, if its outcome was never recorded: it was refused
+        before reaching the endpoint, or cut short by the request deadline. Otherwise a no-op."""
+        with self._lock:
+            if self._state == HALF_OPEN and self._probe_in_flight and self._probe_thread == get_ident():
+                self._probe_in_flight = False
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+_breakers_lock = Lock()
+
+
+def circuit_breaker(endpoint_url: str, options: EndpointOptions) -> CircuitBreaker | None:
+    """The breaker shared by every operation that queries endpoint_url, or None when the endpoint has no
+    breaker_failures set. A breaker whose settings changed is replaced by a fresh, closed one."""
+    if not options.breaker_failures:
+        return None
+    with _breakers_lock:
+        breaker = _breakers.get(endpoint_url)
+        if breaker is None or (breaker.failure_threshold, breaker.reset_timeout) != (
+            options.breaker_failures,
+            options.breaker_reset,
+        ):
+            breaker = CircuitBreaker(options.breaker_failures, options.breaker_reset)
+            _breakers[endpoint_url] = breaker
+        return breaker
+
+
+def reset_circuit_breakers() -> None:
+    with _breakers_lock:
+        _breakers.clear()
+
+
+def circuit_breaker_samples() -> list[Sample]:
+    with _breakers_lock:
+        breakers = list(_breakers.items())
+    return [
+        Sample("ramose_circuit_breaker_state", {"endpoint": endpoint_url}, _STATE_VALUES[breaker.state])
+        for endpoint_url, breaker in breakers
+    ]
+
+
+registry.describe(
+    "ramose_circuit_breaker_state", "gauge", "Circuit breaker state per endpoint (0 closed, 1 open, 2 half-open)."
+)
+registry.describe(
+    "ramose_circuit_breaker_rejections_total", "counter", "Backend requests refused because the circuit was open."
+)
+registry.describe("ramose_stale_responses_total", "counter", "Responses served from an expired cache entry.")
+registry.add_collector(circuit_breaker_samples)
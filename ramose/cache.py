@@ -5,6 +5,7 @@
 from __future__ import annotations
 
 import json
+import os
 import sqlite3
 import time
 from pathlib import Path
@@ -14,12 +15,29 @@ class ResultCache:
     def __init__(self, directory: str) -> None:
         db_dir = Path(directory)
         db_dir.mkdir(parents=True, exist_ok=True)
-        self._conn = sqlite3.connect(str(db_dir / "cache.db"), check_same_thread=False)
+        self._path = db_dir / "cache.db"
+        self._pid = 0
+        self._connection: sqlite3.Connection | None = None
         self._conn.execute(
             "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)",
         )
         self._conn.commit()
 
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        # An SQLite connection must not be used across fork(): every process, such as the workers of the
+        # pre-fork server, opens its own.
+        if self._connection is None or self._pid != os.getpid():
+            self._connection = sqlite3.connect(str(self._path), check_same_thread=False)
+            self._pid = os.getpid()
+        return self._connection
+
+    def close(self) -> None:
+        """Close the connection of this process; the next call opens a new one."""
+        if self._connection is not None and self._pid == os.getpid():
+            self._connection.close()
+        self._connection = None
+
     def get(self, key: str) -> object:
         row = self._conn.execute(
             "SELECT value FROM cache WHERE key = ? AND expires_at > ?",
@@ -27,6 +45,11 @@ class ResultCache:
         ).fetchone()
         return json.loads(row[0]) if row else None
 
+    def get_stale(self, key: str) -> object:
+        """Return the entry for key even when it has expired, for use when the backend cannot be reached."""
+        row = self._conn.execute("SELECT value FROM cache WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
     def set(self, key: str, value: object, expire: int) -> None:
         self._conn.execute(
             "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
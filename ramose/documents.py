@@ -0,0 +1,281 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import shutil
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from http import HTTPStatus
+from pathlib import Path
+from re import compile as re_compile
+from tempfile import NamedTemporaryFile
+from threading import Lock
+from typing import TYPE_CHECKING
+from urllib.parse import urlsplit
+
+from requests.exceptions import RequestException
+
+from ramose._constants import _http_session, backend_auth_header
+from ramose.metrics import registry
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+    from re import Match
+
+    from requests import Response
+
+logger = logging.getLogger(__name__)
+
+# A remote location in the IRI of a SPARQL Anything SERVICE clause, either as its location option,
+# <x-sparql-anything:location=https://...,csv.headers=true>, or as the whole IRI, <x-sparql-anything:https://...>.
+# Commas inside an option value are escaped with a backslash.
+_LOCATION = re_compile(r"(<x-sparql-anything:(?:[^>]*?[:,])?(?:location=)?)(https?://(?:\\,|[^,>\s])+)")
+_SUFFIX = re_compile(r"\.[A-Za-z0-9]{1,8}")
+_CHUNK_SIZE = 64 * 1024
+
+
+@dataclass
+class _Entry:
+    url: str
+    file: str
+    size: int
+    fetched_at: float
+    used_at: float
+    etag: str = ""
+    last_modified: str = ""
+
+
+class DocumentCache:
+    """On-disk copies of the remote documents read by SPARQL Anything queries, shared by every request.
+
+    localize rewrites the remote locations of a query to their local copies. A copy younger than ttl seconds is
+    used as it is; an older one is revalidated with If-None-Match or If-Modified-Since and downloaded again only
+    when it changed. When the copies exceed max_bytes, the least recently used are deleted, except those pinned
+    by a query that localized finished rewriting but that has not yet run. A location that
+    cannot be fetched keeps its stale copy if there is one, and otherwise is left for SPARQL Anything to fetch,
+    so that its errors are reported as before.
+
+    The index, pins and byte count live in memory, so a process forked after the cache was built, such as a
+    pre-fork worker, keeps its copies in a directory of its own, worker-<pid>, with a max_bytes budget of its
+    own. The first time a worker uses the cache, it deletes the directories of workers that are no longer
+    running."""
+
+    def __init__(
+        self,
+        directory: str,
+        ttl: float = 3600,
+        max_bytes: int = 1 << 30,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self._root = Path(directory)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._lock = Lock()
+        self._pid = os.getpid()
+        self._open(self._root)
+        self._report_size()
+
+    def _open(self, directory: Path) -> None:
+        self.directory = directory
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._fetching: dict[str, Lock] = {}
+        self._entries: dict[str, _Entry] = {}
+        self._pins: Counter[str] = Counter()
+        for metadata in self.directory.glob("*.json"):
+            try:
+                entry = _Entry(**json.loads(metadata.read_text(encoding="utf-8")))
+            except (OSError, TypeError, ValueError):
+                continue
+            if (self.directory / entry.file).exists():
+                self._entries[entry.url] = entry
+
+    def _own_directory(self) -> None:
+        # A forked process would share the files of its parent and siblings without seeing their pins and sizes.
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            for directory in self._root.glob("worker-*"):
+                pid = directory.name.removeprefix("worker-")
+                if pid.isdigit() and int(pid) != self._pid and not _running(int(pid)):
+                    shutil.rmtree(directory, ignore_errors=True)
+            self._open(self._root / f"worker-{self._pid}")
+        self._report_size()
+
+    @property
+    def size(self) -> int:
+        self._own_directory()
+        with self._lock:
+            return sum(entry.size for entry in self._entries.values())
+
+    def localize(self, query_text: str, timeout: tuple[float, float]) -> str:
+        """The query with each remote SPARQL Anything location replaced by the path of its local copy. The copies
+        may be evicted as soon as this returns: to run the query, use localized."""
+        with self.localized(query_text, timeout) as localized:
+            return localized
+
+    @contextmanager
+    def localized(self, query_text: str, timeout: tuple[float, float]) -> Iterator[str]:
+        """localize, with the copies the query points at kept on disk until the block exits."""
+        pinned: list[str] = []
+
+        def local(match: Match[str]) -> str:
+            url = match.group(2).replace("\\,", ",")
+            pinned.append(url)
+            path = self._pinned_path(url, timeout)
+            return match.group(0) if path is None else match.group(1) + str(path)
+
+        try:
+            yield _LOCATION.sub(local, query_text)
+        finally:
+            self._unpin(pinned)
+
+    def path(self, url: str, timeout: tuple[float, float]) -> Path | None:
+        """The local copy of url, fetched or revalidated as needed, or None when there is none to use."""
+        try:
+            return self._pinned_path(url, timeout)
+        finally:
+            self._unpin([url])
+
+    def _pinned_path(self, url: str, timeout: tuple[float, float]) -> Path | None:
+        # The pin is taken before the entry is looked up, so that no other request evicts it in between; the
+        # caller releases it with _unpin.
+        self._own_directory()
+        with self._lock:
+            self._pins[url] += 1
+            fetching = self._fetching.setdefault(url, Lock())
+        # One request per document at a time: the others wait for its copy instead of downloading it too.
+        with fetching:
+            with self._lock:
+                entry = self._entries.get(url)
+            now = self._clock()
+            if entry is not None and now - entry.fetched_at < self.ttl:
+                result = "hit"
+            else:
+                entry, result = self._fetch(url, entry, timeout)
+            registry.inc("ramose_document_cache_requests_total", result=result)
+            if entry is None:
+                return None
+            entry.used_at = now
+            self._evict()
+            return self.directory / entry.file
+
+    def _unpin(self, urls: list[str]) -> None:
+        with self._lock:
+            self._pins.subtract(urls)
+            for url in urls:
+                if self._pins[url] <= 0:
+                    del self._pins[url]
+
+    def _fetch(self, url: str, entry: _Entry | None, timeout: tuple[float, float]) -> tuple[_Entry | None, str]:
+        headers = backend_auth_header(url)
+        if entry is not None and entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry is not None and entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        try:
+            response = _http_session.get(url, headers=headers, timeout=timeout, stream=True)
+        except RequestException as exc:
+            logger.warning("Could not fetch %s for the document cache: %s", url, exc)
+            return entry, "stale" if entry is not None else "bypass"
+        try:
+            if response.status_code == HTTPStatus.NOT_MODIFIED and entry is not None:
+                entry.fetched_at = self._clock()
+                self._save(entry)
+                return entry, "revalidated"
+            if response.status_code != HTTPStatus.OK:
+                return entry, "stale" if entry is not None else "bypass"
+            return self._store(url, entry, response), "miss"
+        finally:
+            response.close()
+
+    def _store(self, url: str, old: _Entry | None, response: Response) -> _Entry | None:
+        key = hashlib.sha256(url.encode()).hexdigest()
+        content_type = response.headers.get("Content-Type", "").split(";")[0].strip()
+        suffix = _SUFFIX.fullmatch(Path(urlsplit(url).path).suffix)
+        extension = suffix.group(0) if suffix else mimetypes.guess_extension(content_type) or ""
+        size = 0
+        # A name of its own, so that a download never writes into another one's file.
+        with NamedTemporaryFile(dir=self.directory, prefix=f"{key}.", suffix=".part", delete=False) as handle:
+            partial = Path(handle.name)
+            for chunk in response.iter_content(chunk_size=_CHUNK_SIZE):
+                size += len(chunk)
+                if size > self.max_bytes:
+                    break
+                handle.write(chunk)
+        if size > self.max_bytes:
+            partial.unlink()
+            logger.warning("Not caching %s: larger than the document cache", url)
+            return None
+        if old is not None and old.file != key + extension:
+            (self.directory / old.file).unlink(missing_ok=True)
+        partial.replace(self.directory / (key + extension))
+        now = self._clock()
+        entry = _Entry(
+            url=url,
+            file=key + extension,
+            size=size,
+            fetched_at=now,
+            used_at=now,
+            etag=response.headers.get("ETag", ""),
+            last_modified=response.headers.get("Last-Modified", ""),
+        )
+        self._save(entry)
+        with self._lock:
+            self._entries[url] = entry
+        return entry
+
+    def _save(self, entry: _Entry) -> None:
+        metadata = self.directory / (Path(entry.file).stem + ".json")
+        metadata.write_text(json.dumps(asdict(entry)), encoding="utf-8")
+
+    def _evict(self) -> None:
+        # Pinned copies are skipped, even if the cache stays over budget until they are released.
+        with self._lock:
+            total = sum(entry.size for entry in self._entries.values())
+            for entry in sorted(self._entries.values(), key=lambda entry: entry.used_at):
+                if total <= self.max_bytes:
+                    break
+                if entry.url in self._pins:
+                    continue
+                del self._entries[entry.url]
+                total -= entry.size
+                (self.directory / entry.file).unlink(missing_ok=True)
+                (self.directory / (Path(entry.file).stem + ".json")).unlink(missing_ok=True)
+                registry.inc("ramose_document_cache_evictions_total")
+        self._report_size()
+
+    def _report_size(self) -> None:
+        registry.set("ramose_document_cache_bytes", self.size)
+
+
+def _running(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Running, under another user.
+        return True
+    return True
+
+
+registry.describe(
+    "ramose_document_cache_requests_total",
+    "counter",
+    "SPARQL Anything documents looked up in the document cache, by result (hit, miss, revalidated, stale, bypass).",
+)
+registry.describe("ramose_document_cache_evictions_total", "counter", "Documents evicted from the document cache.")
+registry.describe("ramose_document_cache_bytes", "gauge", "Bytes of documents held by the document cache.")
@@ -0,0 +1,318 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from threading import Lock
+from typing import TYPE_CHECKING, Any
+
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from ramose._constants import _http_session
+from ramose.metrics import Sample, registry
+from ramose.results import RESULT_MEDIA_TYPES
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Mapping
+
+    from requests import Session
+
+
+@dataclass(frozen=True)
+class EndpointOptions:
+    values_max_tuples: int = 0
+    values_max_bytes: int = 0
+    values_parallelism: int = 4
+    fanout_parallelism: int = 1
+    max_url_length: int = 0
+    pool_size: int = 10
+    max_connections: int = 0
+    keep_alive: bool = True
+    connect_timeout: float = 10.0
+    read_timeout: float = 60.0
+    breaker_failures: int = 0
+    breaker_reset: float = 30.0
+    result_format: str = "csv"
+    infer_types: bool = False
+    timeout_param: str = ""
+    timeout_unit: str = "s"
+    timeout_with_unit: bool = False
+    hedge_percentile: float = 0.0
+    hedge_delay: float = 1.0
+    eject_error_rate: float = 0.5
+    eject_duration: float = 30.0
+    adaptive_rate: bool = False
+    min_rate: float = 0.1
+    max_rate: float = 0.0
+    chunk_size: int = 0
+    chunk_parallelism: int = 1
+    max_rows: int = 0
+    truncation_headers: bool = False
+    dialect: str = ""
+    max_concurrent_queries: int = 0
+    max_queued_queries: int = 0
+    queue_timeout: float = 10.0
+
+    @property
+    def timeout(self) -> tuple[float, float]:
+        return self.connect_timeout, self.read_timeout
+
+
+def _parse_bool(value: str) -> bool:
+    lowered = value.strip().lower()
+    if lowered in {"true", "yes", "1"}:
+        return True
+    if lowered in {"false", "no", "0"}:
+        return False
+    msg = f"not a boolean: {value!r}"
+    raise ValueError(msg)
+
+
+def _parse_result_format(value: str) -> str:
+    if value not in RESULT_MEDIA_TYPES:
+        msg = f"not a result format: {value!r}"
+        raise ValueError(msg)
+    return value
+
+
+def _parse_timeout_unit(value: str) -> str:
+    if value not in {"s", "ms"}:
+        msg = f"not a timeout unit: {value!r}"
+        raise ValueError(msg)
+    return value
+
+
+def _parse_dialect(value: str) -> str:
+    if value not in DIALECTS:
+        msg = f"not a dialect: {value!r}"
+        raise ValueError(msg)
+    return value
+
+
+def _parse_rate(value: str) -> float:
+    rate = float(value)
+    if not 0 <= rate <= 1:
+        msg = f"not a rate between 0 and 1: {value!r}"
+        raise ValueError(msg)
+    return rate
+
+
+def _parse_percentile(value: str) -> float:
+    percentile = float(value)
+    if not 0 <= percentile <= 100:  # noqa: PLR2004
+        msg = f"not a percentile: {value!r}"
+        raise ValueError(msg)
+    return percentile
+
+
+_OPTION_PARSERS: dict[str, Callable[[str], object]] = {
+    "values_max_tuples": int,
+    "values_max_bytes": int,
+    "values_parallelism": int,
+    "fanout_parallelism": int,
+    "max_url_length": int,
+    "pool_size": int,
+    "max_connections": int,
+    "keep_alive": _parse_bool,
+    "connect_timeout": float,
+    "read_timeout": float,
+    "breaker_failures": int,
+    "breaker_reset": float,
+    "result_format": _parse_result_format,
+    "infer_types": _parse_bool,
+    "timeout_param": str,
+    "timeout_unit": _parse_timeout_unit,
+    "timeout_with_unit": _parse_bool,
+    "hedge_percentile": _parse_percentile,
+    "hedge_delay": float,
+    "eject_error_rate": _parse_rate,
+    "eject_duration": float,
+    "adaptive_rate": _parse_bool,
+    "min_rate": float,
+    "max_rate": float,
+    "chunk_size": int,
+    "chunk_parallelism": int,
+    "max_rows": int,
+    "truncation_headers": _parse_bool,
+    "dialect": _parse_dialect,
+    "max_concurrent_queries": int,
+    "max_queued_queries": int,
+    "queue_timeout": float,
+}
+_POSITIVE_OPTIONS = frozenset(
+    {
+        "values_parallelism",
+        "fanout_parallelism",
+        "pool_size",
+        "connect_timeout",
+        "read_timeout",
+        "breaker_reset",
+        "hedge_delay",
+        "eject_duration",
+        "min_rate",
+        "chunk_parallelism",
+        "queue_timeout",
+    }
+)
+
+DEFAULT_ENDPOINT_OPTIONS = EndpointOptions()
+
+# The options that suit each triple store, which dialect=<name> sets for an endpoint unless it is given them
+# explicitly: the query timeout the store accepts, a result format it streams with datatypes, and GET URLs
+# that leave room for the headers in the 8 KiB its HTTP server reads for the request line and headers.
+DIALECTS: dict[str, dict[str, str]] = {
+    "qlever": {
+        "timeout_param": "timeout",
+        "timeout_unit": "s",
+        "timeout_with_unit": "true",
+        "result_format": "tsv",
+        "max_url_length": "6144",
+    },
+    "virtuoso": {"timeout_param": "timeout", "timeout_unit": "ms", "max_rows": "10000", "truncation_headers": "true"},
+    "blazegraph": {
+        "timeout_param": "maxQueryTimeMillis",
+        "timeout_unit": "ms",
+        "result_format": "tsv",
+        "max_url_length": "6144",
+    },
+    "fuseki": {"timeout_param": "timeout", "timeout_unit": "s", "result_format": "tsv", "max_url_length": "6144"},
+    "graphdb": {"timeout_param": "timeout", "timeout_unit": "s", "result_format": "tsv", "max_url_length": "6144"},
+}
+
+
+def parse_endpoint_options(entries: Iterable[str]) -> dict[str, dict[str, str]]:
+    """Parse entries shaped as '<endpoint> key=value key=value'. Each entry may hold several
+    endpoints separated by ';', as in the #endpoint_options field of a spec file."""
+    result: dict[str, dict[str, str]] = {}
+    for entry in entries:
+        for raw_part in entry.split(";"):
+            tokens = raw_part.split()
+            if not tokens:
+                continue
+            endpoint, *settings = tokens
+            values = result.setdefault(endpoint, {})
+            for setting in settings:
+                key, separator, value = setting.partition("=")
+                if not separator or not key or not value:
+                    msg = f"invalid endpoint option {setting!r} for {endpoint} (expected 'key=value')"
+                    raise ValueError(msg)
+                if key not in _OPTION_PARSERS:
+                    msg = f"unknown endpoint option {key!r} for {endpoint}"
+                    raise ValueError(msg)
+                values[key] = value
+    return result
+
+
+def build_endpoint_options(values: Mapping[str, str]) -> EndpointOptions:
+    """The options of an endpoint, over those of its dialect when it names one."""
+    dialect = values.get("dialect", "")
+    if dialect in DIALECTS:
+        values = {**DIALECTS[dialect], **values}
+    parsed: dict[str, object] = {}
+    for key, raw_value in values.items():
+        try:
+            value = _OPTION_PARSERS[key](raw_value)
+        except ValueError:
+            msg = f"invalid value {raw_value!r} for endpoint option {key!r}"
+            raise ValueError(msg) from None
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            if key in _POSITIVE_OPTIONS and value <= 0:
+                bound = ">= 1" if isinstance(value, int) else "> 0"
+                msg = f"endpoint option {key!r} must be {bound}, got {raw_value}"
+                raise ValueError(msg)
+            if value < 0:
+                msg = f"endpoint option {key!r} must be >= 0, got {raw_value}"
+                raise ValueError(msg)
+        parsed[key] = value
+    return EndpointOptions(**parsed)  # type: ignore[arg-type]
+
+
+def _has_dedicated_pool(options: EndpointOptions) -> bool:
+    return (options.pool_size, options.max_connections) != (
+        DEFAULT_ENDPOINT_OPTIONS.pool_size,
+        DEFAULT_ENDPOINT_OPTIONS.max_connections,
+    )
+
+
+class CountingHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that counts the requests its pools send and the connections they open, so that the
+    connection reuse rate can be reported. A pooled connection without a socket connects on its next request,
+    which covers both new connections and reconnections after the backend closed the socket."""
+
+    def __init__(self, **kwargs: Any) -> None:  # noqa: ANN401
+        self._stats_lock = Lock()
+        self.requests_sent = 0
+        self.connections_opened = 0
+        super().__init__(**kwargs)
+
+    def record_request(self, *, new_connection: bool) -> None:
+        with self._stats_lock:
+            self.requests_sent += 1
+            if new_connection:
+                self.connections_opened += 1
+
+    def init_poolmanager(self, *args: Any, **kwargs: Any) -> None:  # noqa: ANN401
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _counting_pool_class(HTTPConnectionPool, self),
+            "https": _counting_pool_class(HTTPSConnectionPool, self),
+        }
+
+
+def _counting_pool_class(
+    pool_class: type[HTTPConnectionPool], adapter: CountingHTTPAdapter
+) -> type[HTTPConnectionPool]:
+    class CountingConnectionPool(pool_class):
+        def _make_request(self, conn: Any, *args: Any, **kwargs: Any) -> Any:  # noqa: ANN401
+            adapter.record_request(new_connection=getattr(conn, "sock", None) is None)
+            return super()._make_request(conn, *args, **kwargs)
+
+    return CountingConnectionPool
+
+
+def http_adapter(options: EndpointOptions) -> CountingHTTPAdapter:
+    """Build the connection pool for one endpoint. pool_size is how many idle connections stay open for
+    reuse; max_connections, when set, also caps the open connections and makes requests wait for a free one
+    instead of opening connections that are thrown away afterwards."""
+    if options.max_connections:
+        return CountingHTTPAdapter(pool_maxsize=options.max_connections, pool_block=True)
+    return CountingHTTPAdapter(pool_maxsize=options.pool_size)
+
+
+def mount_endpoint_pools(session: Session, endpoint_options: Mapping[str, EndpointOptions]) -> None:
+    """Give every endpoint with its own pool settings a dedicated adapter on the session. requests picks the
+    adapter with the longest matching URL prefix, so other endpoints keep sharing the default pools, which
+    are replaced by counting adapters with the same settings."""
+    for prefix in ("http://", "https://"):
+        if not isinstance(session.adapters.get(prefix), CountingHTTPAdapter):
+            session.mount(prefix, CountingHTTPAdapter())
+    for endpoint_url, options in endpoint_options.items():
+        if _has_dedicated_pool(options):
+            session.mount(endpoint_url, http_adapter(options))
+
+
+def http_pool_samples(session: Session) -> list[Sample]:
+    """Requests sent, connections opened and their reuse ratio for each counting adapter of the session,
+    labelled by the URL prefix the adapter is mounted on."""
+    samples: list[Sample] = []
+    for prefix, adapter in list(session.adapters.items()):
+        if not isinstance(adapter, CountingHTTPAdapter):
+            continue
+        labels = {"endpoint": prefix}
+        requests_sent, connections = adapter.requests_sent, adapter.connections_opened
+        reuse = (requests_sent - connections) / requests_sent if requests_sent else 0.0
+        samples.append(Sample("ramose_http_requests_total", labels, requests_sent))
+        samples.append(Sample("ramose_http_connections_total", labels, connections))
+        samples.append(Sample("ramose_http_connection_reuse_ratio", labels, reuse))
+    return samples
+
+
+registry.describe("ramose_http_requests_total", "counter", "Backend HTTP requests sent through a connection pool.")
+registry.describe("ramose_http_connections_total", "counter", "Backend HTTP connections opened by a connection pool.")
+registry.describe(
+    "ramose_http_connection_reuse_ratio", "gauge", "Share of backend requests that reused an open connection."
+)
+registry.add_collector(lambda: http_pool_samples(_http_session))
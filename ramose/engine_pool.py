@@ -0,0 +1,151 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+from __future__ import annotations
+
+import logging
+import time
+from threading import Condition, Lock
+from typing import TYPE_CHECKING
+
+from ramose.metrics import Sample, registry
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+logger = logging.getLogger(__name__)
+
+# Query run on an engine whose last query failed, before it is handed out again.
+HEALTH_QUERY = "SELECT (1 AS ?ok) WHERE { }"
+
+
+class EnginePool:
+    """SPARQL Anything engines shared by every operation in the process.
+
+    Starting an engine goes through the JVM bridge and can take seconds, so engines are started once, at most
+    size of them, and each is checked out by one query at a time. An engine released after a failure is checked
+    with HEALTH_QUERY before its next use, and replaced by a fresh one if that fails too."""
+
+    def __init__(self, factory: Callable[[], object], size: int) -> None:
+        self.factory = factory
+        self.size = size
+        self._condition = Condition()
+        # Idle engines, each with whether it must pass a health check before use.
+        self._idle: list[tuple[object, bool]] = []
+        self._started = 0
+        self.busy = 0
+
+    @property
+    def idle(self) -> int:
+        with self._condition:
+            return len(self._idle)
+
+    def warm_up(self) -> None:
+        """Start the missing engines now, so that no request waits for them."""
+        with self._condition:
+            missing = self.size - self._started
+            self._started += missing
+        engines: list[tuple[object, bool]] = []
+        try:
+            while len(engines) < missing:
+                engines.append((self._start(), False))
+        finally:
+            with self._condition:
+                self._started -= missing - len(engines)
+                self._idle.extend(engines)
+                self._condition.notify_all()
+
+    def acquire(self, timeout: float | None = None) -> object:
+        """Check out an idle engine, starting one when fewer than size exist. When all of them are busy, wait
+        for one to be released, or raise TimeoutError after timeout seconds."""
+        started = time.monotonic()
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._idle or self._started < self.size, timeout):
+                msg = f"no SPARQL Anything engine was free within {timeout:g}s"
+                raise TimeoutError(msg)
+            self.busy += 1
+            if self._idle:
+                engine, suspect = self._idle.pop()
+            else:
+                self._started += 1
+                engine, suspect = None, False
+        registry.inc("ramose_sparql_anything_wait_seconds_total", time.monotonic() - started)
+        try:
+            if engine is None:
+                return self._start()
+            if suspect and not self._healthy(engine):
+                logger.warning("Replacing a SPARQL Anything engine that failed its health check")
+                registry.inc("ramose_sparql_anything_engine_replacements_total")
+                return self._start()
+        except BaseException:
+            with self._condition:
+                self.busy -= 1
+                self._started -= 1
+                self._condition.notify()
+            raise
+        return engine
+
+    def release(self, engine: object, *, healthy: bool = True) -> None:
+        """Return an engine to the pool. healthy=False, after a query failed for reasons other than its data
+        sources, has the engine checked before its next use."""
+        with self._condition:
+            self.busy -= 1
+            self._idle.append((engine, not healthy))
+            self._condition.notify()
+
+    def _start(self) -> object:
+        started = time.monotonic()
+        engine = self.factory()
+        logger.info("Started a SPARQL Anything engine in %.2fs", time.monotonic() - started)
+        registry.inc("ramose_sparql_anything_engine_starts_total")
+        return engine
+
+    @staticmethod
+    def _healthy(engine: object) -> bool:
+        try:
+            engine.select(output_type=dict, query=HEALTH_QUERY)  # type: ignore[attr-defined]
+        except Exception:  # noqa: BLE001
+            return False
+        return True
+
+
+_pools: dict[Callable[[], object], EnginePool] = {}
+_pools_lock = Lock()
+
+
+def engine_pool(factory: Callable[[], object], size: int) -> EnginePool:
+    """The pool of the engines built by factory, shared by the whole process. A pool whose size changed is
+    replaced by a fresh, empty one."""
+    with _pools_lock:
+        pool = _pools.get(factory)
+        if pool is None or pool.size != size:
+            pool = _pools[factory] = EnginePool(factory, size)
+        return pool
+
+
+def reset_engine_pools() -> None:
+    with _pools_lock:
+        _pools.clear()
+
+
+def engine_pool_samples() -> list[Sample]:
+    with _pools_lock:
+        pools = list(_pools.values())
+    return [
+        Sample("ramose_sparql_anything_engines", {"state": "idle"}, sum(pool.idle for pool in pools)),
+        Sample("ramose_sparql_anything_engines", {"state": "busy"}, sum(pool.busy for pool in pools)),
+    ]
+
+
+registry.describe("ramose_sparql_anything_engines", "gauge", "SPARQL Anything engines in the pool, idle or busy.")
+registry.describe("ramose_sparql_anything_engine_starts_total", "counter", "SPARQL Anything engines started.")
+registry.describe(
+    "ramose_sparql_anything_engine_replacements_total",
+    "counter",
+    "SPARQL Anything engines replaced after failing their health check.",
+)
+registry.describe(
+    "ramose_sparql_anything_wait_seconds_total", "counter", "Seconds queries waited for a free SPARQL Anything engine."
+)
+registry.add_collector(engine_pool_samples)
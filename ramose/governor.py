@@ -0,0 +1,137 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+from __future__ import annotations
+
+import time
+from threading import Condition, Lock
+from typing import TYPE_CHECKING
+
+from ramose.metrics import Sample, registry
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from ramose.endpoints import EndpointOptions
+
+
+class ConcurrencyGovernor:
+    """Caps the queries in flight to one endpoint, shared by every operation in the process.
+
+    At most max_concurrent queries hold a slot at a time. The next ones queue for a free slot, up to
+    max_queued of them when that is set; a query arriving at a full queue, or still queued after
+    queue_timeout seconds, is turned away with TimeoutError. Slots are handed out in arrival order."""
+
+    def __init__(
+        self,
+        url: str,
+        max_concurrent: int,
+        max_queued: int = 0,
+        queue_timeout: float = 10.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.url = url
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self._clock = clock
+        self._condition = Condition()
+        self.in_flight = 0
+        # Tickets of the queued queries: each takes a slot only once every earlier ticket has.
+        self._next_ticket = 0
+        self._serving = 0
+        self._abandoned: set[int] = set()
+
+    @property
+    def queued(self) -> int:
+        with self._condition:
+            return self._next_ticket - self._serving - len(self._abandoned)
+
+    def acquire(self, timeout: float | None = None) -> None:
+        """Take a slot, waiting at most queue_timeout seconds, or timeout when that is shorter."""
+        wait = self.queue_timeout if timeout is None else min(self.queue_timeout, timeout)
+        started = self._clock()
+        with self._condition:
+            if self.in_flight < self.max_concurrent and self._serving == self._next_ticket:
+                self.in_flight += 1
+                return
+            if self.max_queued and self._next_ticket - self._serving - len(self._abandoned) >= self.max_queued:
+                registry.inc("ramose_backend_queue_rejections_total", endpoint=self.url, reason="full")
+                msg = f"too many queries queued for {self.url}"
+                raise TimeoutError(msg)
+            ticket = self._next_ticket
+            self._next_ticket += 1
+            admitted = self._condition.wait_for(
+                lambda: self._serving == ticket and self.in_flight < self.max_concurrent, wait
+            )
+            if admitted:
+                self.in_flight += 1
+            else:
+                self._abandoned.add(ticket)
+            self._skip_abandoned(admitted=admitted)
+        registry.inc("ramose_backend_queue_wait_seconds_total", self._clock() - started, endpoint=self.url)
+        if not admitted:
+            registry.inc("ramose_backend_queue_rejections_total", endpoint=self.url, reason="timeout")
+            msg = f"no query slot for {self.url} was free within {wait:g}s"
+            raise TimeoutError(msg)
+
+    def release(self) -> None:
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def _skip_abandoned(self, *, admitted: bool) -> None:
+        # The ticket being served moves past the one just admitted, then past every ticket given up on.
+        if admitted:
+            self._serving += 1
+        while self._serving in self._abandoned:
+            self._abandoned.remove(self._serving)
+            self._serving += 1
+        self._condition.notify_all()
+
+
+_governors: dict[str, ConcurrencyGovernor] = {}
+_governors_lock = Lock()
+
+
+def concurrency_governor(endpoint_url: str, options: EndpointOptions) -> ConcurrencyGovernor | None:
+    """The governor shared by every operation that queries endpoint_url, or None when the endpoint does not
+    set max_concurrent_queries. A governor whose limits changed is replaced by a fresh one."""
+    if not options.max_concurrent_queries:
+        return None
+    limits = (options.max_concurrent_queries, options.max_queued_queries, options.queue_timeout)
+    with _governors_lock:
+        governor = _governors.get(endpoint_url)
+        if governor is None or (governor.max_concurrent, governor.max_queued, governor.queue_timeout) != limits:
+            governor = ConcurrencyGovernor(endpoint_url, *limits)
+            _governors[endpoint_url] = governor
+        return governor
+
+
+def reset_concurrency_governors() -> None:
+    with _governors_lock:
+        _governors.clear()
+
+
+def concurrency_governor_samples() -> list[Sample]:
+    with _governors_lock:
+        governors = list(_governors.items())
+    samples: list[Sample] = []
+    for endpoint_url, governor in governors:
+        samples.append(Sample("ramose_backend_queries_in_flight", {"endpoint": endpoint_url}, governor.in_flight))
+        samples.append(Sample("ramose_backend_queue_depth", {"endpoint": endpoint_url}, governor.queued))
+    return samples
+
+
+registry.describe("ramose_backend_queries_in_flight", "gauge", "Queries holding a slot of an endpoint's governor.")
+registry.describe("ramose_backend_queue_depth", "gauge", "Queries waiting for a slot of an endpoint's governor.")
+registry.describe(
+    "ramose_backend_queue_wait_seconds_total", "counter", "Seconds queries waited for a slot of an endpoint's governor."
+)
+registry.describe(
+    "ramose_backend_queue_rejections_total",
+    "counter",
+    "Queries turned away by an endpoint's governor, by reason (full, timeout).",
+)
+registry.add_collector(concurrency_governor_samples)
@@ -13,7 +13,7 @@ from re import DOTALL, search
 
 import yaml
 
-BUILTIN_PARAMS = frozenset({"require", "filter", "sort", "format", "json", "page", "page_size"})
+BUILTIN_PARAMS = frozenset({"require", "filter", "sort", "format", "json", "page", "page_size", "cursor"})
 CUSTOM_PARAM_PHASES = frozenset({"preprocess", "postprocess"})
 YAML_SPEC_SUFFIXES = frozenset({".yaml", ".yml"})
 
@@ -29,6 +29,10 @@ def parse_auth(raw: str) -> bool:
     return raw.strip() == "required"
 
 
+def parse_pushdown(raw: str) -> bool:
+    return raw.strip().lower() == "true"
+
+
 def _is_yaml_handler(handler: str) -> bool:
     return handler.endswith((".yaml", ".yml"))
 
@@ -0,0 +1,94 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+from __future__ import annotations
+
+from threading import Lock
+from typing import TYPE_CHECKING, NamedTuple
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Sample(NamedTuple):
+    name: str
+    labels: dict[str, str]
+    value: float
+
+
+def _label_key(labels: dict[str, str]) -> tuple[tuple[str, str], ...]:
+    return tuple(sorted(labels.items()))
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class MetricsRegistry:
+    """Process-wide counters and gauges, rendered in the Prometheus text exposition format. Collectors are
+    callables that compute samples on demand, for values owned by other objects (e.g. connection pools)."""
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._descriptions: dict[str, tuple[str, str]] = {}
+        self._values: dict[tuple[str, tuple[tuple[str, str], ...]], float] = {}
+        self._collectors: list[Callable[[], Iterable[Sample]]] = []
+
+    def describe(self, name: str, kind: str, help_text: str) -> None:
+        self._descriptions[name] = (kind, help_text)
+
+    def inc(self, name: str, value: float = 1.0, **labels: str) -> None:
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + value
+
+    def set(self, name: str, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[(name, _label_key(labels))] = value
+
+    def add_collector(self, collector: Callable[[], Iterable[Sample]]) -> None:
+        self._collectors.append(collector)
+
+    def value(self, name: str, **labels: str) -> float:
+        key = _label_key(labels)
+        for sample in self.samples():
+            if sample.name == name and _label_key(sample.labels) == key:
+                return sample.value
+        return 0.0
+
+    def samples(self) -> list[Sample]:
+        with self._lock:
+            result = [Sample(name, dict(labels), value) for (name, labels), value in self._values.items()]
+        for collector in self._collectors:
+            result.extend(collector())
+        return result
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def render(self) -> str:
+        by_name: dict[str, list[Sample]] = {}
+        for sample in self.samples():
+            by_name.setdefault(sample.name, []).append(sample)
+        lines: list[str] = []
+        for name in sorted(by_name):
+            if name in self._descriptions:
+                kind, help_text = self._descriptions[name]
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+            for sample in sorted(by_name[name], key=lambda s: _label_key(s.labels)):
+                labels = ",".join(f'{k}="{_escape_label_value(v)}"' for k, v in _label_key(sample.labels))
+                series = f"{name}{{{labels}}}" if labels else name
+                lines.append(f"{series} {_format_value(sample.value)}")
+        return "\n".join(lines) + "\n" if lines else ""
+
+
+registry = MetricsRegistry()
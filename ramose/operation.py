@@ -9,7 +9,13 @@
 
 from __future__ import annotations
 
+import asyncio
+import logging
 import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from contextlib import closing, contextmanager
+from copy import copy
 from csv import DictReader, reader, writer
 from dataclasses import dataclass
 from dataclasses import field as dataclass_field
@@ -21,6 +27,7 @@ from math import ceil
 from operator import eq, gt, itemgetter, lt
 from re import error as regex_error
 from re import findall, fullmatch, match, search, sub
+from threading import Event, Lock
 from typing import TYPE_CHECKING, NoReturn, TypedDict, cast
 from urllib.parse import parse_qs, quote, urlsplit
 
@@ -33,31 +40,81 @@ except ImportError:
     SparqlAnything = None
 
 from ramose._constants import (
-    DEFAULT_HTTP_TIMEOUT,
     FIELD_TYPE_RE,
     _http_session,
     backend_auth_header,
     media_type_for_format,
 )
+from ramose.breaker import circuit_breaker
 from ramose.datatype import DataType
+from ramose.endpoints import DEFAULT_ENDPOINT_OPTIONS
+from ramose.engine_pool import engine_pool
 from ramose.filters import apply_filters
-from ramose.paging import PaginationInfo, build_link_header, build_pagination_info
+from ramose.governor import concurrency_governor
+from ramose.metrics import registry
+from ramose.paging import (
+    Cursor,
+    PaginationInfo,
+    build_cursor_pagination_info,
+    build_link_header,
+    build_pagination_info,
+)
+from ramose.planner import (
+    DEFAULT_BIND_JOIN_THRESHOLD,
+    bind_join_blocker,
+    independent_queries,
+    merge_same_endpoint_joins,
+    page_pushdown_blocker,
+    parse_select_query,
+)
+from ramose.pushdown import (
+    PUSHDOWN_TYPES,
+    Pushdown,
+    chunk_query,
+    chunkable,
+    comparison_condition,
+    count_query,
+    distinct_count_query,
+    key_page_query,
+    page_query,
+    require_condition,
+    sort_keys,
+)
+from ramose.ratelimit import rate_controller, retry_after_seconds
+from ramose.replicas import hedge_delay, latency_window, rank_replicas, replica_health
+from ramose.results import RESULT_MEDIA_TYPES, ParsedResults, TypedCell, parse_results
 
 if TYPE_CHECKING:
     import types
-    from collections.abc import Callable, Mapping
+    from collections.abc import Callable, Generator, Iterator, Mapping
+    from concurrent.futures import Future
     from typing import Protocol
 
     from requests import Response
 
+    from ramose.breaker import CircuitBreaker
     from ramose.cache import ResultCache
+    from ramose.documents import DocumentCache
+    from ramose.endpoints import EndpointOptions
+    from ramose.engine_pool import EnginePool
     from ramose.filters import FiltersConfig
+    from ramose.planner import SelectQuery
+    from ramose.pushdown import OrderKey
+    from ramose.ratelimit import RateController
 
     class SparqlAnythingEngine(Protocol):
         def select(self, output_type: type[object], **kwargs: object) -> object: ...
 
 
+logger = logging.getLogger(__name__)
+
+# RFC 7234 section 5.5.1, sent with a cached result served because the endpoint's circuit breaker is open.
+_STALE_WARNING = '110 - "Response is Stale"'
+# RFC 7234 section 5.5.7, sent with the results of a pipeline that skipped optional steps.
+_PARTIAL_WARNING = '199 - "Partial results: optional steps skipped ({})"'
 _WRITE_METHODS = frozenset({"post", "put", "delete"})
+# Bytes read from the socket at a time when parsing a streamed SPARQL response.
+_STREAM_CHUNK_SIZE = 64 * 1024
 _RETRYABLE_STATUS_CODES = frozenset(
     {
         HTTPStatus.REQUEST_TIMEOUT,
@@ -68,6 +125,10 @@ _RETRYABLE_STATUS_CODES = frozenset(
         HTTPStatus.GATEWAY_TIMEOUT,
     }
 )
+# Statuses with which an endpoint asks for fewer requests, and the longest Retry-After waited for before
+# retrying: a longer one is passed on to the client.
+_THROTTLE_STATUS_CODES = frozenset({HTTPStatus.TOO_MANY_REQUESTS, HTTPStatus.SERVICE_UNAVAILABLE})
+_MAX_RETRY_AFTER = 60.0
 _SPARQL_ANYTHING_HTTP_STATUS_RE = r"\bHTTP/\d(?:\.\d)?\s+(\d{3})\b"
 _SPARQL_ANYTHING_TIMEOUT_MARKERS = frozenset(
     {
@@ -95,7 +156,8 @@ ResultTable = list[ResultRow]
 class CachedPagination(TypedDict):
     page: int
     page_size: int
-    total_items: int
+    total_items: int | None
+    next_cursor: str
 
 
 class CachedResult(TypedDict):
@@ -109,6 +171,22 @@ class HttpError(Exception):
         self.status_code = status_code
 
 
+class _StatusError(HttpError):
+    """A read query answered with a status other than 200."""
+
+    def __init__(self, status_code: int, reason: str) -> None:
+        super().__init__(status_code, f"HTTP status code {status_code}: {reason}")
+        self.reason = reason
+
+
+class CircuitOpenError(HttpError):
+    """Raised instead of contacting an endpoint whose circuit breaker is open."""
+
+
+class DeadlineExceededError(HttpError):
+    """Raised when the time budget of a request (#timeout) runs out."""
+
+
 @dataclass
 class OperationConfig:
     sparql_endpoint: str = ""
@@ -118,16 +196,26 @@ class OperationConfig:
     format_map: dict = dataclass_field(default_factory=dict)
     format_media_types: dict = dataclass_field(default_factory=dict)
     sources_map: dict = dataclass_field(default_factory=dict)
+    replicas: dict[str, tuple[str, ...]] = dataclass_field(default_factory=dict)
+    endpoint_options: dict[str, EndpointOptions] = dataclass_field(default_factory=dict)
     custom_params: dict = dataclass_field(default_factory=dict)
     disabled_params: set = dataclass_field(default_factory=set)
     requires_auth: bool = False
     cache: ResultCache | None = None
+    document_cache: DocumentCache | None = None
     default_cache_ttl: int = 86400
     custom_param_configs: dict[str, FiltersConfig] = dataclass_field(default_factory=dict)
     public_base_url: str = ""
     retry_attempts: int = 3
     retry_wait: float = 0.5
     retry_backoff: float = 2.0
+    pipeline_workers: int = 1
+    optimizations: frozenset[str] = frozenset()
+    bind_join_threshold: int = DEFAULT_BIND_JOIN_THRESHOLD
+    timeout: float = 0.0
+    sparql_anything_engines: int = 1
+    pushdown: bool = False
+    count_cache_ttl: int = 3600
 
     def __post_init__(self) -> None:
         if self.retry_attempts < 1:
@@ -139,6 +227,18 @@ class OperationConfig:
         if self.retry_backoff < 1:
             msg = "retry_backoff must be >= 1"
             raise ValueError(msg)
+        if self.pipeline_workers < 1:
+            msg = "pipeline_workers must be >= 1"
+            raise ValueError(msg)
+        if self.bind_join_threshold < 0:
+            msg = "bind_join_threshold must be >= 0"
+            raise ValueError(msg)
+        if self.timeout < 0:
+            msg = "timeout must be >= 0"
+            raise ValueError(msg)
+        if self.sparql_anything_engines < 1:
+            msg = "sparql_anything_engines must be >= 1"
+            raise ValueError(msg)
 
 
 class Operation:
@@ -162,18 +262,32 @@ class Operation:
         self.format = config.format_map
         self.format_media_types = config.format_media_types
         self.sources_map = config.sources_map
+        self.replicas = config.replicas
+        self._replica_urls = frozenset(url for urls in self.replicas.values() for url in urls)
+        self.endpoint_options = config.endpoint_options
         self.custom_params = config.custom_params
         self.disabled_params = config.disabled_params
         self.requires_auth = config.requires_auth
-        self._sa_engine = None
         self._cache = config.cache
+        self._document_cache = config.document_cache
         self._default_cache_ttl = config.default_cache_ttl
         self.custom_param_configs = config.custom_param_configs
         self.public_base_url = config.public_base_url
         self.retry_attempts = config.retry_attempts
         self.retry_wait = config.retry_wait
         self.retry_backoff = config.retry_backoff
+        self.pipeline_workers = config.pipeline_workers
+        self.optimizations = config.optimizations
+        self.bind_join_threshold = config.bind_join_threshold
+        self.timeout = config.timeout
+        self.sparql_anything_engines = config.sparql_anything_engines
+        self.pushdown = config.pushdown
+        self._count_cache_ttl = config.count_cache_ttl
+        self._deadline: float | None = None
+        self.query_plan: list[str] = []
         self.pagination_info: PaginationInfo | None = None
+        self.stale = False
+        self.skipped_steps: list[str] = []
 
         self.operation = {"=": eq, "<": lt, ">": gt}
 
@@ -660,20 +774,38 @@ class Operation:
         return [header, *result]
 
     def type_fields(
-        self, res: list[list[str] | list[tuple[object, str]] | list[str | object]], op_item: dict[str, str]
+        self,
+        res: list[list[str] | list[tuple[object, str]] | list[str | object]],
+        op_item: dict[str, str],
+        column_types: Mapping[str, str | None] | None = None,
+        *,
+        infer_undeclared: bool = False,
     ) -> list[list[str] | list[tuple[object, str]]]:
         """It creates a version of the results 'res' that adds, to each value of the fields, the same value interpreted
         with the type specified in the specification file (field 'field_type'). Note that 'str' is used as default in
-        case no further specifications are provided."""
+        case no further specifications are provided.
+
+        Typed results (see ramose.results) come with 'column_types', the type that the datatypes of the literals
+        give to each column. The (value, lexical) pairs of the declared columns of that type were built at parsing
+        time and are kept as they are. A column without a 'field_type' takes the type of its literals only with
+        infer_undeclared, and is otherwise a string as with CSV results."""
         result = []
         cast_func = {}
         header = res[0]
         for heading in header:
             cast_func[heading] = DataType.str
 
+        declared: dict[str, str] = {}
         if "field_type" in op_item:
             for f, p in findall(FIELD_TYPE_RE, op_item["field_type"]):
                 cast_func[p] = self.dt.get_func(f)
+                declared[p] = f
+
+        typed_columns = Operation._typed_columns(column_types or {}, declared, infer_undeclared=infer_undeclared)
+        for heading, type_name in typed_columns.items():
+            cast_func[heading] = self.dt.get_func(type_name)
+        if typed_columns:
+            return [header, *self._type_typed_rows(res[1:], header, cast_func, typed_columns)]  # type: ignore[list-item]
 
         for row in res[1:]:
             new_row = []
@@ -686,6 +818,39 @@ class Operation:
 
         return [header, *result]  # type: ignore[return-value]
 
+    @staticmethod
+    def _typed_columns(
+        column_types: Mapping[str, str | None], declared: Mapping[str, str], *, infer_undeclared: bool
+    ) -> dict[str, str]:
+        """The columns whose parsed values are kept: those declared with the type of their literals, and, with
+        infer_undeclared, those not declared whose literals share a type."""
+        return {
+            heading: type_name
+            for heading, type_name in column_types.items()
+            if type_name is not None and declared.get(heading, type_name if infer_undeclared else None) == type_name
+        }
+
+    @staticmethod
+    def _type_typed_rows(
+        rows: list[list[str | object]],
+        header: list[str],
+        cast_func: Mapping[str, Callable[[str | None], object]],
+        typed_columns: Mapping[str, str],
+    ) -> list[list[tuple[object, str]]]:
+        columns = [(heading in typed_columns, cast_func[heading]) for heading in header]
+        result = []
+        for row in rows:
+            new_row = []
+            for (keep, cast_value), cur_value in zip(columns, row, strict=False):
+                if isinstance(cur_value, tuple):
+                    if keep:
+                        new_row.append(cur_value)
+                        continue
+                    cur_value = cur_value[1]  # noqa: PLW2901
+                new_row.append((cast_value(cur_value), cur_value))  # type: ignore[arg-type]
+            result.append(new_row)
+        return result
+
     def remove_types(self, res: list[list[str] | list[tuple[object, str]]]) -> ResultTable:
         """This method takes the results 'res' that include also the typed value and returns a version of such
         results without the types that is ready to be stored on the file system."""
@@ -769,9 +934,31 @@ class Operation:
         return None, engine, None
 
     @staticmethod
-    def _handle_directive_join(parts: list[str]) -> tuple[None, None, tuple[str, str, str, str]]:
-        args = Operation._parse_directive_args(parts[1:], ["left_var", "right_var"], defaults={"type": "inner"})
-        return None, None, ("JOIN", args["left_var"], args["right_var"], args["type"].lower())
+    def _handle_directive_join(parts: list[str]) -> tuple[None, None, tuple[str, ...]]:
+        args = Operation._parse_directive_args(
+            parts[1:], ["left_var", "right_var"], defaults={"type": "inner", "optional": "false", "timeout": ""}
+        )
+        how = args["type"].lower()
+        optional = args["optional"].lower()
+        if optional not in {"true", "false"}:
+            msg = f"Invalid optional value in @@join: {args['optional']!r}"
+            raise ValueError(msg)
+        if optional == "false":
+            if args["timeout"]:
+                msg = "@@join timeout requires optional=true"
+                raise ValueError(msg)
+            return None, None, ("JOIN", args["left_var"], args["right_var"], how)
+        if how != "left":
+            msg = "@@join optional=true requires type=left"
+            raise ValueError(msg)
+        try:
+            valid = not args["timeout"] or float(args["timeout"]) > 0
+        except ValueError:
+            valid = False
+        if not valid:
+            msg = f"Invalid timeout value in @@join: {args['timeout']!r}"
+            raise ValueError(msg)
+        return None, None, ("OPTIONAL_JOIN", args["left_var"], args["right_var"], how, args["timeout"])
 
     @staticmethod
     def _handle_directive_values(parts: list[str]) -> tuple[None, None, tuple[str, list[str]]]:
@@ -836,6 +1023,7 @@ class Operation:
         Returns a list of steps:
           - ("QUERY", endpoint_url, engine, query_text)
           - ("JOIN", left_var, right_var, how)       # how in {"inner","left"}
+          - ("OPTIONAL_JOIN", left_var, right_var, "left", timeout)  # @@join ... optional=true [timeout=N]
           - ("REMOVE", [vars])
           - ("VALUES_INJECT", [vars])                # @@values ?var1 ?var2 ...
           - ("FOREACH", var_name, placeholder, delay)  # @@foreach ?var placeholder [wait=N]
@@ -889,71 +1077,471 @@ class Operation:
         flush_query()
         return steps
 
+    def _endpoint_options(self, endpoint_url: str) -> EndpointOptions:
+        return self.endpoint_options.get(endpoint_url, DEFAULT_ENDPOINT_OPTIONS)
+
+    @staticmethod
+    def _connection_headers(options: EndpointOptions) -> dict[str, str]:
+        return {} if options.keep_alive else {"Connection": "close"}
+
     def _send_sparql_csv_request(self, endpoint_url: str, query_text: str) -> Response:
+        options = self._endpoint_options(endpoint_url)
         headers = {
-            "Accept": "text/csv",
+            "Accept": RESULT_MEDIA_TYPES[options.result_format],
             "User-Agent": "RAMOSE/2.0.0",
+            **Operation._connection_headers(options),
             **backend_auth_header(endpoint_url),
         }
-        if self.sparql_http_method == "get":
+        timeout = self._request_timeout(options)
+        timeout_param = self._backend_timeout_param(options)
+        get_url = endpoint_url + "?query=" + quote(query_text) + (f"&{timeout_param}" if timeout_param else "")
+        # Queries that would not fit in a GET request line are sent as POST instead.
+        if self.sparql_http_method == "get" and (not options.max_url_length or len(get_url) <= options.max_url_length):
             return _http_session.get(
-                endpoint_url + "?query=" + quote(query_text),
+                get_url,
                 headers=headers,
-                timeout=DEFAULT_HTTP_TIMEOUT,
+                timeout=timeout,
+                stream=True,
             )
         return _http_session.post(
-            endpoint_url,
+            endpoint_url + (f"?{timeout_param}" if timeout_param else ""),
             data=query_text,
             headers={
                 **headers,
                 "Content-Type": "application/sparql-query",
             },
-            timeout=DEFAULT_HTTP_TIMEOUT,
+            timeout=timeout,
+            stream=True,
         )
 
-    def _request_sparql_csv(self, endpoint_url: str, query_text: str) -> Response:
+    def _replicas(self, endpoint_url: str) -> tuple[str, ...]:
+        return self.replicas.get(endpoint_url, (endpoint_url,))
+
+    def _request_endpoint(self, endpoint_url: str, query_text: str) -> Response:
+        """Send a read query to endpoint_url. The replicas of an endpoint are ranked by their health (see
+        ramose.replicas.rank_replicas). The query is hedged to the second one when the endpoint sets
+        hedge_percentile, and otherwise goes to each in turn until one answers."""
+        replicas = self._replicas(endpoint_url)
+        if len(replicas) > 1:
+            replicas = tuple(rank_replicas(replicas))
+        if len(replicas) == 1:
+            return self._request_sparql_csv(replicas[0], query_text)
+        delay = hedge_delay(endpoint_url, self._endpoint_options(endpoint_url))
+        if delay is None:
+            return self._request_with_failover(endpoint_url, replicas, query_text)
+        return self._request_hedged(endpoint_url, replicas, query_text, delay)
+
+    def _request_with_failover(self, endpoint_url: str, replicas: tuple[str, ...], query_text: str) -> Response:
+        for replica in replicas[:-1]:
+            try:
+                response = self._request_sparql_csv(replica, query_text)
+            except DeadlineExceededError:
+                raise
+            except HttpError:
+                registry.inc("ramose_replica_failovers_total", endpoint=endpoint_url)
+                continue
+            if response.status_code not in _RETRYABLE_STATUS_CODES:
+                return response
+            response.close()
+            registry.inc("ramose_replica_failovers_total", endpoint=endpoint_url)
+        return self._request_sparql_csv(replicas[-1], query_text)
+
+    def _request_hedged(self, endpoint_url: str, replicas: tuple[str, ...], query_text: str, delay: float) -> Response:
+        """Query the first replica and, if it has not answered after delay seconds, the second one as well. The
+        first usable answer wins. The other request is abandoned: it is not retried, and its response is closed
+        unread as soon as it arrives. A replica that fails before the delay is replaced by the second at once."""
+        cancelled = Event()
+        pool = ThreadPoolExecutor(max_workers=2)
+        try:
+            started = time.monotonic()
+            primary = pool.submit(self._request_sparql_csv, replicas[0], query_text, cancelled)
+            wait([primary], timeout=delay)
+            if Operation._usable_answer(primary):
+                latency_window(endpoint_url).record(time.monotonic() - started)
+                return primary.result()
+            hedged = not primary.done()
+            registry.inc(
+                "ramose_hedged_requests_total" if hedged else "ramose_replica_failovers_total", endpoint=endpoint_url
+            )
+            hedge_started = time.monotonic()
+            hedge = pool.submit(self._request_sparql_csv, replicas[1], query_text, cancelled)
+            # Without a usable answer, the primary's response or error is reported as it would be without hedging.
+            winner = Operation._first_usable_answer([primary, hedge]) or primary
+            cancelled.set()
+            (hedge if winner is primary else primary).add_done_callback(Operation._close_abandoned)
+            if winner is hedge and hedged:
+                registry.inc("ramose_hedge_wins_total", endpoint=endpoint_url)
+            if Operation._usable_answer(winner):
+                latency_window(endpoint_url).record(time.monotonic() - (hedge_started if winner is hedge else started))
+            return winner.result()
+        finally:
+            pool.shutdown(wait=False)
+
+    @staticmethod
+    def _usable_answer(future: Future[Response]) -> bool:
+        """Whether a finished request got a response other than a failure worth trying elsewhere."""
+        if not future.done() or future.exception() is not None:
+            return False
+        return future.result().status_code not in _RETRYABLE_STATUS_CODES
+
+    @staticmethod
+    def _first_usable_answer(futures: list[Future[Response]]) -> Future[Response] | None:
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in futures:
+                if future in done and Operation._usable_answer(future):
+                    return future
+        return None
+
+    @staticmethod
+    def _close_abandoned(future: Future[Response]) -> None:
+        if not future.cancelled() and future.exception() is None:
+            future.result().close()
+
+    def _request_sparql_csv(self, endpoint_url: str, query_text: str, cancelled: Event | None = None) -> Response:
+        options = self._endpoint_options(endpoint_url)
+        breaker = circuit_breaker(endpoint_url, options)
+        controller = rate_controller(endpoint_url, options)
         retry_wait = self.retry_wait
         for attempt in range(self.retry_attempts):
+            if cancelled is not None and cancelled.is_set():
+                msg = f"SPARQL request to {endpoint_url} was abandoned"
+                raise RuntimeError(msg)
+            Operation._guard_circuit(endpoint_url, breaker)
             try:
-                response = self._send_sparql_csv_request(endpoint_url, query_text)
-            except (RequestsTimeout, TimeoutError) as exc:
-                if attempt + 1 == self.retry_attempts:
-                    msg = f"HTTP status code 408: SPARQL request timeout: {exc}"
-                    raise HttpError(HTTPStatus.REQUEST_TIMEOUT, msg) from exc
-                self._sleep_before_retry(retry_wait)
-                retry_wait *= self.retry_backoff
-                continue
-            except RequestException as exc:
-                if attempt + 1 == self.retry_attempts:
-                    msg = f"HTTP status code 502: SPARQL request failed: {exc}"
-                    raise HttpError(HTTPStatus.BAD_GATEWAY, msg) from exc
-                self._sleep_before_retry(retry_wait)
-                retry_wait *= self.retry_backoff
-                continue
+                self._wait_for_rate(endpoint_url, controller)
+                try:
+                    with self._backend_slot(endpoint_url) as hand_over:
+                        response = self._send_tracked_request(endpoint_url, query_text)
+                        hand_over(response)
+                except (RequestsTimeout, TimeoutError) as exc:
+                    Operation._record_attempt(breaker, failed=True)
+                    # A read cut short by the deadline is not the endpoint's fault.
+                    self._check_deadline()
+                    if attempt + 1 == self.retry_attempts:
+                        msg = f"HTTP status code 408: SPARQL request timeout: {exc}"
+                        raise HttpError(HTTPStatus.REQUEST_TIMEOUT, msg) from exc
+                    self._sleep_within_deadline(retry_wait)
+                    retry_wait *= self.retry_backoff
+                    continue
+                except RequestException as exc:
+                    Operation._record_attempt(breaker, failed=True)
+                    if attempt + 1 == self.retry_attempts:
+                        msg = f"HTTP status code 502: SPARQL request failed: {exc}"
+                        raise HttpError(HTTPStatus.BAD_GATEWAY, msg) from exc
+                    self._sleep_within_deadline(retry_wait)
+                    retry_wait *= self.retry_backoff
+                    continue
 
-            response.encoding = "utf-8"
-            if response.status_code not in _RETRYABLE_STATUS_CODES or attempt + 1 == self.retry_attempts:
-                return response
-            self._sleep_before_retry(retry_wait)
-            retry_wait *= self.retry_backoff
+                response.encoding = "utf-8"
+                Operation._record_attempt(breaker, failed=response.status_code in _RETRYABLE_STATUS_CODES)
+                retry_after = Operation._record_rate(endpoint_url, controller, response)
+                if response.status_code not in _RETRYABLE_STATUS_CODES or attempt + 1 == self.retry_attempts:
+                    return response
+                if retry_after is not None and retry_after > _MAX_RETRY_AFTER:
+                    return response
+                response.close()
+                self._sleep_within_deadline(max(retry_wait, retry_after or 0.0))
+                retry_wait *= self.retry_backoff
+            finally:
+                # A probe refused by the governor or cut short by the deadline recorded no outcome; without this
+                # the half-open breaker would wait for it forever.
+                Operation._release_probe(breaker)
 
         msg = "SPARQL request did not run"
         raise RuntimeError(msg)
 
+    def _send_tracked_request(self, endpoint_url: str, query_text: str) -> Response:
+        """Send one attempt, feeding its latency and outcome to the health record of endpoint_url when it is
+        a replica. The latency of a successful response runs until its body has been read or it is closed,
+        since streaming stores do most of the work of a query after sending the headers."""
+        if endpoint_url not in self._replica_urls:
+            return self._send_sparql_csv_request(endpoint_url, query_text)
+        health = replica_health(endpoint_url)
+        options = self._endpoint_options(endpoint_url)
+        health.start()
+        started = time.monotonic()
+        try:
+            response = self._send_sparql_csv_request(endpoint_url, query_text)
+        except DeadlineExceededError:
+            health.cancel()
+            raise
+        except Exception:
+            health.finish(time.monotonic() - started, failed=True, options=options)
+            raise
+        if response.status_code in _RETRYABLE_STATUS_CODES:
+            health.finish(time.monotonic() - started, failed=True, options=options)
+        else:
+            Operation._when_read(
+                response, lambda: health.finish(time.monotonic() - started, failed=False, options=options)
+            )
+        return response
+
+    @staticmethod
+    def _when_read(response: Response, callback: Callable[[], None]) -> None:
+        """Call callback once, when the streamed body of response has been read to its end, or given up on,
+        or when the response is closed, whichever comes first."""
+        lock = Lock()
+        pending = [True]
+
+        def done() -> None:
+            with lock:
+                if not pending[0]:
+                    return
+                pending[0] = False
+            callback()
+
+        iter_content = response.iter_content
+        close = response.close
+
+        def read(chunk_size: int | None = 1) -> Iterator[bytes]:
+            try:
+                yield from iter_content(chunk_size=chunk_size)
+            finally:
+                done()
+
+        def close_then_done() -> None:
+            try:
+                close()
+            finally:
+                done()
+
+        response.iter_content = read  # pyright: ignore[reportAttributeAccessIssue]
+        response.close = close_then_done
+
+    @contextmanager
+    def _backend_slot(self, endpoint_url: str) -> Iterator[Callable[[Response], None]]:
+        """Hold one of the query slots of endpoint_url, for endpoints with max_concurrent_queries. A request
+        that finds the queue full, or waits longer than queue_timeout, fails with 503; one whose deadline
+        passes while it waits fails with 504.
+
+        The slot is released when the block exits, unless the block hands it over to the streamed response it
+        got, with the function it is given: the slot is then held until the body of that response has been
+        read or the response closed, so that the cap covers the whole query and not only its headers."""
+        governor = concurrency_governor(endpoint_url, self._endpoint_options(endpoint_url))
+        if governor is None:
+            yield lambda _response: None
+            return
+        try:
+            governor.acquire(self._remaining_time())
+        except TimeoutError as exc:
+            self._check_deadline()
+            msg = f"HTTP status code 503: {exc}"
+            raise HttpError(HTTPStatus.SERVICE_UNAVAILABLE, msg) from None
+        handed_over = []
+
+        def hand_over(response: Response) -> None:
+            Operation._when_read(response, governor.release)
+            handed_over.append(response)
+
+        try:
+            yield hand_over
+        finally:
+            if not handed_over:
+                governor.release()
+
+    def _wait_for_rate(self, endpoint_url: str, controller: RateController | None) -> None:
+        if controller is None:
+            return
+        seconds = controller.reserve()
+        if seconds > 0:
+            registry.inc("ramose_rate_wait_seconds_total", seconds, endpoint=endpoint_url)
+            self._sleep_within_deadline(seconds)
+
+    @staticmethod
+    def _record_rate(endpoint_url: str, controller: RateController | None, response: Response) -> float | None:
+        """Feed a response to the endpoint's rate controller, and return the seconds its Retry-After asks to
+        wait, if any."""
+        if response.status_code in _THROTTLE_STATUS_CODES:
+            registry.inc("ramose_throttled_responses_total", endpoint=endpoint_url)
+            retry_after = retry_after_seconds(response.headers.get("Retry-After"))
+            if controller is not None:
+                controller.throttled(retry_after)
+            return retry_after
+        if controller is not None and response.status_code not in _RETRYABLE_STATUS_CODES:
+            controller.succeeded()
+        return None
+
+    @staticmethod
+    def _guard_circuit(endpoint_url: str, breaker: CircuitBreaker | None) -> None:
+        if breaker is None or breaker.allow():
+            return
+        registry.inc("ramose_circuit_breaker_rejections_total", endpoint=endpoint_url)
+        msg = f"HTTP status code 503: circuit breaker open for {endpoint_url}, retry in {ceil(breaker.retry_after())}s"
+        raise CircuitOpenError(HTTPStatus.SERVICE_UNAVAILABLE, msg)
+
+    @staticmethod
+    def _release_probe(breaker: CircuitBreaker | None) -> None:
+        if breaker is not None:
+            breaker.record_abandoned()
+
     @staticmethod
-    def _sleep_before_retry(retry_wait: float) -> None:
-        if retry_wait:
-            time.sleep(retry_wait)
+    def _record_attempt(breaker: CircuitBreaker | None, *, failed: bool) -> None:
+        if breaker is None:
+            return
+        if failed:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+
+    def _raise_deadline_exceeded(self) -> NoReturn:
+        msg = f"HTTP status code 504: request deadline of {self.timeout:g}s exceeded"
+        raise DeadlineExceededError(HTTPStatus.GATEWAY_TIMEOUT, msg)
+
+    def _check_deadline(self) -> None:
+        if self._deadline is not None and time.monotonic() >= self._deadline:
+            self._raise_deadline_exceeded()
+
+    def _remaining_time(self) -> float | None:
+        """Seconds left before the deadline of the request, or None when the operation has no #timeout."""
+        if self._deadline is None:
+            return None
+        self._check_deadline()
+        return self._deadline - time.monotonic()
+
+    def _request_timeout(self, options: EndpointOptions) -> tuple[float, float]:
+        """The endpoint's connect and read timeouts, shortened to the time left before the deadline."""
+        remaining = self._remaining_time()
+        if remaining is None:
+            return options.timeout
+        return min(options.connect_timeout, remaining), min(options.read_timeout, remaining)
+
+    def _backend_timeout_param(self, options: EndpointOptions) -> str:
+        """The query parameter telling the endpoint how long it may run the query, e.g. 'timeout=12', or
+        'timeout=12s' with timeout_with_unit. Only sent when the endpoint declares one with timeout_param and
+        the request has a deadline."""
+        remaining = self._remaining_time()
+        if not options.timeout_param or remaining is None:
+            return ""
+        value = max(1, int(remaining * 1000 if options.timeout_unit == "ms" else remaining))
+        suffix = options.timeout_unit if options.timeout_with_unit else ""
+        return f"{quote(options.timeout_param)}={value}{suffix}"
+
+    def _sleep_within_deadline(self, seconds: float) -> None:
+        """Sleep before a retry or a @@foreach iteration, or fail with 504 straight away if the deadline would
+        pass in the meantime."""
+        remaining = self._remaining_time()
+        if remaining is not None and seconds >= remaining:
+            self._raise_deadline_exceeded()
+        if seconds:
+            time.sleep(seconds)
+
+    def _response_chunks(self, response: Response, abandoned: Event | None = None) -> Generator[bytes]:
+        """The body of a streamed response, cut off with 504 when the deadline passes while it is read, and
+        closed as soon as abandoned is set."""
+        for chunk in response.iter_content(chunk_size=_STREAM_CHUNK_SIZE):
+            if abandoned is not None and abandoned.is_set():
+                response.close()
+                msg = "SPARQL response was abandoned"
+                raise RuntimeError(msg)
+            if self._deadline is not None and time.monotonic() >= self._deadline:
+                response.close()
+                self._raise_deadline_exceeded()
+            yield chunk
 
     def _run_sparql_dicts(self, endpoint_url: str, query_text: str) -> list[dict[str, object]]:
-        r = self._request_sparql_csv(endpoint_url, query_text)
-        r.encoding = "utf-8"
+        try:
+            table = self._select_rows(query_text, endpoint_url, typed=False).table
+        except _StatusError as err:
+            msg = f"SPARQL {err.status_code}: {err.reason}"
+            raise RuntimeError(msg) from None
+        if not table:
+            return []
+        header, *rows = table
+        return [dict(zip(header, row, strict=False)) for row in rows if row]  # type: ignore[arg-type]
+
+    def _select_rows(self, query_text: str, endpoint_url: str = "", *, typed: bool = True) -> ParsedResults:
+        """The rows of a SELECT query. An endpoint with a chunk_size is sent the query in chunks of that many
+        rows; a response the endpoint truncated is fetched again in chunks of the rows it did return."""
+        endpoint_url = endpoint_url or self.tp
+        options = self._endpoint_options(endpoint_url)
+        if options.chunk_size:
+            chunked = self._select_chunks(endpoint_url, query_text, options.chunk_size, typed=typed)
+            if chunked is not None:
+                return chunked
+        parsed, truncated = self._select_once(endpoint_url, query_text, typed=typed)
+        if not truncated:
+            return parsed
+        registry.inc("ramose_truncated_results_total", endpoint=endpoint_url)
+        rows = len(parsed.table) - 1
+        chunked = self._select_chunks(endpoint_url, query_text, rows, typed=typed) if rows > 0 else None
+        if chunked is None:
+            logger.warning("%s truncated the results of a query that cannot be fetched in chunks", endpoint_url)
+            return parsed
+        return chunked
+
+    def _select_once(
+        self, endpoint_url: str, query_text: str, abandoned: Event | None = None, *, typed: bool
+    ) -> tuple[ParsedResults, bool]:
+        """The rows of one SELECT request, and whether the endpoint truncated them. For an endpoint declaring
+        its result cap in max_rows, a response with that many rows is taken to have reached it, as is one that
+        Virtuoso marks as cut short in its headers. With truncation_headers, only the headers count, so a complete
+        result of exactly max_rows rows is not fetched again. Once abandoned is set, the response is closed unread."""
+        r = self._request_endpoint(endpoint_url, query_text)
         if r.status_code != HTTPStatus.OK:
-            msg = f"SPARQL {r.status_code}: {r.reason}"
-            raise RuntimeError(msg)
-        text = r.content.decode("utf-8-sig", errors="replace")
-        list_of_lines = text.splitlines()
-        return list(DictReader(list_of_lines))  # type: ignore[return-value]
+            r.close()
+            raise _StatusError(r.status_code, r.reason)
+        options = self._endpoint_options(endpoint_url)
+        # Closing the chunks also ends the query slot and replica timing of a body whose parsing failed.
+        with closing(self._response_chunks(r, abandoned)) as chunks:
+            parsed = parse_results(options.result_format, chunks, typed=typed)
+        if not options.max_rows:
+            return parsed, False
+        flagged = "X-SPARQL-MaxRows" in r.headers or r.headers.get("X-SQL-State") == "S1TAT"
+        if options.truncation_headers:
+            return parsed, flagged
+        return parsed, flagged or len(parsed.table) - 1 >= options.max_rows
+
+    def _select_chunks(self, endpoint_url: str, query_text: str, size: int, *, typed: bool) -> ParsedResults | None:
+        """The rows of a SELECT query fetched size rows at a time, or None when its chunks would not add up to
+        its result. Up to chunk_parallelism chunks are requested at once; a chunk with fewer rows than asked
+        ends the result, unless the endpoint truncated it, in which case the next chunks start after it and
+        are no larger than it. Either way the chunks requested after it are abandoned: those not sent yet are
+        cancelled, and the others stop reading their response and close it."""
+        select = parse_select_query(query_text)
+        if select is None or not chunkable(select):
+            return None
+        parallelism = self._endpoint_options(endpoint_url).chunk_parallelism
+        parsed = ParsedResults([])
+        offset = 0
+        pool = ThreadPoolExecutor(max_workers=parallelism)
+        abandoned = Event()
+        try:
+            while True:
+                offsets = [offset + index * size for index in range(parallelism)]
+                abandoned = Event()
+                futures = [
+                    pool.submit(
+                        self._select_once, endpoint_url, chunk_query(select, size, start), abandoned, typed=typed
+                    )
+                    for start in offsets
+                ]
+                for index, (start, future) in enumerate(zip(offsets, futures, strict=True)):
+                    chunk, truncated = future.result()
+                    registry.inc("ramose_query_chunks_total", endpoint=endpoint_url)
+                    if not parsed.table:
+                        parsed.table.extend(chunk.table[:1])
+                    parsed.extend(chunk)
+                    rows = len(chunk.table) - 1
+                    if rows >= size:
+                        offset = start + size
+                        continue
+                    Operation._abandon(futures[index + 1 :], abandoned)
+                    if not truncated or rows <= 0:
+                        return parsed
+                    registry.inc("ramose_truncated_results_total", endpoint=endpoint_url)
+                    offset, size = start + rows, rows
+                    break
+        finally:
+            abandoned.set()
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    def _abandon(futures: list[Future[tuple[ParsedResults, bool]]], abandoned: Event) -> None:
+        abandoned.set()
+        for future in futures:
+            future.cancel()
 
     @staticmethod
     def _normalize_sparql_json_resultset(result: dict[str, object]) -> list[dict[str, object]]:
@@ -1005,30 +1593,53 @@ class Operation:
         msg = f"HTTP status code {status_code}: SPARQL Anything request failed: {exc}"
         raise HttpError(status_code, msg) from exc
 
-    def _request_sparql_anything_select(self, kwargs: dict[str, object]) -> object:
-        if self._sa_engine is None:
-            msg = "SPARQL Anything engine not initialized"
-            raise RuntimeError(msg)
-        sa_engine = cast("SparqlAnythingEngine", self._sa_engine)
-
+    def _request_sparql_anything_select(self, sa_engine: SparqlAnythingEngine, kwargs: dict[str, object]) -> object:
         retry_wait = self.retry_wait
         for attempt in range(self.retry_attempts):
+            self._check_deadline()
             try:
                 return sa_engine.select(output_type=dict, **kwargs)
-            except Exception as exc:  # noqa: PERF203
+            except Exception as exc:
                 status_code = self._sparql_anything_error_status(exc)
                 if status_code is None:
                     raise
                 if status_code not in _RETRYABLE_STATUS_CODES or attempt + 1 == self.retry_attempts:
                     self._raise_sparql_anything_error(status_code, exc)
-                self._sleep_before_retry(retry_wait)
+                self._sleep_within_deadline(retry_wait)
                 retry_wait *= self.retry_backoff
 
         msg = "SPARQL Anything request did not run"
         raise RuntimeError(msg)
 
+    def _select_with_engine(self, pool: EnginePool, kwargs: dict[str, object]) -> object:
+        try:
+            sa_engine = pool.acquire(self._remaining_time())
+        except TimeoutError:
+            self._raise_deadline_exceeded()
+        healthy = True
+        try:
+            return self._request_sparql_anything_select(cast("SparqlAnythingEngine", sa_engine), kwargs)
+        except HttpError:
+            # Failures classified from the exception message come from the data sources, not the engine.
+            raise
+        except Exception:
+            healthy = False
+            raise
+        finally:
+            pool.release(sa_engine, healthy=healthy)
+
+    @contextmanager
+    def _localized_documents(self, query_text: str) -> Iterator[str]:
+        if self._document_cache is None:
+            yield query_text
+            return
+        timeout = self._request_timeout(DEFAULT_ENDPOINT_OPTIONS)
+        with self._document_cache.localized(query_text, timeout) as localized:
+            self._check_deadline()
+            yield localized
+
     def _run_sparql_anything_dicts(
-        self, query_text: str, values: dict[str, str] | None = None
+        self, query_text: str, values: dict[str, str] | None = None, endpoint_url: str = ""
     ) -> list[dict[str, object]]:
         """
         Execute a SPARQL Anything SELECT query via PySPARQL-Anything and return
@@ -1038,18 +1649,26 @@ class Operation:
                         (typically containing SERVICE <x-sparql-anything:...>).
         values: optional dict of template parameters for the query
                     (name -> value), passed to SPARQL Anything's `values=`.
-        """
-        if self._sa_engine is None:
-            if SparqlAnything is None:
-                msg = "pysparql_anything not installed. Install with: pip install ramose[sparql-anything]"
-                raise ImportError(msg)
-            self._sa_engine = SparqlAnything()
-
-        kwargs: dict[str, object] = {"query": query_text}
-        if values:
-            kwargs["values"] = {str(k): str(v) for k, v in values.items()}  # type: ignore[assignment]
 
-        result = self._request_sparql_anything_select(kwargs)
+        The engine is checked out of the process-wide pool of ramose.engine_pool
+        for the duration of the query, retries included, and so is a query slot
+        of endpoint_url, the endpoint named by the step (the operation's
+        endpoint by default). With a document cache, remote locations are first
+        rewritten to their local copies, which are not evicted before the query
+        has run.
+        """
+        if SparqlAnything is None:
+            msg = "pysparql_anything not installed. Install with: pip install ramose[sparql-anything]"
+            raise ImportError(msg)
+
+        pool = engine_pool(SparqlAnything, self.sparql_anything_engines)
+        # The local copies stay pinned in the document cache until the engine has read them.
+        with self._localized_documents(query_text) as localized:
+            kwargs: dict[str, object] = {"query": localized}
+            if values:
+                kwargs["values"] = {str(k): str(v) for k, v in values.items()}  # type: ignore[assignment]
+            with self._backend_slot(endpoint_url or self.tp):
+                result = self._select_with_engine(pool, kwargs)
 
         # Normalize to list[dict]
         if isinstance(result, list):
@@ -1071,19 +1690,14 @@ class Operation:
 
     def _run_query_dicts(self, endpoint_url: str, engine: str, query_text: str) -> list[dict[str, object]]:
         if engine == "sparql-anything":
-            return self._run_sparql_anything_dicts(query_text)
+            return self._run_sparql_anything_dicts(query_text, endpoint_url=endpoint_url)
         if engine != "sparql":
             msg = f"Unknown query engine {engine!r}"
             raise ValueError(msg)
         return self._run_sparql_dicts(endpoint_url, query_text)
 
-    def _inject_values_clause(self, query_text: str, vars_: list[str], acc_rows: list[dict[str, object]] | None) -> str:
-        # None means no prior step ran: leave the query unrestricted.
-        # An empty list means a prior step matched nothing: keep going so the empty
-        # accumulator injects an empty VALUES block, which correctly yields zero solutions.
-        if acc_rows is None:
-            return query_text
-
+    @staticmethod
+    def _values_tuples(vars_: list[str], acc_rows: list[dict[str, object]]) -> list[tuple[object, ...]]:
         # build distinct tuples for requested vars from the accumulator
         cols = [v.lstrip("?") for v in vars_]
         tuples, seen = [], set()
@@ -1092,7 +1706,10 @@ class Operation:
             if all(tup) and tup not in seen:
                 seen.add(tup)
                 tuples.append(tup)
+        return tuples
 
+    @staticmethod
+    def _values_row(tup: tuple[object, ...]) -> str:
         # format literals vs IRIs
         def fmt(x: object) -> str:
             s = str(x)
@@ -1100,8 +1717,12 @@ class Operation:
                 return f"<{s}>"
             return '"' + s.replace("\\", "\\\\").replace('"', '\\"') + '"'
 
+        return "  (" + " ".join(fmt(v) for v in tup) + ")"
+
+    @staticmethod
+    def _render_values_clause(query_text: str, vars_: list[str], value_rows: list[str]) -> str:
         head = "VALUES (" + " ".join(vars_) + ") {\n"
-        body = "\n".join("  (" + " ".join(fmt(v) for v in tup) + ")" for tup in tuples)
+        body = "\n".join(value_rows)
         tail = "\n}\n"
 
         i = query_text.find("{")
@@ -1111,6 +1732,89 @@ class Operation:
         j = i + 1
         return query_text[:j] + "\n" + head + body + tail + query_text[j:]
 
+    def _inject_values_clause(self, query_text: str, vars_: list[str], acc_rows: list[dict[str, object]] | None) -> str:
+        # None means no prior step ran: leave the query unrestricted.
+        # An empty list means a prior step matched nothing: keep going so the empty
+        # accumulator injects an empty VALUES block, which correctly yields zero solutions.
+        if acc_rows is None:
+            return query_text
+        value_rows = [Operation._values_row(tup) for tup in Operation._values_tuples(vars_, acc_rows)]
+        return Operation._render_values_clause(query_text, vars_, value_rows)
+
+    @staticmethod
+    def _chunk_values_rows(value_rows: list[str], max_tuples: int, max_bytes: int) -> list[list[str]]:
+        """Split the rows of a VALUES block so that each chunk holds at most max_tuples rows and at most
+        max_bytes bytes of rows (0 disables a limit). A chunk always takes at least one row, and an empty
+        block still yields one (empty) chunk so that the query keeps returning zero solutions."""
+        chunks: list[list[str]] = [[]]
+        chunk_bytes = 0
+        for value_row in value_rows:
+            row_bytes = len(value_row.encode("utf-8")) + 1
+            current = chunks[-1]
+            full_by_count = max_tuples > 0 and len(current) >= max_tuples
+            full_by_size = max_bytes > 0 and len(current) > 0 and chunk_bytes + row_bytes > max_bytes
+            if full_by_count or full_by_size:
+                chunks.append([])
+                chunk_bytes = 0
+            chunks[-1].append(value_row)
+            chunk_bytes += row_bytes
+        return chunks
+
+    def _values_chunk_queries(
+        self, endpoint_url: str, query_text: str, vars_: list[str], acc_rows: list[dict[str, object]] | None
+    ) -> list[str]:
+        if acc_rows is None:
+            return [query_text]
+        options = self._endpoint_options(endpoint_url)
+        value_rows = [Operation._values_row(tup) for tup in Operation._values_tuples(vars_, acc_rows)]
+        chunks = Operation._chunk_values_rows(value_rows, options.values_max_tuples, options.values_max_bytes)
+        return [Operation._render_values_clause(query_text, vars_, chunk) for chunk in chunks]
+
+    def _run_query_chunks(
+        self, endpoint_url: str, engine: str, queries: list[str], parallelism: int | None = None
+    ) -> list[dict[str, object]]:
+        """Run the sub-queries of a chunked VALUES injection and concatenate their rows in chunk order.
+        SPARQL chunks run in parallel, up to parallelism or else the endpoint's values_parallelism."""
+        workers = min(parallelism or self._endpoint_options(endpoint_url).values_parallelism, len(queries))
+        if engine != "sparql" or workers <= 1:
+            chunk_rows = [self._run_query_dicts(endpoint_url, engine, query) for query in queries]
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                chunk_rows = list(pool.map(lambda query: self._run_query_dicts(endpoint_url, engine, query), queries))
+        return [row for rows in chunk_rows for row in rows]
+
+    @staticmethod
+    def _join_key_variants(key: str) -> list[str]:
+        # every http(s) IRI that _norm_join_key maps to the same key
+        rest = key.strip().split("://", 1)[1].removesuffix("/")
+        return [f"{scheme}://{rest}{slash}" for scheme in ("http", "https") for slash in ("", "/")]
+
+    def _bind_join_queries(
+        self, endpoint_url: str, query_text: str, join: tuple[str, str, str], acc_rows: list[dict[str, object]]
+    ) -> list[str]:
+        """Pick the plan for a @@join: a bind join sends the distinct left keys to the right-hand query as a
+        VALUES block, a hash join runs the right-hand query unrestricted. Only the bind join needs fewer rows
+        than bind_join_threshold, and keys that are all http(s) IRIs; _join combines the rows the same way in
+        both plans."""
+        left_var, right_var, _how = join
+        column = left_var.lstrip("?")
+        keys = list(dict.fromkeys(str(row[column]) for row in acc_rows if row.get(column)))
+        blocker = bind_join_blocker(query_text, right_var)
+        # _values_row injects other values as plain literals, which miss typed and language-tagged keys.
+        if blocker is None and not all(key.strip().startswith(("http://", "https://")) for key in keys):
+            blocker = "a key is not an http(s) IRI"
+        if blocker is None and len(keys) > self.bind_join_threshold:
+            blocker = f"{len(keys)} keys exceed the threshold of {self.bind_join_threshold}"
+        if blocker is not None:
+            self.query_plan.append(f"hash_join: @@join {left_var} {right_var} on {endpoint_url} ({blocker})")
+            return [query_text]
+        self.query_plan.append(f"bind_join: @@join {left_var} {right_var} on {endpoint_url} ({len(keys)} keys)")
+        right_column = right_var.lstrip("?")
+        key_rows: list[dict[str, object]] = [
+            {right_column: variant} for key in keys for variant in Operation._join_key_variants(key)
+        ]
+        return self._values_chunk_queries(endpoint_url, query_text, [right_var], key_rows)
+
     @staticmethod
     def _drop_columns(rows: list[dict[str, object]], vars_: list[str]) -> list[dict[str, object]]:
         if not rows:
@@ -1200,10 +1904,24 @@ class Operation:
             return int(self.i["cache_duration"])
         return self._default_cache_ttl
 
+    @property
+    def _count_ttl(self) -> int:
+        if "count_cache_duration" in self.i:
+            return int(self.i["count_cache_duration"])
+        return self._count_cache_ttl
+
+    def _build_count_key(self, q_string: dict[str, list[str]]) -> str:
+        # Sorting and paging do not change how many rows there are.
+        ignored = {"format", "json", "sort", "page", "page_size", "total_items", "cursor"}
+        data_params = sorted((name, values) for name, values in q_string.items() if name not in ignored)
+        query_string = "&".join(f"{name}={value}" for name, values in data_params for value in values)
+        return f"count:{self.tp}:{self.op_url}?{query_string}"
+
     def _build_cache_key(self, q_string: dict[str, list[str]]) -> str:
         presentation_params = {"format", "json"}
-        if "@@page" not in self.i["sparql"]:
-            presentation_params |= {"page", "page_size"}
+        # Operations that paginate in their queries cache each page on its own.
+        if "@@page" not in self.i["sparql"] and not self.pushdown:
+            presentation_params |= {"page", "page_size", "cursor"}
         data_params = sorted((name, values) for name, values in q_string.items() if name not in presentation_params)
         if data_params:
             query_string = "&".join(f"{name}={value}" for name, values in data_params for value in values)
@@ -1223,6 +1941,24 @@ class Operation:
             page = Operation._parse_positive_int_param(q_string, "page")
         return page, page_size
 
+    def _extract_cursor(self, q_string: dict[str, list[str]], *, keyset: bool) -> Cursor | None:
+        """The cursor of the request, or None when it asks for no cursor page. keyset tells whether the endpoint
+        pages the query, which needs a cursor recording the last row of the previous page; a cursor recording
+        an offset for RAMOSE to slice at is rejected then, and the other way around."""
+        if "cursor" not in q_string or not self._is_builtin_param_active("cursor"):
+            return None
+        if "page_size" not in q_string or not self._is_builtin_param_active("page_size"):
+            Operation._raise_unprocessable("cursor requires page_size")
+        if "page" in q_string and self._is_builtin_param_active("page"):
+            Operation._raise_unprocessable("cursor cannot be combined with page")
+        try:
+            cursor = Cursor.decode(q_string["cursor"][0])
+        except ValueError:
+            Operation._raise_unprocessable(f"invalid cursor {q_string['cursor'][0]!r}")
+        if (cursor.values is not None and not keyset) or (cursor.offset and keyset):
+            Operation._raise_unprocessable(f"invalid cursor {q_string['cursor'][0]!r}")
+        return cursor
+
     def _has_custom_converter(self, q_string: dict[str, list[str]]) -> bool:
         if "format" in q_string and self._is_builtin_param_active("format"):
             for req_format in q_string["format"]:
@@ -1238,13 +1974,25 @@ class Operation:
         q_string: dict[str, list[str]],
         content_type: str,
     ) -> tuple[int, str, str]:
-        has_page_directive = "@@page" in self.i["sparql"]
-        if self._has_custom_converter(q_string) and not has_page_directive:
+        # A @@page step or the query itself already paginated upstream; do not paginate again here.
+        paged_upstream = "@@page" in self.i["sparql"] or self.pagination_info is not None
+        if self._has_custom_converter(q_string) and not paged_upstream:
+            if self._extract_cursor(q_string, keyset=False) is not None:
+                Operation._raise_unprocessable("cursor is not supported by custom formats")
             self.pagination_info = None
-        # A @@page step already paginated upstream; do not paginate again here.
-        elif not has_page_directive:
+        elif not paged_upstream:
             page_params = self._extract_pagination_params(q_string)
-            if page_params is not None:
+            cursor = self._extract_cursor(q_string, keyset=False)
+            if page_params is not None and cursor is not None:
+                page_size = page_params[1]
+                total_items = len(table) - 1
+                end = cursor.offset + page_size
+                table = [table[0], *table[1 + cursor.offset : 1 + end]]
+                next_cursor = Cursor(cursor.page + 1, offset=end).encode() if end < total_items else ""
+                self.pagination_info = build_cursor_pagination_info(
+                    self.op_url, q_string, cursor.page, page_size, next_cursor=next_cursor, total_items=total_items
+                )
+            elif page_params is not None:
                 page, page_size = page_params
                 total_items = len(table) - 1
                 total_pages = ceil(total_items / page_size)
@@ -1264,11 +2012,12 @@ class Operation:
 
     def _cache_value(self, rows: ResultTable) -> CachedResult:
         pagination: CachedPagination | None = None
-        if "@@page" in self.i["sparql"] and self.pagination_info is not None:
+        if self.pagination_info is not None:
             pagination = {
                 "page": self.pagination_info.page,
                 "page_size": self.pagination_info.page_size,
                 "total_items": self.pagination_info.total_items,
+                "next_cursor": self.pagination_info.next_cursor,
             }
         return {"rows": rows, "pagination": pagination}
 
@@ -1279,30 +2028,49 @@ class Operation:
         content_type: str,
     ) -> tuple[int, str, str]:
         entry = cast("CachedResult", cached_value)
-        if entry["pagination"] is not None:
+        if entry["pagination"] is not None and "cursor" in q_string:
+            pagination = entry["pagination"]
+            self.pagination_info = build_cursor_pagination_info(
+                self.op_url,
+                q_string,
+                pagination["page"],
+                pagination["page_size"],
+                next_cursor=pagination.get("next_cursor", ""),
+                total_items=pagination["total_items"],
+            )
+        elif entry["pagination"] is not None:
             pagination = entry["pagination"]
             self.pagination_info = build_pagination_info(
                 self.op_url,
                 q_string,
                 pagination["page"],
                 pagination["page_size"],
-                pagination["total_items"],
+                pagination["total_items"] or 0,
             )
         return self._paginate_and_format(entry["rows"], q_string, content_type)
 
     def _finalize_result(
-        self, csv_rows: list[list[str]] | list[list[str | object]], content_type: str
+        self,
+        csv_rows: list[list[str]] | list[list[str | object]] | list[list[str | TypedCell]],
+        content_type: str,
+        column_types: Mapping[str, str | None] | None = None,
+        *,
+        pushed_down: bool = False,
     ) -> tuple[int, str, str]:
-        """Run the shared pipeline: type fields, postprocess, filter, remove types, cache, paginate, format."""
+        """Run the shared pipeline: type fields, postprocess, filter, remove types, cache, paginate, format.
+        pushed_down skips the filters that the query already applied."""
         q_string = parse_qs(quote(self.url_parsed.query, safe="&="))
-        res = self.type_fields(csv_rows, self.i)  # type: ignore[arg-type]
+        infer_types = self._endpoint_options(self.tp).infer_types
+        res = self.type_fields(csv_rows, self.i, column_types, infer_undeclared=infer_types)  # type: ignore[arg-type]
         if self.addon is not None:
             res = self.postprocess(res, self.i, self.addon)
-        res = self.handling_params(q_string, res)
+        if not pushed_down:
+            res = self.handling_params(q_string, res)
         res = self.remove_types(res)
         if self.custom_params:
             res = self._apply_custom_postprocess_params(res, q_string)
-        if self._cache is not None and "cache_disable" not in self.i:
+        # Partial results are not cached, so that the next request tries the skipped steps again.
+        if self._cache is not None and "cache_disable" not in self.i and not self.skipped_steps:
             self._cache.set(self._build_cache_key(q_string), self._cache_value(res), expire=self._cache_ttl)
         return self._paginate_and_format(res, q_string, content_type)
 
@@ -1376,29 +2144,202 @@ class Operation:
 
         # Example: {"id":"5","area":["A1","A2"]}  ->  [{"id":"5","area":"A1"}, {"id":"5","area":"A2"}]
 
-        list_of_res = []
-        include_header_line = True
+        queries = []
         for comb in parameters_comb:
             query = self.i["sparql"]
             for param, val in comb.items():
                 query = query.replace(f"[[{param}]]", str(val))
+            queries.append(query)
 
-            r = self._request_sparql_csv(self.tp, query)
+        if self.pushdown and len(queries) == 1:
+            pushed = self._exec_pushdown(queries[0], content_type)
+            if pushed is not None:
+                return pushed
 
-            if r.status_code != HTTPStatus.OK:
-                return r.status_code, f"HTTP status code {r.status_code}: {r.reason}", "text/plain"
+        # The queries of several combinations run in parallel, up to the fanout_parallelism of the endpoint.
+        workers = min(self._endpoint_options(self.tp).fanout_parallelism, len(queries))
+        if workers <= 1:
+            results = [self._select_rows(query) for query in queries]
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(self._select_rows, queries))
+        parsed: ParsedResults | None = None
+        for response_rows in results:
+            # Include the header only from the first response
+            if parsed is None:
+                parsed = response_rows
+            else:
+                parsed.extend(response_rows)
 
-            # Re-encode to handle non-UTF8 characters in splitlines
-            list_of_lines = [line.decode("utf-8") for line in r.text.encode("utf-8").splitlines()]
+        if parsed is None:
+            parsed = ParsedResults([])
+        return self._finalize_result(parsed.table, content_type, parsed.column_types)
 
-            # Include the CSV header only from the first response
-            if not include_header_line:
-                list_of_lines = list_of_lines[1:]
-            include_header_line = False
+    def _exec_pushdown(self, query_text: str, content_type: str) -> tuple[int, str, str] | None:
+        """Run query_text with the built-in parameters of the request applied by the endpoint, or return None
+        when they cannot be, leaving them to handling_params."""
+        select = parse_select_query(query_text)
+        if select is None:
+            return None
+        q_string = parse_qs(quote(self.url_parsed.query, safe="&="))
+        pushdown = self._pushdown_plan(q_string, select.projection)
+        if pushdown is None:
+            return None
+        self.query_plan = [pushdown.describe()]
+        if pushdown.cursor is not None:
+            return self._exec_cursor_page(select, pushdown, q_string, content_type)
+        if not pushdown.page_size:
+            parsed = self._select_rows(page_query(select, pushdown))
+            return self._finalize_result(parsed.table, content_type, parsed.column_types, pushed_down=True)
+
+        total_items = self._known_total(q_string)
+        if total_items is not None:
+            parsed = self._select_rows(page_query(select, pushdown))
+        else:
+            # The page and its total are independent queries: the endpoint answers both at once.
+            pool = ThreadPoolExecutor(max_workers=1)
+            try:
+                counting = pool.submit(self._count_rows, count_query(select, pushdown))
+                parsed = self._select_rows(page_query(select, pushdown))
+                total_items = counting.result()
+            finally:
+                pool.shutdown(wait=False, cancel_futures=True)
+            registry.inc("ramose_pagination_totals_total", source="query")
+            if self._cache is not None and "cache_disable" not in self.i:
+                self._cache.set(self._build_count_key(q_string), total_items, expire=self._count_ttl)
+
+        Operation._validate_page_range(pushdown.page, total_items, ceil(total_items / pushdown.page_size))
+        self.pagination_info = build_pagination_info(
+            self.op_url, q_string, pushdown.page, pushdown.page_size, total_items
+        )
+        return self._finalize_result(parsed.table, content_type, parsed.column_types, pushed_down=True)
 
-            list_of_res += list_of_lines
+    def _exec_cursor_page(
+        self, select: SelectQuery, pushdown: Pushdown, q_string: dict[str, list[str]], content_type: str
+    ) -> tuple[int, str, str]:
+        """Run the query of a cursor page and point the next cursor at its last row. The total is reported only
+        when it is known without a COUNT query."""
+        cursor = cast("Cursor", pushdown.cursor)
+        parsed = self._select_rows(page_query(select, pushdown))
+        header, rows = parsed.table[0], parsed.table[1 : 1 + pushdown.page_size]
+        next_cursor = ""
+        if len(parsed.table) - 1 > pushdown.page_size:
+            lexical = [[cell[1] if isinstance(cell, tuple) else str(cell) for cell in row] for row in rows]
+            values = tuple(dict(zip(header, lexical[-1], strict=True)).get(name, "") for name in select.projection)
+            # Rows identical to the last one sort together: the next page skips those already returned.
+            skip = lexical.count(lexical[-1]) + (cursor.skip if cursor.values == values else 0)
+            next_cursor = Cursor(cursor.page + 1, values=values, skip=skip).encode()
+        self.pagination_info = build_cursor_pagination_info(
+            self.op_url,
+            q_string,
+            cursor.page,
+            pushdown.page_size,
+            next_cursor=next_cursor,
+            total_items=self._known_total(q_string),
+        )
+        return self._finalize_result([header, *rows], content_type, parsed.column_types, pushed_down=True)
+
+    def _known_total(self, q_string: dict[str, list[str]]) -> int | None:
+        """The number of rows before paging when it is known without a COUNT query: passed back by the client
+        as the total_items of the Link URLs (see ramose.paging), or counted by an earlier request."""
+        if "total_items" in q_string and "total_items" not in self.custom_params:
+            raw_value = q_string["total_items"][0]
+            if raw_value.isascii() and raw_value.isdigit():
+                registry.inc("ramose_pagination_totals_total", source="client")
+                return int(raw_value)
+        if self._cache is not None and "cache_disable" not in self.i:
+            cached = self._cache.get(self._build_count_key(q_string))
+            if isinstance(cached, int):
+                registry.inc("ramose_pagination_totals_total", source="cache")
+                return cached
+        return None
+
+    def _count_rows(self, query_text: str) -> int:
+        table = self._select_rows(query_text).table
+        cell = table[1][0] if len(table) > 1 else "0"
+        return int(cell[1] if isinstance(cell, tuple) else cell)
+
+    def _pushdown_plan(self, q_string: dict[str, list[str]], projection: list[str]) -> Pushdown | None:
+        """The require, filter, sort and paging parameters of the request as a Pushdown, or None when the
+        endpoint cannot apply all of them as handling_params would. A #postprocess function sees every row
+        before the parameters apply, so it rules pushdown out; a custom postprocess parameter sees them after
+        the filters but before paging, so it only keeps paging in RAMOSE."""
+        if "postprocess" in self.i:
+            return None
+        field_types = {name: type_name for type_name, name in findall(FIELD_TYPE_RE, self.i.get("field_type", ""))}
+        overridden = set(self.custom_params) | self.disabled_params
+
+        conditions: list[str] = []
+        if ("exclude" in q_string or "require" in q_string) and not overridden & {"require", "exclude"}:
+            fields = q_string["exclude"] if "exclude" in q_string else q_string["require"]
+            if not set(fields) <= set(projection):
+                return None
+            conditions.extend(require_condition(field) for field in fields)
+        if "filter" in q_string and "filter" not in overridden:
+            filters = self._pushdown_filters(q_string["filter"], projection, field_types)
+            if filters is None:
+                return None
+            conditions.extend(filters)
+
+        order_by: list[OrderKey] = []
+        if "sort" in q_string and "sort" not in overridden:
+            keys = self._pushdown_sort(q_string["sort"], projection, field_types)
+            if keys is None:
+                return None
+            order_by.extend(keys)
+
+        page, page_size, cursor = self._pushdown_paging(q_string, projection)
+        if not conditions and not order_by and not page_size:
+            return None
+        return Pushdown(tuple(conditions), tuple(order_by), page, page_size, cursor)
+
+    def _pushdown_paging(self, q_string: dict[str, list[str]], projection: list[str]) -> tuple[int, int, Cursor | None]:
+        # Page, page size and cursor of the request, with a page size of 0 when RAMOSE paginates the rows.
+        custom_postprocess = any(
+            conf["phase"] == "postprocess" and name in q_string for name, conf in self.custom_params.items()
+        )
+        if self._has_custom_converter(q_string) or custom_postprocess:
+            return 1, 0, None
+        page, page_size = self._extract_pagination_params(q_string) or (1, 0)
+        cursor = self._extract_cursor(q_string, keyset=True)
+        if cursor is None:
+            return page, page_size, None
+        if cursor.values is not None and len(cursor.values) != len(projection):
+            Operation._raise_unprocessable(f"invalid cursor {q_string['cursor'][0]!r}")
+        return cursor.page, page_size, cursor
+
+    @staticmethod
+    def _pushdown_filters(filters: list[str], projection: list[str], field_types: dict[str, str]) -> list[str] | None:
+        # Regular expressions stay in Python: SPARQL REGEX follows XPath syntax, not Python's.
+        conditions = []
+        for field in filters:
+            field_name, _, field_value = field.partition(":")
+            if field_name not in projection or field_types.get(field_name) not in PUSHDOWN_TYPES:
+                return None
+            if len(field_value) < 2 or field_value[0] not in ("<", ">", "="):  # noqa: PLR2004
+                return None
+            condition = comparison_condition(
+                field_name, field_types[field_name], field_value[0], field_value[1:].lower()
+            )
+            if condition is None:
+                return None
+            conditions.append(condition)
+        return conditions
 
-        return self._finalize_result(list(reader(list_of_res)), content_type)
+    @staticmethod
+    def _pushdown_sort(fields: list[str], projection: list[str], field_types: dict[str, str]) -> list[OrderKey] | None:
+        # _apply_sort sorts by each field in turn, so the one it sorts by last, the first in sorted order,
+        # decides the order and the others break ties.
+        keys = []
+        for field in sorted(fields):
+            order_match = fullmatch(r"(?P<direction>desc|asc)\((?P<field_name>[^()]+)\)", field)
+            direction, field_name = (
+                (order_match.group("direction"), order_match.group("field_name")) if order_match else ("asc", field)
+            )
+            if field_name not in projection or field_types.get(field_name) not in PUSHDOWN_TYPES:
+                return None
+            keys.extend(sort_keys(field_name, field_types[field_name], descending=direction == "desc"))
+        return keys
 
     def _exec_foreach_query(
         self,
@@ -1408,7 +2349,8 @@ class Operation:
         foreach: tuple[str, str, float],
         acc: list[dict[str, object]] | None,
     ) -> list[dict[str, object]]:
-        """Run one query per distinct value collected from the accumulator (@@foreach)."""
+        """Run one query per distinct value collected from the accumulator (@@foreach). Without a wait, the
+        queries run in parallel up to the endpoint's fanout_parallelism; with one, in sequence."""
         var_name, placeholder, delay = foreach
         column = var_name.lstrip("?")
 
@@ -1420,30 +2362,55 @@ class Operation:
                 seen.add(v)
                 values.append(v)
 
+        queries = [qtxt.replace(f"[[{placeholder}]]", str(val)) for val in values]
+        if not delay:
+            parallelism = self._endpoint_options(endpoint_url).fanout_parallelism
+            return self._run_query_chunks(endpoint_url, engine, queries, parallelism)
         all_rows = []
-        for idx_val, val in enumerate(values):
-            q_one = qtxt.replace(f"[[{placeholder}]]", str(val))
+        for idx_val, q_one in enumerate(queries):
             sub_rows = self._run_query_dicts(endpoint_url, engine, q_one)
             if sub_rows:
                 all_rows.extend(sub_rows)
-            if delay and idx_val + 1 < len(values):
-                time.sleep(delay)
+            if idx_val + 1 < len(queries):
+                self._sleep_within_deadline(delay)
 
         return all_rows
 
     def _exec_multi_source_query_step(
-        self, endpoint_url: str, engine: str, qtxt: str, state: dict[str, object]
+        self,
+        endpoint_url: str,
+        engine: str,
+        qtxt: str,
+        state: dict[str, object],
+        prefetched: Future[list[dict[str, object]]] | None = None,
     ) -> None:
         """Handle a QUERY step in the multi-source pipeline."""
-        if state["pending_foreach"] is not None:
-            rows = self._exec_foreach_query(endpoint_url, engine, qtxt, state["pending_foreach"], state["acc"])  # type: ignore[arg-type]
-            state["pending_foreach"] = None
-            state["pending_values_vars"] = None
+        foreach, values_vars = state["pending_foreach"], state["pending_values_vars"]
+        state["pending_foreach"] = state["pending_values_vars"] = None
+
+        def fetch(op: Operation) -> list[dict[str, object]]:
+            if prefetched is not None:
+                return prefetched.result()
+            if foreach is not None:
+                return op._exec_foreach_query(endpoint_url, engine, qtxt, foreach, state["acc"])  # type: ignore[arg-type]
+            queries = [qtxt]
+            if values_vars:
+                queries = op._values_chunk_queries(endpoint_url, qtxt, values_vars, state["acc"])  # type: ignore[arg-type]
+            elif state["pending_join"] and state["acc"] is not None and "bind_join" in op.optimizations:
+                queries = op._bind_join_queries(endpoint_url, qtxt, state["pending_join"], state["acc"])  # type: ignore[arg-type]
+            return op._run_query_chunks(endpoint_url, engine, queries)
+
+        optional_timeout = state["pending_optional"]
+        if optional_timeout is None:
+            rows = fetch(self)
         else:
-            if state["pending_values_vars"]:
-                qtxt = self._inject_values_clause(qtxt, state["pending_values_vars"], state["acc"])  # type: ignore[arg-type]
-                state["pending_values_vars"] = None
-            rows = self._run_query_dicts(endpoint_url, engine, qtxt)
+            state["pending_optional"] = None
+            optional_rows = self._run_optional_step(endpoint_url, fetch, cast("str", optional_timeout))
+            if optional_rows is None:
+                # The rows joined so far are kept as they are, as a left join with no matches would leave them.
+                state["pending_join"] = None
+                return
+            rows = optional_rows
 
         if state["acc"] is None:
             state["acc"] = rows
@@ -1455,9 +2422,40 @@ class Operation:
             msg = "Multiple QUERY steps without an explicit @@join directive"
             raise ValueError(msg)
 
-    def _exec_page_step(self, var: str, default_size: str, max_size: str, state: dict[str, object]) -> None:
-        q_string = parse_qs(quote(self.url_parsed.query, safe="&="))
+    def _run_optional_step(
+        self, endpoint_url: str, fetch: Callable[[Operation], list[dict[str, object]]], timeout: str
+    ) -> list[dict[str, object]] | None:
+        """The rows of an optional step, or None when its query fails or takes longer than timeout seconds. A
+        step still running when the request has no time left fails the request with 504. The step runs on a copy
+        of the operation whose deadline ends with its budget, so the query of a step given up on stops reading
+        its response at that deadline, freeing its endpoint's slots, and its rows are dropped."""
+        budget = float(timeout) if timeout else None
+        remaining = self._remaining_time()
+        if remaining is not None:
+            budget = remaining if budget is None else min(budget, remaining)
+        step = copy(self)
+        step._deadline = None if budget is None else time.monotonic() + budget  # noqa: SLF001
+        pool = ThreadPoolExecutor(max_workers=1)
+        try:
+            return pool.submit(fetch, step).result(timeout=budget)
+        except (FuturesTimeoutError, DeadlineExceededError):
+            if budget is not None and budget == remaining:
+                self._raise_deadline_exceeded()
+            reason = "timeout"
+        except (HttpError, RuntimeError, OSError) as exc:
+            reason = "error"
+            logger.warning("Optional step on %s failed: %s", endpoint_url, exc)
+        finally:
+            pool.shutdown(wait=False)
+        registry.inc("ramose_optional_steps_skipped_total", endpoint=endpoint_url, reason=reason)
+        self.skipped_steps.append(f"{endpoint_url} {reason}")
+        self.query_plan.append(f"optional: step on {endpoint_url} skipped ({reason})")
+        return None
 
+    def _page_params(self, default_size: str, max_size: str, q_string: dict[str, list[str]]) -> tuple[int, int] | None:
+        """The page and page size a @@page step keeps, or None when the request and the step set no page size."""
+        if "cursor" in q_string and self._is_builtin_param_active("cursor"):
+            Operation._raise_unprocessable("cursor is not supported by @@page")
         page_size_active = self._is_builtin_param_active("page_size")
         page_active = self._is_builtin_param_active("page")
         explicit_page_size = page_size_active and "page_size" in q_string
@@ -1469,7 +2467,7 @@ class Operation:
         else:
             if page_size_active and page_active and "page" in q_string:
                 Operation._raise_unprocessable("page requires page_size")
-            return
+            return None
         if page_size < 1:
             msg = f"page_size must be >= 1, got {page_size}"
             raise ValueError(msg)
@@ -1482,6 +2480,14 @@ class Operation:
         page = 1
         if "page" in q_string and page_active:
             page = Operation._parse_positive_int_param(q_string, "page")
+        return page, page_size
+
+    def _exec_page_step(self, var: str, default_size: str, max_size: str, state: dict[str, object]) -> None:
+        q_string = parse_qs(quote(self.url_parsed.query, safe="&="))
+        page_params = self._page_params(default_size, max_size, q_string)
+        if page_params is None:
+            return
+        page, page_size = page_params
 
         column = var.lstrip("?")
         acc = state["acc"]
@@ -1496,24 +2502,103 @@ class Operation:
         state["acc"] = [row for row in rows if row.get(column) in keep]
         self.pagination_info = build_pagination_info(self.op_url, q_string, page, page_size, total_items)
 
+    def _push_page_down(self, steps: list[tuple[str, ...]]) -> list[tuple[str, ...]]:
+        """With the page_pushdown optimization, have the SPARQL query that a pipeline starts with return only
+        the rows of the page that the @@page right after it keeps (see ramose.pushdown.key_page_query), so
+        that the following steps receive only the keys of that page. The @@page step becomes a PAGED step,
+        which takes the number of distinct keys from the client, the cache or a COUNT query."""
+        if len(steps) < 2 or steps[0][0] != "QUERY" or steps[0][2] != "sparql" or steps[1][0] != "PAGE":  # noqa: PLR2004
+            return steps
+        _, endpoint_url, _, query_text = steps[0]
+        _, var, default_size, max_size = steps[1]
+        select = parse_select_query(query_text)
+        blocker = page_pushdown_blocker(select, var)
+        if blocker is not None or select is None:
+            self.query_plan.append(f"page: @@page {var} runs in RAMOSE ({blocker})")
+            return steps
+        q_string = parse_qs(quote(self.url_parsed.query, safe="&="))
+        page_params = self._page_params(default_size, max_size, q_string)
+        if page_params is None:
+            return steps
+        page, page_size = page_params
+        total_items = self._known_total(q_string)
+        count = distinct_count_query(select, var) if total_items is None else ""
+        self.query_plan.append(f"page_pushdown: @@page {var} runs on {endpoint_url}")
+        return [
+            ("QUERY", endpoint_url, "sparql", key_page_query(select, var, page, page_size)),
+            ("PAGED", str(page), str(page_size), "" if total_items is None else str(total_items), endpoint_url, count),
+            *steps[2:],
+        ]
+
+    def _exec_paged_step(self, step: tuple[str, ...], counted: Future[list[dict[str, object]]] | None) -> None:
+        _, page, page_size, total, endpoint_url, count = step
+        q_string = parse_qs(quote(self.url_parsed.query, safe="&="))
+        if count:
+            rows = counted.result() if counted is not None else self._run_sparql_dicts(endpoint_url, count)
+            total = str(rows[0]["total"]) if rows else "0"
+            registry.inc("ramose_pagination_totals_total", source="query")
+            if self._cache is not None and "cache_disable" not in self.i:
+                self._cache.set(self._build_count_key(q_string), int(total), expire=self._count_ttl)
+        total_items = int(total)
+        Operation._validate_page_range(int(page), total_items, ceil(total_items / int(page_size)))
+        self.pagination_info = build_pagination_info(self.op_url, q_string, int(page), int(page_size), total_items)
+
     def _exec_multi_source(self, par_dict: dict[str, object], content_type: str) -> tuple[int, str, str]:
         """Execute a multi-source query pipeline with @@ directives."""
         steps = self._parse_steps(self.i["sparql"], self.tp, par_dict)
+        self.query_plan = []
+        if "merge_joins" in self.optimizations:
+            steps = merge_same_endpoint_joins(steps, self.query_plan)
+        if "page_pushdown" in self.optimizations:
+            steps = self._push_page_down(steps)
+
+        bind_join = "bind_join" in self.optimizations
+        prefetch = independent_queries(steps, bind_join=bind_join) if self.pipeline_workers > 1 else []
+        if len(prefetch) <= 1:
+            prefetch = []
+        # The count of a pushed-down @@page always runs alongside the page query.
+        counts = [index for index, step in enumerate(steps) if step[0] == "PAGED" and step[5]]
+        if not prefetch and not counts:
+            return self._run_multi_source_steps(steps, {}, content_type)
+
+        # Queries that do not read the accumulator start right away; the steps still run in order and
+        # wait for their prefetched rows, so joins and errors happen exactly as in a sequential run.
+        pool = ThreadPoolExecutor(max_workers=min(self.pipeline_workers, len(prefetch)) + len(counts))
+        try:
+            prefetched = {
+                index: pool.submit(self._run_query_chunks, steps[index][1], steps[index][2], [steps[index][3]])
+                for index in prefetch
+            }
+            for index in counts:
+                prefetched[index] = pool.submit(self._run_sparql_dicts, steps[index][4], steps[index][5])
+            return self._run_multi_source_steps(steps, prefetched, content_type)
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
 
+    def _run_multi_source_steps(
+        self,
+        steps: list[tuple[str, ...]],
+        prefetched: dict[int, Future[list[dict[str, object]]]],
+        content_type: str,
+    ) -> tuple[int, str, str]:
         state: dict[str, object] = {
             "acc": None,
             "pending_join": None,
             "pending_values_vars": None,
             "pending_foreach": None,
+            "pending_optional": None,
         }
 
-        for st in steps:
+        for index, st in enumerate(steps):
             tag = st[0]
 
             if tag == "QUERY":
-                self._exec_multi_source_query_step(st[1], st[2], st[3], state)
+                self._exec_multi_source_query_step(st[1], st[2], st[3], state, prefetched.get(index))
             elif tag == "JOIN":
                 state["pending_join"] = (st[1], st[2], st[3])
+            elif tag == "OPTIONAL_JOIN":
+                state["pending_join"] = (st[1], st[2], st[3])
+                state["pending_optional"] = st[4]
             elif tag == "REMOVE":
                 state["acc"] = self._drop_columns(state["acc"] or [], st[1])  # type: ignore[arg-type]
             elif tag == "VALUES_INJECT":
@@ -1522,6 +2607,8 @@ class Operation:
                 state["pending_foreach"] = (st[1], st[2], st[3])
             elif tag == "PAGE":
                 self._exec_page_step(st[1], st[2], st[3], state)
+            elif tag == "PAGED":
+                self._exec_paged_step(st, prefetched.get(index))
             else:
                 msg = f"Unknown step tag {tag}"
                 raise RuntimeError(msg)
@@ -1559,6 +2646,9 @@ class Operation:
         if str_method not in self.i["method"].split():
             return 405, f"HTTP status code 405: '{str_method}' method not allowed", "text/plain", {}
 
+        # Every backend call, retry and step from here on shares this time budget.
+        self._deadline = time.monotonic() + self.timeout if self.timeout else None
+
         try:
             if self._is_write(str_method):
                 status, body, ctype = self._exec_update(self._prepare_params(body_params), content_type)
@@ -1573,12 +2663,32 @@ class Operation:
         except Exception as e:  # noqa: BLE001
             return *self._format_error(500, e, "something unexpected happened - "), {}
 
+        return status, body, ctype, self._response_headers()
+
+    async def aexec(
+        self,
+        method: str = "get",
+        content_type: str = "application/json",
+        body_params: Mapping[str, object] | None = None,
+    ) -> tuple[int, str, str, dict[str, str]]:
+        """exec for asyncio callers. This is a wrapper that offloads exec to a thread of the event loop's
+        default executor, not an asynchronous implementation: the backend calls, retries and waits still block,
+        but they block that thread and never the loop. Each running operation holds a thread, so the executor
+        bounds how many run at once. Cancelling the coroutine does not stop the operation, whose result is then
+        dropped."""
+        return await asyncio.to_thread(self.exec, method, content_type, body_params)
+
+    def _response_headers(self) -> dict[str, str]:
         headers = {}
         if self.pagination_info is not None:
             link_header = build_link_header(self.pagination_info)
             if link_header:
                 headers["Link"] = link_header
-        return status, body, ctype, headers
+        if self.stale:
+            headers["Warning"] = _STALE_WARNING
+        elif self.skipped_steps:
+            headers["Warning"] = _PARTIAL_WARNING.format("; ".join(self.skipped_steps))
+        return headers
 
     def _prepare_params(self, body_params: Mapping[str, object] | None = None) -> dict[str, object]:
         par_dict = self._extract_params(body_params)
@@ -1595,6 +2705,9 @@ class Operation:
     ) -> tuple[int, str, str]:
         """Dispatch to the appropriate read execution path based on the SPARQL text content."""
         par_dict = self._prepare_params(body_params)
+        self.stale = False
+        self.skipped_steps = []
+        self.pagination_info = None
 
         if self._cache is not None and "cache_disable" not in self.i:
             q_string = parse_qs(quote(self.url_parsed.query, safe="&="))
@@ -1602,6 +2715,20 @@ class Operation:
             if cached_table is not None:
                 return self._format_cached_result(cached_table, q_string, content_type)
 
+        try:
+            return self._exec_backend(par_dict, content_type)
+        except CircuitOpenError:
+            if self._cache is None or "cache_disable" in self.i:
+                raise
+            q_string = parse_qs(quote(self.url_parsed.query, safe="&="))
+            stale_table = self._cache.get_stale(self._build_cache_key(q_string))
+            if stale_table is None:
+                raise
+            self.stale = True
+            registry.inc("ramose_stale_responses_total", endpoint=self.tp)
+            return self._format_cached_result(stale_table, q_string, content_type)
+
+    def _exec_backend(self, par_dict: dict[str, object], content_type: str) -> tuple[int, str, str]:
         sparql_text = self.i["sparql"]
         resolved_text = sparql_text
         for param, val in par_dict.items():
@@ -1660,16 +2787,26 @@ class Operation:
             return HTTPStatus.BAD_REQUEST, message, "text/plain"
 
         endpoint = self.update_endpoint or self.tp
+        options = self._endpoint_options(endpoint)
+        controller = rate_controller(endpoint, options)
+        self._wait_for_rate(endpoint, controller)
         try:
-            response = _http_session.post(
-                endpoint,
-                data={"update": update_text},
-                headers={"Accept": "application/json", **backend_auth_header(endpoint)},
-                timeout=DEFAULT_HTTP_TIMEOUT,
-            )
+            with self._backend_slot(endpoint):
+                response = _http_session.post(
+                    endpoint,
+                    data={"update": update_text},
+                    headers={
+                        "Accept": "application/json",
+                        **Operation._connection_headers(options),
+                        **backend_auth_header(endpoint),
+                    },
+                    timeout=self._request_timeout(options),
+                )
         except RequestException as exc:
+            self._check_deadline()
             msg = f"SPARQL update request failed: {exc}"
             raise RuntimeError(msg) from exc
+        Operation._record_rate(endpoint, controller, response)
 
         if response.status_code not in (HTTPStatus.OK, HTTPStatus.CREATED, HTTPStatus.NO_CONTENT):
             return response.status_code, f"HTTP status code {response.status_code}: {response.reason}", "text/plain"
@@ -1677,3 +2814,10 @@ class Operation:
         if self._cache is not None:
             self._cache.clear()
         return self._format_write_success(content_type)
+
+
+registry.describe(
+    "ramose_optional_steps_skipped_total",
+    "counter",
+    "Optional pipeline steps skipped because their query failed or timed out, by reason (error, timeout).",
+)
@@ -4,22 +4,75 @@
 
 from __future__ import annotations
 
+import json
+import zlib
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from dataclasses import dataclass
 from math import ceil
 from typing import NamedTuple
 from urllib.parse import urlencode
 
-_PAGINATION_KEYS = frozenset({"page", "page_size"})
+_PAGINATION_KEYS = frozenset({"page", "page_size", "total_items", "cursor"})
+# The cursor of the first page.
+FIRST_CURSOR = "*"
 
 
 class PaginationInfo(NamedTuple):
     page: int
     page_size: int
-    total_items: int
+    total_items: int | None
     self_url: str
     next_url: str
     prev_url: str
     first_url: str
     last_url: str
+    next_cursor: str = ""
+
+
+@dataclass(frozen=True)
+class Cursor:
+    """Where a cursor page starts. RAMOSE slicing the whole result records the offset of the page; an endpoint
+    paging the query records the values of the last row of the previous page, and how many rows of the previous
+    pages have exactly these values, so that the next page resumes right after them."""
+
+    page: int = 1
+    offset: int = 0
+    values: tuple[str, ...] | None = None
+    skip: int = 0
+
+    def encode(self) -> str:
+        if self.page == 1:
+            return FIRST_CURSOR
+        state: dict[str, object] = {"p": self.page}
+        if self.values is None:
+            state["o"] = self.offset
+        else:
+            state["v"] = list(self.values)
+            state["s"] = self.skip
+        packed = zlib.compress(json.dumps(state, separators=(",", ":")).encode())
+        return urlsafe_b64encode(packed).decode().rstrip("=")
+
+    @classmethod
+    def decode(cls, raw: str) -> Cursor:
+        """The cursor encoded as raw, or ValueError when raw is not a cursor."""
+        if raw == FIRST_CURSOR:
+            return cls()
+        try:
+            state = json.loads(zlib.decompress(urlsafe_b64decode(raw + "=" * (-len(raw) % 4))))
+        except (BinasciiError, zlib.error, UnicodeDecodeError, ValueError) as exc:
+            msg = "not a cursor"
+            raise ValueError(msg) from exc
+        if not isinstance(state, dict):
+            state = {}
+        page, offset, values, skip = state.get("p", 0), state.get("o", 0), state.get("v"), state.get("s", 0)
+        valid = all(isinstance(number, int) for number in (page, offset, skip)) and (
+            values is None or (isinstance(values, list) and all(isinstance(value, str) for value in values))
+        )
+        if not valid or page < 2 or offset < 0 or skip < 0:  # noqa: PLR2004
+            msg = "not a cursor"
+            raise ValueError(msg)
+        return cls(page, offset, None if values is None else tuple(values), skip)
 
 
 def build_pagination_info(
@@ -38,6 +91,24 @@ def build_pagination_info(
     return PaginationInfo(page, page_size, total_items, self_url, next_url, prev_url, first_url, last_url)
 
 
+def build_cursor_pagination_info(  # noqa: PLR0913
+    base_path: str,
+    query_params: dict[str, list[str]],
+    page: int,
+    page_size: int,
+    *,
+    next_cursor: str,
+    total_items: int | None,
+) -> PaginationInfo:
+    """Pagination info of a cursor page, linking to the next page and back to the first. There is no way back
+    from a cursor, so no prev or last link; total_items is left out of the links when it is not known."""
+    cursor = query_params.get("cursor", [FIRST_CURSOR])[0]
+    self_url = _cursor_url(base_path, query_params, cursor, page_size, total_items)
+    next_url = _cursor_url(base_path, query_params, next_cursor, page_size, total_items) if next_cursor else ""
+    first_url = _cursor_url(base_path, query_params, FIRST_CURSOR, page_size, total_items)
+    return PaginationInfo(page, page_size, total_items, self_url, next_url, "", first_url, "", next_cursor)
+
+
 def build_link_header(pagination_info: PaginationInfo) -> str:
     links = []
     if pagination_info.next_url:
@@ -45,7 +116,8 @@ def build_link_header(pagination_info: PaginationInfo) -> str:
     if pagination_info.prev_url:
         links.append(f'<{pagination_info.prev_url}>; rel="prev"')
     links.append(f'<{pagination_info.first_url}>; rel="first"')
-    links.append(f'<{pagination_info.last_url}>; rel="last"')
+    if pagination_info.last_url:
+        links.append(f'<{pagination_info.last_url}>; rel="last"')
     return ", ".join(links)
 
 
@@ -55,3 +127,14 @@ def _page_url(base_path: str, query_params: dict[str, list[str]], page: int, pag
     params["page_size"] = [str(page_size)]
     params["total_items"] = [str(total_items)]
     return f"{base_path}?{urlencode(params, doseq=True, safe=':,')}"
+
+
+def _cursor_url(
+    base_path: str, query_params: dict[str, list[str]], cursor: str, page_size: int, total_items: int | None
+) -> str:
+    params = {k: v for k, v in query_params.items() if k not in _PAGINATION_KEYS}
+    params["cursor"] = [cursor]
+    params["page_size"] = [str(page_size)]
+    if total_items is not None:
+        params["total_items"] = [str(total_items)]
+    return f"{base_path}?{urlencode(params, doseq=True, safe=':,*')}"
@@ -0,0 +1,278 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+# Steps that make the next QUERY read the accumulator built so far.
+_ACCUMULATOR_CONSUMERS = frozenset({"VALUES_INJECT", "FOREACH"})
+
+
+def independent_queries(steps: list[tuple[str, ...]], *, bind_join: bool = False) -> list[int]:
+    """Indexes of the SPARQL QUERY steps that can start before any earlier step has finished.
+
+    The pipeline forms a chain through the accumulator: @@join, @@remove and @@page need every earlier step.
+    A query only joins that chain when @@values or @@foreach feeds the accumulator into its text; any other
+    query depends on nothing and can be fetched up front, leaving only its @@join in the chain. With the
+    bind_join optimization, a query after @@join may also receive the accumulator keys."""
+    consumers = _ACCUMULATOR_CONSUMERS | {"JOIN", "OPTIONAL_JOIN"} if bind_join else _ACCUMULATOR_CONSUMERS
+    independent: list[int] = []
+    consumes_acc = False
+    for index, step in enumerate(steps):
+        tag = step[0]
+        if tag == "QUERY":
+            if not consumes_acc and step[2] == "sparql":
+                independent.append(index)
+            consumes_acc = False
+        elif tag in consumers:
+            consumes_acc = True
+    return independent
+
+
+OPTIMIZATIONS = frozenset({"merge_joins", "bind_join", "page_pushdown"})
+DEFAULT_BIND_JOIN_THRESHOLD = 1000
+
+
+def parse_optimizations(value: str) -> frozenset[str]:
+    """Parse the #optimize field of an operation: optimizer passes separated by spaces or commas."""
+    names = frozenset(value.replace(",", " ").split())
+    unknown = names - OPTIMIZATIONS
+    if unknown:
+        msg = f"Unknown optimization(s) in #optimize: {', '.join(sorted(unknown))}"
+        raise ValueError(msg)
+    return names
+
+
+_PROLOGUE_DECL = re.compile(r"\s*(?:PREFIX\s+([\w.-]*:)\s*(<[^<>\s]*>)|BASE\s*(<[^<>\s]*>))", re.IGNORECASE)
+_IRI_REF = re.compile(r"<[^<>\"{}|^`\\\s]*>")
+_SELECT_HEAD = re.compile(r"SELECT\s+(?:(?:DISTINCT|REDUCED)\s+)?(.*?)\s*(?:WHERE\s*)?$", re.IGNORECASE | re.DOTALL)
+_ORDER_BY = re.compile(r"\bORDER\s+BY\b(.*?)(?=\bLIMIT\b|\bOFFSET\b|\bVALUES\b|$)", re.IGNORECASE | re.DOTALL)
+_VARIABLE = re.compile(r"[?$](\w+)")
+_ORDER_BY_VARIABLE = re.compile(r"(?:(?:ASC|DESC)\s*\(\s*[?$]\w+\s*\)|[?$]\w+)", re.IGNORECASE)
+_GROUP_BY = re.compile(
+    r"\bGROUP\s+BY\b(.*?)(?=\bHAVING\b|\bORDER\b|\bLIMIT\b|\bOFFSET\b|\bVALUES\b|\}|$)", re.IGNORECASE | re.DOTALL
+)
+_SLICE = re.compile(r"\b(?:LIMIT|OFFSET)\s+\d", re.IGNORECASE)
+# QUERY, JOIN, QUERY
+_MERGE_WINDOW = 3
+# The join key as RAMOSE compares it (Operation._norm_join_key): the lexical form without surrounding spaces,
+# https for http and no trailing slash. An unbound key compares as "", like the empty cell it becomes in CSV.
+_NORMALIZED_KEY = (
+    r'COALESCE(REPLACE(REPLACE(REPLACE(STR(?{key}), "^\\s+|\\s+$", ""), "^http://", "https://"), "/$", ""), "")'
+)
+
+
+@dataclass(frozen=True)
+class SelectQuery:
+    prefixes: dict[str, str]
+    base: str | None
+    projection: list[str]
+    body: str
+    order_by: str
+
+
+def _skip_token(text: str, index: int) -> int:
+    """Return the index just past the string literal, IRI or comment starting at index, or index itself."""
+    char = text[index]
+    if char in "\"'":
+        end = index + 1
+        while end < len(text) and text[end] != char:
+            end += 2 if text[end] == "\\" else 1
+        return end + 1
+    if char == "<":
+        iri = _IRI_REF.match(text, index)
+        return iri.end() if iri else index
+    if char == "#":
+        newline = text.find("\n", index)
+        return len(text) if newline == -1 else newline + 1
+    return index
+
+
+def _scan(text: str, start: int = 0) -> Iterator[tuple[int, str]]:
+    """Yield (index, char) for the characters of a SPARQL text that sit outside literals, IRIs and comments."""
+    index = start
+    while index < len(text):
+        skipped = _skip_token(text, index)
+        if skipped != index:
+            index = skipped
+            continue
+        yield index, text[index]
+        index += 1
+
+
+def _projected_variables(projection: str) -> list[str]:
+    variables: list[str] = []
+    depth = 0
+    after_as = False
+    for part in re.findall(r"\(|\)|[?$]\w+|\bAS\b|[^\s()]+", projection, re.IGNORECASE):
+        if part == "(":
+            depth += 1
+        elif part == ")":
+            depth -= 1
+        elif part.upper() == "AS":
+            after_as = True
+            continue
+        elif part[0] in "?$" and (depth == 0 or (depth == 1 and after_as)):
+            variables.append(part[1:])
+        after_as = False
+    return variables
+
+
+def _where_clause_bounds(body: str) -> tuple[int, int] | None:
+    """Indexes of the braces that open and close the first top-level group, if all braces are balanced."""
+    depth = 0
+    where_start = where_end = -1
+    for index, char in _scan(body):
+        if char == "{":
+            if depth == 0 and where_start == -1:
+                where_start = index
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth < 0:
+                return None
+            if depth == 0 and where_end == -1:
+                where_end = index
+    if where_start == -1 or where_end == -1 or depth != 0:
+        return None
+    return where_start, where_end
+
+
+def parse_select_query(text: str) -> SelectQuery | None:
+    """Split a SPARQL SELECT query into prologue, projection and the rest, or return None when the query
+    cannot be reused as a sub-select (not a SELECT, SELECT *, a dataset clause, unbalanced braces)."""
+    prefixes: dict[str, str] = {}
+    base = None
+    position = 0
+    while declaration := _PROLOGUE_DECL.match(text, position):
+        if declaration.group(3):
+            base = declaration.group(3)
+        else:
+            prefixes[declaration.group(1)] = declaration.group(2)
+        position = declaration.end()
+    body = text[position:].strip()
+
+    bounds = _where_clause_bounds(body)
+    if bounds is None:
+        return None
+    where_start, where_end = bounds
+    head = _SELECT_HEAD.fullmatch(body[:where_start].strip())
+    if head is None or re.search(r"\bFROM\b", head.group(1), re.IGNORECASE):
+        return None
+    projection = _projected_variables(head.group(1))
+    if not projection or len(set(projection)) != len(projection):
+        return None
+
+    order_by = _ORDER_BY.search(body[where_end + 1 :])
+    return SelectQuery(prefixes, base, projection, body, order_by.group(1).strip() if order_by else "")
+
+
+def _merge_select_queries(left: SelectQuery, right: SelectQuery, key: str, how: str) -> str | None:
+    """Rewrite 'left @@join right' on the shared key variable as a single query with two sub-selects, or
+    return None when the single query would not give the same rows as the join RAMOSE runs itself."""
+    if set(left.projection) & set(right.projection) != {key}:
+        return None
+    if any(right.prefixes.get(prefix, iri) != iri for prefix, iri in left.prefixes.items()):
+        return None
+    if left.base and right.base and left.base != right.base:
+        return None
+    # Ordering by anything other than the projected variables cannot move to the outer query.
+    if not set(_VARIABLE.findall(left.order_by)) <= set(left.projection):
+        return None
+
+    join_key = f"{key}_join_key"
+    while join_key in left.projection or join_key in right.projection:
+        join_key += "_"
+    base = left.base or right.base
+    prologue = [f"BASE {base}"] if base else []
+    prologue += [f"PREFIX {prefix} {iri}" for prefix, iri in {**left.prefixes, **right.prefixes}.items()]
+    right_projection = [variable for variable in right.projection if variable != key]
+    projection = left.projection + right_projection
+    # The sides meet on the normalized key alone: the original key variables would be compared exactly.
+    right_group = "OPTIONAL {" if how == "left" else "{"
+    lines = [
+        *prologue,
+        "SELECT " + " ".join(f"?{variable}" for variable in projection) + " WHERE {",
+        "  {",
+        "    SELECT " + " ".join(f"?{variable}" for variable in [*left.projection, join_key]) + " WHERE {",
+        "      {",
+        left.body,
+        "      }",
+        f"      BIND({_NORMALIZED_KEY.format(key=key)} AS ?{join_key})",
+        "    }",
+        "  }",
+        f"  {right_group}",
+        "    SELECT " + " ".join(f"?{variable}" for variable in [*right_projection, join_key]) + " WHERE {",
+        "      {",
+        right.body,
+        "      }",
+        f"      BIND({_NORMALIZED_KEY.format(key=key)} AS ?{join_key})",
+        "    }",
+        "  }",
+        "}",
+    ]
+    if left.order_by:
+        lines.append(f"ORDER BY {left.order_by}")
+    return "\n".join(lines)
+
+
+def merge_same_endpoint_joins(steps: list[tuple[str, ...]], plan: list[str]) -> list[tuple[str, ...]]:
+    """Fold '@@join' between the leading query and the next one into a single backend query when both run on
+    the same SPARQL endpoint, join on a variable with the same name, and share no other column. Each merge is
+    described in plan."""
+    steps = list(steps)
+    while len(steps) >= _MERGE_WINDOW:
+        first, join, second = steps[:_MERGE_WINDOW]
+        if first[0] != "QUERY" or join[0] != "JOIN" or second[0] != "QUERY":
+            break
+        _, endpoint_url, engine, left_text = first
+        _, left_var, right_var, how = join
+        key = left_var.lstrip("?")
+        if engine != "sparql" or second[1:3] != (endpoint_url, engine) or right_var.lstrip("?") != key:
+            break
+        if how not in {"inner", "left"}:
+            break
+        left = parse_select_query(left_text)
+        right = parse_select_query(second[3])
+        merged = _merge_select_queries(left, right, key, how) if left and right else None
+        if merged is None:
+            break
+        steps[:_MERGE_WINDOW] = [("QUERY", endpoint_url, engine, merged)]
+        plan.append(f"merge_joins: @@join ?{key} ({how}) runs on {endpoint_url}")
+    return steps
+
+
+def bind_join_blocker(query_text: str, variable: str) -> str | None:
+    """Why the join keys cannot be injected as 'VALUES variable' into query_text, or None when they can.
+    The VALUES block goes at the top of the WHERE clause, so it must only narrow down the rows the query
+    would return anyway."""
+    name = variable.lstrip("?")
+    if re.search(rf"\bAS\s+[?$]{name}\b", query_text, re.IGNORECASE):
+        return f"?{name} is assigned in the query"
+    if _SLICE.search(query_text):
+        return "the query uses LIMIT or OFFSET"
+    for group_by in _GROUP_BY.finditer(query_text):
+        if name not in _VARIABLE.findall(group_by.group(1)):
+            return f"the query groups by something other than ?{name}"
+    return None
+
+
+def page_pushdown_blocker(select: SelectQuery | None, variable: str) -> str | None:
+    """Why @@page on variable cannot be applied by the query it follows, or None when it can. The page takes
+    the distinct values in the order of the query, so the query may only be ordered by variable itself."""
+    if select is None:
+        return "the query is not a SELECT with an explicit projection"
+    name = variable.lstrip("?")
+    if name not in select.projection:
+        return f"the query does not project ?{name}"
+    order_by = select.order_by.strip()
+    if order_by and (not _ORDER_BY_VARIABLE.fullmatch(order_by) or _VARIABLE.findall(order_by) != [name]):
+        return f"the query is ordered by something other than ?{name}"
+    return None
@@ -0,0 +1,264 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+from __future__ import annotations
+
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from types import FrameType
+
+    from flask import Flask
+
+    from ramose.asgi import ASGIApp
+
+    Serve = Callable[[socket.socket], None]
+
+logger = logging.getLogger(__name__)
+
+_POLL_INTERVAL = 0.2
+_HANDLED_SIGNALS = (signal.SIGHUP, signal.SIGTERM, signal.SIGINT)
+
+
+def listen_socket(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    """The listening socket that the workers share: each one accepts connections from it."""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    return sock
+
+
+class _RequestHandler(WSGIRequestHandler):
+    # Seconds an idle keep-alive connection holds a thread of the pool. Without a limit, one open connection
+    # would keep a worker from ever finishing a graceful shutdown.
+    timeout = 5
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    """The werkzeug server of the Flask app, handling the connections on a pool of threads instead of a new
+    thread for each one. Past threads connections, the next ones wait for a free thread."""
+
+    multithread = True
+
+    def __init__(self, app: Flask, sock: socket.socket, threads: int) -> None:
+        host, port = sock.getsockname()[:2]
+        super().__init__(host, port, app, handler=_RequestHandler, fd=sock.fileno())
+        self._pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="ramose")
+
+    def process_request(self, request: socket.socket, client_address: tuple[str, int]) -> None:  # type: ignore[override]
+        self._pool.submit(self._handle, request, client_address)
+
+    def _handle(self, request: socket.socket, client_address: tuple[str, int]) -> None:
+        try:
+            self.finish_request(request, client_address)
+        except Exception:  # noqa: BLE001
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self) -> None:
+        super().server_close()
+        if hasattr(self, "_pool"):
+            self._pool.shutdown(wait=True)
+
+
+def serve_wsgi(app: Flask, sock: socket.socket, threads: int) -> None:
+    """Serve app on sock until SIGTERM or SIGINT, then stop accepting connections and return once the requests
+    in progress are answered."""
+    server = PooledWSGIServer(app, sock, threads)
+
+    def stop(_signum: int, _frame: FrameType | None) -> None:
+        # shutdown() waits for serve_forever to return, which the main thread runs: it has to be called from
+        # another thread.
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    server.serve_forever()
+
+
+def serve_asgi(app: ASGIApp, sock: socket.socket, *, debug: bool = False) -> None:
+    """Serve app on sock under uvicorn, which stops gracefully on SIGTERM or SIGINT."""
+    import uvicorn  # noqa: PLC0415  # pyright: ignore[reportMissingImports]
+
+    config = uvicorn.Config(app, log_level="debug" if debug else "info")
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+@dataclass
+class _Worker:
+    generation: int
+    slot: int
+    started: float
+    kill_at: float | None = None
+
+
+class PreforkServer:
+    """Serves sock from workers processes forked from this one, which supervises them.
+
+    load runs in this process and returns the function each worker serves sock with: the spec files, addons
+    and everything else it loads are inherited by the workers copy-on-write. The objects it created are moved
+    to the permanent generation of the garbage collector (gc.freeze) before each fork, so that collections in
+    the workers do not write to, and so copy, the pages holding them.
+
+    A worker that dies is replaced, after restart_delay seconds when it lived less than that. SIGHUP reloads:
+    load runs again and a new generation of workers starts, while the previous one stops gracefully; when load
+    fails, the running workers keep serving. SIGTERM and SIGINT stop the workers gracefully and return. Workers
+    still running graceful_timeout seconds after they were asked to stop are killed."""
+
+    def __init__(
+        self,
+        sock: socket.socket,
+        workers: int,
+        load: Callable[[], Serve],
+        *,
+        restart_delay: float = 1.0,
+        graceful_timeout: float = 30.0,
+    ) -> None:
+        self.sock = sock
+        self.workers = workers
+        self.load = load
+        self.restart_delay = restart_delay
+        self.graceful_timeout = graceful_timeout
+        self._serve: Serve | None = None
+        self._generation = 0
+        self._children: dict[int, _Worker] = {}
+        self._respawn_at: dict[int, float] = {}
+        self._reload = False
+        self._stopping = False
+
+    def run(self) -> None:
+        signal.signal(signal.SIGHUP, self._request_reload)
+        signal.signal(signal.SIGTERM, self._request_stop)
+        signal.signal(signal.SIGINT, self._request_stop)
+        self._serve = self.load()
+        for slot in range(self.workers):
+            self._spawn(slot)
+        stop_sent = False
+        while not stop_sent or self._children:
+            self._reap()
+            if self._stopping and not stop_sent:
+                self._terminate(list(self._children))
+                stop_sent = True
+            elif self._reload and not self._stopping:
+                self._reload = False
+                self._reload_workers()
+            elif not self._stopping:
+                self._respawn()
+            self._kill_overdue()
+            time.sleep(_POLL_INTERVAL)
+        self.sock.close()
+
+    def _request_reload(self, _signum: int, _frame: FrameType | None) -> None:
+        self._reload = True
+
+    def _request_stop(self, _signum: int, _frame: FrameType | None) -> None:
+        self._stopping = True
+
+    def _spawn(self, slot: int) -> None:
+        serve = self._serve
+        if serve is None:  # pragma: no cover
+            return
+        gc.collect()
+        gc.freeze()
+        # The signals stay blocked until the worker has replaced the handlers of this process with its own.
+        signal.pthread_sigmask(signal.SIG_BLOCK, _HANDLED_SIGNALS)
+        pid = os.fork()
+        if pid == 0:  # pragma: no cover
+            self._run_worker(serve)
+        signal.pthread_sigmask(signal.SIG_UNBLOCK, _HANDLED_SIGNALS)
+        gc.unfreeze()
+        self._children[pid] = _Worker(self._generation, slot, time.monotonic())
+        logger.info("Started worker %d (slot %d, generation %d)", pid, slot, self._generation)
+
+    def _run_worker(self, serve: Serve) -> None:  # pragma: no cover
+        status = 0
+        try:
+            signal.signal(signal.SIGHUP, signal.SIG_IGN)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            signal.pthread_sigmask(signal.SIG_UNBLOCK, _HANDLED_SIGNALS)
+            serve(self.sock)
+        except BaseException:
+            logger.exception("Worker %d failed", os.getpid())
+            status = 1
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(status)
+
+    def _reap(self) -> None:
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            worker = self._children.pop(pid, None)
+            if worker is None or worker.generation != self._generation or self._stopping:
+                continue
+            logger.warning("Worker %d exited with status %d, restarting it", pid, os.waitstatus_to_exitcode(status))
+            lived = time.monotonic() - worker.started
+            self._respawn_at[worker.slot] = time.monotonic() + (self.restart_delay if lived < self.restart_delay else 0)
+
+    def _respawn(self) -> None:
+        now = time.monotonic()
+        for slot, respawn_at in list(self._respawn_at.items()):
+            if respawn_at <= now:
+                del self._respawn_at[slot]
+                self._spawn(slot)
+
+    def _reload_workers(self) -> None:
+        try:
+            serve = self.load()
+        except Exception:
+            logger.exception("Reload failed, the running workers keep serving")
+            return
+        previous = list(self._children)
+        self._serve = serve
+        self._generation += 1
+        self._respawn_at.clear()
+        for slot in range(self.workers):
+            self._spawn(slot)
+        self._terminate(previous)
+        logger.info("Reloaded: generation %d started, %d previous workers stopping", self._generation, len(previous))
+
+    def _terminate(self, pids: list[int]) -> None:
+        kill_at = time.monotonic() + self.graceful_timeout
+        for pid in pids:
+            worker = self._children.get(pid)
+            if worker is None or worker.kill_at is not None:
+                continue
+            worker.kill_at = kill_at
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                continue
+
+    def _kill_overdue(self) -> None:
+        now = time.monotonic()
+        for pid, worker in list(self._children.items()):
+            if worker.kill_at is not None and worker.kill_at <= now:
+                logger.warning("Worker %d did not stop within %gs, killing it", pid, self.graceful_timeout)
+                worker.kill_at = float("inf")
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    continue
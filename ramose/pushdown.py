@@ -0,0 +1,262 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from math import isfinite
+from typing import TYPE_CHECKING, NamedTuple
+
+from ramose.datatype import DataType
+from ramose.metrics import registry
+
+if TYPE_CHECKING:
+    from ramose.paging import Cursor
+    from ramose.planner import SelectQuery
+
+_XSD = "http://www.w3.org/2001/XMLSchema#"
+# The value that the DataType of a field compares and sorts by, with empty and unbound cells given the value
+# that DataType gives an empty string.
+_TYPED_KEYS = {
+    "str": 'COALESCE(LCASE(STR({term})), "")',
+    "int": f"COALESCE(<{_XSD}integer>(STR({{term}})), {DataType.int(None)})",
+    "float": f'COALESCE(<{_XSD}double>(STR({{term}})), "{DataType.float(None)!r}"^^<{_XSD}double>)',
+}
+_LEXICAL_KEY = 'COALESCE(STR({term}), "")'
+# Field types whose filters and sorting the endpoint can apply exactly as RAMOSE does.
+PUSHDOWN_TYPES = frozenset(_TYPED_KEYS)
+_VARIABLE = re.compile(r"[?$](\w+)")
+_SLICE = re.compile(r"\b(?:LIMIT|OFFSET)\s+\d", re.IGNORECASE)
+
+
+class OrderKey(NamedTuple):
+    """An ORDER BY key: template, an expression of {term}, applied to the value of field."""
+
+    template: str
+    field: str
+    descending: bool = False
+
+    def expression(self, term: str | None = None) -> str:
+        return self.template.format(term=f"?{self.field}" if term is None else term)
+
+    def order(self) -> str:
+        return f"DESC({self.expression()})" if self.descending else self.expression()
+
+
+@dataclass(frozen=True)
+class Pushdown:
+    """The require, filter, sort and paging parameters of a request, rewritten for the endpoint to apply.
+    page_size is 0 when the rows are paginated by RAMOSE; with a cursor, the page starts where it points
+    instead of at an offset."""
+
+    conditions: tuple[str, ...] = ()
+    order_by: tuple[OrderKey, ...] = ()
+    page: int = 1
+    page_size: int = 0
+    cursor: Cursor | None = None
+
+    def describe(self) -> str:
+        parts = []
+        if self.conditions:
+            parts.append(f"FILTER ({len(self.conditions)} conditions)")
+        if self.order_by:
+            parts.append(f"ORDER BY ({len(self.order_by)} keys)")
+        if self.page_size and self.cursor is not None:
+            parts.append(f"LIMIT {self.page_size} after the cursor")
+        elif self.page_size:
+            parts.append(f"LIMIT {self.page_size} OFFSET {(self.page - 1) * self.page_size}")
+        return "pushdown: " + ", ".join(parts)
+
+
+def _literal(value: str) -> str:
+    value = value.replace("\\", "\\\\").replace('"', '\\"')
+    return '"' + value.replace("\n", "\\n").replace("\r", "\\r").replace("\t", "\\t") + '"'
+
+
+def require_condition(field: str) -> str:
+    """Keep the rows with a value in field, as require does. STR makes the test hold for IRIs and typed
+    literals too, which '!= ""' alone would turn into a type error."""
+    return f'(BOUND(?{field}) && STR(?{field}) != "")'
+
+
+def comparison_condition(field: str, type_name: str, operator: str, value: str) -> str | None:
+    """Keep the rows that filter=field:<operator><value> keeps, comparing the values of type_name, or return
+    None when value is not one of them."""
+    key = _TYPED_KEYS[type_name].format(term=f"?{field}")
+    if type_name == "str":
+        literal = _literal(value)
+    else:
+        try:
+            number = int(value) if type_name == "int" else float(value)
+        except ValueError:
+            return None
+        if not isfinite(number):
+            return None
+        literal = f'"{number!r}"^^<{_XSD}{"integer" if type_name == "int" else "double"}>'
+    return f"{key} {operator} {literal}"
+
+
+def sort_keys(field: str, type_name: str, *, descending: bool) -> list[OrderKey]:
+    """ORDER BY keys sorting field as sort does: by typed value, then by lexical form."""
+    return [
+        OrderKey(_TYPED_KEYS[type_name], field, descending),
+        OrderKey(_LEXICAL_KEY, field, descending),
+    ]
+
+
+def _prologue(select: SelectQuery) -> list[str]:
+    prologue = [f"BASE {select.base}"] if select.base else []
+    return prologue + [f"PREFIX {prefix} {iri}" for prefix, iri in select.prefixes.items()]
+
+
+def _filtered(select: SelectQuery, pushdown: Pushdown, *extra: str) -> list[str]:
+    lines = ["  {", select.body, "  }"]
+    conditions = [*pushdown.conditions, *extra]
+    if conditions:
+        lines.append(f"  FILTER({' && '.join(conditions)})")
+    return lines
+
+
+def _keyset_order(select: SelectQuery, pushdown: Pushdown) -> list[OrderKey]:
+    """The ORDER BY keys of a cursor page: the sort keys, then the lexical form of every projected variable,
+    so that only identical rows tie."""
+    keys = list(pushdown.order_by)
+    keys.extend(OrderKey(_LEXICAL_KEY, variable) for variable in select.projection)
+    return list(dict.fromkeys(keys))
+
+
+def _after_condition(keys: list[OrderKey], values: dict[str, str]) -> str:
+    # The rows sorting at or after the row with values: each key is compared with its value for that row, the
+    # value given as a literal in place of the variable, so that the endpoint computes both sides alike.
+    equal = [f"{key.expression()} = {key.expression(_literal(values[key.field]))}" for key in keys]
+    branches = [
+        [
+            *equal[:index],
+            f"{key.expression()} {'<' if key.descending else '>'} {key.expression(_literal(values[key.field]))}",
+        ]
+        for index, key in enumerate(keys)
+    ]
+    branches.append(equal)
+    return "(" + " || ".join("(" + " && ".join(branch) + ")" for branch in branches) + ")"
+
+
+def page_query(select: SelectQuery, pushdown: Pushdown) -> str:
+    """The query returning the rows of the request: the original query as a sub-select, with the filters,
+    ordering and slice of pushdown around it. Its own ORDER BY follows the pushed keys, since rows that tie
+    on them keep the order the query gives them.
+
+    A cursor page is ordered by _keyset_order instead, starts at the row its cursor points to, and has one
+    row more than the page, which tells whether another page follows."""
+    order_by = [key.order() for key in pushdown.order_by]
+    if select.order_by and set(_VARIABLE.findall(select.order_by)) <= set(select.projection):
+        order_by.append(select.order_by)
+    after: list[str] = []
+    cursor = pushdown.cursor
+    if cursor is not None:
+        keys = _keyset_order(select, pushdown)
+        order_by = [key.order() for key in keys]
+        if cursor.values is not None:
+            after.append(_after_condition(keys, dict(zip(select.projection, cursor.values, strict=True))))
+    lines = [
+        *_prologue(select),
+        "SELECT " + " ".join(f"?{variable}" for variable in select.projection) + " WHERE {",
+        *_filtered(select, pushdown, *after),
+        "}",
+    ]
+    if order_by:
+        lines.append("ORDER BY " + " ".join(order_by))
+    if pushdown.page_size and cursor is not None:
+        lines.append(f"LIMIT {pushdown.page_size + 1}")
+        if cursor.skip:
+            lines.append(f"OFFSET {cursor.skip}")
+    elif pushdown.page_size:
+        lines.append(f"LIMIT {pushdown.page_size}")
+        lines.append(f"OFFSET {(pushdown.page - 1) * pushdown.page_size}")
+    return "\n".join(lines)
+
+
+def count_query(select: SelectQuery, pushdown: Pushdown) -> str:
+    """The query counting the rows that the request selects before they are paginated."""
+    return "\n".join([*_prologue(select), "SELECT (COUNT(*) AS ?total) WHERE {", *_filtered(select, pushdown), "}"])
+
+
+def key_page_query(select: SelectQuery, variable: str, page: int, page_size: int) -> str:
+    """The query returning the rows of one page of the distinct values of variable, as @@page keeps them: a
+    sub-select picks the values of the page in the order of the query, ?variable when it has none, and the
+    query joined with it returns their rows. Rows without a value are dropped on both sides, as @@page does."""
+    name = variable.lstrip("?")
+    pushdown = Pushdown((require_condition(name),))
+    order_by = select.order_by or f"?{name}"
+    indented = ["  " + line for line in _filtered(select, pushdown)]
+    lines = [
+        *_prologue(select),
+        "SELECT " + " ".join(f"?{projected}" for projected in select.projection) + " WHERE {",
+        "  {",
+        f"    SELECT DISTINCT ?{name} WHERE {{",
+        *indented,
+        "    }",
+        f"    ORDER BY {order_by}",
+        f"    LIMIT {page_size}",
+        f"    OFFSET {(page - 1) * page_size}",
+        "  }",
+        "  {",
+        *indented,
+        "  }",
+        "}",
+    ]
+    if select.order_by:
+        lines.append(f"ORDER BY {select.order_by}")
+    return "\n".join(lines)
+
+
+def distinct_count_query(select: SelectQuery, variable: str) -> str:
+    """The query counting the distinct values of variable that @@page paginates."""
+    name = variable.lstrip("?")
+    return "\n".join(
+        [
+            *_prologue(select),
+            f"SELECT (COUNT(DISTINCT ?{name}) AS ?total) WHERE {{",
+            *_filtered(select, Pushdown((require_condition(name),))),
+            "}",
+        ]
+    )
+
+
+def chunkable(select: SelectQuery | None) -> bool:
+    """Whether the rows of select can be fetched in chunks that add up to its result: the chunks are sliced
+    from one order, so the query may only be ordered by projected variables, and a LIMIT or OFFSET of its own
+    has to follow an ORDER BY to pick the same rows every time."""
+    if select is None or not set(_VARIABLE.findall(select.order_by)) <= set(select.projection):
+        return False
+    return not (_SLICE.search(select.body) and not select.order_by)
+
+
+def chunk_query(select: SelectQuery, size: int, offset: int) -> str:
+    """The query returning size rows of select from offset on. The rows keep the order of the query, with ties
+    broken by the lexical form of every projected variable, so that consecutive chunks never overlap."""
+    order_by = [select.order_by] if select.order_by else []
+    order_by.extend(OrderKey(_LEXICAL_KEY, variable).order() for variable in select.projection)
+    return "\n".join(
+        [
+            *_prologue(select),
+            "SELECT " + " ".join(f"?{variable}" for variable in select.projection) + " WHERE {",
+            *_filtered(select, Pushdown()),
+            "}",
+            "ORDER BY " + " ".join(order_by),
+            f"LIMIT {size}",
+            f"OFFSET {offset}",
+        ]
+    )
+
+
+registry.describe(
+    "ramose_pagination_totals_total",
+    "counter",
+    "Totals of pushed-down pages, by where they came from (client, cache, query).",
+)
+registry.describe("ramose_query_chunks_total", "counter", "Chunks of SELECT queries fetched from an endpoint.")
+registry.describe(
+    "ramose_truncated_results_total", "counter", "SELECT responses an endpoint truncated to its result cap."
+)
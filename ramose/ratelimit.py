@@ -0,0 +1,162 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+from __future__ import annotations
+
+import logging
+import time
+from collections import deque
+from contextlib import suppress
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from threading import Lock
+from typing import TYPE_CHECKING
+
+from ramose.metrics import Sample, registry
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from ramose.endpoints import EndpointOptions
+
+logger = logging.getLogger(__name__)
+
+# Factor applied to the rate when the endpoint pushes back, and how long after a decrease further pushback is
+# put down to requests already sent at the old rate.
+_DECREASE_FACTOR = 0.5
+_DECREASE_INTERVAL = 1.0
+# Requests per second added to the rate by each healthy response.
+_RATE_STEP = 0.1
+# Seconds of sent requests used to estimate the rate of an endpoint that was not throttled yet.
+_SENT_WINDOW = 10.0
+
+
+def retry_after_seconds(value: str | None, now: datetime | None = None) -> float | None:
+    """Seconds to wait according to a Retry-After header, given either as seconds or as an HTTP date, or None
+    when the header is missing or invalid."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    with suppress(TypeError, ValueError):
+        moment = parsedate_to_datetime(value)
+        return max(0.0, (moment - (now or datetime.now(timezone.utc))).total_seconds())
+    return None
+
+
+class RateController:
+    """Token bucket pacing the requests sent to one endpoint, with a rate adjusted by AIMD.
+
+    The controller does not throttle until the endpoint first answers 429 or 503. The rate then starts at half
+    the rate requests were being sent at, and is halved again on each further 429 or 503 (additive increase,
+    multiplicative decrease): every healthy response raises it by a small step, so the controller keeps probing
+    for the highest rate the endpoint accepts. A Retry-After holds every request until it expires. The rate
+    never drops below min_rate, nor rises above max_rate when that is set; with max_rate the controller
+    throttles from the start."""
+
+    def __init__(
+        self,
+        url: str,
+        min_rate: float,
+        max_rate: float = 0.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.url = url
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self._clock = clock
+        self._lock = Lock()
+        self.rate: float | None = max_rate or None
+        self._tokens = 1.0
+        self._refilled = clock()
+        self._decreased = float("-inf")
+        self._sent: deque[float] = deque()
+
+    def reserve(self) -> float:
+        """Take a token for one request, and return the seconds to wait before sending it."""
+        with self._lock:
+            now = self._clock()
+            start = max(now, self._refilled)
+            if self.rate is not None:
+                if now > self._refilled:
+                    self._tokens = min(1.0, self._tokens + (now - self._refilled) * self.rate)
+                    self._refilled = now
+                self._tokens -= 1
+                start = self._refilled + max(0.0, -self._tokens) / self.rate
+            else:
+                self._sent.append(start)
+                while self._sent[0] < start - _SENT_WINDOW:
+                    self._sent.popleft()
+            return start - now
+
+    def succeeded(self) -> None:
+        """Probe upward after a healthy response."""
+        with self._lock:
+            if self.rate is None:
+                return
+            self.rate += _RATE_STEP
+            if self.max_rate:
+                self.rate = min(self.rate, self.max_rate)
+
+    def throttled(self, retry_after: float | None = None) -> None:
+        """Back off after a 429 or 503, pausing for retry_after seconds when the endpoint asked for it."""
+        with self._lock:
+            now = self._clock()
+            if retry_after:
+                # No token is handed out, nor refilled, before the pause is over.
+                self._refilled = max(self._refilled, now + retry_after)
+            if now - self._decreased < _DECREASE_INTERVAL:
+                return
+            self._decreased = now
+            current = self.rate if self.rate is not None else self._sent_rate(now)
+            self.rate = max(self.min_rate, current * _DECREASE_FACTOR)
+            self._sent.clear()
+        registry.inc("ramose_rate_decreases_total", endpoint=self.url)
+        logger.info("Throttled by %s: rate lowered to %.2f requests/s", self.url, self.rate)
+
+    def _sent_rate(self, now: float) -> float:
+        if not self._sent:
+            return self.min_rate
+        return len(self._sent) / max(1.0, now - self._sent[0])
+
+
+_controllers: dict[str, RateController] = {}
+_controllers_lock = Lock()
+
+
+def rate_controller(endpoint_url: str, options: EndpointOptions) -> RateController | None:
+    """The rate controller shared by every operation that queries endpoint_url, or None when the endpoint does
+    not set adaptive_rate. A controller whose bounds changed is replaced by a fresh one."""
+    if not options.adaptive_rate:
+        return None
+    with _controllers_lock:
+        controller = _controllers.get(endpoint_url)
+        if controller is None or (controller.min_rate, controller.max_rate) != (options.min_rate, options.max_rate):
+            controller = RateController(endpoint_url, options.min_rate, options.max_rate)
+            _controllers[endpoint_url] = controller
+        return controller
+
+
+def reset_rate_controllers() -> None:
+    with _controllers_lock:
+        _controllers.clear()
+
+
+def rate_controller_samples() -> list[Sample]:
+    with _controllers_lock:
+        controllers = list(_controllers.items())
+    return [
+        Sample("ramose_rate_limit", {"endpoint": endpoint_url}, controller.rate or 0)
+        for endpoint_url, controller in controllers
+    ]
+
+
+registry.describe(
+    "ramose_rate_limit", "gauge", "Requests per second allowed to an endpoint by its rate controller (0 unlimited)."
+)
+registry.describe("ramose_rate_decreases_total", "counter", "Times an endpoint's rate was lowered after a 429 or 503.")
+registry.describe("ramose_throttled_responses_total", "counter", "Backend responses with status 429 or 503.")
+registry.describe("ramose_rate_wait_seconds_total", "counter", "Seconds requests waited for the rate controller.")
+registry.add_collector(rate_controller_samples)
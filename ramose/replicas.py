@@ -0,0 +1,205 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+from __future__ import annotations
+
+import logging
+import time
+from collections import deque
+from math import ceil
+from random import Random
+from threading import Lock
+from typing import TYPE_CHECKING
+
+from ramose.metrics import Sample, registry
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable
+
+    from ramose.endpoints import EndpointOptions
+
+logger = logging.getLogger(__name__)
+
+REPLICA_SEPARATOR = "|"
+# Latencies kept per endpoint, and how many are needed before the hedge delay follows their percentile.
+_LATENCY_WINDOW = 200
+_MIN_LATENCY_SAMPLES = 20
+# Weight of the newest request in the moving averages of a replica, and the requests a replica must have
+# answered before its error rate can eject it.
+_EWMA_WEIGHT = 0.3
+_MIN_EJECTION_SAMPLES = 5
+# How much slower a replica that always fails looks: without it, a replica refusing connections would look fast.
+_ERROR_PENALTY = 10
+_random = Random()  # noqa: S311
+
+
+def split_replicas(value: str) -> tuple[str, ...]:
+    """The URLs of an endpoint declared as mirrored replicas, 'https://a/sparql|https://b/sparql'. The first
+    one is the primary: options, cache keys and metrics of the endpoint are declared and reported under it."""
+    return tuple(url.strip() for url in value.split(REPLICA_SEPARATOR) if url.strip())
+
+
+class LatencyWindow:
+    """The most recent response times of an endpoint, in seconds."""
+
+    def __init__(self, size: int = _LATENCY_WINDOW) -> None:
+        self._lock = Lock()
+        self._samples: deque[float] = deque(maxlen=size)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, percent: float) -> float | None:
+        """Nearest-rank percentile of the recorded latencies, or None when there are none."""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        return samples[max(0, ceil(percent / 100 * len(samples)) - 1)]
+
+
+_windows: dict[str, LatencyWindow] = {}
+_windows_lock = Lock()
+
+
+def latency_window(endpoint_url: str) -> LatencyWindow:
+    with _windows_lock:
+        return _windows.setdefault(endpoint_url, LatencyWindow())
+
+
+def reset_latency_windows() -> None:
+    with _windows_lock:
+        _windows.clear()
+
+
+def hedge_delay(endpoint_url: str, options: EndpointOptions) -> float | None:
+    """Seconds to wait for a replica before sending the same query to another one, or None when the endpoint
+    does not hedge. The delay is the hedge_percentile of the endpoint's recent latencies, or hedge_delay until
+    enough of them have been observed."""
+    if not options.hedge_percentile:
+        return None
+    window = latency_window(endpoint_url)
+    if len(window) < _MIN_LATENCY_SAMPLES:
+        return options.hedge_delay
+    observed = window.percentile(options.hedge_percentile)
+    return options.hedge_delay if observed is None else observed
+
+
+class ReplicaHealth:
+    """Moving averages of the latency and error rate of one replica, and the requests it is serving.
+
+    A replica whose error rate reaches eject_error_rate, over at least a few requests, is ejected: it gets no
+    queries for eject_duration seconds, and then is readmitted with a clean record."""
+
+    def __init__(self, url: str, clock: Callable[[], float] = time.monotonic) -> None:
+        self.url = url
+        self._clock = clock
+        self._lock = Lock()
+        self.latency = 0.0
+        self.error_rate = 0.0
+        self.samples = 0
+        self.in_flight = 0
+        self.ejected_until = 0.0
+
+    def start(self) -> None:
+        with self._lock:
+            self.in_flight += 1
+
+    def cancel(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+
+    def finish(self, seconds: float, *, failed: bool, options: EndpointOptions) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            weight = 1.0 if not self.samples else _EWMA_WEIGHT
+            self.latency += weight * (seconds - self.latency)
+            self.error_rate += weight * (float(failed) - self.error_rate)
+            self.samples += 1
+            if (
+                options.eject_error_rate
+                and not self.ejected_until
+                and self.samples >= _MIN_EJECTION_SAMPLES
+                and self.error_rate >= options.eject_error_rate
+            ):
+                self.ejected_until = self._clock() + options.eject_duration
+                logger.warning(
+                    "Ejecting replica %s for %gs: error rate %.0f%%, latency %.3fs",
+                    self.url,
+                    options.eject_duration,
+                    self.error_rate * 100,
+                    self.latency,
+                )
+                registry.inc("ramose_replica_ejections_total", endpoint=self.url)
+
+    @property
+    def ejected(self) -> bool:
+        with self._lock:
+            if self.ejected_until and self._clock() >= self.ejected_until:
+                self.ejected_until = 0.0
+                self.error_rate = 0.0
+                self.samples = 0
+                logger.info("Readmitting replica %s", self.url)
+            return bool(self.ejected_until)
+
+    def score(self) -> float:
+        """Expected cost of a new query: the moving latency, scaled by the queries already in flight and
+        inflated by the error rate."""
+        with self._lock:
+            return self.latency * (self.in_flight + 1) * (1 + _ERROR_PENALTY * self.error_rate)
+
+
+_health: dict[str, ReplicaHealth] = {}
+_health_lock = Lock()
+
+
+def replica_health(url: str) -> ReplicaHealth:
+    with _health_lock:
+        health = _health.get(url)
+        if health is None:
+            health = _health[url] = ReplicaHealth(url)
+        return health
+
+
+def reset_replica_health() -> None:
+    with _health_lock:
+        _health.clear()
+
+
+def rank_replicas(replicas: Iterable[str]) -> list[str]:
+    """Replicas in the order to query them. The first is the better of two replicas picked at random (power of
+    two choices), so load spreads over the replicas while slow or busy ones get less of it; the others follow
+    by score. Ejected replicas are left out, unless all of them are ejected."""
+    candidates = [url for url in replicas if not replica_health(url).ejected] or list(replicas)
+    if len(candidates) == 1:
+        return candidates
+    first = min(_random.sample(candidates, 2), key=lambda url: replica_health(url).score())
+    rest = sorted((url for url in candidates if url != first), key=lambda url: replica_health(url).score())
+    return [first, *rest]
+
+
+def replica_health_samples() -> list[Sample]:
+    with _health_lock:
+        replicas = list(_health.values())
+    samples: list[Sample] = []
+    for health in replicas:
+        labels = {"endpoint": health.url}
+        samples.append(Sample("ramose_replica_ejected", labels, int(health.ejected)))
+        samples.append(Sample("ramose_replica_latency_seconds", labels, health.latency))
+        samples.append(Sample("ramose_replica_error_rate", labels, health.error_rate))
+    return samples
+
+
+registry.describe("ramose_hedged_requests_total", "counter", "Queries sent to a second replica as a hedge.")
+registry.describe("ramose_hedge_wins_total", "counter", "Hedged queries answered first by the second replica.")
+registry.describe("ramose_replica_failovers_total", "counter", "Queries retried on another replica after failing.")
+registry.describe("ramose_replica_ejections_total", "counter", "Times a replica was ejected for its error rate.")
+registry.describe("ramose_replica_ejected", "gauge", "Whether a replica is ejected (1) or receives queries (0).")
+registry.describe("ramose_replica_latency_seconds", "gauge", "Moving average of a replica's response time.")
+registry.describe("ramose_replica_error_rate", "gauge", "Moving average of a replica's failed requests.")
+registry.add_collector(replica_health_samples)
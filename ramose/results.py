@@ -0,0 +1,303 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+from __future__ import annotations
+
+import json
+from csv import reader
+from dataclasses import dataclass, field
+from io import StringIO
+from itertools import islice
+from re import DOTALL
+from re import compile as re_compile
+from typing import TYPE_CHECKING, TypeVar
+
+from ramose.datatype import DataType
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+RESULT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "json": "application/sparql-results+json",
+    "tsv": "text/tab-separated-values",
+}
+
+_XSD = "http://www.w3.org/2001/XMLSchema#"
+_INT_TYPES = (
+    "integer int long short byte nonNegativeInteger positiveInteger negativeInteger nonPositiveInteger "
+    "unsignedLong unsignedInt unsignedShort unsignedByte"
+)
+# XSD datatypes whose literals RAMOSE can type without a #field_type, keyed to the DataType cast they match.
+XSD_DATATYPES: dict[str, str] = {
+    **{_XSD + name: "int" for name in _INT_TYPES.split()},
+    **{_XSD + name: "float" for name in ("decimal", "float", "double")},
+    **{_XSD + name: "datetime" for name in ("dateTime", "dateTimeStamp", "date", "gYear", "gYearMonth")},
+    **{_XSD + name: "duration" for name in ("duration", "dayTimeDuration", "yearMonthDuration")},
+}
+_DATA_TYPE = DataType()
+
+_TSV_LITERAL = re_compile(r'"(.*)"(?:@[A-Za-z0-9-]+|\^\^<([^<>]*)>)?', DOTALL)
+_TSV_ESCAPES = {"t": "\t", "b": "\b", "n": "\n", "r": "\r", "f": "\f", '"': '"', "'": "'", "\\": "\\"}
+_UCHAR_LENGTHS = {"u": 4, "U": 8}
+# Rows converted at a time, column by column.
+_BATCH_ROWS = 10_000
+
+T = TypeVar("T")
+
+
+# A literal whose datatype gave its Python value, as the (value, lexical form) pair built by type_fields.
+TypedCell = tuple[object, str]
+Cell = str | TypedCell
+
+
+@dataclass
+class ParsedResults:
+    """Rows of a SPARQL SELECT result, header first. column_types maps a column to the DataType name shared by
+    all its bound cells, or None when they disagree or some are untyped; columns with no bound cell are
+    absent."""
+
+    table: list[list[Cell]]
+    column_types: dict[str, str | None] = field(default_factory=dict)
+
+    def extend(self, other: ParsedResults) -> None:
+        """Append the rows of another result with the same header, merging the column types."""
+        self.table.extend(other.table[1:])
+        for column, type_name in other.column_types.items():
+            if column not in self.column_types:
+                self.column_types[column] = type_name
+            elif self.column_types[column] != type_name:
+                self.column_types[column] = None
+
+
+class _ColumnTypes:
+    def __init__(self, width: int) -> None:
+        self._seen: list[str | None] = [None] * width
+        self._mixed = [False] * width
+
+    def typed(self, index: int, type_name: str) -> None:
+        seen = self._seen[index]
+        if seen is None:
+            self._seen[index] = type_name
+        elif seen != type_name:
+            self._mixed[index] = True
+
+    def untyped(self, index: int) -> None:
+        self._mixed[index] = True
+
+    def as_dict(self, header: list[str]) -> dict[str, str | None]:
+        return {
+            column: None if mixed else seen
+            for column, seen, mixed in zip(header, self._seen, self._mixed, strict=False)
+            if seen is not None or mixed
+        }
+
+
+def iter_lines(chunks: Iterable[bytes]) -> Iterator[str]:
+    """Decode a streamed response body one line at a time, so that it is never held in memory whole.
+    Lines keep their terminators, so csv.reader preserves line breaks inside quoted fields. A leading BOM
+    is dropped and undecodable bytes are replaced."""
+    encoding = "utf-8-sig"
+    pending: list[bytes] = []
+    for chunk in chunks:
+        # Cutting after a newline byte never splits a UTF-8 character.
+        cut = chunk.rfind(b"\n") + 1
+        if not cut:
+            pending.append(chunk)
+            continue
+        pending.append(chunk[:cut])
+        yield from StringIO(b"".join(pending).decode(encoding, errors="replace"), newline="")
+        pending = [chunk[cut:]]
+        encoding = "utf-8"
+    tail = b"".join(pending)
+    if tail:
+        yield from StringIO(tail.decode(encoding, errors="replace"), newline="")
+
+
+def _typed_cell(lexical: str, datatype: str | None, index: int, types: _ColumnTypes) -> Cell:
+    type_name = XSD_DATATYPES.get(datatype) if datatype else None
+    if type_name is not None:
+        try:
+            cell = (_DATA_TYPE.get_func(type_name)(lexical), lexical)
+        except ValueError:
+            pass
+        else:
+            types.typed(index, type_name)
+            return cell
+    types.untyped(index)
+    return lexical
+
+
+def _typed_column(lexicals: list[str], type_name: str) -> list[Cell] | None:
+    """Cells for a column whose bound literals share one datatype, or None when one of them does not parse."""
+    cast = _DATA_TYPE.get_func(type_name)
+    try:
+        return [(cast(lexical), lexical) if lexical else "" for lexical in lexicals]
+    except ValueError:
+        return None
+
+
+def _batches(rows: Iterable[T], size: int) -> Iterator[list[T]]:
+    iterator = iter(rows)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def parse_csv(chunks: Iterable[bytes]) -> ParsedResults:
+    return ParsedResults(list(reader(iter_lines(chunks))))  # type: ignore[arg-type]
+
+
+def _json_cell(term: dict[str, str] | None, index: int, types: _ColumnTypes, *, typed: bool) -> Cell:
+    if term is None:
+        return ""
+    value = term["value"]
+    if term["type"] == "bnode":
+        value = "_:" + value
+    if typed:
+        return _typed_cell(value, term.get("datatype"), index, types)
+    types.untyped(index)
+    return value
+
+
+def _json_column(terms: list[dict[str, str] | None], index: int, types: _ColumnTypes, *, typed: bool) -> list[Cell]:
+    kinds = {(term["type"], term.get("datatype")) for term in terms if term is not None}
+    if not kinds:
+        return [""] * len(terms)
+    if len(kinds) == 1:
+        ((kind, datatype),) = kinds
+        type_name = XSD_DATATYPES.get(datatype) if typed and datatype else None
+        lexicals = [term["value"] if term is not None else "" for term in terms]
+        if type_name is not None:
+            cells = _typed_column(lexicals, type_name)
+            if cells is not None:
+                types.typed(index, type_name)
+                return cells
+        elif kind != "bnode":
+            types.untyped(index)
+            return lexicals  # type: ignore[return-value]
+    return [_json_cell(term, index, types, typed=typed) for term in terms]
+
+
+def parse_json(chunks: Iterable[bytes], *, typed: bool = True) -> ParsedResults:
+    """Parse application/sparql-results+json. Terms are written as in the CSV results: IRIs and literals by
+    their lexical form, blank nodes as _:label, unbound variables as empty strings. Rows are converted a batch
+    and a column at a time, so that a column of one kind of term takes a single pass."""
+    document = json.loads(b"".join(chunks))
+    header: list[str] = document["head"].get("vars") or []
+    bindings: list[dict[str, dict[str, str]]] = document["results"].get("bindings", [])
+    types = _ColumnTypes(len(header))
+    table: list[list[Cell]] = [list[Cell](header)]
+    for batch in _batches(bindings, _BATCH_ROWS):
+        columns = [
+            _json_column([binding.get(variable) for binding in batch], index, types, typed=typed)
+            for index, variable in enumerate(header)
+        ]
+        table.extend(map(list, zip(*columns, strict=True)))
+    return ParsedResults(table, types.as_dict(header))
+
+
+def _unescape(text: str) -> str:
+    if "\\" not in text:
+        return text
+    parts: list[str] = []
+    index = 0
+    while (slash := text.find("\\", index)) != -1:
+        parts.append(text[index:slash])
+        code = text[slash + 1 : slash + 2]
+        if code in _UCHAR_LENGTHS:
+            end = slash + 2 + _UCHAR_LENGTHS[code]
+            parts.append(chr(int(text[slash + 2 : end], 16)))
+            index = end
+        else:
+            parts.append(_TSV_ESCAPES.get(code, code))
+            index = slash + 2
+    parts.append(text[index:])
+    return "".join(parts)
+
+
+def _abbreviated_datatype(term: str) -> str | None:
+    """Datatype of a number or boolean written in the Turtle shorthand, e.g. 42, 1.5, 1e3, true."""
+    if term[0].isdigit() or term[0] in "+-.":
+        if "e" in term or "E" in term:
+            return _XSD + "double"
+        return _XSD + ("decimal" if "." in term else "integer")
+    return _XSD + "boolean" if term in {"true", "false"} else None
+
+
+def _tsv_term(term: str) -> tuple[str, str | None]:
+    """Lexical form and datatype IRI of a term in SPARQL TSV (Turtle) syntax."""
+    if not term:
+        return "", None
+    if term[0] == "<":
+        return term[1:-1], None
+    if term[0] == '"':
+        literal = _TSV_LITERAL.fullmatch(term)
+        if literal is None:
+            return term, None
+        return _unescape(literal.group(1)), literal.group(2)
+    return term, _abbreviated_datatype(term)
+
+
+def _tsv_cell(term: str, index: int, types: _ColumnTypes, *, typed: bool) -> Cell:
+    if not term:
+        return ""
+    lexical, datatype = _tsv_term(term)
+    if typed:
+        return _typed_cell(lexical, datatype, index, types)
+    types.untyped(index)
+    return lexical
+
+
+def _tsv_column(terms: tuple[str, ...], index: int, types: _ColumnTypes, *, typed: bool) -> list[Cell]:
+    bound = [term for term in terms if term]
+    if not bound:
+        return [""] * len(terms)
+    starts = {term[0] for term in bound}
+    # IRIs, and literals without escapes, language tag or datatype, only lose their delimiters.
+    if starts == {"<"} or (starts == {'"'} and all(term[-1] == '"' and "\\" not in term for term in bound)):
+        types.untyped(index)
+        return [term[1:-1] for term in terms]
+    if typed and all(term.isdigit() for term in bound):
+        cells = _typed_column(list(terms), "int")
+        if cells is not None:
+            types.typed(index, "int")
+            return cells
+    return [_tsv_cell(term, index, types, typed=typed) for term in terms]
+
+
+def _tsv_rows(lines: Iterable[str], width: int) -> Iterator[list[str]]:
+    for line in lines:
+        fields = line.rstrip("\r\n").split("\t")
+        if len(fields) == width:
+            yield fields
+        # A single empty field is a blank line, unless there is one variable and it is unbound.
+        elif fields != [""]:
+            yield (fields + [""] * width)[:width]
+
+
+def parse_tsv(chunks: Iterable[bytes], *, typed: bool = True) -> ParsedResults:
+    """Parse text/tab-separated-values SPARQL results into the same cells as parse_json, a batch and a column
+    at a time."""
+    lines = iter_lines(chunks)
+    head = next(lines, None)
+    if head is None:
+        return ParsedResults([[]])
+    header = [variable.lstrip("?$") for variable in head.rstrip("\r\n").split("\t")]
+    types = _ColumnTypes(len(header))
+    table: list[list[Cell]] = [list[Cell](header)]
+    for batch in _batches(_tsv_rows(lines, len(header)), _BATCH_ROWS):
+        columns = [
+            _tsv_column(column, index, types, typed=typed) for index, column in enumerate(zip(*batch, strict=True))
+        ]
+        table.extend(map(list, zip(*columns, strict=True)))
+    return ParsedResults(table, types.as_dict(header))
+
+
+def parse_results(result_format: str, chunks: Iterable[bytes], *, typed: bool = True) -> ParsedResults:
+    """Parse the body of a SPARQL SELECT response, given as the byte chunks it arrives in."""
+    if result_format == "json":
+        return parse_json(chunks, typed=typed)
+    if result_format == "tsv":
+        return parse_tsv(chunks, typed=typed)
+    return parse_csv(chunks)
@@ -4,7 +4,9 @@
 
 from __future__ import annotations
 
+import asyncio
 from typing import TYPE_CHECKING
+from unittest.mock import patch
 
 import pytest
 
@@ -89,6 +91,8 @@ class TestBestMatch:
             "addon",
             "sparql_http_method",
             "sources_map",
+            "replicas",
+            "endpoint_options",
             "disable_params",
             "auth_required",
             "conf_file",
@@ -111,6 +115,23 @@ class TestGetOp:
         assert result == (404, "HTTP status code 404: the operation requested does not exist", "text/plain")
 
 
+class TestAsyncApi:
+    def test_aget_op_matches_like_get_op(self, api_mgr: APIManager) -> None:
+        assert isinstance(asyncio.run(api_mgr.aget_op("/v1/metadata/doi:10.1234/test")), Operation)
+        assert asyncio.run(api_mgr.aget_op("/v1/nonexistent")) == api_mgr.get_op("/v1/nonexistent")
+
+    def test_aexec_of_an_unknown_operation_returns_its_error(self, api_mgr: APIManager) -> None:
+        status, body, content_type, headers = asyncio.run(api_mgr.aexec("/v1/nonexistent"))
+        assert (status, content_type, headers) == (404, "text/plain", {})
+        assert "does not exist" in body
+
+    def test_aexec_runs_the_operation(self, api_mgr: APIManager) -> None:
+        with patch.object(Operation, "exec", return_value=(200, "[]", "application/json", {})) as mock_exec:
+            result = asyncio.run(api_mgr.aexec("/v1/metadata/doi:10.1234/test", content_type="text/csv"))
+        assert result == (200, "[]", "application/json", {})
+        mock_exec.assert_called_once_with("get", "text/csv", None)
+
+
 class TestGetOpInvalidParam:
     def test_invalid_param_value_returns_400(self, api_mgr: APIManager) -> None:
         result = api_mgr.get_op(api_mgr.base_url[0] + "/author/orcid:10.1162/qss_a_00292")
@@ -230,6 +251,132 @@ class TestRetryConfig:
         assert (op.retry_attempts, op.retry_wait, op.retry_backoff) == (4, 0.1, 3.0)
 
 
+class TestPipelineWorkersConfig:
+    def test_default_is_sequential(self, api_mgr: APIManager) -> None:
+        op = api_mgr.get_op(api_mgr.base_url[0] + "/metadata/doi:10.1234")
+        assert isinstance(op, Operation)
+        assert op.pipeline_workers == 1
+
+    def test_operation_overrides_api_manager(self, tmp_path: Path) -> None:
+        spec = tmp_path / "spec.hf"
+        spec.write_text(
+            "#url /api\n"
+            "#type api\n"
+            "#base http://localhost:5000\n"
+            "#endpoint http://localhost:9999/sparql\n"
+            "#title Pipeline API\n"
+            "#description Pipeline API.\n"
+            "#version 0.0.1\n"
+            "\n"
+            "#url /items/{id}\n"
+            "#type operation\n"
+            "#id str(.+)\n"
+            "#method get\n"
+            "#description Pipeline operation.\n"
+            "#field_type str(id)\n"
+            "#pipeline_workers 3\n"
+            '#sparql SELECT ?id WHERE { BIND("[[id]]" AS ?id) }\n',
+            encoding="utf-8",
+        )
+        am = APIManager([str(spec)], pipeline_workers=8)
+        op = am.get_op("/api/items/ABC")
+        assert isinstance(op, Operation)
+        assert op.pipeline_workers == 3
+
+    def test_api_manager_value_applies(self) -> None:
+        am = APIManager(["test/data/meta_v1.hf"], endpoint_override="http://localhost:9999/sparql", pipeline_workers=4)
+        op = am.get_op(am.base_url[0] + "/metadata/doi:10.1234")
+        assert isinstance(op, Operation)
+        assert op.pipeline_workers == 4
+
+
+class TestTimeoutConfig:
+    def test_default_has_no_deadline(self, api_mgr: APIManager) -> None:
+        op = api_mgr.get_op(api_mgr.base_url[0] + "/metadata/doi:10.1234")
+        assert isinstance(op, Operation)
+        assert op.timeout == 0
+
+    def test_operation_overrides_api_manager(self, tmp_path: Path) -> None:
+        spec = tmp_path / "spec.hf"
+        spec.write_text(
+            "#url /api\n"
+            "#type api\n"
+            "#base http://localhost:5000\n"
+            "#endpoint http://localhost:9999/sparql\n"
+            "#title Timeout API\n"
+            "#description Timeout API.\n"
+            "#version 0.0.1\n"
+            "\n"
+            "#url /items/{id}\n"
+            "#type operation\n"
+            "#id str(.+)\n"
+            "#method get\n"
+            "#description Timeout operation.\n"
+            "#field_type str(id)\n"
+            "#timeout 2.5\n"
+            '#sparql SELECT ?id WHERE { BIND("[[id]]" AS ?id) }\n',
+            encoding="utf-8",
+        )
+        op = APIManager([str(spec)], timeout=30).get_op("/api/items/ABC")
+        assert isinstance(op, Operation)
+        assert op.timeout == 2.5
+
+    def test_api_manager_value_applies(self) -> None:
+        am = APIManager(["test/data/meta_v1.hf"], endpoint_override="http://localhost:9999/sparql", timeout=30)
+        op = am.get_op(am.base_url[0] + "/metadata/doi:10.1234")
+        assert isinstance(op, Operation)
+        assert op.timeout == 30
+
+
+class TestOptimizeConfig:
+    @staticmethod
+    def _write_spec(tmp_path: Path, optimize: str) -> Path:
+        spec = tmp_path / "spec.hf"
+        spec.write_text(
+            "#url /api\n"
+            "#type api\n"
+            "#base http://localhost:5000\n"
+            "#endpoint http://localhost:9999/sparql\n"
+            "#title Optimize API\n"
+            "#description Optimize API.\n"
+            "#version 0.0.1\n"
+            "\n"
+            "#url /items/{id}\n"
+            "#type operation\n"
+            "#id str(.+)\n"
+            "#method get\n"
+            "#description Optimize operation.\n"
+            "#field_type str(id)\n"
+            f"#optimize {optimize}\n"
+            '#sparql SELECT ?id WHERE { BIND("[[id]]" AS ?id) }\n',
+            encoding="utf-8",
+        )
+        return spec
+
+    def test_default_has_no_optimizations(self, api_mgr: APIManager) -> None:
+        op = api_mgr.get_op(api_mgr.base_url[0] + "/metadata/doi:10.1234")
+        assert isinstance(op, Operation)
+        assert op.optimizations == frozenset()
+
+    def test_operation_field_enables_passes(self, tmp_path: Path) -> None:
+        am = APIManager([str(self._write_spec(tmp_path, "merge_joins"))])
+        op = am.get_op("/api/items/ABC")
+        assert isinstance(op, Operation)
+        assert op.optimizations == frozenset({"merge_joins"})
+
+    def test_bind_join_threshold_field(self, tmp_path: Path) -> None:
+        spec = self._write_spec(tmp_path, "bind_join")
+        spec.write_text(spec.read_text(encoding="utf-8").replace("#optimize", "#bind_join_threshold 50\n#optimize"))
+        op = APIManager([str(spec)]).get_op("/api/items/ABC")
+        assert isinstance(op, Operation)
+        assert (op.optimizations, op.bind_join_threshold) == (frozenset({"bind_join"}), 50)
+
+    def test_unknown_pass_is_rejected(self, tmp_path: Path) -> None:
+        am = APIManager([str(self._write_spec(tmp_path, "reorder"))])
+        with pytest.raises(ValueError, match="Unknown optimization"):
+            am.get_op("/api/items/ABC")
+
+
 class TestFormatParsingEmptyPart:
     def test_trailing_semicolon_ignored(self) -> None:
         am = APIManager(
@@ -325,3 +472,78 @@ class TestCustomParamConfigs:
             "filter": {"identifiers.id": {"slot_a": '?x ex:a "{{value}}" .'}},
             "extra": {"cf.cites": {"slot_b": "?x ex:b <{{value}}> ."}},
         }
+
+
+class TestEndpointOptions:
+    @staticmethod
+    def _write_spec(tmp_path: Path, endpoint_options: str) -> str:
+        spec = tmp_path / "spec.hf"
+        spec.write_text(
+            "#url /api\n"
+            "#type api\n"
+            "#base http://localhost:5000\n"
+            "#endpoint http://localhost:9999/sparql\n"
+            "#sources meta=https://sparql.example.org/meta\n"
+            f"#endpoint_options {endpoint_options}\n"
+            "#title Endpoint options API\n"
+            "#version 0.0.1\n"
+            "\n"
+            "#url /items/{id}\n"
+            "#type operation\n"
+            "#id str(.+)\n"
+            "#method get\n"
+            "#description Endpoint options operation.\n"
+            "#field_type str(id)\n"
+            '#sparql SELECT ?id WHERE { BIND("[[id]]" AS ?id) }\n',
+            encoding="utf-8",
+        )
+        return str(spec)
+
+    def test_source_names_resolve_to_urls(self, tmp_path: Path) -> None:
+        spec = self._write_spec(tmp_path, "meta values_max_tuples=200; http://other/sparql max_url_length=0")
+        am = APIManager([spec])
+        options = am.all_conf["/api"]["endpoint_options"]
+        assert set(options) == {"https://sparql.example.org/meta", "http://other/sparql"}
+        assert options["https://sparql.example.org/meta"].values_max_tuples == 200
+        assert options["http://other/sparql"].max_url_length == 0
+
+    def test_default_endpoint_options_follow_endpoint_override(self, tmp_path: Path) -> None:
+        spec = self._write_spec(tmp_path, "http://localhost:9999/sparql values_max_bytes=4096")
+        am = APIManager([spec], endpoint_override="http://staging/sparql")
+        op = am.get_op("/api/items/ABC")
+        assert isinstance(op, Operation)
+        assert op._endpoint_options("http://staging/sparql").values_max_bytes == 4096
+
+    def test_cli_options_override_spec_options(self, tmp_path: Path) -> None:
+        spec = self._write_spec(tmp_path, "meta values_max_tuples=200 values_parallelism=2")
+        am = APIManager([spec], endpoint_options=["meta values_max_tuples=50"])
+        options = am.all_conf["/api"]["endpoint_options"]["https://sparql.example.org/meta"]
+        assert (options.values_max_tuples, options.values_parallelism) == (50, 2)
+
+    def test_replicas_share_the_options_of_their_endpoint(self, tmp_path: Path) -> None:
+        self._write_spec(tmp_path, "meta hedge_percentile=95; https://m2/sparql hedge_delay=0.2")
+        spec = tmp_path / "spec.hf"
+        spec.write_text(
+            spec.read_text(encoding="utf-8")
+            .replace("#endpoint http://localhost:9999/sparql", "#endpoint http://a/sparql | http://b/sparql")
+            .replace("meta=https://sparql.example.org/meta", "meta=https://m1/sparql|https://m2/sparql"),
+            encoding="utf-8",
+        )
+        am = APIManager([str(spec)])
+        conf = am.all_conf["/api"]
+        assert (conf["tp"], conf["sources_map"]["meta"]) == ("http://a/sparql", "https://m1/sparql")
+        assert conf["replicas"] == {
+            "http://a/sparql": ("http://a/sparql", "http://b/sparql"),
+            "https://m1/sparql": ("https://m1/sparql", "https://m2/sparql"),
+        }
+        options = conf["endpoint_options"]
+        assert (options["https://m1/sparql"].hedge_percentile, options["https://m1/sparql"].hedge_delay) == (95, 1.0)
+        assert (options["https://m2/sparql"].hedge_percentile, options["https://m2/sparql"].hedge_delay) == (0, 0.2)
+        op = am.get_op("/api/items/ABC")
+        assert isinstance(op, Operation)
+        assert op.replicas == conf["replicas"]
+
+    def test_invalid_option_value_raises(self, tmp_path: Path) -> None:
+        spec = self._write_spec(tmp_path, "meta values_max_tuples=many")
+        with pytest.raises(ValueError, match="invalid value 'many' for endpoint option 'values_max_tuples'"):
+            APIManager([spec])
@@ -0,0 +1,239 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+from __future__ import annotations
+
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+from types import ModuleType, SimpleNamespace
+from typing import TYPE_CHECKING
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from ramose import APIManager, Operation
+from ramose.__main__ import _build_app
+from ramose.asgi import build_asgi_app
+from ramose.auth import TokenStore
+from ramose.html_documentation import HTMLDocumentationHandler
+from ramose.openapi_documentation import SWAGGER_MARKDOWN_CSS_FIX, OpenAPIDocumentationHandler
+
+if "pysparql_anything" not in sys.modules:
+    _mock_module = ModuleType("pysparql_anything")
+    _mock_module.SparqlAnything = MagicMock()  # type: ignore[attr-defined]
+    sys.modules["pysparql_anything"] = _mock_module
+
+if TYPE_CHECKING:
+    from ramose.asgi import ASGIApp, Message
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+SCHOLARLY_CSV = (
+    "qid,author,year,title,source_title,source_id,volume,issue,page,doi,reference,citation_count\n"
+    "Q24260641,,2015,Setting our bibliographic references free,,,,,,10.1108/JD-12-2013-0166,,1\n"
+)
+OP_URL = "/api/v1/metadata/10.1108/jd-12-2013-0166"
+RESOURCES_URL = "/bibliography/v1/resources"
+RESOURCE_BODY = {
+    "resource": "https://w3id.org/oc/meta/br/062104388184",
+    "title": "OpenCitations Meta",
+    "identifier": "https://w3id.org/oc/meta/id/062106312420",
+    "scheme": "http://purl.org/spar/datacite/doi",
+    "value": "10.1162/qss_a_00292",
+}
+
+
+def _handlers(spec: str) -> tuple[APIManager, HTMLDocumentationHandler, OpenAPIDocumentationHandler]:
+    api_manager = APIManager([str(FIXTURES_DIR / spec)], endpoint_override="http://mock/sparql")
+    return api_manager, HTMLDocumentationHandler(api_manager), OpenAPIDocumentationHandler(api_manager)
+
+
+def _scope(method: str, path: str, query: str = "", headers: dict[str, str] | None = None) -> Message:
+    return {
+        "type": "http",
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "root_path": "",
+        "query_string": query.encode(),
+        "headers": [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()],
+        "server": ("localhost", 80),
+    }
+
+
+async def _acall(app: ASGIApp, scope: Message, body: bytes = b"") -> tuple[int, dict[str, str], bytes]:
+    requests = [{"type": "http.request", "body": body, "more_body": False}]
+    sent: list[Message] = []
+
+    async def receive() -> Message:
+        return requests.pop(0) if requests else {"type": "http.disconnect"}
+
+    async def send(message: Message) -> None:
+        sent.append(message)
+
+    await app(scope, receive, send)
+    start, body_message = sent
+    headers = {name.decode(): value.decode() for name, value in start["headers"]}  # type: ignore[attr-defined]
+    return start["status"], headers, body_message["body"]  # type: ignore[return-value]
+
+
+def _call(  # noqa: PLR0913
+    app: ASGIApp,
+    method: str,
+    path: str,
+    *,
+    query: str = "",
+    headers: dict[str, str] | None = None,
+    body: bytes = b"",
+) -> tuple[int, dict[str, str], bytes]:
+    return asyncio.run(_acall(app, _scope(method, path, query, headers), body))
+
+
+def _sparql_response() -> SimpleNamespace:
+    return SimpleNamespace(
+        status_code=200,
+        reason="OK",
+        encoding=None,
+        iter_content=lambda chunk_size: iter([SCHOLARLY_CSV.encode()]),
+        close=lambda: None,
+    )
+
+
+class TestRoutes:
+    @pytest.fixture
+    def apps(self, tmp_path: Path) -> tuple[ASGIApp, object]:
+        handlers = _handlers("test_scholarly.hf")
+        token_store = TokenStore(str(tmp_path))
+        return build_asgi_app(*handlers, None, token_store), _build_app(*handlers, None, token_store).test_client()
+
+    @pytest.mark.parametrize(
+        ("path", "query", "headers"),
+        [
+            ("/", "", {}),
+            ("/api/v1", "", {}),
+            ("/api/v1/openapi.yaml", "", {}),
+            ("/nowhere/openapi.yaml", "", {}),
+            ("/nowhere", "", {}),
+            (OP_URL, "", {"Accept": "text/csv"}),
+            (OP_URL, "", {"Accept": "application/json"}),
+            (OP_URL, "format=json", {"Accept": "text/csv"}),
+            (OP_URL, "require=nothing", {}),
+            (OP_URL, "format=csv&page=0&page_size=1", {}),
+        ],
+    )
+    def test_same_response_as_the_flask_server(
+        self, apps: tuple[ASGIApp, object], path: str, query: str, headers: dict[str, str]
+    ) -> None:
+        app, client = apps
+        with patch("ramose.operation._http_session") as mock_session:
+            mock_session.post.return_value = _sparql_response()
+            status, asgi_headers, body = _call(app, "GET", path, query=query, headers=headers)
+            expected = client.get(path, query_string=query, headers=headers)  # type: ignore[attr-defined]
+        assert status == expected.status_code
+        assert asgi_headers["content-type"] == expected.headers["Content-Type"]
+        assert asgi_headers.get("access-control-allow-origin") == expected.headers.get("Access-Control-Allow-Origin")
+        assert body == expected.get_data()
+
+    def test_metrics(self, apps: tuple[ASGIApp, object]) -> None:
+        status, headers, body = _call(apps[0], "GET", "/metrics")
+        assert status == 200
+        assert headers["content-type"] == "text/plain; version=0.0.4; charset=utf-8"
+        assert b"# TYPE" in body
+
+    def test_swagger_ui(self, apps: tuple[ASGIApp, object]) -> None:
+        app = apps[0]
+        assert _call(app, "GET", "/docs")[:2] == (308, {"location": "/docs/", "content-length": "0"})
+        status, _, page = _call(app, "GET", "/docs/")
+        assert status == 200
+        assert b'"url": "/api/v1/openapi.yaml"' in page
+        assert b'src="/docs/swagger-ui-bundle.js"' in page
+        status, headers, css = _call(app, "GET", "/docs/index.css")
+        assert (status, headers["content-type"]) == (200, "text/css")
+        assert css.endswith(SWAGGER_MARKDOWN_CSS_FIX.encode())
+        status, headers, _ = _call(app, "GET", "/docs/swagger-ui-bundle.js")
+        assert status == 200
+        assert "javascript" in headers["content-type"]
+        assert _call(app, "GET", "/docs/../__init__.py")[0] == 404
+
+    def test_head_has_no_body(self, apps: tuple[ASGIApp, object]) -> None:
+        status, headers, body = _call(apps[0], "HEAD", "/")
+        assert status == 200
+        assert int(headers["content-length"]) > 0
+        assert body == b""
+
+    def test_unsupported_method_is_405(self, apps: tuple[ASGIApp, object]) -> None:
+        assert _call(apps[0], "PATCH", OP_URL)[0] == 405
+
+
+class TestWriteOperations:
+    @pytest.fixture
+    def app_and_token(self, tmp_path: Path) -> tuple[ASGIApp, str]:
+        token_store = TokenStore(str(tmp_path))
+        token = token_store.create("demo")
+        return build_asgi_app(*_handlers("write_api.hf"), None, token_store), token
+
+    def test_post_without_token_is_401(self, app_and_token: tuple[ASGIApp, str]) -> None:
+        app, _ = app_and_token
+        status, headers, body = _call(app, "POST", RESOURCES_URL, body=json.dumps(RESOURCE_BODY).encode())
+        assert status == 401
+        assert headers["content-type"] == "application/json"
+        assert json.loads(body)["message"] == "HTTP status code 401: missing or invalid bearer token"
+
+    @pytest.mark.parametrize(
+        ("content_type", "body"),
+        [
+            ("application/json", json.dumps(RESOURCE_BODY)),
+            ("application/x-www-form-urlencoded", "&".join(f"{k}={v}" for k, v in RESOURCE_BODY.items())),
+        ],
+    )
+    def test_post_reads_the_body(self, app_and_token: tuple[ASGIApp, str], content_type: str, body: str) -> None:
+        app, token = app_and_token
+        headers = {"Authorization": f"Bearer {token}", "Content-Type": content_type}
+        with patch("ramose.operation._http_session") as mock_session:
+            mock_session.post.return_value = SimpleNamespace(status_code=200, reason="OK", text="", encoding=None)
+            status, _, _ = _call(app, "POST", RESOURCES_URL, headers=headers, body=body.encode())
+        assert status == 200
+        update_text = mock_session.post.call_args.kwargs["data"]["update"]
+        assert f'"{RESOURCE_BODY["title"]}"' in update_text
+
+
+class TestEventLoop:
+    def test_lifespan_starts_the_engines(self, tmp_path: Path) -> None:
+        api_manager, html_handler, openapi_handler = _handlers("test_scholarly.hf")
+        app = build_asgi_app(api_manager, html_handler, openapi_handler, None, TokenStore(str(tmp_path)))
+        events: list[Message] = [{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}]
+        sent: list[Message] = []
+
+        async def receive() -> Message:
+            return events.pop(0)
+
+        async def send(message: Message) -> None:
+            sent.append(message)
+
+        async def run() -> None:
+            await app({"type": "lifespan"}, receive, send)
+
+        with patch.object(api_manager, "warm_up") as warm_up:
+            asyncio.run(run())
+        warm_up.assert_called_once_with()
+        assert sent == [{"type": "lifespan.startup.complete"}, {"type": "lifespan.shutdown.complete"}]
+
+    def test_operations_do_not_block_the_loop(self, tmp_path: Path) -> None:
+        app = build_asgi_app(*_handlers("test_scholarly.hf"), None, TokenStore(str(tmp_path)))
+
+        def slow_exec(*args: object, **kwargs: object) -> tuple[int, str, str, dict[str, str]]:
+            time.sleep(0.2)
+            return 200, "[]", "application/json", {}
+
+        async def run() -> list[tuple[int, dict[str, str], bytes]]:
+            return await asyncio.gather(*(_acall(app, _scope("GET", OP_URL)) for _ in range(4)))
+
+        started = time.monotonic()
+        with patch.object(Operation, "exec", side_effect=slow_exec):
+            responses = asyncio.run(run())
+        assert [response[0] for response in responses] == [200] * 4
+        assert time.monotonic() - started < 0.6
@@ -181,7 +181,13 @@ class TestWebEnforcement:
 
     def test_open_get_needs_no_token(self, tmp_path: Path) -> None:
         client, _ = self._client_and_token(tmp_path)
-        read_response = SimpleNamespace(status_code=200, reason="OK", text="title,scheme,value\nA,B,C\n", encoding=None)
+        read_response = SimpleNamespace(
+            status_code=200,
+            reason="OK",
+            encoding=None,
+            iter_content=lambda chunk_size: iter([b"title,scheme,value\nA,B,C\n"]),
+            close=lambda: None,
+        )
         with patch("ramose.operation._http_session") as mock_session:
             mock_session.get.return_value = read_response
             response = client.get(f"{RESOURCES_URL}/https://w3id.org/oc/meta/br/062104388184")
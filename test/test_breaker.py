@@ -0,0 +1,132 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+from __future__ import annotations
+
+import threading
+from typing import TYPE_CHECKING
+
+import pytest
+
+from ramose.breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, circuit_breaker, reset_circuit_breakers
+from ramose.endpoints import DEFAULT_ENDPOINT_OPTIONS, EndpointOptions
+from ramose.metrics import registry
+
+if TYPE_CHECKING:
+    from collections.abc import Generator
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture(autouse=True)
+def _fresh_breakers() -> Generator[None, None, None]:
+    reset_circuit_breakers()
+    yield
+    reset_circuit_breakers()
+
+
+class TestCircuitBreaker:
+    def test_opens_after_consecutive_failures(self) -> None:
+        breaker = CircuitBreaker(3, 30.0, clock=FakeClock())
+        breaker.record_failure()
+        breaker.record_failure()
+        assert breaker.state == CLOSED
+        breaker.record_failure()
+        assert breaker.state == OPEN
+        assert not breaker.allow()
+
+    def test_success_resets_the_failure_count(self) -> None:
+        breaker = CircuitBreaker(2, 30.0, clock=FakeClock())
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        assert breaker.state == CLOSED
+
+    def test_half_open_lets_one_probe_through(self) -> None:
+        clock = FakeClock()
+        breaker = CircuitBreaker(1, 30.0, clock=clock)
+        breaker.record_failure()
+        clock.now += 10
+        assert breaker.retry_after() == 20.0
+        clock.now += 20
+        assert breaker.state == HALF_OPEN
+        assert breaker.allow()
+        assert not breaker.allow()
+
+    def test_probe_success_closes(self) -> None:
+        clock = FakeClock()
+        breaker = CircuitBreaker(1, 30.0, clock=clock)
+        breaker.record_failure()
+        clock.now += 30
+        assert breaker.allow()
+        breaker.record_success()
+        assert breaker.state == CLOSED
+        assert breaker.allow()
+
+    def test_probe_failure_reopens(self) -> None:
+        clock = FakeClock()
+        breaker = CircuitBreaker(5, 30.0, clock=clock)
+        for _ in range(5):
+            breaker.record_failure()
+        clock.now += 30
+        assert breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == OPEN
+        assert breaker.retry_after() == 30.0
+
+    def test_abandoned_probe_lets_the_next_one_through(self) -> None:
+        clock = FakeClock()
+        breaker = CircuitBreaker(1, 30.0, clock=clock)
+        breaker.record_failure()
+        clock.now += 30
+        assert breaker.allow()
+        other = threading.Thread(target=breaker.record_abandoned)
+        other.start()
+        other.join()
+        assert not breaker.allow()
+        breaker.record_abandoned()
+        assert breaker.state == HALF_OPEN
+        assert breaker.allow()
+
+    def test_abandon_after_an_outcome_is_a_no_op(self) -> None:
+        clock = FakeClock()
+        breaker = CircuitBreaker(1, 30.0, clock=clock)
+        breaker.record_failure()
+        clock.now += 30
+        assert breaker.allow()
+        breaker.record_failure()
+        breaker.record_abandoned()
+        assert breaker.state == OPEN
+        assert not breaker.allow()
+
+
+class TestBreakerRegistry:
+    def test_disabled_by_default(self) -> None:
+        assert circuit_breaker("http://a/sparql", DEFAULT_ENDPOINT_OPTIONS) is None
+
+    def test_shared_per_endpoint(self) -> None:
+        options = EndpointOptions(breaker_failures=2)
+        first = circuit_breaker("http://a/sparql", options)
+        assert first is circuit_breaker("http://a/sparql", options)
+        assert first is not circuit_breaker("http://b/sparql", options)
+
+    def test_changed_settings_replace_the_breaker(self) -> None:
+        first = circuit_breaker("http://a/sparql", EndpointOptions(breaker_failures=2))
+        second = circuit_breaker("http://a/sparql", EndpointOptions(breaker_failures=3))
+        assert second is not None
+        assert second is not first
+        assert second.failure_threshold == 3
+
+    def test_state_metric(self) -> None:
+        breaker = circuit_breaker("http://a/sparql", EndpointOptions(breaker_failures=1))
+        assert breaker is not None
+        assert registry.value("ramose_circuit_breaker_state", endpoint="http://a/sparql") == 0
+        breaker.record_failure()
+        assert registry.value("ramose_circuit_breaker_state", endpoint="http://a/sparql") == 1
@@ -81,7 +81,13 @@ class TestContentNegotiationWeb:
         return app.test_client()
 
     def _get(self, tmp_path: Path, path: str, headers: dict[str, str]) -> tuple[int, str, str]:
-        sparql_response = SimpleNamespace(status_code=200, text=SCHOLARLY_CSV, reason="OK", encoding=None)
+        sparql_response = SimpleNamespace(
+            status_code=200,
+            reason="OK",
+            encoding=None,
+            iter_content=lambda chunk_size: iter([SCHOLARLY_CSV.encode()]),
+            close=lambda: None,
+        )
         with patch("ramose.operation._http_session") as mock_session:
             mock_session.post.return_value = sparql_response
             response = self._client(tmp_path).get(path, headers=headers)
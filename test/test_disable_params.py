@@ -25,7 +25,16 @@ class TestParseDisableParams:
         assert parse_disable_params("require,filter,sort") == {"require", "filter", "sort"}
 
     def test_wildcard(self) -> None:
-        assert parse_disable_params("*") == {"require", "filter", "sort", "format", "json", "page", "page_size"}
+        assert parse_disable_params("*") == {
+            "require",
+            "filter",
+            "sort",
+            "format",
+            "json",
+            "page",
+            "page_size",
+            "cursor",
+        }
 
     def test_wildcard_matches_builtin(self) -> None:
         assert parse_disable_params("*") == set(BUILTIN_PARAMS)
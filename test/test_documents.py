@@ -0,0 +1,235 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import TYPE_CHECKING
+from unittest.mock import patch
+
+import pytest
+
+from ramose import Operation, OperationConfig
+from ramose.documents import DocumentCache
+from ramose.metrics import registry
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+TIMEOUT = (5.0, 5.0)
+
+
+class _DocumentServer:
+    """Serves documents by path, with an ETag per version, and answers 304 to a matching If-None-Match."""
+
+    def __init__(self) -> None:
+        self.documents: dict[str, tuple[bytes, str]] = {}
+        self.requests: list[tuple[str, str | None]] = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                server.requests.append((self.path, self.headers.get("If-None-Match")))
+                if self.path not in server.documents:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                body, content_type = server.documents[self.path]
+                etag = f'"{hash(body)}"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: object) -> None:  # noqa: A002
+                return
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def documents() -> Iterator[_DocumentServer]:
+    server = _DocumentServer()
+    server.documents["/data.csv"] = (b"id\nA\n", "text/csv")
+    server.documents["/api/items"] = (b'{"id": "A"}', "application/json")
+    yield server
+    server.close()
+
+
+def _query(location: str) -> str:
+    return f"SELECT ?id WHERE {{ SERVICE <x-sparql-anything:location={location},csv.headers=true> {{ ?s ?p ?id }} }}"
+
+
+class TestLocalize:
+    def test_remote_locations_are_rewritten_to_local_copies(self, documents: _DocumentServer, tmp_path: Path) -> None:
+        cache = DocumentCache(str(tmp_path))
+        query = cache.localize(_query(documents.url + "/data.csv"), TIMEOUT)
+
+        local = query.split("location=")[1].split(",")[0]
+        assert local.startswith(str(tmp_path))
+        assert local.endswith(".csv")
+        assert Path(local).read_bytes() == b"id\nA\n"
+        assert ",csv.headers=true> { ?s ?p ?id }" in query
+
+    def test_extension_comes_from_the_content_type_when_the_url_has_none(
+        self, documents: _DocumentServer, tmp_path: Path
+    ) -> None:
+        query = DocumentCache(str(tmp_path)).localize(
+            f"SERVICE <x-sparql-anything:{documents.url}/api/items> {{}}", TIMEOUT
+        )
+        assert query.startswith(f"SERVICE <x-sparql-anything:{tmp_path}")
+        assert query.endswith(".json> {}")
+
+    def test_local_and_unreachable_locations_are_left_alone(self, documents: _DocumentServer, tmp_path: Path) -> None:
+        cache = DocumentCache(str(tmp_path))
+        for location in ("/data/local.csv", documents.url + "/missing.csv", "http://127.0.0.1:9/data.csv"):
+            assert cache.localize(_query(location), TIMEOUT) == _query(location)
+
+
+class TestFreshness:
+    def test_copy_is_reused_then_revalidated_with_its_etag(self, documents: _DocumentServer, tmp_path: Path) -> None:
+        now = [0.0]
+        cache = DocumentCache(str(tmp_path), ttl=60, clock=lambda: now[0])
+        url = documents.url + "/data.csv"
+        revalidated = registry.value("ramose_document_cache_requests_total", result="revalidated")
+
+        first = cache.path(url, TIMEOUT)
+        assert cache.path(url, TIMEOUT) == first
+        assert len(documents.requests) == 1
+
+        now[0] = 61.0
+        assert cache.path(url, TIMEOUT) == first
+        assert documents.requests[1][1] is not None
+        assert registry.value("ramose_document_cache_requests_total", result="revalidated") == revalidated + 1
+
+    def test_changed_document_is_downloaded_again(self, documents: _DocumentServer, tmp_path: Path) -> None:
+        now = [0.0]
+        cache = DocumentCache(str(tmp_path), ttl=60, clock=lambda: now[0])
+        url = documents.url + "/data.csv"
+        cache.path(url, TIMEOUT)
+
+        documents.documents["/data.csv"] = (b"id\nB\n", "text/csv")
+        now[0] = 61.0
+        path = cache.path(url, TIMEOUT)
+
+        assert path is not None
+        assert path.read_bytes() == b"id\nB\n"
+
+    def test_stale_copy_is_used_when_the_server_fails(self, documents: _DocumentServer, tmp_path: Path) -> None:
+        now = [0.0]
+        cache = DocumentCache(str(tmp_path), ttl=60, clock=lambda: now[0])
+        url = documents.url + "/data.csv"
+        first = cache.path(url, TIMEOUT)
+
+        del documents.documents["/data.csv"]
+        now[0] = 61.0
+        assert cache.path(url, TIMEOUT) == first
+
+    def test_copies_survive_a_restart(self, documents: _DocumentServer, tmp_path: Path) -> None:
+        url = documents.url + "/data.csv"
+        first = DocumentCache(str(tmp_path)).path(url, TIMEOUT)
+        assert DocumentCache(str(tmp_path)).path(url, TIMEOUT) == first
+        assert len(documents.requests) == 1
+
+
+class TestByteBudget:
+    def test_least_recently_used_copies_are_evicted(self, documents: _DocumentServer, tmp_path: Path) -> None:
+        for name in ("a", "b", "c"):
+            documents.documents[f"/{name}.csv"] = (b"x" * 40, "text/csv")
+        now = [0.0]
+        cache = DocumentCache(str(tmp_path), max_bytes=100, clock=lambda: now[0])
+        evictions = registry.value("ramose_document_cache_evictions_total")
+
+        for moment, name in enumerate(("a", "b", "a", "c")):
+            now[0] = float(moment)
+            cache.path(f"{documents.url}/{name}.csv", TIMEOUT)
+
+        assert sorted(path.suffix for path in tmp_path.iterdir()) == [".csv", ".csv", ".json", ".json"]
+        assert cache.size == 80
+        assert registry.value("ramose_document_cache_evictions_total") == evictions + 1
+        assert registry.value("ramose_document_cache_bytes") == 80
+        cache.path(f"{documents.url}/a.csv", TIMEOUT)
+        assert [path for path, _ in documents.requests].count("/a.csv") == 1
+
+    def test_copies_of_a_running_query_are_not_evicted(self, documents: _DocumentServer, tmp_path: Path) -> None:
+        for name in ("a", "b", "c"):
+            documents.documents[f"/{name}.csv"] = (b"x" * 40, "text/csv")
+        now = [0.0]
+        cache = DocumentCache(str(tmp_path), max_bytes=100, clock=lambda: now[0])
+        with cache.localized(_query(f"{documents.url}/a.csv"), TIMEOUT) as query:
+            copy = Path(query.split("location=")[1].split(",")[0])
+            for moment, name in enumerate(("b", "c"), start=1):
+                now[0] = float(moment)
+                cache.path(f"{documents.url}/{name}.csv", TIMEOUT)
+            assert copy.exists()
+            assert cache.size == 80
+        now[0] = 3.0
+        cache.path(f"{documents.url}/b.csv", TIMEOUT)
+        assert not copy.exists()
+        assert cache.size == 80
+
+    def test_document_larger_than_the_budget_is_not_cached(self, documents: _DocumentServer, tmp_path: Path) -> None:
+        cache = DocumentCache(str(tmp_path), max_bytes=3)
+        assert cache.path(documents.url + "/data.csv", TIMEOUT) is None
+        assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+class TestForkedWorkers:
+    def test_a_forked_worker_keeps_its_copies_apart(self, documents: _DocumentServer, tmp_path: Path) -> None:
+        url = documents.url + "/data.csv"
+        cache = DocumentCache(str(tmp_path))
+        parent_copy = cache.path(url, TIMEOUT)
+        finished = subprocess.Popen([sys.executable, "-c", ""])
+        finished.wait()
+        orphan = tmp_path / f"worker-{finished.pid}"
+        orphan.mkdir()
+        pid = os.fork()
+        if pid == 0:  # pragma: no cover
+            copy = cache.path(url, TIMEOUT)
+            own = copy is not None and copy.parent == tmp_path / f"worker-{os.getpid()}"
+            os._exit(0 if own and cache.size == 5 and not orphan.exists() else 1)
+        _, status = os.waitpid(pid, 0)
+
+        assert os.waitstatus_to_exitcode(status) == 0
+        assert parent_copy is not None
+        assert parent_copy.read_bytes() == b"id\nA\n"
+        assert cache.path(url, TIMEOUT) == parent_copy
+        assert len(documents.requests) == 2
+
+
+class TestOperationDocuments:
+    def test_sparql_anything_reads_the_local_copy(self, documents: _DocumentServer, tmp_path: Path) -> None:
+        cache = DocumentCache(str(tmp_path))
+        op = Operation(
+            "/test",
+            "/test",
+            {"url": "/test", "sparql": "SELECT ?id WHERE { }", "method": "get", "field_type": "str(id)"},
+            OperationConfig(document_cache=cache),
+        )
+        with patch("ramose.operation.SparqlAnything") as mock_sa:
+            mock_sa.return_value.select.return_value = [{"id": "A"}]
+            for _ in range(2):
+                assert op._run_sparql_anything_dicts(_query(documents.url + "/data.csv")) == [{"id": "A"}]
+        query = mock_sa.return_value.select.call_args.kwargs["query"]
+        assert f"location={tmp_path}" in query
+        assert len(documents.requests) == 1
@@ -0,0 +1,145 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+from __future__ import annotations
+
+import pytest
+from requests import Session
+
+from ramose.endpoints import (
+    DEFAULT_ENDPOINT_OPTIONS,
+    CountingHTTPAdapter,
+    EndpointOptions,
+    build_endpoint_options,
+    http_adapter,
+    mount_endpoint_pools,
+    parse_endpoint_options,
+)
+
+
+class TestParseEndpointOptions:
+    def test_single_entry(self) -> None:
+        result = parse_endpoint_options(["https://host/sparql values_max_tuples=500 values_parallelism=8"])
+        assert result == {"https://host/sparql": {"values_max_tuples": "500", "values_parallelism": "8"}}
+
+    def test_semicolon_separated_endpoints(self) -> None:
+        result = parse_endpoint_options(["meta values_max_tuples=10; index values_max_bytes=2048;"])
+        assert result == {"meta": {"values_max_tuples": "10"}, "index": {"values_max_bytes": "2048"}}
+
+    def test_later_entries_extend_earlier_ones(self) -> None:
+        result = parse_endpoint_options(["meta values_max_tuples=10", "meta values_max_tuples=20 values_max_bytes=5"])
+        assert result == {"meta": {"values_max_tuples": "20", "values_max_bytes": "5"}}
+
+    def test_endpoint_without_settings(self) -> None:
+        assert parse_endpoint_options(["https://host/sparql"]) == {"https://host/sparql": {}}
+
+    def test_unknown_option_raises(self) -> None:
+        with pytest.raises(ValueError, match="unknown endpoint option 'colour' for meta"):
+            parse_endpoint_options(["meta colour=blue"])
+
+    def test_setting_without_value_raises(self) -> None:
+        with pytest.raises(ValueError, match=r"invalid endpoint option 'values_max_tuples=' for meta"):
+            parse_endpoint_options(["meta values_max_tuples="])
+
+
+class TestBuildEndpointOptions:
+    def test_defaults(self) -> None:
+        assert build_endpoint_options({}) == DEFAULT_ENDPOINT_OPTIONS == EndpointOptions()
+
+    def test_typed_values(self) -> None:
+        options = build_endpoint_options({"values_max_tuples": "500", "max_url_length": "4096"})
+        assert options.values_max_tuples == 500
+        assert options.max_url_length == 4096
+        assert build_endpoint_options({}).max_url_length == 0
+
+    def test_negative_value_raises(self) -> None:
+        with pytest.raises(ValueError, match="endpoint option 'values_max_bytes' must be >= 0, got -1"):
+            build_endpoint_options({"values_max_bytes": "-1"})
+
+    def test_parallelism_must_be_positive(self) -> None:
+        with pytest.raises(ValueError, match="endpoint option 'values_parallelism' must be >= 1, got 0"):
+            build_endpoint_options({"values_parallelism": "0"})
+        with pytest.raises(ValueError, match="endpoint option 'fanout_parallelism' must be >= 1, got 0"):
+            build_endpoint_options({"fanout_parallelism": "0"})
+        assert build_endpoint_options({}).fanout_parallelism == 1
+
+    def test_http_options(self) -> None:
+        options = build_endpoint_options(
+            {"pool_size": "32", "keep_alive": "false", "connect_timeout": "2.5", "read_timeout": "120"}
+        )
+        assert (options.pool_size, options.keep_alive) == (32, False)
+        assert options.timeout == (2.5, 120.0)
+
+    def test_invalid_boolean_raises(self) -> None:
+        with pytest.raises(ValueError, match="invalid value 'maybe' for endpoint option 'keep_alive'"):
+            build_endpoint_options({"keep_alive": "maybe"})
+
+    def test_timeouts_must_be_positive(self) -> None:
+        with pytest.raises(ValueError, match="endpoint option 'read_timeout' must be > 0, got 0"):
+            build_endpoint_options({"read_timeout": "0"})
+
+    def test_result_format(self) -> None:
+        assert build_endpoint_options({"result_format": "json"}).result_format == "json"
+        assert not build_endpoint_options({"result_format": "json"}).infer_types
+        assert build_endpoint_options({"infer_types": "true"}).infer_types
+        with pytest.raises(ValueError, match="invalid value 'xml' for endpoint option 'result_format'"):
+            build_endpoint_options({"result_format": "xml"})
+
+    def test_timeout_param_options(self) -> None:
+        options = build_endpoint_options({"timeout_param": "timeout", "timeout_unit": "ms"})
+        assert (options.timeout_param, options.timeout_unit) == ("timeout", "ms")
+        assert (DEFAULT_ENDPOINT_OPTIONS.timeout_param, DEFAULT_ENDPOINT_OPTIONS.timeout_unit) == ("", "s")
+        with pytest.raises(ValueError, match="invalid value 'min' for endpoint option 'timeout_unit'"):
+            build_endpoint_options({"timeout_unit": "min"})
+
+    def test_breaker_options(self) -> None:
+        options = build_endpoint_options({"breaker_failures": "5", "breaker_reset": "12.5"})
+        assert (options.breaker_failures, options.breaker_reset) == (5, 12.5)
+        with pytest.raises(ValueError, match="endpoint option 'breaker_reset' must be > 0, got 0"):
+            build_endpoint_options({"breaker_reset": "0"})
+
+    def test_chunk_options(self) -> None:
+        options = build_endpoint_options({"chunk_size": "1000", "chunk_parallelism": "3", "max_rows": "10000"})
+        assert (options.chunk_size, options.chunk_parallelism, options.max_rows) == (1000, 3, 10000)
+        with pytest.raises(ValueError, match="endpoint option 'chunk_parallelism' must be >= 1, got 0"):
+            build_endpoint_options({"chunk_parallelism": "0"})
+
+    def test_dialect_sets_its_profile(self) -> None:
+        options = build_endpoint_options({"dialect": "qlever"})
+        assert (options.timeout_param, options.timeout_unit, options.timeout_with_unit) == ("timeout", "s", True)
+        assert (options.result_format, options.max_url_length) == ("tsv", 6144)
+        assert not options.infer_types
+        assert build_endpoint_options({"dialect": "blazegraph"}).timeout_param == "maxQueryTimeMillis"
+
+    def test_explicit_options_override_the_dialect(self) -> None:
+        options = build_endpoint_options({"max_rows": "50000", "dialect": "virtuoso"})
+        assert (options.dialect, options.timeout_unit, options.max_rows) == ("virtuoso", "ms", 50000)
+        assert options.truncation_headers
+
+    def test_unknown_dialect_raises(self) -> None:
+        with pytest.raises(ValueError, match="invalid value 'stardog' for endpoint option 'dialect'"):
+            build_endpoint_options({"dialect": "stardog"})
+
+
+class TestEndpointPools:
+    def test_adapter_pool_settings(self) -> None:
+        adapter = http_adapter(EndpointOptions(pool_size=25))
+        assert (adapter._pool_maxsize, adapter._pool_block) == (25, False)
+        capped = http_adapter(EndpointOptions(pool_size=25, max_connections=5))
+        assert (capped._pool_maxsize, capped._pool_block) == (5, True)
+
+    def test_only_endpoints_with_pool_settings_get_an_adapter(self) -> None:
+        session = Session()
+        mount_endpoint_pools(
+            session,
+            {
+                "https://a.org/sparql": EndpointOptions(max_connections=4),
+                "https://b.org/sparql": EndpointOptions(read_timeout=5.0),
+            },
+        )
+        dedicated = session.get_adapter("https://a.org/sparql?query=x")
+        assert isinstance(dedicated, CountingHTTPAdapter)
+        assert dedicated._pool_maxsize == 4
+        assert session.get_adapter("https://b.org/sparql") is session.adapters["https://"]
+        assert isinstance(session.adapters["https://"], CountingHTTPAdapter)
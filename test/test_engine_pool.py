@@ -0,0 +1,129 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+from __future__ import annotations
+
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from ramose import APIManager, Operation, OperationConfig
+from ramose.engine_pool import HEALTH_QUERY, EnginePool, engine_pool, reset_engine_pools
+from ramose.metrics import registry
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+TESTS_DIR = Path(__file__).resolve().parent / "fixtures"
+OP_ITEM = {
+    "url": "/test",
+    "sparql": "@@with engine=sparql-anything\nSELECT ?x WHERE { }",
+    "method": "get",
+    "field_type": "str(x)",
+}
+
+
+@pytest.fixture(autouse=True)
+def _fresh_pools() -> Iterator[None]:
+    reset_engine_pools()
+    yield
+    reset_engine_pools()
+
+
+def _op(**config: float) -> Operation:
+    return Operation("/test", "/test", OP_ITEM, OperationConfig(sparql_endpoint="http://ep/sparql", **config))  # type: ignore[arg-type]
+
+
+class TestEnginePool:
+    def test_engines_are_reused_across_operations(self) -> None:
+        with patch("ramose.operation.SparqlAnything") as mock_sa:
+            mock_sa.return_value.select.return_value = [{"x": "a"}]
+            for _ in range(3):
+                assert _op()._run_sparql_anything_dicts("SELECT ?x WHERE { }") == [{"x": "a"}]
+        assert mock_sa.call_count == 1
+
+    def test_busy_pool_makes_the_next_query_wait(self) -> None:
+        pool = EnginePool(MagicMock, size=1)
+        engine = pool.acquire()
+        with pytest.raises(TimeoutError, match=r"no SPARQL Anything engine was free within 0\.05s"):
+            pool.acquire(timeout=0.05)
+
+        released = threading.Timer(0.05, pool.release, args=(engine,))
+        released.start()
+        assert pool.acquire(timeout=5) is engine
+        assert (pool.idle, pool.busy) == (0, 1)
+
+    def test_warm_up_starts_every_engine(self) -> None:
+        factory = MagicMock()
+        pool = engine_pool(factory, 3)
+        pool.warm_up()
+        pool.warm_up()
+        assert factory.call_count == 3
+        assert pool.idle == 3
+        assert registry.value("ramose_sparql_anything_engines", state="idle") == 3
+
+    def test_engine_that_fails_its_health_check_is_replaced(self) -> None:
+        broken, fresh = MagicMock(), MagicMock()
+        broken.select.side_effect = RuntimeError("JVM detached")
+        pool = EnginePool(MagicMock(side_effect=[broken, fresh]), size=1)
+        replacements = registry.value("ramose_sparql_anything_engine_replacements_total")
+
+        pool.release(pool.acquire(), healthy=False)
+
+        assert pool.acquire() is fresh
+        broken.select.assert_called_once_with(output_type=dict, query=HEALTH_QUERY)
+        assert registry.value("ramose_sparql_anything_engine_replacements_total") == replacements + 1
+
+    def test_engine_that_passes_its_health_check_is_kept(self) -> None:
+        pool = EnginePool(MagicMock, size=1)
+        engine = pool.acquire()
+        pool.release(engine, healthy=False)
+        assert pool.acquire() is engine
+        pool.release(engine)
+        assert pool.acquire() is engine
+        assert engine.select.call_count == 1  # type: ignore[attr-defined]
+
+    def test_engine_that_fails_to_start_frees_its_slot(self) -> None:
+        pool = EnginePool(MagicMock(side_effect=[OSError("no JVM"), "engine"]), size=1)
+        with pytest.raises(OSError, match="no JVM"):
+            pool.acquire()
+        assert pool.acquire(timeout=0) == "engine"
+
+    def test_pool_is_replaced_when_its_size_changes(self) -> None:
+        pool = engine_pool(MagicMock, 2)
+        assert engine_pool(MagicMock, 2) is pool
+        assert engine_pool(MagicMock, 3) is not pool
+
+
+class TestOperationEngines:
+    def test_unclassified_failure_marks_the_engine_for_a_health_check(self) -> None:
+        with patch("ramose.operation.SparqlAnything") as mock_sa:
+            mock_sa.return_value.select.side_effect = [ValueError("bad query"), [{"ok": "1"}], [{"x": "a"}]]
+            op = _op()
+            with pytest.raises(ValueError, match="bad query"):
+                op._run_sparql_anything_dicts("SELECT ?x WHERE { }")
+            assert op._run_sparql_anything_dicts("SELECT ?x WHERE { }") == [{"x": "a"}]
+        assert mock_sa.return_value.select.call_args_list[1].kwargs == {"output_type": dict, "query": HEALTH_QUERY}
+
+    def test_waiting_for_an_engine_past_the_deadline_returns_504(self) -> None:
+        with patch("ramose.operation.SparqlAnything") as mock_sa:
+            engine_pool(mock_sa, 1).acquire()
+            sc, msg, _, _ = _op(timeout=0.2).exec(method="get")
+        assert (sc, msg) == (504, "HTTP status code 504: request deadline of 0.2s exceeded")
+
+    def test_size_must_be_positive(self) -> None:
+        with pytest.raises(ValueError, match="sparql_anything_engines must be >= 1"):
+            OperationConfig(sparql_anything_engines=0)
+
+
+class TestWarmUp:
+    def test_starts_the_pool_when_an_operation_uses_sparql_anything(self) -> None:
+        with patch("ramose.api_manager.SparqlAnything") as mock_sa:
+            APIManager([str(TESTS_DIR / "test.hf")], sparql_anything_engines=2).warm_up()
+            assert mock_sa.call_count == 2
+            APIManager([str(TESTS_DIR / "test_with_sources.hf")]).warm_up()
+            assert mock_sa.call_count == 2
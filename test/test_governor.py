@@ -0,0 +1,242 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+from __future__ import annotations
+
+import threading
+import time
+from types import SimpleNamespace
+from typing import TYPE_CHECKING
+from unittest.mock import patch
+
+import pytest
+
+from ramose import Operation, OperationConfig
+from ramose.endpoints import EndpointOptions, build_endpoint_options
+from ramose.governor import ConcurrencyGovernor, concurrency_governor, reset_concurrency_governors
+from ramose.metrics import registry
+from ramose.operation import HttpError
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+ENDPOINT = "http://localhost/sparql"
+OP_ITEM = {
+    "url": "/test",
+    "sparql": "SELECT ?name WHERE { }",
+    "method": "get",
+    "field_type": "str(name)",
+}
+
+
+@pytest.fixture(autouse=True)
+def _fresh_governors() -> Iterator[None]:
+    reset_concurrency_governors()
+    yield
+    reset_concurrency_governors()
+
+
+def _response() -> SimpleNamespace:
+    return SimpleNamespace(
+        status_code=200,
+        reason="OK",
+        encoding=None,
+        headers={},
+        iter_content=lambda chunk_size: iter([b"name\nA\n"]),
+        close=lambda: None,
+    )
+
+
+def _op(options: EndpointOptions, **config: float) -> Operation:
+    return Operation(
+        "/test",
+        "/test",
+        OP_ITEM,
+        OperationConfig(sparql_endpoint=ENDPOINT, endpoint_options={ENDPOINT: options}, **config),  # type: ignore[arg-type]
+    )
+
+
+def _start(target: object) -> threading.Thread:
+    thread = threading.Thread(target=target)  # type: ignore[arg-type]
+    thread.start()
+    return thread
+
+
+def _wait_until(condition: object) -> None:
+    deadline = time.monotonic() + 5
+    while not condition() and time.monotonic() < deadline:  # type: ignore[operator]
+        time.sleep(0.01)
+
+
+class TestConcurrencyGovernor:
+    def test_slots_are_handed_out_in_arrival_order(self) -> None:
+        governor = ConcurrencyGovernor(ENDPOINT, max_concurrent=1)
+        governor.acquire()
+        order: list[int] = []
+
+        def queued(number: int) -> None:
+            governor.acquire()
+            order.append(number)
+            governor.release()
+
+        threads = []
+        for number in range(3):
+            threads.append(_start(lambda number=number: queued(number)))
+            _wait_until(lambda number=number: governor.queued == number + 1)
+        assert (governor.in_flight, governor.queued) == (1, 3)
+        governor.release()
+        for thread in threads:
+            thread.join()
+        assert order == [0, 1, 2]
+        assert (governor.in_flight, governor.queued) == (0, 0)
+
+    def test_full_queue_rejects_at_once(self) -> None:
+        governor = ConcurrencyGovernor(ENDPOINT, max_concurrent=1, max_queued=1)
+        rejected = registry.value("ramose_backend_queue_rejections_total", endpoint=ENDPOINT, reason="full")
+        governor.acquire()
+        waiter = _start(governor.acquire)
+        _wait_until(lambda: governor.queued == 1)
+        with pytest.raises(TimeoutError, match="too many queries queued"):
+            governor.acquire()
+        assert registry.value("ramose_backend_queue_rejections_total", endpoint=ENDPOINT, reason="full") == rejected + 1
+        governor.release()
+        waiter.join()
+        assert governor.in_flight == 1
+
+    def test_queued_query_times_out_and_leaves_the_queue(self) -> None:
+        governor = ConcurrencyGovernor(ENDPOINT, max_concurrent=1, queue_timeout=0.05)
+        waited = registry.value("ramose_backend_queue_wait_seconds_total", endpoint=ENDPOINT)
+        governor.acquire()
+        with pytest.raises(TimeoutError, match=r"no query slot for http://localhost/sparql was free within 0\.05s"):
+            governor.acquire()
+        assert governor.queued == 0
+        assert registry.value("ramose_backend_queue_wait_seconds_total", endpoint=ENDPOINT) >= waited + 0.05
+        governor.release()
+        governor.acquire()
+        assert governor.in_flight == 1
+
+    def test_shared_per_endpoint_and_replaced_when_its_limits_change(self) -> None:
+        options = EndpointOptions(max_concurrent_queries=2)
+        governor = concurrency_governor(ENDPOINT, options)
+        assert governor is not None
+        assert concurrency_governor(ENDPOINT, options) is governor
+        assert concurrency_governor(ENDPOINT, EndpointOptions(max_concurrent_queries=3)) is not governor
+        assert concurrency_governor(ENDPOINT, EndpointOptions()) is None
+
+    def test_endpoint_options(self) -> None:
+        options = build_endpoint_options(
+            {"max_concurrent_queries": "4", "max_queued_queries": "20", "queue_timeout": "2.5"}
+        )
+        assert (options.max_concurrent_queries, options.max_queued_queries, options.queue_timeout) == (4, 20, 2.5)
+        with pytest.raises(ValueError, match="endpoint option 'queue_timeout' must be > 0, got 0"):
+            build_endpoint_options({"queue_timeout": "0"})
+
+
+class TestGovernedRequests:
+    @patch("ramose.operation._http_session")
+    def test_queries_beyond_the_limit_wait_for_a_slot(self, mock_session: object) -> None:
+        release = threading.Event()
+        active: list[int] = []
+        peak = [0]
+
+        def get(*args: object, **kwargs: object) -> SimpleNamespace:
+            active.append(1)
+            peak[0] = max(peak[0], len(active))
+            release.wait(5)
+            active.pop()
+            return _response()
+
+        mock_session.get.side_effect = get  # type: ignore[attr-defined]
+        options = EndpointOptions(max_concurrent_queries=2)
+        results: list[int] = []
+        threads = [_start(lambda: results.append(_op(options).exec()[0])) for _ in range(4)]
+        governor = concurrency_governor(ENDPOINT, options)
+        assert governor is not None
+        _wait_until(lambda: governor.queued == 2)
+        assert (governor.in_flight, governor.queued) == (2, 2)
+        release.set()
+        for thread in threads:
+            thread.join()
+        assert results == [200] * 4
+        assert peak[0] == 2
+
+    @patch("ramose.operation._http_session")
+    def test_slot_is_held_while_the_body_is_read(self, mock_session: object) -> None:
+        reading, release = threading.Event(), threading.Event()
+
+        def body(chunk_size: int) -> Iterator[bytes]:
+            yield b"name\n"
+            reading.set()
+            release.wait(5)
+            yield b"A\n"
+
+        mock_session.get.return_value = SimpleNamespace(  # type: ignore[attr-defined]
+            status_code=200, reason="OK", encoding=None, headers={}, iter_content=body, close=lambda: None
+        )
+        options = EndpointOptions(max_concurrent_queries=1)
+        governor = concurrency_governor(ENDPOINT, options)
+        assert governor is not None
+        results: list[tuple[int, str]] = []
+        thread = _start(lambda: results.append(_op(options).exec(content_type="text/csv")[:2]))
+        assert reading.wait(5)
+        assert governor.in_flight == 1
+        release.set()
+        thread.join()
+        assert results == [(200, "name\r\nA\r\n")]
+        assert governor.in_flight == 0
+
+    @patch("ramose.operation._http_session")
+    def test_query_that_waits_too_long_gets_503(self, mock_session: object) -> None:
+        options = EndpointOptions(max_concurrent_queries=1, queue_timeout=0.05)
+        governor = concurrency_governor(ENDPOINT, options)
+        assert governor is not None
+        governor.acquire()
+        status, body, _, _ = _op(options).exec()
+        assert status == 503
+        assert "no query slot for http://localhost/sparql" in body
+        assert mock_session.get.call_count == 0  # type: ignore[attr-defined]
+
+    @patch("ramose.operation._http_session")
+    def test_deadline_shorter_than_the_queue_timeout_gets_504(self, mock_session: object) -> None:
+        options = EndpointOptions(max_concurrent_queries=1, queue_timeout=30)
+        governor = concurrency_governor(ENDPOINT, options)
+        assert governor is not None
+        governor.acquire()
+        status, body, _, _ = _op(options, timeout=0.05).exec()
+        assert status == 504
+        assert "deadline" in body
+        assert mock_session.get.call_count == 0  # type: ignore[attr-defined]
+
+    @patch("ramose.operation._http_session")
+    def test_updates_hold_a_slot_too(self, mock_session: object) -> None:
+        options = EndpointOptions(max_concurrent_queries=1, queue_timeout=0.05)
+        op = Operation(
+            "/test",
+            "/test",
+            {"url": "/test", "sparql": "INSERT DATA { <a> <b> <c> }", "method": "post"},
+            OperationConfig(sparql_endpoint=ENDPOINT, endpoint_options={ENDPOINT: options}),
+        )
+        governor = concurrency_governor(ENDPOINT, options)
+        assert governor is not None
+        governor.acquire()
+        status, _, _, _ = op.exec(method="post")
+        assert status == 503
+        governor.release()
+        mock_session.post.return_value = SimpleNamespace(status_code=204, reason="No Content", headers={})  # type: ignore[attr-defined]
+        assert op.exec(method="post")[0] == 200
+        assert governor.in_flight == 0
+
+    def test_sparql_anything_queries_hold_a_slot_of_their_endpoint(self) -> None:
+        options = EndpointOptions(max_concurrent_queries=1, queue_timeout=0.05)
+        governor = concurrency_governor(ENDPOINT, options)
+        assert governor is not None
+        governor.acquire()
+        op = _op(options)
+        with patch("ramose.operation.SparqlAnything") as mock_sa:
+            with pytest.raises(HttpError, match="HTTP status code 503"):
+                op._run_query_dicts(ENDPOINT, "sparql-anything", "SELECT ?x WHERE { }")
+            governor.release()
+            mock_sa.return_value.select.return_value = [{"x": "a"}]
+            assert op._run_query_dicts(ENDPOINT, "sparql-anything", "SELECT ?x WHERE { }") == [{"x": "a"}]
+        assert governor.in_flight == 0
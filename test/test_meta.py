@@ -6,14 +6,12 @@ from __future__ import annotations
 
 import json
 import re
-from typing import TYPE_CHECKING
 
 import pytest
 
+from ramose import APIManager
 from test.conftest import execute_operation
-
-if TYPE_CHECKING:
-    from ramose import APIManager
+from test.start_qlever import DATA_DIR
 
 
 def _sort_ids(value: str) -> str:
@@ -419,3 +417,15 @@ def test_author_order_in_metadata(api_manager: APIManager) -> None:
         "Yilmazlar, Sel\u00e7uk [omid:ra/06802276622]",
         "Korfali, G\u00fclsen [omid:ra/06802276623]",
     ]
+
+
+def test_qlever_dialect_returns_the_same_results(api_manager: APIManager, qlever_endpoint: str) -> None:
+    dialect_manager = APIManager(
+        [str(DATA_DIR / "meta_v1.hf")],
+        endpoint_override=qlever_endpoint,
+        endpoint_options=[f"{qlever_endpoint} dialect=qlever"],
+        timeout=30,
+    )
+    for url in ("/v1/metadata/omid:br/0601", "/v1/author/orcid:0000-0002-8420-0696"):
+        expected = normalize_result(json.loads(execute_operation(api_manager, url)))
+        assert normalize_result(json.loads(execute_operation(dialect_manager, url))) == expected
@@ -0,0 +1,126 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+from __future__ import annotations
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import pytest
+from requests import Session
+
+from ramose import APIManager
+from ramose.__main__ import _build_app
+from ramose.auth import TokenStore
+from ramose.endpoints import EndpointOptions, http_pool_samples, mount_endpoint_pools
+from ramose.html_documentation import HTMLDocumentationHandler
+from ramose.metrics import MetricsRegistry, Sample
+from ramose.openapi_documentation import OpenAPIDocumentationHandler
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+TESTS_DIR = str(Path(__file__).resolve().parent / "fixtures")
+
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        body = b"id\nA\n"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/csv")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: object) -> None:  # noqa: A002
+        return
+
+
+@pytest.fixture
+def local_endpoint() -> Iterator[str]:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _KeepAliveHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/sparql"
+    server.shutdown()
+    server.server_close()
+
+
+class TestMetricsRegistry:
+    def test_counters_and_gauges_render_as_prometheus_text(self) -> None:
+        metrics = MetricsRegistry()
+        metrics.describe("ramose_test_total", "counter", "Test counter.")
+        metrics.inc("ramose_test_total", endpoint="http://a/sparql")
+        metrics.inc("ramose_test_total", 2, endpoint="http://a/sparql")
+        metrics.set("ramose_test_ratio", 0.25)
+
+        assert metrics.value("ramose_test_total", endpoint="http://a/sparql") == 3
+        assert metrics.render() == (
+            "ramose_test_ratio 0.25\n"
+            "# HELP ramose_test_total Test counter.\n"
+            "# TYPE ramose_test_total counter\n"
+            'ramose_test_total{endpoint="http://a/sparql"} 3\n'
+        )
+
+    def test_collectors_and_label_escaping(self) -> None:
+        metrics = MetricsRegistry()
+        metrics.add_collector(lambda: [Sample("ramose_collected", {"name": 'a "b"\\c'}, 1.5)])
+        assert metrics.render() == 'ramose_collected{name="a \\"b\\"\\\\c"} 1.5\n'
+
+    def test_clear_keeps_collectors(self) -> None:
+        metrics = MetricsRegistry()
+        metrics.inc("ramose_counter")
+        metrics.add_collector(lambda: [Sample("ramose_collected", {}, 1)])
+        metrics.clear()
+        assert metrics.render() == "ramose_collected 1\n"
+
+
+class TestHttpPoolSamples:
+    def test_keep_alive_reuses_the_dedicated_pool(self, local_endpoint: str) -> None:
+        session = Session()
+        mount_endpoint_pools(session, {local_endpoint: EndpointOptions(pool_size=2)})
+        for _ in range(3):
+            assert session.get(local_endpoint, timeout=(5, 5)).text == "id\nA\n"
+
+        samples = {s.name: s.value for s in http_pool_samples(session) if s.labels["endpoint"] == local_endpoint}
+        assert samples["ramose_http_requests_total"] == 3
+        assert samples["ramose_http_connections_total"] == 1
+        assert samples["ramose_http_connection_reuse_ratio"] == pytest.approx(2 / 3)
+
+    def test_default_pools_are_counted_too(self, local_endpoint: str) -> None:
+        session = Session()
+        mount_endpoint_pools(session, {local_endpoint: EndpointOptions()})
+        session.get(local_endpoint, timeout=(5, 5))
+        samples = {(s.name, s.labels["endpoint"]): s.value for s in http_pool_samples(session)}
+        assert samples["ramose_http_requests_total", "http://"] == 1
+        assert ("ramose_http_requests_total", local_endpoint) not in samples
+
+    def test_connection_close_opens_a_connection_per_request(self, local_endpoint: str) -> None:
+        session = Session()
+        mount_endpoint_pools(session, {local_endpoint: EndpointOptions(pool_size=2)})
+        for _ in range(3):
+            session.get(local_endpoint, headers={"Connection": "close"}, timeout=(5, 5))
+
+        samples = {s.name: s.value for s in http_pool_samples(session) if s.labels["endpoint"] == local_endpoint}
+        assert samples["ramose_http_connections_total"] == 3
+        assert samples["ramose_http_connection_reuse_ratio"] == 0
+
+
+class TestMetricsRoute:
+    def test_metrics_endpoint_serves_prometheus_text(self, tmp_path: Path) -> None:
+        api_manager = APIManager([str(Path(TESTS_DIR) / "test_scholarly.hf")], endpoint_override="http://mock/sparql")
+        app = _build_app(
+            api_manager,
+            HTMLDocumentationHandler(api_manager),
+            OpenAPIDocumentationHandler(api_manager),
+            None,
+            TokenStore(str(tmp_path)),
+        )
+        response = app.test_client().get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["Content-Type"] == "text/plain; version=0.0.4; charset=utf-8"
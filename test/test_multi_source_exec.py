@@ -5,18 +5,28 @@
 from __future__ import annotations
 
 import json
+import re
+import threading
+import time
 from pathlib import Path
 from types import SimpleNamespace
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, ClassVar
 from unittest.mock import MagicMock, patch
+from urllib.parse import unquote
 
 import pytest
+from rdflib import Graph
 from requests.exceptions import ConnectionError as RequestsConnectionError
 
 from ramose import APIManager, HttpError, Operation, OperationConfig
+from ramose.cache import ResultCache
+from ramose.endpoints import EndpointOptions
+from ramose.metrics import registry
 from ramose.paging import build_pagination_info
 
 if TYPE_CHECKING:
+    from collections.abc import Iterator
+
     from ramose.operation import ResultTable
 
 TESTS_DIR = str(Path(__file__).resolve().parent / "fixtures")
@@ -87,6 +97,9 @@ def _csv_response(status_code: int = 200, text: str = "id\nA\n", reason: str = "
         content=text.encode(),
         reason=reason,
         encoding=None,
+        iter_content=lambda chunk_size: iter([text.encode()]),
+        close=lambda: None,
+        headers={},
     )
 
 
@@ -169,7 +182,9 @@ class TestMultiSourceWithSparqlAnything:
                 return []
             return list(WIKIDATA_DOI_QID)
 
-        def mock_run_sa(query_text: str, values: dict[str, str] | None = None) -> list[dict[str, str]]:
+        def mock_run_sa(
+            query_text: str, values: dict[str, str] | None = None, endpoint_url: str = ""
+        ) -> list[dict[str, str]]:
             return list(CROSSREF_TITLE_YEAR)
 
         with (
@@ -211,6 +226,152 @@ class TestMultiSourceErrorHandling:
         assert ct == "text/plain"
 
 
+class TestOptionalSteps:
+    SPARQL = (
+        "SELECT ?doi ?title WHERE { }\n"
+        "@@join ?doi ?doi type=left optional=true timeout=0.2\n"
+        "@@with endpoint=http://wikidata/sparql\n"
+        "SELECT ?doi ?qid WHERE { }"
+    )
+
+    @staticmethod
+    def _make_op(tmp_path: Path | None = None, sparql: str = SPARQL, timeout: float = 0) -> Operation:
+        return Operation(
+            "/t",
+            "/t",
+            {
+                "url": "/t",
+                "sparql": sparql,
+                "method": "get",
+                "field_type": "str(doi) str(title) str(qid)",
+            },
+            OperationConfig(
+                sparql_endpoint="http://meta/sparql",
+                cache=ResultCache(str(tmp_path)) if tmp_path else None,
+                timeout=timeout,
+            ),
+        )
+
+    @staticmethod
+    def _rows(endpoint_url: str, query_text: str) -> list[dict[str, str]]:
+        return [{"doi": "10.1/a", "title": "A"}, {"doi": "10.1/b", "title": "B"}]
+
+    def test_rows_are_joined_when_the_optional_step_succeeds(self) -> None:
+        def run(endpoint_url: str, query_text: str) -> list[dict[str, str]]:
+            if "wikidata" in endpoint_url:
+                return [{"doi": "10.1/a", "qid": "Q1"}]
+            return self._rows(endpoint_url, query_text)
+
+        op = self._make_op()
+        with patch.object(op, "_run_sparql_dicts", side_effect=run):
+            sc, body, _, headers = op.exec()
+        assert sc == 200
+        assert [row["qid"] for row in json.loads(body)] == ["Q1", ""]
+        assert "Warning" not in headers
+
+    def test_failing_optional_step_keeps_the_left_rows(self, tmp_path: Path) -> None:
+        def run(endpoint_url: str, query_text: str) -> list[dict[str, str]]:
+            if "wikidata" in endpoint_url:
+                msg = "SPARQL 500: Internal Server Error"
+                raise RuntimeError(msg)
+            return self._rows(endpoint_url, query_text)
+
+        skipped = registry.value(
+            "ramose_optional_steps_skipped_total", endpoint="http://wikidata/sparql", reason="error"
+        )
+        op = self._make_op(tmp_path)
+        with patch.object(op, "_run_sparql_dicts", side_effect=run) as mock_run:
+            sc, body, _, headers = op.exec()
+            assert sc == 200
+            assert json.loads(body) == [
+                {"doi": "10.1/a", "title": "A", "qid": ""},
+                {"doi": "10.1/b", "title": "B", "qid": ""},
+            ]
+            assert (
+                headers["Warning"] == '199 - "Partial results: optional steps skipped (http://wikidata/sparql error)"'
+            )
+            assert (
+                registry.value("ramose_optional_steps_skipped_total", endpoint="http://wikidata/sparql", reason="error")
+                == skipped + 1
+            )
+            # Partial results are not cached: the next request queries both sources again.
+            op.exec()
+            assert mock_run.call_count == 4
+
+    def test_slow_optional_step_is_given_up_after_its_timeout(self) -> None:
+        release = threading.Event()
+
+        def run(endpoint_url: str, query_text: str) -> list[dict[str, str]]:
+            if "wikidata" in endpoint_url:
+                release.wait(5)
+                return [{"doi": "10.1/a", "qid": "Q1"}]
+            return self._rows(endpoint_url, query_text)
+
+        op = self._make_op()
+        started = time.monotonic()
+        try:
+            with patch.object(op, "_run_sparql_dicts", side_effect=run):
+                sc, body, _, headers = op.exec()
+        finally:
+            release.set()
+        assert time.monotonic() - started < 2
+        assert sc == 200
+        assert [row["qid"] for row in json.loads(body)] == ["", ""]
+        assert "http://wikidata/sparql timeout" in headers["Warning"]
+
+    def test_optional_step_running_past_the_request_deadline_fails_with_504(self) -> None:
+        release = threading.Event()
+
+        def run(endpoint_url: str, query_text: str) -> list[dict[str, str]]:
+            if "wikidata" in endpoint_url:
+                release.wait(5)
+                return [{"doi": "10.1/a", "qid": "Q1"}]
+            return self._rows(endpoint_url, query_text)
+
+        op = self._make_op(sparql=self.SPARQL.replace("timeout=0.2", "timeout=5"), timeout=0.3)
+        try:
+            with patch.object(op, "_run_sparql_dicts", side_effect=run):
+                sc, msg, _, _ = op.exec()
+        finally:
+            release.set()
+        assert sc == 504
+        assert msg == "HTTP status code 504: request deadline of 0.3s exceeded"
+
+    @patch("ramose.operation._http_session")
+    def test_given_up_step_stops_reading_its_response(self, mock_session: MagicMock) -> None:
+        closed = threading.Event()
+
+        def body(chunk_size: int) -> Iterator[bytes]:
+            yield b"doi,qid\n"
+            for _ in range(50):
+                time.sleep(0.1)
+                yield b"10.1/a,Q1\n"
+
+        def get(url: str, **_: object) -> SimpleNamespace:
+            if "wikidata" in url:
+                response = _csv_response()
+                response.iter_content = body
+                response.close = closed.set
+                return response
+            return _csv_response(text="doi,title\n10.1/a,A\n")
+
+        mock_session.get.side_effect = get
+        sc, _, _, headers = self._make_op().exec()
+        assert sc == 200
+        assert "http://wikidata/sparql timeout" in headers["Warning"]
+        assert closed.wait(1)
+
+    def test_failing_required_step_still_fails_the_request(self) -> None:
+        def run(endpoint_url: str, query_text: str) -> list[dict[str, str]]:
+            msg = "SPARQL 500: Internal Server Error"
+            raise RuntimeError(msg)
+
+        op = self._make_op()
+        with patch.object(op, "_run_sparql_dicts", side_effect=run):
+            sc, _, _, _ = op.exec()
+        assert sc == 502
+
+
 class TestMultiSourceUnknownStepTag:
     def test_unknown_step_tag_returns_502(self) -> None:
         am = _load_api_manager("test_scholarly_multi-sources.hf")
@@ -326,12 +487,20 @@ class TestMultiSourceRetry:
             op_item,
             OperationConfig(sparql_endpoint="http://ep1/sparql", retry_wait=0),
         )
-        mock_session.get.side_effect = [
-            _csv_response(text="id\nA\nB\n"),
-            _csv_response(text="id,value\nA,one\n"),
-            _csv_response(status_code=503, text="error", reason="Service Unavailable"),
-            _csv_response(text="id,value\nB,two\n"),
-        ]
+        responses = {
+            "ep1": [_csv_response(text="id\nA\nB\n")],
+            "A": [_csv_response(text="id,value\nA,one\n")],
+            "B": [
+                _csv_response(status_code=503, text="error", reason="Service Unavailable"),
+                _csv_response(text="id,value\nB,two\n"),
+            ],
+        }
+
+        def get(url: str, **kwargs: object) -> SimpleNamespace:
+            key = "ep1" if url.startswith("http://ep1/") else unquote(url).split("BIND(")[1][0]
+            return responses[key].pop(0)
+
+        mock_session.get.side_effect = get
 
         def mock_parse_steps(text: str, tp: str, par_dict: dict[str, object]) -> list[tuple[str, ...]]:
             return [
@@ -352,6 +521,27 @@ class TestMultiSourceRetry:
         assert called_urls[0].startswith("http://ep1/sparql?")
         assert all(url.startswith("http://ep2/sparql?") for url in called_urls[1:])
 
+    @patch("ramose.operation._http_session")
+    def test_foreach_wait_past_deadline_returns_504(self, mock_session: MagicMock) -> None:
+        op_item = {
+            "url": "/test/{id}",
+            "id": "str(.+)",
+            "sparql": (
+                "SELECT ?id WHERE { }\n@@join ?id ?id\n@@foreach ?id item wait=5\n"
+                "SELECT ?id ?value WHERE { BIND([[item]] AS ?id) }"
+            ),
+            "method": "get",
+            "field_type": "str(id) str(value)",
+        }
+        config = OperationConfig(sparql_endpoint="http://ep1/sparql", retry_wait=0, timeout=1)
+        op = Operation("/api/test/A", r"/api/test/(.+)", op_item, config)
+        mock_session.get.side_effect = [_csv_response(text="id\nA\nB\n"), _csv_response(text="id,value\nA,one\n")]
+
+        sc, msg, _, _ = op.exec(method="get", content_type="application/json")
+
+        assert (sc, msg) == (504, "HTTP status code 504: request deadline of 1s exceeded")
+        assert mock_session.get.call_count == 2
+
     def test_sparql_anything_endpoint_retries_before_join(self) -> None:
         op_item = {
             "url": "/test/{id}",
@@ -480,6 +670,70 @@ class TestMultiSourceForeachNoMatchingColumn:
         assert json.loads(body) == []
 
 
+class TestForeachParallelism:
+    @staticmethod
+    def _run(wait: float, mock_session: MagicMock, fanout_parallelism: int = 1) -> tuple[list[dict[str, str]], int]:
+        op_item = {
+            "url": "/test/{id}",
+            "id": "str(.+)",
+            "sparql": f"SELECT ?id WHERE {{ }}\n@@foreach ?id item wait={wait}\nSELECT ?id ?value WHERE {{ }}",
+            "method": "get",
+            "field_type": "str(id) str(value)",
+        }
+        config = OperationConfig(
+            sparql_endpoint="http://ep1/sparql",
+            endpoint_options={"http://ep2/sparql": EndpointOptions(fanout_parallelism=fanout_parallelism)},
+        )
+        op = Operation("/api/test/A", r"/api/test/(.+)", op_item, config)
+        in_flight = [0, 0]
+        lock = threading.Lock()
+
+        def get(url: str, **kwargs: object) -> SimpleNamespace:
+            if url.startswith("http://ep1/"):
+                return _csv_response(text="id\nA\nB\nC\n")
+            with lock:
+                in_flight[0] += 1
+                in_flight[1] = max(in_flight)
+            time.sleep(0.05)
+            with lock:
+                in_flight[0] -= 1
+            item = unquote(url).split("BIND(")[1][0]
+            return _csv_response(text=f"id,value\n{item},{item.lower()}\n")
+
+        mock_session.get.side_effect = get
+
+        def mock_parse_steps(text: str, tp: str, par_dict: dict[str, object]) -> list[tuple[str, ...]]:
+            return [
+                ("QUERY", "http://ep1/sparql", "sparql", "SELECT ?id WHERE { }"),
+                ("JOIN", "?id", "?id", "inner"),
+                ("FOREACH", "?id", "item", wait),  # type: ignore[list-item]
+                ("QUERY", "http://ep2/sparql", "sparql", "SELECT ?id ?value WHERE { BIND([[item]] AS ?id) }"),
+            ]
+
+        with patch.object(op, "_parse_steps", side_effect=mock_parse_steps):
+            sc, body, _ctype, _ = op.exec(method="get", content_type="application/json")
+        assert sc == 200
+        return json.loads(body), in_flight[1]
+
+    @patch("ramose.operation._http_session")
+    def test_iterations_without_wait_run_in_parallel_when_enabled(self, mock_session: MagicMock) -> None:
+        rows, peak = self._run(0.0, mock_session, fanout_parallelism=3)
+        assert rows == [{"id": "A", "value": "a"}, {"id": "B", "value": "b"}, {"id": "C", "value": "c"}]
+        assert peak == 3
+
+    @patch("ramose.operation._http_session")
+    def test_iterations_run_in_sequence_by_default(self, mock_session: MagicMock) -> None:
+        rows, peak = self._run(0.0, mock_session)
+        assert rows == [{"id": "A", "value": "a"}, {"id": "B", "value": "b"}, {"id": "C", "value": "c"}]
+        assert peak == 1
+
+    @patch("ramose.operation._http_session")
+    def test_iterations_with_wait_run_in_sequence(self, mock_session: MagicMock) -> None:
+        rows, peak = self._run(0.01, mock_session)
+        assert rows == [{"id": "A", "value": "a"}, {"id": "B", "value": "b"}, {"id": "C", "value": "c"}]
+        assert peak == 1
+
+
 class TestParseSteps:
     def _make_op(self, sources_map: dict[str, str] | None = None) -> Operation:
         op_item = {
@@ -740,6 +994,29 @@ class TestParseSteps:
         with pytest.raises(ValueError, match=r"Positional argument.*cannot follow keyword"):
             op._parse_steps(text, "http://ep/sparql", {})
 
+    def test_optional_join(self) -> None:
+        op = self._make_op()
+        text = "SELECT ?a WHERE { }\n@@join ?a ?a type=left optional=true timeout=2.5\nSELECT ?a ?b WHERE { }"
+        steps = op._parse_steps(text, "http://ep/sparql", {})
+        assert steps[1] == ("OPTIONAL_JOIN", "?a", "?a", "left", "2.5")
+        text = "SELECT ?a WHERE { }\n@@join ?a ?a type=left optional=true\nSELECT ?a ?b WHERE { }"
+        assert op._parse_steps(text, "http://ep/sparql", {})[1] == ("OPTIONAL_JOIN", "?a", "?a", "left", "")
+
+    @pytest.mark.parametrize(
+        ("join", "message"),
+        [
+            ("@@join ?a ?a optional=true", "optional=true requires type=left"),
+            ("@@join ?a ?a type=left timeout=2", "timeout requires optional=true"),
+            ("@@join ?a ?a type=left optional=maybe", "Invalid optional value"),
+            ("@@join ?a ?a type=left optional=true timeout=0", "Invalid timeout value"),
+            ("@@join ?a ?a type=left optional=true timeout=soon", "Invalid timeout value"),
+        ],
+    )
+    def test_invalid_optional_join_raises(self, join: str, message: str) -> None:
+        op = self._make_op()
+        with pytest.raises(ValueError, match=message):
+            op._parse_steps(f"SELECT ?a WHERE {{ }}\n{join}\nSELECT ?a WHERE {{ }}", "http://ep/sparql", {})
+
     # @@foreach: positional, keyword, mixed, wrong order
 
     def test_foreach_keyword_syntax(self) -> None:
@@ -912,6 +1189,428 @@ class TestInjectValuesClause:
         assert result != query
 
 
+class TestValuesChunking:
+    @staticmethod
+    def _make_op(options: EndpointOptions) -> Operation:
+        op_item = {
+            "url": "/test/{id}",
+            "id": "str(.+)",
+            "sparql": "SELECT ?id WHERE { }\n@@values ?id\n@@join ?id ?id\nSELECT ?id ?v WHERE { }",
+            "method": "get",
+            "field_type": "str(id) str(v)",
+        }
+        return Operation(
+            "/api/test/A",
+            r"/api/test/(.+)",
+            op_item,
+            OperationConfig(
+                sparql_endpoint="http://ep1/sparql",
+                endpoint_options={"http://ep2/sparql": options},
+                retry_wait=0,
+            ),
+        )
+
+    @staticmethod
+    def _steps(text: str, tp: str, par_dict: dict[str, object]) -> list[tuple[str, ...]]:
+        return [
+            ("QUERY", "http://ep1/sparql", "sparql", "SELECT ?id WHERE { }"),
+            ("VALUES_INJECT", ["?id"]),  # type: ignore[list-item]
+            ("JOIN", "?id", "?id", "inner"),
+            ("QUERY", "http://ep2/sparql", "sparql", "SELECT ?id ?v WHERE { }"),
+        ]
+
+    def test_chunk_rows_by_tuple_count(self) -> None:
+        rows = [f'  ("{i}")' for i in range(5)]
+        chunks = Operation._chunk_values_rows(rows, 2, 0)
+        assert chunks == [rows[0:2], rows[2:4], rows[4:5]]
+
+    def test_chunk_rows_by_byte_size(self) -> None:
+        rows = ['  ("aaaa")', '  ("bbbb")', '  ("cccc")']
+        chunks = Operation._chunk_values_rows(rows, 0, 25)
+        assert chunks == [rows[0:2], rows[2:3]]
+
+    def test_oversized_row_gets_its_own_chunk(self) -> None:
+        rows = ['  ("' + "x" * 50 + '")', '  ("y")']
+        assert Operation._chunk_values_rows(rows, 0, 10) == [rows[0:1], rows[1:2]]
+
+    def test_empty_block_yields_one_empty_chunk(self) -> None:
+        assert Operation._chunk_values_rows([], 2, 10) == [[]]
+
+    def test_without_limits_keeps_a_single_query(self) -> None:
+        op = self._make_op(EndpointOptions())
+        acc = [{"id": str(i)} for i in range(10)]
+        queries = op._values_chunk_queries("http://ep2/sparql", "SELECT ?id WHERE { }", ["?id"], acc)  # type: ignore[arg-type]
+        assert queries == [op._inject_values_clause("SELECT ?id WHERE { }", ["?id"], acc)]  # type: ignore[arg-type]
+
+    def test_chunks_run_in_parallel_and_concatenate_in_order(self) -> None:
+        op = self._make_op(EndpointOptions(values_max_tuples=2, values_parallelism=3))
+        lock = threading.Lock()
+        in_flight = {"now": 0, "max": 0}
+
+        def mock_run_sparql(endpoint_url: str, query_text: str) -> list[dict[str, str]]:
+            if endpoint_url == "http://ep1/sparql":
+                return [{"id": str(i)} for i in range(5)]
+            with lock:
+                in_flight["now"] += 1
+                in_flight["max"] = max(in_flight["max"], in_flight["now"])
+            time.sleep(0.05)
+            with lock:
+                in_flight["now"] -= 1
+            ids = re.findall(r'\("(\d)"\)', query_text)
+            return [{"id": i, "v": f"v{i}"} for i in ids]
+
+        with (
+            patch.object(op, "_parse_steps", side_effect=self._steps),
+            patch.object(op, "_run_sparql_dicts", side_effect=mock_run_sparql) as run_sparql,
+        ):
+            sc, body, _ctype, _ = op.exec(method="get", content_type="application/json")
+
+        assert sc == 200
+        assert json.loads(body) == [{"id": str(i), "v": f"v{i}"} for i in range(5)]
+        chunk_queries = [call.args[1] for call in run_sparql.call_args_list if call.args[0] == "http://ep2/sparql"]
+        assert sorted(len(re.findall(r'\("\d"\)', q)) for q in chunk_queries) == [1, 2, 2]
+        assert in_flight["max"] > 1
+
+    def test_chunk_failure_propagates(self) -> None:
+        op = self._make_op(EndpointOptions(values_max_tuples=1))
+
+        def mock_run_sparql(endpoint_url: str, query_text: str) -> list[dict[str, str]]:
+            if endpoint_url == "http://ep1/sparql":
+                return [{"id": "1"}, {"id": "2"}]
+            if '("2")' in query_text:
+                msg = "SPARQL 500: Internal Server Error"
+                raise RuntimeError(msg)
+            return [{"id": "1", "v": "v1"}]
+
+        with (
+            patch.object(op, "_parse_steps", side_effect=self._steps),
+            patch.object(op, "_run_sparql_dicts", side_effect=mock_run_sparql),
+        ):
+            sc, msg, _ctype, _ = op.exec(method="get", content_type="application/json")
+
+        assert sc == 502
+        assert msg == "HTTP status code 502: SPARQL 500: Internal Server Error"
+
+    @patch("ramose.operation._http_session")
+    def test_long_get_chunk_falls_back_to_post(self, mock_session: MagicMock) -> None:
+        op = self._make_op(EndpointOptions(max_url_length=60))
+        mock_session.post.return_value = _csv_response(text="id,v\nA,B\n")
+        rows = op._run_sparql_dicts("http://ep2/sparql", "SELECT ?id ?v WHERE { VALUES ?id { 'a' 'b' 'c' 'd' } }")
+        assert rows == [{"id": "A", "v": "B"}]
+        assert mock_session.get.call_count == 0
+        assert mock_session.post.call_args.kwargs["data"] == "SELECT ?id ?v WHERE { VALUES ?id { 'a' 'b' 'c' 'd' } }"
+
+    @patch("ramose.operation._http_session")
+    def test_long_get_stays_get_without_a_limit(self, mock_session: MagicMock) -> None:
+        op = self._make_op(EndpointOptions())
+        mock_session.get.return_value = _csv_response(text="id\nA\n")
+        op._run_sparql_dicts("http://ep2/sparql", "SELECT ?id WHERE { VALUES ?id { " + "'a' " * 5000 + "} }")
+        assert mock_session.get.call_count == 1
+        assert mock_session.post.call_count == 0
+
+    @patch("ramose.operation._http_session")
+    def test_short_get_chunk_stays_get(self, mock_session: MagicMock) -> None:
+        op = self._make_op(EndpointOptions(max_url_length=500))
+        mock_session.get.return_value = _csv_response(text="id\nA\n")
+        op._run_sparql_dicts("http://ep2/sparql", "SELECT ?id WHERE { }")
+        assert mock_session.get.call_count == 1
+        assert mock_session.post.call_count == 0
+
+
+class _DelayedEndpoints:
+    """Stand-in for the HTTP session: every endpoint answers its fixed CSV after a delay."""
+
+    def __init__(self, delay: float, tables: dict[str, str], failures: dict[str, float] | None = None) -> None:
+        self.delay = delay
+        self.tables = tables
+        self.failures = failures or {}
+        self.queries: list[tuple[str, str]] = []
+        self._lock = threading.Lock()
+
+    def get(self, url: str, headers: dict[str, str], timeout: float, *, stream: bool) -> SimpleNamespace:
+        endpoint, _, query = url.partition("?query=")
+        with self._lock:
+            self.queries.append((endpoint, query))
+        if endpoint in self.failures:
+            time.sleep(self.failures[endpoint])
+            return _csv_response(status_code=400, text="", reason=f"Bad Request from {endpoint}")
+        time.sleep(self.delay)
+        return _csv_response(text=self.tables[endpoint])
+
+
+class TestPipelineScheduling:
+    DELAY = 0.2
+    SPARQL = (
+        "SELECT ?id ?a WHERE { }\n"
+        "@@with endpoint=http://ep2/sparql\n"
+        "@@join ?id ?id\n"
+        "SELECT ?id ?b WHERE { }\n"
+        "@@with endpoint=http://ep3/sparql\n"
+        "@@join ?id ?id type=left\n"
+        "SELECT ?id ?c WHERE { }\n"
+        "@@with endpoint=http://ep4/sparql\n"
+        "@@values ?id\n"
+        "@@join ?id ?id\n"
+        "SELECT ?id ?d WHERE { }"
+    )
+    TABLES: ClassVar[dict[str, str]] = {
+        "http://ep1/sparql": "id,a\n1,a1\n2,a2\n3,a3\n",
+        "http://ep2/sparql": "id,b\n1,b1\n3,b3\n",
+        "http://ep3/sparql": "id,c\n3,c3\n",
+        "http://ep4/sparql": "id,d\n1,d1\n3,d3\n",
+    }
+
+    def _make_op(self, pipeline_workers: int) -> Operation:
+        op_item = {
+            "url": "/test/{id}",
+            "id": "str(.+)",
+            "sparql": self.SPARQL,
+            "method": "get",
+            "field_type": "str(id) str(a) str(b) str(c) str(d)",
+        }
+        return Operation(
+            "/api/test/A",
+            r"/api/test/(.+)",
+            op_item,
+            OperationConfig(sparql_endpoint="http://ep1/sparql", pipeline_workers=pipeline_workers),
+        )
+
+    def _run(self, pipeline_workers: int, endpoints: _DelayedEndpoints) -> tuple[tuple[int, str, str], float]:
+        op = self._make_op(pipeline_workers)
+        with patch("ramose.operation._http_session", endpoints):
+            start = time.monotonic()
+            sc, body, ctype, _ = op.exec(method="get", content_type="application/json")
+            elapsed = time.monotonic() - start
+        return (sc, body, ctype), elapsed
+
+    def test_concurrent_run_matches_sequential_and_saves_time(self) -> None:
+        sequential, sequential_elapsed = self._run(1, _DelayedEndpoints(self.DELAY, self.TABLES))
+        endpoints = _DelayedEndpoints(self.DELAY, self.TABLES)
+        concurrent, concurrent_elapsed = self._run(4, endpoints)
+
+        assert concurrent == sequential
+        assert json.loads(concurrent[1]) == [
+            {"id": "1", "a": "a1", "b": "b1", "c": "", "d": "d1"},
+            {"id": "3", "a": "a3", "b": "b3", "c": "c3", "d": "d3"},
+        ]
+        # Three independent queries overlap; only the @@values query waits for the joins.
+        assert sequential_elapsed >= 4 * self.DELAY
+        assert concurrent_elapsed < 3 * self.DELAY
+        values_query = next(unquote(query) for endpoint, query in endpoints.queries if endpoint == "http://ep4/sparql")
+        assert re.findall(r'\("(\d)"\)', values_query) == ["1", "3"]
+
+    def test_first_failing_step_in_pipeline_order_is_reported(self) -> None:
+        failures = {"http://ep1/sparql": self.DELAY, "http://ep2/sparql": 0.0}
+        sequential, _ = self._run(1, _DelayedEndpoints(self.DELAY, self.TABLES, failures))
+        concurrent, _ = self._run(4, _DelayedEndpoints(self.DELAY, self.TABLES, failures))
+
+        assert concurrent == sequential
+        assert concurrent[0] == 502
+        assert "http://ep1/sparql" in concurrent[1]
+
+    def test_sequential_default_keeps_call_order(self) -> None:
+        endpoints = _DelayedEndpoints(0.0, self.TABLES)
+        self._run(1, endpoints)
+        assert [endpoint for endpoint, _ in endpoints.queries] == [
+            "http://ep1/sparql",
+            "http://ep2/sparql",
+            "http://ep3/sparql",
+            "http://ep4/sparql",
+        ]
+
+
+class TestMergeJoins:
+    SPARQL = (
+        "SELECT ?id ?title WHERE { ?id <http://ex.org/title> ?title }\n"
+        "@@join ?id ?id type=left\n"
+        "SELECT ?id ?year WHERE { ?id <http://ex.org/year> ?year }"
+    )
+
+    def _make_op(self, optimizations: frozenset[str]) -> Operation:
+        op_item = {
+            "url": "/test/{id}",
+            "id": "str(.+)",
+            "sparql": self.SPARQL,
+            "method": "get",
+            "field_type": "str(id) str(title) str(year)",
+        }
+        return Operation(
+            "/api/test/A",
+            r"/api/test/(.+)",
+            op_item,
+            OperationConfig(sparql_endpoint="http://ep1/sparql", optimizations=optimizations),
+        )
+
+    @patch("ramose.operation._http_session")
+    def test_same_endpoint_join_runs_as_one_query(self, mock_session: MagicMock) -> None:
+        op = self._make_op(frozenset({"merge_joins"}))
+        mock_session.get.return_value = _csv_response(text="id,title,year\nA,T1,2020\nB,T2,\n")
+
+        sc, body, _ctype, _ = op.exec(method="get", content_type="application/json")
+
+        assert sc == 200
+        assert json.loads(body) == [
+            {"id": "A", "title": "T1", "year": "2020"},
+            {"id": "B", "title": "T2", "year": ""},
+        ]
+        assert mock_session.get.call_count == 1
+        query = unquote(mock_session.get.call_args.args[0].partition("?query=")[2])
+        assert "OPTIONAL {" in query
+        assert op.query_plan == ["merge_joins: @@join ?id (left) runs on http://ep1/sparql"]
+
+    @patch("ramose.operation._http_session")
+    def test_without_optimization_joins_in_python(self, mock_session: MagicMock) -> None:
+        op = self._make_op(frozenset())
+        mock_session.get.side_effect = [
+            _csv_response(text="id,title\nA,T1\nB,T2\n"),
+            _csv_response(text="id,year\nA,2020\n"),
+        ]
+
+        sc, body, _ctype, _ = op.exec(method="get", content_type="application/json")
+
+        assert sc == 200
+        assert json.loads(body) == [
+            {"id": "A", "title": "T1", "year": "2020"},
+            {"id": "B", "title": "T2", "year": ""},
+        ]
+        assert mock_session.get.call_count == 2
+        assert op.query_plan == []
+
+
+class TestBindJoin:
+    SPARQL = (
+        "SELECT ?id ?title WHERE { ?id <http://ex.org/title> ?title }\n"
+        "@@with endpoint=http://ep2/sparql\n"
+        "@@join ?id ?br type=left\n"
+        "SELECT ?br ?count WHERE { ?br <http://ex.org/count> ?count }"
+    )
+    LEFT = "id,title\nhttp://ex.org/a,T1\nhttp://ex.org/b,T2\nhttp://ex.org/a,T1bis\n"
+    RIGHT = "br,count\nhttps://ex.org/a/,3\n"
+    EXPECTED: ClassVar[list[dict[str, str]]] = [
+        {"id": "http://ex.org/a", "title": "T1", "count": "3"},
+        {"id": "http://ex.org/b", "title": "T2", "count": ""},
+        {"id": "http://ex.org/a", "title": "T1bis", "count": "3"},
+    ]
+
+    def _make_op(self, threshold: int, sparql: str = SPARQL) -> Operation:
+        op_item = {
+            "url": "/test/{id}",
+            "id": "str(.+)",
+            "sparql": sparql,
+            "method": "get",
+            "field_type": "str(id) str(title) str(count)",
+        }
+        return Operation(
+            "/api/test/A",
+            r"/api/test/(.+)",
+            op_item,
+            OperationConfig(
+                sparql_endpoint="http://ep1/sparql",
+                optimizations=frozenset({"bind_join"}),
+                bind_join_threshold=threshold,
+            ),
+        )
+
+    def _run(self, op: Operation) -> tuple[list[dict[str, str]], str]:
+        with patch("ramose.operation._http_session") as mock_session:
+            mock_session.get.side_effect = [_csv_response(text=self.LEFT), _csv_response(text=self.RIGHT)]
+            sc, body, _ctype, _ = op.exec(method="get", content_type="application/json")
+        assert sc == 200
+        right_query = unquote(mock_session.get.call_args_list[1].args[0].partition("?query=")[2])
+        return json.loads(body), right_query
+
+    def test_small_left_side_injects_the_keys(self) -> None:
+        op = self._make_op(threshold=2)
+        rows, right_query = self._run(op)
+
+        assert rows == self.EXPECTED
+        assert "VALUES (?br) {" in right_query
+        # Both URL schemes and both trailing-slash forms match the key, as in the in-memory join.
+        for iri in ("http://ex.org/a", "https://ex.org/a", "http://ex.org/a/", "https://ex.org/a/", "http://ex.org/b"):
+            assert f"(<{iri}>)" in right_query
+        assert op.query_plan == ["bind_join: @@join ?id ?br on http://ep2/sparql (2 keys)"]
+
+    def test_large_left_side_uses_hash_join(self) -> None:
+        op = self._make_op(threshold=1)
+        rows, right_query = self._run(op)
+
+        assert rows == self.EXPECTED
+        assert "VALUES" not in right_query
+        assert op.query_plan == [
+            "hash_join: @@join ?id ?br on http://ep2/sparql (2 keys exceed the threshold of 1)",
+        ]
+
+    def test_query_that_assigns_the_key_uses_hash_join(self) -> None:
+        sparql = self.SPARQL.replace(
+            "?br <http://ex.org/count> ?count", "?x <http://ex.org/count> ?count BIND(?x AS ?br)"
+        )
+        op = self._make_op(threshold=100, sparql=sparql)
+        _rows, right_query = self._run(op)
+
+        assert "VALUES" not in right_query
+        assert op.query_plan == ["hash_join: @@join ?id ?br on http://ep2/sparql (?br is assigned in the query)"]
+
+    def test_bind_join_keys_respect_values_chunking(self) -> None:
+        op = self._make_op(threshold=100)
+        op.endpoint_options = {"http://ep2/sparql": EndpointOptions(values_max_tuples=4, values_parallelism=1)}
+        with patch("ramose.operation._http_session") as mock_session:
+            mock_session.get.side_effect = [
+                _csv_response(text=self.LEFT),
+                _csv_response(text=self.RIGHT),
+                _csv_response(text="br,count\n"),
+            ]
+            sc, body, _ctype, _ = op.exec(method="get", content_type="application/json")
+
+        assert sc == 200
+        assert json.loads(body) == self.EXPECTED
+        assert mock_session.get.call_count == 3
+
+
+class TestBindJoinLiteralKeys:
+    GRAPH = """@prefix ex: <http://ex.org/> .
+    ex:a ex:code 5 ; ex:title "T1" .
+    ex:b ex:code "x"@en ; ex:title "T2" .
+    ex:c ex:code <urn:isbn:1> ; ex:title "T3" .
+    ex:r1 ex:ref 5 ; ex:count "3" .
+    ex:r2 ex:ref "x"@en ; ex:count "4" .
+    ex:r3 ex:ref <urn:isbn:1> ; ex:count "5" ."""
+    SPARQL = (
+        "SELECT ?code ?title WHERE { ?s <http://ex.org/code> ?code ; <http://ex.org/title> ?title }\n"
+        "@@join ?code ?ref\n"
+        "SELECT ?ref ?count WHERE { ?r <http://ex.org/ref> ?ref ; <http://ex.org/count> ?count }"
+    )
+
+    def _run(self, optimizations: frozenset[str]) -> tuple[list[dict[str, str]], list[str]]:
+        graph = Graph().parse(data=self.GRAPH, format="turtle")
+
+        def get(url: str, **_kwargs: object) -> SimpleNamespace:
+            result = graph.query(unquote(url.partition("?query=")[2]))
+            return _csv_response(text=result.serialize(format="csv").decode())  # type: ignore[union-attr]
+
+        op_item = {
+            "url": "/test/{id}",
+            "id": "str(.+)",
+            "sparql": self.SPARQL,
+            "method": "get",
+            "field_type": "str(code) str(title) str(count)",
+        }
+        config = OperationConfig(sparql_endpoint="http://ep1/sparql", optimizations=optimizations)
+        op = Operation("/api/test/A", r"/api/test/(.+)", op_item, config)
+        with patch("ramose.operation._http_session") as mock_session:
+            mock_session.get.side_effect = get
+            sc, body, _ctype, _ = op.exec(method="get", content_type="application/json")
+        assert sc == 200
+        return sorted(json.loads(body), key=str), op.query_plan
+
+    def test_literal_keys_join_like_the_hash_join(self) -> None:
+        hash_rows, _ = self._run(frozenset())
+        rows, plan = self._run(frozenset({"bind_join"}))
+
+        assert rows == hash_rows
+        assert len(rows) == 3
+        assert plan == ["hash_join: @@join ?code ?ref on http://ep1/sparql (a key is not an http(s) IRI)"]
+
+
 class TestHeaderFromFieldType:
     def test_extracts_field_names_in_order(self) -> None:
         op_item = {"field_type": "str(doi) str(qid) int(count)"}
@@ -960,12 +1659,7 @@ class TestRunSparqlDicts:
 
     @patch("ramose.operation._http_session")
     def test_get_request(self, mock_session: MagicMock) -> None:
-        resp = SimpleNamespace(
-            status_code=200,
-            content=b"doi,qid\n10.1,Q1\n10.2,Q2\n",
-            reason="OK",
-            encoding=None,
-        )
+        resp = _csv_response(status_code=200, text="doi,qid\n10.1,Q1\n10.2,Q2\n", reason="OK")
         mock_session.get.return_value = resp
 
         op = self._make_op("get")
@@ -975,13 +1669,24 @@ class TestRunSparqlDicts:
         assert rows[1]["qid"] == "Q2"
 
     @patch("ramose.operation._http_session")
-    def test_post_request(self, mock_session: MagicMock) -> None:
-        resp = SimpleNamespace(
-            status_code=200,
-            content=b"x\nval\n",
-            reason="OK",
-            encoding=None,
+    def test_tsv_results_give_lexical_values(self, mock_session: MagicMock) -> None:
+        mock_session.get.return_value = _csv_response(text='?doi\t?n\n"10.1"\t5\n<http://q/Q2>\t\n')
+        op = Operation(
+            "/api/test/v",
+            r"/api/test/(.+)",
+            {"url": "/test/{id}", "sparql": "SELECT ?x WHERE { }", "method": "get"},
+            OperationConfig(
+                sparql_endpoint="http://ep/sparql",
+                endpoint_options={"http://ep/sparql": EndpointOptions(result_format="tsv")},
+                retry_wait=0,
+            ),
         )
+        rows = op._run_sparql_dicts("http://ep/sparql", "SELECT ?doi ?n WHERE { }")
+        assert rows == [{"doi": "10.1", "n": "5"}, {"doi": "http://q/Q2", "n": ""}]
+
+    @patch("ramose.operation._http_session")
+    def test_post_request(self, mock_session: MagicMock) -> None:
+        resp = _csv_response(status_code=200, text="x\nval\n", reason="OK")
         mock_session.post.return_value = resp
 
         op = self._make_op("post")
@@ -991,12 +1696,7 @@ class TestRunSparqlDicts:
 
     @patch("ramose.operation._http_session")
     def test_non_200_raises(self, mock_session: MagicMock) -> None:
-        resp = SimpleNamespace(
-            status_code=500,
-            content=b"error",
-            reason="Internal Server Error",
-            encoding=None,
-        )
+        resp = _csv_response(status_code=500, text="error", reason="Internal Server Error")
         mock_session.get.return_value = resp
 
         op = self._make_op("get")
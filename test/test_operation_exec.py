@@ -4,12 +4,29 @@
 
 from __future__ import annotations
 
+import asyncio
+import json
+import threading
+import time
 from types import SimpleNamespace
+from typing import TYPE_CHECKING, ClassVar
 from unittest.mock import patch
 
+import pytest
 from requests.exceptions import ConnectionError as RequestsConnectionError
+from requests.exceptions import Timeout as RequestsTimeout
 
 from ramose import Operation, OperationConfig
+from ramose.breaker import reset_circuit_breakers
+from ramose.cache import ResultCache
+from ramose.endpoints import EndpointOptions
+from ramose.governor import concurrency_governor, reset_concurrency_governors
+
+if TYPE_CHECKING:
+    from collections.abc import Generator, Iterator
+    from pathlib import Path
+
+XSD = "http://www.w3.org/2001/XMLSchema#"
 
 
 def _mock_response(status_code: int = 200, text: str = "name,age\nAlice,30\n", reason: str = "OK") -> SimpleNamespace:
@@ -19,6 +36,9 @@ def _mock_response(status_code: int = 200, text: str = "name,age\nAlice,30\n", r
     resp.content = text.encode()
     resp.reason = reason
     resp.encoding = None
+    resp.iter_content = lambda chunk_size: iter([resp.content])
+    resp.close = lambda: None
+    resp.headers = {}
     return resp
 
 
@@ -113,6 +133,311 @@ class TestExecNon200:
         assert mock_session.get.call_count == 1  # type: ignore[attr-defined]
 
 
+class TestExecEndpointHttpOptions:
+    @patch("ramose.operation._http_session")
+    def test_default_connect_and_read_timeouts(self, mock_session: object) -> None:
+        mock_session.get.return_value = _mock_response()  # type: ignore[attr-defined]
+        _make_op().exec(method="get", content_type="text/csv")
+        call = mock_session.get.call_args  # type: ignore[attr-defined]
+        assert call.kwargs["timeout"] == (10.0, 60.0)
+        assert "Connection" not in call.kwargs["headers"]
+
+    @patch("ramose.operation._http_session")
+    def test_endpoint_timeouts_and_keep_alive(self, mock_session: object) -> None:
+        mock_session.get.return_value = _mock_response()  # type: ignore[attr-defined]
+        options = EndpointOptions(connect_timeout=2.5, read_timeout=300.0, keep_alive=False)
+        config = OperationConfig(
+            sparql_endpoint="http://localhost/sparql",
+            endpoint_options={"http://localhost/sparql": options},
+        )
+        _make_op(config=config).exec(method="get", content_type="text/csv")
+        call = mock_session.get.call_args  # type: ignore[attr-defined]
+        assert call.kwargs["timeout"] == (2.5, 300.0)
+        assert call.kwargs["headers"]["Connection"] == "close"
+
+
+class TestExecStreamedResponse:
+    @staticmethod
+    def _chunked_response(*chunks: bytes) -> SimpleNamespace:
+        resp = _mock_response()
+        resp.iter_content = lambda chunk_size: iter(chunks)
+        return resp
+
+    @patch("ramose.operation._http_session")
+    def test_response_is_streamed_into_rows(self, mock_session: object) -> None:
+        mock_session.get.return_value = self._chunked_response(  # type: ignore[attr-defined]
+            b'name,age\nAlice,"3', b'0"\n"Bob\nJr",4', b"0\n"
+        )
+        sc, body, _, _ = _make_op().exec(method="get", content_type="text/csv")
+        assert sc == 200
+        assert body == 'name,age\r\nAlice,30\r\n"Bob\nJr",40\r\n'
+        assert mock_session.get.call_args.kwargs["stream"] is True  # type: ignore[attr-defined]
+
+
+class TestExecTypedResults:
+    SPARQL_JSON = json.dumps(
+        {
+            "head": {"vars": ["name", "count"]},
+            "results": {
+                "bindings": [
+                    {
+                        "name": {"type": "literal", "value": "Alice"},
+                        "count": {"type": "literal", "value": "9", "datatype": f"{XSD}integer"},
+                    },
+                    {
+                        "name": {"type": "literal", "value": "Bob"},
+                        "count": {"type": "literal", "value": "10", "datatype": f"{XSD}integer"},
+                    },
+                ]
+            },
+        }
+    )
+    OP_ITEM: ClassVar[dict[str, str]] = {
+        "url": "/test/{id}",
+        "id": "str(.+)",
+        "sparql": "SELECT ?name ?count WHERE { }",
+        "method": "get",
+    }
+
+    @staticmethod
+    def _config(result_format: str, *, infer_types: bool = False) -> OperationConfig:
+        options = EndpointOptions(result_format=result_format, infer_types=infer_types)
+        return OperationConfig(
+            sparql_endpoint="http://localhost/sparql",
+            endpoint_options={"http://localhost/sparql": options},
+            retry_wait=0,
+        )
+
+    @patch("ramose.operation._http_session")
+    def test_json_results_keep_their_datatypes(self, mock_session: object) -> None:
+        mock_session.get.return_value = _mock_response(text=self.SPARQL_JSON)  # type: ignore[attr-defined]
+        config = self._config("json", infer_types=True)
+        op = _make_op(op_url="/api/v1/test/val?sort=desc(count)", op_item=self.OP_ITEM, config=config)
+        sc, body, _, _ = op.exec(method="get", content_type="text/csv")
+        assert sc == 200
+        # Without a field_type, CSV values sort as text and 9 comes first; xsd:integer values sort as numbers.
+        assert body == "name,count\r\nBob,10\r\nAlice,9\r\n"
+        headers = mock_session.get.call_args.kwargs["headers"]  # type: ignore[attr-defined]
+        assert headers["Accept"] == "application/sparql-results+json"
+
+    @patch("ramose.operation._http_session")
+    def test_undeclared_columns_stay_strings_without_infer_types(self, mock_session: object) -> None:
+        mock_session.get.return_value = _mock_response(text=self.SPARQL_JSON)  # type: ignore[attr-defined]
+        op = _make_op(op_url="/api/v1/test/val?sort=desc(count)", op_item=self.OP_ITEM, config=self._config("json"))
+        _, body, _, _ = op.exec(method="get", content_type="text/csv")
+        assert body == "name,count\r\nAlice,9\r\nBob,10\r\n"
+
+    @patch("ramose.operation._http_session")
+    def test_declared_columns_use_the_datatype_without_infer_types(self, mock_session: object) -> None:
+        mock_session.get.return_value = _mock_response(text=self.SPARQL_JSON)  # type: ignore[attr-defined]
+        op_item = {**self.OP_ITEM, "field_type": "int(count)"}
+        op = _make_op(op_url="/api/v1/test/val?sort=desc(count)", op_item=op_item, config=self._config("json"))
+        _, body, _, _ = op.exec(method="get", content_type="text/csv")
+        assert body == "name,count\r\nBob,10\r\nAlice,9\r\n"
+
+    @patch("ramose.operation._http_session")
+    def test_field_type_overrides_the_datatype(self, mock_session: object) -> None:
+        mock_session.get.return_value = _mock_response(text=self.SPARQL_JSON)  # type: ignore[attr-defined]
+        op_item = {**self.OP_ITEM, "field_type": "str(count)"}
+        op = _make_op(op_url="/api/v1/test/val?sort=desc(count)", op_item=op_item, config=self._config("json"))
+        _, body, _, _ = op.exec(method="get", content_type="text/csv")
+        assert body == "name,count\r\nAlice,9\r\nBob,10\r\n"
+
+    @patch("ramose.operation._http_session")
+    def test_tsv_results_match_csv(self, mock_session: object) -> None:
+        tsv = '?name\t?count\n"Alice"\t9\n"Bob"\t10\n'
+        mock_session.get.return_value = _mock_response(text=tsv)  # type: ignore[attr-defined]
+        op = _make_op(op_item=self.OP_ITEM, config=self._config("tsv"))
+        sc, body, _, _ = op.exec(method="get", content_type="application/json")
+        assert sc == 200
+        assert json.loads(body) == [{"name": "Alice", "count": "9"}, {"name": "Bob", "count": "10"}]
+        headers = mock_session.get.call_args.kwargs["headers"]  # type: ignore[attr-defined]
+        assert headers["Accept"] == "text/tab-separated-values"
+
+
+class TestExecCircuitBreaker:
+    @pytest.fixture(autouse=True)
+    def _fresh_breakers(self) -> Generator[None, None, None]:
+        reset_circuit_breakers()
+        yield
+        reset_circuit_breakers()
+
+    @staticmethod
+    def _config(failures: int, cache: ResultCache | None = None) -> OperationConfig:
+        return OperationConfig(
+            sparql_endpoint="http://localhost/sparql",
+            endpoint_options={"http://localhost/sparql": EndpointOptions(breaker_failures=failures)},
+            cache=cache,
+            retry_wait=0,
+        )
+
+    @patch("ramose.operation._http_session")
+    def test_open_breaker_fails_fast(self, mock_session: object) -> None:
+        mock_session.get.side_effect = RequestsConnectionError("refused")  # type: ignore[attr-defined]
+        sc, msg, _, headers = _make_op(config=self._config(2)).exec(method="get")
+        assert sc == 503
+        assert msg.startswith("HTTP status code 503: circuit breaker open for http://localhost/sparql")
+        assert "Warning" not in headers
+        assert mock_session.get.call_count == 2  # type: ignore[attr-defined]
+
+        sc, _, _, _ = _make_op(config=self._config(2)).exec(method="get")
+        assert sc == 503
+        assert mock_session.get.call_count == 2  # type: ignore[attr-defined]
+
+    @patch("ramose.operation._http_session")
+    def test_non_retryable_status_keeps_breaker_closed(self, mock_session: object) -> None:
+        mock_session.get.return_value = _mock_response(400, "bad query", "Bad Request")  # type: ignore[attr-defined]
+        for _ in range(3):
+            sc, _, _, _ = _make_op(config=self._config(1)).exec(method="get")
+            assert sc == 400
+        assert mock_session.get.call_count == 3  # type: ignore[attr-defined]
+
+    @patch("ramose.operation._http_session")
+    def test_expired_cache_entry_is_served_while_open(self, mock_session: object, tmp_path: Path) -> None:
+        cache = ResultCache(str(tmp_path))
+        op_item = {
+            "url": "/test/{id}",
+            "id": "str(.+)",
+            "sparql": "SELECT ?name ?age WHERE { BIND([[id]] AS ?name) BIND('30' AS ?age) }",
+            "method": "get",
+            "field_type": "str(name) int(age)",
+            "cache_duration": "0",
+        }
+        mock_session.get.return_value = _mock_response()  # type: ignore[attr-defined]
+        sc, _, _, headers = _make_op(op_item=op_item, config=self._config(1, cache)).exec(
+            method="get", content_type="text/csv"
+        )
+        assert sc == 200
+        assert "Warning" not in headers
+
+        mock_session.get.side_effect = RequestsConnectionError("refused")  # type: ignore[attr-defined]
+        sc, body, _, headers = _make_op(op_item=op_item, config=self._config(1, cache)).exec(
+            method="get", content_type="text/csv"
+        )
+        assert sc == 200
+        assert body == "name,age\r\nAlice,30\r\n"
+        assert headers["Warning"] == '110 - "Response is Stale"'
+        assert mock_session.get.call_count == 2  # type: ignore[attr-defined]
+
+    @staticmethod
+    def _open_then_heal(mock_session: object, options: EndpointOptions) -> OperationConfig:
+        config = OperationConfig(
+            sparql_endpoint="http://localhost/sparql",
+            endpoint_options={"http://localhost/sparql": options},
+            retry_attempts=1,
+            timeout=0.5,
+        )
+        mock_session.get.side_effect = RequestsConnectionError("refused")  # type: ignore[attr-defined]
+        assert _make_op(config=config).exec(method="get")[0] == 502
+        mock_session.get.side_effect = None  # type: ignore[attr-defined]
+        mock_session.get.return_value = _mock_response()  # type: ignore[attr-defined]
+        time.sleep(0.05)
+        return config
+
+    @patch("ramose.operation._http_session")
+    def test_probe_refused_by_the_governor_is_released(self, mock_session: object) -> None:
+        reset_concurrency_governors()
+        options = EndpointOptions(breaker_failures=1, breaker_reset=0.05, max_concurrent_queries=1, queue_timeout=0.01)
+        config = self._open_then_heal(mock_session, options)
+        governor = concurrency_governor("http://localhost/sparql", options)
+        assert governor is not None
+        governor.acquire()
+        sc, msg, _, _ = _make_op(config=config).exec(method="get")
+        assert sc == 503
+        assert "no query slot" in msg
+        governor.release()
+        assert _make_op(config=config).exec(method="get")[0] == 200
+        reset_concurrency_governors()
+
+    @patch("ramose.operation._http_session")
+    def test_probe_cut_by_the_deadline_is_released(self, mock_session: object) -> None:
+        config = self._open_then_heal(mock_session, EndpointOptions(breaker_failures=1, breaker_reset=0.05))
+        slow_rate = SimpleNamespace(reserve=lambda: 10.0)
+        with patch("ramose.operation.rate_controller", return_value=slow_rate):
+            assert _make_op(config=config).exec(method="get")[0] == 504
+        assert _make_op(config=config).exec(method="get")[0] == 200
+
+
+class TestExecDeadline:
+    @staticmethod
+    def _config(timeout: float, **options: object) -> OperationConfig:
+        return OperationConfig(
+            sparql_endpoint="http://localhost/sparql",
+            endpoint_options={"http://localhost/sparql": EndpointOptions(**options)},  # type: ignore[arg-type]
+            retry_wait=1.0,
+            timeout=timeout,
+        )
+
+    @patch("ramose.operation._http_session")
+    def test_remaining_budget_caps_timeouts_and_is_sent_to_the_endpoint(self, mock_session: object) -> None:
+        mock_session.get.return_value = _mock_response()  # type: ignore[attr-defined]
+        config = self._config(5, connect_timeout=2.0, timeout_param="timeout", timeout_unit="ms")
+        sc, _, _, _ = _make_op(config=config).exec(method="get", content_type="text/csv")
+        assert sc == 200
+        call = mock_session.get.call_args  # type: ignore[attr-defined]
+        connect, read = call.kwargs["timeout"]
+        assert connect == 2.0
+        assert 4.0 < read <= 5.0
+        sent = int(call.args[0].rpartition("&timeout=")[2])
+        assert 4000 < sent <= 5000
+
+    @patch("ramose.operation._http_session")
+    def test_timeout_param_goes_in_the_url_of_post_requests(self, mock_session: object) -> None:
+        mock_session.post.return_value = _mock_response()  # type: ignore[attr-defined]
+        config = self._config(30, max_url_length=10, timeout_param="timeout")
+        _make_op(config=config).exec(method="get", content_type="text/csv")
+        assert mock_session.post.call_args.args[0] == "http://localhost/sparql?timeout=29"  # type: ignore[attr-defined]
+
+    @patch("ramose.operation._http_session")
+    def test_timeout_param_with_unit(self, mock_session: object) -> None:
+        mock_session.get.return_value = _mock_response()  # type: ignore[attr-defined]
+        config = self._config(30, timeout_param="timeout", timeout_with_unit=True)
+        _make_op(config=config).exec(method="get", content_type="text/csv")
+        assert mock_session.get.call_args.args[0].endswith("&timeout=29s")  # type: ignore[attr-defined]
+
+    @patch("ramose.operation._http_session")
+    def test_no_timeout_param_without_deadline(self, mock_session: object) -> None:
+        mock_session.get.return_value = _mock_response()  # type: ignore[attr-defined]
+        _make_op(config=self._config(0, timeout_param="timeout")).exec(method="get", content_type="text/csv")
+        assert "timeout=" not in mock_session.get.call_args.args[0]  # type: ignore[attr-defined]
+
+    @patch("ramose.operation._http_session")
+    def test_retry_wait_beyond_deadline_fails_with_504(self, mock_session: object) -> None:
+        mock_session.get.side_effect = RequestsConnectionError("refused")  # type: ignore[attr-defined]
+        sc, msg, ct, _ = _make_op(config=self._config(0.5)).exec(method="get")
+        assert (sc, msg, ct) == (504, "HTTP status code 504: request deadline of 0.5s exceeded", "text/plain")
+        assert mock_session.get.call_count == 1  # type: ignore[attr-defined]
+
+    @patch("ramose.operation._http_session")
+    def test_read_cut_by_deadline_is_504_not_408(self, mock_session: object) -> None:
+        def slow_get(*_args: object, **_kwargs: object) -> None:
+            time.sleep(0.1)
+            msg = "read timed out"
+            raise RequestsTimeout(msg)
+
+        mock_session.get.side_effect = slow_get  # type: ignore[attr-defined]
+        sc, _, _, _ = _make_op(config=self._config(0.05)).exec(method="get")
+        assert sc == 504
+        assert mock_session.get.call_count == 1  # type: ignore[attr-defined]
+
+    @patch("ramose.operation._http_session")
+    def test_body_read_past_deadline_fails_with_504(self, mock_session: object) -> None:
+        closed: list[bool] = []
+
+        def slow_chunks(chunk_size: int) -> Iterator[bytes]:
+            yield b"name,age\n"
+            time.sleep(0.1)
+            yield b"Alice,30\n"
+
+        response = _mock_response()
+        response.iter_content = slow_chunks
+        response.close = lambda: closed.append(True)
+        mock_session.get.return_value = response  # type: ignore[attr-defined]
+        sc, _, _, _ = _make_op(config=self._config(0.05)).exec(method="get")
+        assert sc == 504
+        assert closed == [True]
+
+
 class TestExecTimeout:
     @patch("ramose.operation._http_session")
     def test_timeout_returns_408(self, mock_session: object) -> None:
@@ -223,6 +548,84 @@ class TestExecMultipleParameterCombinations:
         assert result[0] == 200
         assert mock_session.get.call_count == 2  # type: ignore[attr-defined]
 
+    @pytest.mark.parametrize(("fanout_parallelism", "peak"), [(1, 1), (3, 3)])
+    @patch("ramose.operation._http_session")
+    def test_combinations_run_in_parallel_when_enabled_and_keep_their_order(
+        self, mock_session: object, fanout_parallelism: int, peak: int
+    ) -> None:
+        in_flight = [0, 0]
+        lock = threading.Lock()
+
+        def get(url: str, **kwargs: object) -> SimpleNamespace:
+            with lock:
+                in_flight[0] += 1
+                in_flight[1] = max(in_flight)
+            time.sleep(0.05)
+            with lock:
+                in_flight[0] -= 1
+            name = "a" if "%27a%27" in url else "b" if "%27b%27" in url else "c"
+            return _mock_response(text=f"name,age\n{name},30\n")
+
+        mock_session.get.side_effect = get  # type: ignore[attr-defined]
+
+        class FakeAddon:
+            @staticmethod
+            def expand(val: str) -> tuple[list[str]]:
+                return (["a", "b", "c"],)
+
+        op_item = {
+            "url": "/test/{id}",
+            "id": "str(.+)",
+            "sparql": "SELECT ?name ?age WHERE { BIND('[[id]]' AS ?name) BIND('30' AS ?age) }",
+            "method": "get",
+            "field_type": "str(name) int(age)",
+            "preprocess": "expand(id)",
+        }
+        config = OperationConfig(
+            sparql_endpoint="http://localhost/sparql",
+            addon=FakeAddon,  # type: ignore[arg-type]
+            endpoint_options={"http://localhost/sparql": EndpointOptions(fanout_parallelism=fanout_parallelism)},
+        )
+        result = _make_op(op_item=op_item, config=config).exec(method="get", content_type="text/csv")
+        assert result[1] == "name,age\r\na,30\r\nb,30\r\nc,30\r\n"
+        assert in_flight[1] == peak
+
+
+class TestAsyncExec:
+    @patch("ramose.operation._http_session")
+    def test_aexec_returns_what_exec_returns(self, mock_session: object) -> None:
+        mock_session.get.return_value = _mock_response()  # type: ignore[attr-defined]
+        expected = _make_op().exec(method="get", content_type="text/csv")
+        assert asyncio.run(_make_op().aexec(method="get", content_type="text/csv")) == expected
+
+    @patch("ramose.operation._http_session")
+    def test_operations_run_off_the_event_loop(self, mock_session: object) -> None:
+        def get(*args: object, **kwargs: object) -> SimpleNamespace:
+            time.sleep(0.2)
+            return _mock_response()
+
+        mock_session.get.side_effect = get  # type: ignore[attr-defined]
+
+        async def run() -> tuple[list[tuple[int, str, str, dict[str, str]]], int]:
+            ticks = 0
+
+            async def tick() -> None:
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.01)
+                    ticks += 1
+
+            ticker = asyncio.create_task(tick())
+            results = await asyncio.gather(*(_make_op().aexec(content_type="text/csv") for _ in range(4)))
+            ticker.cancel()
+            return results, ticks
+
+        started = time.monotonic()
+        results, ticks = asyncio.run(run())
+        assert [result[0] for result in results] == [200] * 4
+        assert time.monotonic() - started < 0.6
+        assert ticks >= 5
+
 
 class TestExecNonStrTypedParam:
     @patch("ramose.operation._http_session")
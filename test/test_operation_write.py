@@ -9,6 +9,7 @@ from types import SimpleNamespace
 from unittest.mock import patch
 
 from ramose import Operation, OperationConfig
+from ramose.endpoints import EndpointOptions
 
 DCTERMS_TITLE = "<http://purl.org/dc/terms/title>"
 RESOURCE_IRI = "https://w3id.org/oc/meta/br/062104388184"
@@ -79,6 +80,20 @@ class TestWriteRequest:
         op.exec(method="post", body_params={"resource": RESOURCE_IRI, "title": "OpenCitations Meta"})
         assert mock_session.post.call_args.args[0] == "http://localhost/update"  # type: ignore[attr-defined]
 
+    @patch("ramose.operation._http_session")
+    def test_update_endpoint_options_apply(self, mock_session: object) -> None:
+        mock_session.post.return_value = _mock_response()  # type: ignore[attr-defined]
+        config = OperationConfig(
+            sparql_endpoint="http://localhost/query",
+            update_endpoint="http://localhost/update",
+            endpoint_options={"http://localhost/update": EndpointOptions(read_timeout=600.0, keep_alive=False)},
+        )
+        op = _make_write_op(config=config)
+        op.exec(method="post", body_params={"resource": RESOURCE_IRI, "title": "OpenCitations Meta"})
+        call = mock_session.post.call_args  # type: ignore[attr-defined]
+        assert call.kwargs["timeout"] == (10.0, 600.0)
+        assert call.kwargs["headers"]["Connection"] == "close"
+
     @patch("ramose.operation._http_session")
     def test_non_2xx_from_store_propagates(self, mock_session: object) -> None:
         mock_session.post.return_value = _mock_response(status_code=400, reason="Bad Request")  # type: ignore[attr-defined]
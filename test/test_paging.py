@@ -2,7 +2,9 @@
 #
 # SPDX-License-Identifier: ISC
 
-from ramose.paging import build_link_header, build_pagination_info
+import pytest
+
+from ramose.paging import Cursor, build_cursor_pagination_info, build_link_header, build_pagination_info
 
 
 class TestBuildPaginationInfo:
@@ -95,3 +97,39 @@ class TestBuildLinkHeader:
             '</api/v1/test?page=1&page_size=50&total_items=10>; rel="first", '
             '</api/v1/test?page=1&page_size=50&total_items=10>; rel="last"'
         )
+
+
+class TestCursor:
+    @pytest.mark.parametrize("cursor", [Cursor(3, offset=20), Cursor(2, values=("w1", "", "é&="), skip=2)])
+    def test_round_trip(self, cursor: Cursor) -> None:
+        encoded = cursor.encode()
+        assert encoded.replace("-", "").replace("_", "").isalnum()
+        assert Cursor.decode(encoded) == cursor
+
+    def test_first_page(self) -> None:
+        assert Cursor.decode("*") == Cursor()
+        assert Cursor().encode() == "*"
+
+    @pytest.mark.parametrize("raw", ["", "abc", "eJyrVipQsjKsBQAIdQIY", Cursor(2, offset=1).encode()[:-2]])
+    def test_anything_else_is_rejected(self, raw: str) -> None:
+        with pytest.raises(ValueError, match="not a cursor"):
+            Cursor.decode(raw)
+
+
+class TestBuildCursorPaginationInfo:
+    def test_links_to_the_next_and_first_pages(self) -> None:
+        info = build_cursor_pagination_info(
+            "/api/v1/test", {"cursor": ["abc"], "filter": ["x"]}, 2, 10, next_cursor="def", total_items=None
+        )
+        assert info.self_url == "/api/v1/test?filter=x&cursor=abc&page_size=10"
+        assert info.next_url == "/api/v1/test?filter=x&cursor=def&page_size=10"
+        assert info.total_items is None
+        assert build_link_header(info) == (
+            '</api/v1/test?filter=x&cursor=def&page_size=10>; rel="next", '
+            '</api/v1/test?filter=x&cursor=*&page_size=10>; rel="first"'
+        )
+
+    def test_known_total_is_carried_along(self) -> None:
+        info = build_cursor_pagination_info("/api/v1/test", {}, 1, 10, next_cursor="", total_items=5)
+        assert info.self_url == "/api/v1/test?cursor=*&page_size=10&total_items=5"
+        assert info.next_url == ""
@@ -0,0 +1,279 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import pytest
+from rdflib import Graph
+from rdflib.plugins.sparql import CUSTOM_EVALS, prepareQuery
+from rdflib.plugins.sparql.evaluate import evalPart
+
+from ramose import Operation, OperationConfig
+from ramose.planner import (
+    bind_join_blocker,
+    independent_queries,
+    merge_same_endpoint_joins,
+    page_pushdown_blocker,
+    parse_optimizations,
+    parse_select_query,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    from rdflib.plugins.sparql.parserutils import CompValue
+    from rdflib.plugins.sparql.sparql import FrozenBindings, QueryContext
+
+
+def _query(endpoint: str = "http://ep/sparql", engine: str = "sparql") -> tuple[str, ...]:
+    return ("QUERY", endpoint, engine, "SELECT * WHERE { }")
+
+
+class TestIndependentQueries:
+    def test_joined_queries_are_independent(self) -> None:
+        steps = [_query(), ("JOIN", "?a", "?a", "inner"), _query(), ("JOIN", "?a", "?a", "left"), _query()]
+        assert independent_queries(steps) == [0, 2, 4]
+
+    def test_values_and_foreach_make_the_next_query_dependent(self) -> None:
+        steps = [
+            _query(),
+            ("VALUES_INJECT", ["?a"]),
+            ("JOIN", "?a", "?a", "inner"),
+            _query(),
+            ("FOREACH", "?a", "item", 0.0),
+            ("JOIN", "?a", "?a", "inner"),
+            _query(),
+            ("JOIN", "?a", "?a", "inner"),
+            _query(),
+        ]
+        assert independent_queries(steps) == [0, 8]
+
+    def test_remove_and_page_do_not_affect_later_queries(self) -> None:
+        steps = [
+            _query(),
+            ("REMOVE", ["?b"]),
+            ("PAGE", "?a", "10", ""),
+            ("JOIN", "?a", "?a", "inner"),
+            _query(),
+        ]
+        assert independent_queries(steps) == [0, 4]
+
+    def test_values_before_the_first_query_is_not_prefetched(self) -> None:
+        assert independent_queries([("VALUES_INJECT", ["?a"]), _query()]) == []
+
+    def test_bind_join_makes_joined_queries_dependent(self) -> None:
+        steps = [_query(), ("JOIN", "?a", "?a", "inner"), _query(), ("REMOVE", ["?b"]), _query()]
+        assert independent_queries(steps, bind_join=True) == [0, 4]
+
+    def test_bind_join_makes_optionally_joined_queries_dependent(self) -> None:
+        steps = [_query(), ("OPTIONAL_JOIN", "?a", "?a", "left", "2"), _query()]
+        assert independent_queries(steps) == [0, 2]
+        assert independent_queries(steps, bind_join=True) == [0]
+
+    def test_sparql_anything_queries_are_not_prefetched(self) -> None:
+        steps = [_query(), ("JOIN", "?a", "?a", "inner"), _query(engine="sparql-anything")]
+        assert independent_queries(steps) == [0]
+
+
+LEFT_QUERY = """PREFIX dcterm: <http://purl.org/dc/terms/>
+SELECT ?doi ?title WHERE {
+  ?res dcterm:title ?title ; <http://example.org/id#doi> ?doi .
+}"""
+
+RIGHT_QUERY = """PREFIX cito: <http://purl.org/spar/cito/>
+SELECT ?doi (COUNT(?citing) AS ?count) WHERE { ?citing cito:cites ?doi } GROUP BY ?doi"""
+
+
+def _bottom_up_join(ctx: QueryContext, part: CompValue) -> Iterator[FrozenBindings]:
+    """Join as SPARQL defines it. rdflib evaluates the right side with the bindings of the left one, which
+    leak into sub-selects, so it cannot check a query that joins them."""
+    if part.name not in {"Join", "LeftJoin"}:
+        raise NotImplementedError
+    right = list(evalPart(ctx, part.p2))
+
+    def solutions() -> Iterator[FrozenBindings]:
+        for solution in evalPart(ctx, part.p1):
+            matches = [other for other in right if solution.compatible(other)]
+            yield from (solution.merge(other) for other in matches)
+            if not matches and part.name == "LeftJoin":
+                yield solution
+
+    return solutions()
+
+
+def _join_steps(
+    how: str = "inner", right: str = RIGHT_QUERY, endpoint: str = "http://ep/sparql"
+) -> list[tuple[str, ...]]:
+    return [
+        ("QUERY", "http://ep/sparql", "sparql", LEFT_QUERY),
+        ("JOIN", "?doi", "?doi", how),
+        ("QUERY", endpoint, "sparql", right),
+    ]
+
+
+class TestParseOptimizations:
+    def test_names_separated_by_spaces_or_commas(self) -> None:
+        assert parse_optimizations("merge_joins, bind_join") == frozenset({"merge_joins", "bind_join"})
+        assert parse_optimizations("") == frozenset()
+
+    def test_unknown_name_raises(self) -> None:
+        with pytest.raises(ValueError, match="Unknown optimization"):
+            parse_optimizations("merge_joins reorder")
+
+
+class TestParseSelectQuery:
+    def test_splits_prologue_projection_and_order(self) -> None:
+        query = parse_select_query(
+            "PREFIX ex: <http://ex.org/>\n"
+            'SELECT DISTINCT ?a (STR(?b) AS ?label) WHERE { ?a ex:p "}" . # comment {\n ?a ex:q ?b }\n'
+            "ORDER BY DESC(?label) LIMIT 5"
+        )
+        assert query is not None
+        assert query.prefixes == {"ex:": "<http://ex.org/>"}
+        assert query.projection == ["a", "label"]
+        assert query.order_by == "DESC(?label)"
+        assert query.body.startswith("SELECT DISTINCT")
+
+    @pytest.mark.parametrize(
+        "text",
+        [
+            "SELECT * WHERE { ?s ?p ?o }",
+            "SELECT ?s FROM <http://g> WHERE { ?s ?p ?o }",
+            "ASK { ?s ?p ?o }",
+            "SELECT ?s WHERE { ?s ?p ?o ",
+        ],
+    )
+    def test_rejects_queries_that_cannot_be_sub_selects(self, text: str) -> None:
+        assert parse_select_query(text) is None
+
+
+class TestMergeSameEndpointJoins:
+    @pytest.mark.parametrize(("how", "group"), [("inner", "{"), ("left", "OPTIONAL {")])
+    def test_merges_into_one_valid_query(self, how: str, group: str) -> None:
+        plan: list[str] = []
+        steps = merge_same_endpoint_joins(_join_steps(how), plan)
+
+        assert len(steps) == 1
+        tag, endpoint, engine, text = steps[0]
+        assert (tag, endpoint, engine) == ("QUERY", "http://ep/sparql", "sparql")
+        assert "SELECT ?doi ?title ?count WHERE {" in text
+        assert f"\n  {group}\n" in text
+        assert text.startswith("PREFIX dcterm: <http://purl.org/dc/terms/>\nPREFIX cito: <http://purl.org/spar/cito/>")
+        prepareQuery(text)
+        assert plan == [f"merge_joins: @@join ?doi ({how}) runs on http://ep/sparql"]
+
+    def test_left_order_moves_to_the_outer_query(self) -> None:
+        steps = _join_steps()
+        steps[0] = ("QUERY", "http://ep/sparql", "sparql", LEFT_QUERY + " ORDER BY ?title")
+        text = merge_same_endpoint_joins(steps, [])[0][3]
+        assert text.endswith("}\nORDER BY ?title")
+        prepareQuery(text)
+
+    def test_chained_joins_collapse(self) -> None:
+        third = "SELECT ?doi ?year WHERE { ?doi <http://ex.org/year> ?year }"
+        steps = [*_join_steps(), ("JOIN", "?doi", "?doi", "left"), ("QUERY", "http://ep/sparql", "sparql", third)]
+        plan: list[str] = []
+        merged = merge_same_endpoint_joins(steps, plan)
+        assert len(merged) == 1
+        assert "SELECT ?doi ?title ?count ?year WHERE {" in merged[0][3]
+        assert len(plan) == 2
+        prepareQuery(merged[0][3])
+
+    @pytest.mark.parametrize("how", ["inner", "left"])
+    def test_merged_query_returns_the_rows_of_the_python_join(self, how: str, monkeypatch: pytest.MonkeyPatch) -> None:
+        monkeypatch.setitem(CUSTOM_EVALS, "bottom_up_join", _bottom_up_join)
+        graph = Graph().parse(
+            format="turtle",
+            data="""@prefix ex: <http://ex.org/> .
+            ex:a a ex:Item ; ex:doi <http://doi.org/1> .
+            ex:b a ex:Item .
+            ex:c a ex:Item ; ex:doi <http://doi.org/3/> .
+            <https://doi.org/1> ex:label "X" .
+            <http://doi.org/2> ex:label "Y" .
+            <https://doi.org/3> ex:label "Z" .""",
+        )
+        left = "SELECT ?item ?doi WHERE { ?item a <http://ex.org/Item> OPTIONAL { ?item <http://ex.org/doi> ?doi } }"
+        right = "SELECT ?doi ?label WHERE { ?doi <http://ex.org/label> ?label }"
+
+        def rows(query: str) -> list[dict[str, object]]:
+            result = graph.query(query)
+            return [{str(var): str(row[var] or "") for var in result.vars or []} for row in result]  # type: ignore[index, union-attr]
+
+        op = Operation("/t", "/t", {"url": "/t", "sparql": left, "method": "get"}, OperationConfig(sparql_endpoint=""))
+        expected = [
+            {"item": row["item"], "doi": row["doi"], "label": row.get("label", "")}
+            for row in op._join(rows(left), rows(right), "?doi", "?doi", how)
+        ]
+        steps = [
+            ("QUERY", "http://ep/sparql", "sparql", left),
+            ("JOIN", "?doi", "?doi", how),
+            ("QUERY", "http://ep/sparql", "sparql", right),
+        ]
+        merged = merge_same_endpoint_joins(steps, [])
+
+        assert len(merged) == 1
+        assert sorted(rows(merged[0][3]), key=str) == sorted(expected, key=str)
+        assert len(expected) == (2 if how == "inner" else 3)
+
+    @pytest.mark.parametrize(
+        "steps",
+        [
+            _join_steps(endpoint="http://other/sparql"),
+            _join_steps(right="SELECT ?doi ?title WHERE { ?doi <http://ex.org/t> ?title }"),
+            _join_steps(right="PREFIX dcterm: <http://other.org/>\nSELECT ?doi ?n WHERE { ?doi dcterm:n ?n }"),
+            _join_steps(right="SELECT * WHERE { ?doi ?p ?o }"),
+            [_join_steps()[0], ("JOIN", "?doi", "?id", "inner"), _join_steps()[2]],
+            [_join_steps()[0], ("VALUES_INJECT", ["?doi"]), ("JOIN", "?doi", "?doi", "inner"), _join_steps()[2]],
+            [("QUERY", "http://ep/sparql", "sparql", LEFT_QUERY + " ORDER BY ?res"), *_join_steps()[1:]],
+        ],
+    )
+    def test_keeps_steps_that_cannot_merge(self, steps: list[tuple[str, ...]]) -> None:
+        plan: list[str] = []
+        assert merge_same_endpoint_joins(steps, plan) == steps
+        assert plan == []
+
+
+class TestBindJoinBlocker:
+    def test_plain_query_accepts_values(self) -> None:
+        assert bind_join_blocker("SELECT ?doi ?n WHERE { ?doi <http://ex.org/n> ?n }", "?doi") is None
+
+    def test_grouping_by_the_join_variable_is_fine(self) -> None:
+        query = "SELECT ?doi (COUNT(?c) AS ?n) WHERE { ?c <http://ex.org/cites> ?doi } GROUP BY ?doi"
+        assert bind_join_blocker(query, "?doi") is None
+
+    @pytest.mark.parametrize(
+        ("query", "reason"),
+        [
+            ('SELECT ?doi WHERE { BIND("x" AS ?doi) }', "?doi is assigned in the query"),
+            ("SELECT ?doi WHERE { ?doi ?p ?o } LIMIT 10", "the query uses LIMIT or OFFSET"),
+            (
+                "SELECT ?doi (COUNT(?c) AS ?n) WHERE { ?c ?p ?doi ; ?q ?y } GROUP BY ?y",
+                "the query groups by something other than ?doi",
+            ),
+        ],
+    )
+    def test_reports_why_values_would_change_the_result(self, query: str, reason: str) -> None:
+        assert bind_join_blocker(query, "?doi") == reason
+
+
+class TestPagePushdownBlocker:
+    def test_projected_join_variable_can_be_paged(self) -> None:
+        select = parse_select_query("SELECT ?doi ?n WHERE { ?doi <http://ex.org/n> ?n } ORDER BY ?doi")
+        assert page_pushdown_blocker(select, "?doi") is None
+
+    @pytest.mark.parametrize(
+        ("query", "reason"),
+        [
+            ("SELECT * WHERE { ?doi ?p ?o }", "the query is not a SELECT with an explicit projection"),
+            ("SELECT ?n WHERE { ?doi <http://ex.org/n> ?n }", "the query does not project ?doi"),
+            (
+                "SELECT ?doi ?n WHERE { ?doi <http://ex.org/n> ?n } ORDER BY ?n",
+                "the query is ordered by something other than ?doi",
+            ),
+        ],
+    )
+    def test_reports_why_the_page_stays_in_ramose(self, query: str, reason: str) -> None:
+        assert page_pushdown_blocker(parse_select_query(query), "?doi") == reason
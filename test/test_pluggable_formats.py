@@ -241,14 +241,16 @@ class TestCustomFormatThroughExec:
         op = am.get_op("/api/v1/metadata/10.1108/jd-12-2013-0166?format=xml")
         assert isinstance(op, Operation)
 
+        text = (
+            "qid,author,year,title,source_title,source_id,volume,issue,page,doi,reference,citation_count\n"
+            "Q24260641,,2015,Setting our bibliographic references free,,,,,,10.1108/JD-12-2013-0166,,1\n"
+        )
         resp = SimpleNamespace(
             status_code=200,
-            text=(
-                "qid,author,year,title,source_title,source_id,volume,issue,page,doi,reference,citation_count\n"
-                "Q24260641,,2015,Setting our bibliographic references free,,,,,,10.1108/JD-12-2013-0166,,1\n"
-            ),
             reason="OK",
             encoding=None,
+            iter_content=lambda chunk_size: iter([text.encode()]),
+            close=lambda: None,
         )
         with patch("ramose.operation._http_session") as mock_session:
             mock_session.post.return_value = resp
@@ -553,7 +555,7 @@ class TestRunQueryDictsDispatch:
         op = self._make_op()
         with patch.object(op, "_run_sparql_anything_dicts", return_value=[{"x": "1"}]) as mock_sa:
             rows = op._run_query_dicts("http://some-endpoint/sparql", "sparql-anything", "SELECT ?x WHERE { }")
-        mock_sa.assert_called_once_with("SELECT ?x WHERE { }")
+        mock_sa.assert_called_once_with("SELECT ?x WHERE { }", endpoint_url="http://some-endpoint/sparql")
         assert rows == [{"x": "1"}]
 
 
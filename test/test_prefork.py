@@ -0,0 +1,208 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+from __future__ import annotations
+
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from http.client import HTTPConnection
+from typing import TYPE_CHECKING
+
+import pytest
+from flask import Flask
+
+from ramose.auth import TokenStore
+from ramose.cache import ResultCache
+from ramose.prefork import PooledWSGIServer, listen_socket
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+    from pathlib import Path
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork"), reason="the pre-fork server needs os.fork")
+
+# A pre-fork server whose workers answer with their pid and the number of the load that built them. Each worker
+# records its pid in the directory given as argument; a file named "broken" there makes the next load fail.
+DRIVER = """
+import os, sys, time
+from pathlib import Path
+from ramose.prefork import PreforkServer, listen_socket, serve_wsgi
+
+directory = Path(sys.argv[2])
+loads = [0]
+
+def load():
+    if (directory / "broken").exists():
+        raise RuntimeError("broken spec")
+    loads[0] += 1
+    generation = loads[0]
+
+    def app(environ, start_response):
+        if environ["PATH_INFO"] == "/slow":
+            time.sleep(1)
+        body = f"{os.getpid()} {generation}".encode()
+        start_response("200 OK", [("Content-Type", "text/plain"), ("Content-Length", str(len(body)))])
+        return [body]
+
+    def serve(sock):
+        (directory / str(os.getpid())).touch()
+        serve_wsgi(app, sock, 4)
+
+    return serve
+
+PreforkServer(listen_socket("127.0.0.1", int(sys.argv[1])), 2, load, restart_delay=0.1, graceful_timeout=5).run()
+"""
+
+
+def _wait_for(condition: Callable[[], object], timeout: float = 10) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            msg = "condition not met in time"
+            raise AssertionError(msg)
+        time.sleep(0.05)
+
+
+def _get(port: int, path: str = "/") -> tuple[int, str]:
+    connection = HTTPConnection("127.0.0.1", port, timeout=10)
+    try:
+        connection.request("GET", path, headers={"Connection": "close"})
+        response = connection.getresponse()
+        return response.status, response.read().decode()
+    finally:
+        connection.close()
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    return True
+
+
+class TestPooledWSGIServer:
+    def test_requests_beyond_the_pool_wait_for_a_thread(self) -> None:
+        app = Flask(__name__)
+        lock = threading.Lock()
+        in_flight = [0, 0]
+
+        @app.route("/")
+        def slow() -> str:
+            with lock:
+                in_flight[0] += 1
+                in_flight[1] = max(in_flight)
+            time.sleep(0.1)
+            with lock:
+                in_flight[0] -= 1
+            return "ok"
+
+        sock = listen_socket("127.0.0.1", 0)
+        server = PooledWSGIServer(app, sock, threads=2)
+        serving = threading.Thread(target=server.serve_forever)
+        serving.start()
+        statuses: list[int] = []
+        clients = [threading.Thread(target=lambda: statuses.append(_get(sock.getsockname()[1])[0])) for _ in range(5)]
+        for client in clients:
+            client.start()
+        for client in clients:
+            client.join()
+        server.shutdown()
+        serving.join()
+        sock.close()
+        assert statuses == [200] * 5
+        assert in_flight[1] == 2
+
+
+class TestSQLiteAcrossFork:
+    def test_a_forked_process_opens_its_own_connections(self, tmp_path: Path) -> None:
+        cache = ResultCache(str(tmp_path / "cache"))
+        cache.set("key", ["value"], 60)
+        tokens = TokenStore(str(tmp_path / "auth"))
+        token = tokens.create("demo")
+        parent_connections = (cache._conn, tokens._conn)
+        pid = os.fork()
+        if pid == 0:  # pragma: no cover
+            fresh = cache._conn not in parent_connections and tokens._conn not in parent_connections
+            os._exit(0 if fresh and cache.get("key") == ["value"] and tokens.validate(token) else 1)
+        _, status = os.waitpid(pid, 0)
+        assert os.waitstatus_to_exitcode(status) == 0
+        assert (cache._conn, tokens._conn) == parent_connections
+
+    def test_close_reopens_on_next_use(self, tmp_path: Path) -> None:
+        cache = ResultCache(str(tmp_path))
+        cache.set("key", 1, 60)
+        connection = cache._conn
+        cache.close()
+        assert cache.get("key") == 1
+        assert cache._conn is not connection
+
+
+class TestPreforkServer:
+    @pytest.fixture
+    def server(self, tmp_path: Path) -> Iterator[tuple[subprocess.Popen[bytes], int, Path]]:
+        sock = listen_socket("127.0.0.1", 0)
+        port = sock.getsockname()[1]
+        sock.close()
+        process = subprocess.Popen([sys.executable, "-c", DRIVER, str(port), str(tmp_path)])
+        _wait_for(lambda: len(self._pids(tmp_path)) == 2)
+        yield process, port, tmp_path
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+
+    @staticmethod
+    def _pids(directory: Path) -> set[int]:
+        return {int(path.name) for path in directory.iterdir() if path.name.isdigit()}
+
+    def test_workers_serve_the_shared_socket(self, server: tuple[subprocess.Popen[bytes], int, Path]) -> None:
+        _, port, directory = server
+        status, body = _get(port)
+        pid, generation = body.split()
+        assert status == 200
+        assert int(pid) in self._pids(directory)
+        assert generation == "1"
+
+    def test_a_dead_worker_is_replaced(self, server: tuple[subprocess.Popen[bytes], int, Path]) -> None:
+        _, port, directory = server
+        killed = min(self._pids(directory))
+        os.kill(killed, signal.SIGKILL)
+        _wait_for(lambda: len(self._pids(directory)) == 3)
+        _wait_for(lambda: not _alive(killed))
+        assert _get(port)[0] == 200
+
+    def test_sighup_replaces_the_workers_gracefully(self, server: tuple[subprocess.Popen[bytes], int, Path]) -> None:
+        process, port, directory = server
+        first = self._pids(directory)
+        slow: list[tuple[int, str]] = []
+        request = threading.Thread(target=lambda: slow.append(_get(port, "/slow")))
+        request.start()
+        time.sleep(0.3)
+        process.send_signal(signal.SIGHUP)
+        _wait_for(lambda: len(self._pids(directory)) == 4)
+        request.join()
+        assert slow[0][0] == 200
+        assert slow[0][1].split()[1] == "1"
+        _wait_for(lambda: not any(_alive(pid) for pid in first))
+        status, body = _get(port)
+        assert (status, body.split()[1]) == (200, "2")
+
+    def test_a_failed_reload_keeps_the_workers(self, server: tuple[subprocess.Popen[bytes], int, Path]) -> None:
+        process, port, directory = server
+        (directory / "broken").touch()
+        process.send_signal(signal.SIGHUP)
+        time.sleep(1)
+        assert len(self._pids(directory)) == 2
+        assert all(_alive(pid) for pid in self._pids(directory))
+        assert _get(port)[1].split()[1] == "1"
+
+    def test_sigterm_stops_the_workers_and_exits(self, server: tuple[subprocess.Popen[bytes], int, Path]) -> None:
+        process, _, directory = server
+        process.send_signal(signal.SIGTERM)
+        assert process.wait(timeout=10) == 0
+        assert not any(_alive(pid) for pid in self._pids(directory))
@@ -0,0 +1,536 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from types import SimpleNamespace
+from typing import TYPE_CHECKING
+from unittest.mock import patch
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import pytest
+from rdflib import Graph
+
+from ramose import Operation, OperationConfig
+from ramose.cache import ResultCache
+from ramose.endpoints import EndpointOptions, build_endpoint_options
+from ramose.metrics import registry
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+    from pathlib import Path
+
+DATA = """
+@prefix ex: <http://example.org/> .
+ex:w1 ex:id "w1" ; ex:title "Alpha" ; ex:year "2012" .
+ex:w2 ex:id "w2" ; ex:title "beta" ; ex:year "2018" .
+ex:w3 ex:id "w3" ; ex:title "Gamma" ; ex:year "2015" .
+ex:w4 ex:id "w4" ; ex:title "delta" .
+ex:w5 ex:id "w5" ; ex:title "Epsilon" ; ex:year "2021" .
+ex:w6 ex:id "w6" ; ex:title "zeta" ; ex:year "9" .
+ex:w7 ex:id "w7" ; ex:title "" ; ex:year "2018" .
+"""
+QUERY = """PREFIX ex: <http://example.org/>
+SELECT ?id ?title ?year WHERE {
+  ?work ex:id ?id ; ex:title ?title .
+  OPTIONAL { ?work ex:year ?year }
+}
+ORDER BY ?id"""
+
+
+class _Endpoint:
+    """Answers the queries sent through the mocked HTTP session from an in-memory graph, keeping at most cap
+    rows of each result when cap is set. With flag, a cut result carries Virtuoso's X-SPARQL-MaxRows header."""
+
+    def __init__(self) -> None:
+        self.graph = Graph().parse(data=DATA, format="turtle")
+        self.queries: list[str] = []
+        self.cap = 0
+        self.flag = False
+        self.held = ""
+        self.release = threading.Event()
+        self.closed: list[str] = []
+        # rdflib's query parser is not thread-safe, and chunks are requested from several threads.
+        self._lock = threading.Lock()
+
+    def get(self, url: str, headers: dict[str, str] | None = None, **_: object) -> SimpleNamespace:
+        query = parse_qs(urlsplit(url).query)["query"][0]
+        self.queries.append(query)
+        with self._lock:
+            result = self.graph.query(query)
+            if (headers or {}).get("Accept") == "text/tab-separated-values":
+                # rdflib has no TSV serializer: SPARQL TSV writes each term in its Turtle form.
+                lines = ["\t".join(f"?{var}" for var in result.vars or [])]
+                lines.extend("\t".join("" if term is None else term.n3() for term in row) for row in result)  # type: ignore[union-attr]
+                content = ("\n".join(lines) + "\n").encode()
+            else:
+                content = result.serialize(format="csv")
+        assert content is not None
+        cut = bool(self.cap) and len(content.splitlines()) > 1 + self.cap
+        if cut:
+            content = b"".join(content.splitlines(keepends=True)[: 1 + self.cap])
+        held = bool(self.held) and query.endswith(self.held)
+
+        def body(chunk_size: int) -> Iterator[bytes]:
+            header, _, rows = content.partition(b"\n")
+            yield header + b"\n"
+            if held:
+                self.release.wait(5)
+            yield rows
+
+        return SimpleNamespace(
+            status_code=200,
+            reason="OK",
+            encoding=None,
+            headers={"X-SPARQL-MaxRows": str(self.cap)} if cut and self.flag else {},
+            iter_content=body,
+            close=lambda: self.closed.append(query),
+        )
+
+
+@pytest.fixture
+def endpoint() -> Iterator[_Endpoint]:
+    endpoint = _Endpoint()
+    with patch("ramose.operation._http_session") as session:
+        session.get.side_effect = endpoint.get
+        yield endpoint
+
+
+def _op(query_string: str, *, pushdown: bool = True, **op_fields: str) -> Operation:
+    op_item = {
+        "url": "/works",
+        "sparql": QUERY,
+        "method": "get",
+        "field_type": "str(id) str(title) int(year)",
+        **op_fields,
+    }
+    config = OperationConfig(sparql_endpoint="http://ep/sparql", retry_wait=0, pushdown=pushdown)
+    return Operation(f"/works?{query_string}", "/works", op_item, config)
+
+
+def _rows(op: Operation) -> list[dict[str, str]]:
+    status, body, _, _ = op.exec()
+    assert status == 200, body
+    return json.loads(body)
+
+
+class TestSameResults:
+    @pytest.mark.parametrize(
+        "query_string",
+        [
+            "require=year",
+            "exclude=title",
+            "filter=year:>2014",
+            "filter=year:<2016",
+            "filter=year:=2018",
+            "filter=title:=ALPHA",
+            "filter=title:>c",
+            "filter=title:<c",
+            "sort=desc(year)",
+            "sort=asc(title)",
+            "sort=desc(year)&sort=asc(id)",
+            "page_size=3",
+            "page=3&page_size=3",
+            "require=year&filter=year:>2010&sort=desc(year)&page=2&page_size=2",
+        ],
+    )
+    def test_as_if_ramose_applied_the_parameters(self, endpoint: _Endpoint, query_string: str) -> None:
+        expected = _op(query_string, pushdown=False)
+        expected_rows = _rows(expected)
+        pushed = _op(query_string)
+
+        assert _rows(pushed) == expected_rows
+        assert pushed.query_plan[0].startswith("pushdown: ")
+        assert pushed.pagination_info == expected.pagination_info
+        assert "WHERE {\n  {\n" in endpoint.queries[-1]
+
+    def test_only_the_page_is_transferred(self, endpoint: _Endpoint) -> None:
+        op = _op("sort=desc(year)&page=2&page_size=2")
+        assert [row["id"] for row in _rows(op)] == ["w7", "w3"]
+        count, page = sorted(endpoint.queries, key=lambda query: "COUNT" not in query)
+        assert "SELECT (COUNT(*) AS ?total)" in count
+        assert page.endswith("LIMIT 2\nOFFSET 2")
+        assert op.query_plan == ["pushdown: ORDER BY (2 keys), LIMIT 2 OFFSET 2"]
+        assert op.pagination_info is not None
+        assert op.pagination_info.total_items == 7
+
+    def test_page_past_the_last_one_is_unprocessable(self, endpoint: _Endpoint) -> None:
+        status, body, _, _ = _op("require=year&page=4&page_size=3").exec()
+        assert (status, body) == (422, "HTTP status code 422: page 4 exceeds total pages 2")
+
+
+class TestFallback:
+    @pytest.mark.parametrize(
+        "query_string",
+        [
+            "filter=title:^a",
+            "filter=id:=w1",
+            "require=missing",
+            "sort=desc(missing)",
+        ],
+    )
+    def test_parameters_the_endpoint_cannot_apply_stay_in_ramose(self, endpoint: _Endpoint, query_string: str) -> None:
+        op = _op(query_string, field_type="str(title) int(year)")
+        op.exec()
+        assert endpoint.queries == [QUERY]
+        assert op.query_plan == []
+
+    def test_postprocess_rules_out_pushdown(self, endpoint: _Endpoint) -> None:
+        op = _op("require=year&page_size=2", postprocess="keep()")
+        op.addon = SimpleNamespace(keep=lambda table: (table, False))  # type: ignore[assignment]
+        assert len(_rows(op)) == 2
+        assert endpoint.queries == [QUERY]
+
+    def test_custom_postprocess_parameter_keeps_paging_in_ramose(self, endpoint: _Endpoint) -> None:
+        op = _op("require=year&page_size=2&top=1")
+        op.custom_params = {"top": {"handler": "top", "phase": "postprocess"}}
+        op.addon = SimpleNamespace(top=lambda table, values: table[: 1 + int(values[0])])  # type: ignore[assignment]
+        assert len(_rows(op)) == 1
+        assert op.query_plan == ["pushdown: FILTER (1 conditions)"]
+        assert "LIMIT" not in endpoint.queries[0]
+
+    def test_nothing_is_rewritten_without_parameters(self, endpoint: _Endpoint) -> None:
+        assert len(_rows(_op(""))) == 7
+        assert endpoint.queries == [QUERY]
+
+
+class TestCache:
+    def test_each_page_is_cached_with_its_total(self, endpoint: _Endpoint, tmp_path: Path) -> None:
+        cache = ResultCache(str(tmp_path))
+        config = OperationConfig(sparql_endpoint="http://ep/sparql", retry_wait=0, pushdown=True, cache=cache)
+        op_item = {"url": "/works", "sparql": QUERY, "method": "get", "field_type": "str(id) str(title) int(year)"}
+
+        pages = []
+        for _ in range(2):
+            for page in (1, 2):
+                op = Operation(f"/works?page={page}&page_size=4", "/works", op_item, config)
+                pages.append((_rows(op), op.pagination_info))
+
+        assert pages[:2] == pages[2:]
+        assert [len(rows) for rows, _ in pages[:2]] == [4, 3]
+        # The second page reuses the count of the first.
+        assert len(endpoint.queries) == 3
+        assert sum("COUNT" in query for query in endpoint.queries) == 1
+
+
+class TestTotals:
+    def test_total_passed_back_by_the_client_skips_the_count(self, endpoint: _Endpoint) -> None:
+        client = registry.value("ramose_pagination_totals_total", source="client")
+        op = _op("page=2&page_size=3&total_items=7")
+        assert len(_rows(op)) == 3
+        assert len(endpoint.queries) == 1
+        assert "COUNT" not in endpoint.queries[0]
+        assert op.pagination_info is not None
+        assert op.pagination_info.last_url == "/works?page=3&page_size=3&total_items=7"
+        assert registry.value("ramose_pagination_totals_total", source="client") == client + 1
+
+    def test_malformed_total_is_counted_again(self, endpoint: _Endpoint) -> None:
+        op = _op("page=1&page_size=3&total_items=-1")
+        _rows(op)
+        assert sum("COUNT" in query for query in endpoint.queries) == 1
+        assert op.pagination_info is not None
+        assert op.pagination_info.total_items == 7
+
+    def test_count_is_shared_across_sort_orders(self, endpoint: _Endpoint, tmp_path: Path) -> None:
+        config = OperationConfig(
+            sparql_endpoint="http://ep/sparql", retry_wait=0, pushdown=True, cache=ResultCache(str(tmp_path))
+        )
+        op_item = {"url": "/works", "sparql": QUERY, "method": "get", "field_type": "str(id) str(title) int(year)"}
+        for sort in ("asc(title)", "desc(year)"):
+            op = Operation(f"/works?require=year&sort={sort}&page_size=2", "/works", op_item, config)
+            _rows(op)
+            assert op.pagination_info is not None
+            assert op.pagination_info.total_items == 6
+        assert sum("COUNT" in query for query in endpoint.queries) == 1
+
+    def test_count_expires_with_its_own_ttl(self, endpoint: _Endpoint, tmp_path: Path) -> None:
+        cache = ResultCache(str(tmp_path))
+        config = OperationConfig(sparql_endpoint="http://ep/sparql", retry_wait=0, pushdown=True, cache=cache)
+        op_item = {
+            "url": "/works",
+            "sparql": QUERY,
+            "method": "get",
+            "field_type": "str(id) str(title) int(year)",
+            "count_cache_duration": "0",
+        }
+        for page in (1, 2):
+            _rows(Operation(f"/works?page={page}&page_size=4", "/works", op_item, config))
+        assert sum("COUNT" in query for query in endpoint.queries) == 2
+
+
+def _walk(query_string: str, **op_fields: str | bool) -> tuple[list[dict[str, str]], list[Operation]]:
+    """Every row of a cursor walk from the first page, following the next links, and the operations run."""
+    rows: list[dict[str, str]] = []
+    ops: list[Operation] = []
+    next_query = f"{query_string}&cursor=*"
+    while next_query:
+        op = _op(next_query, **op_fields)  # type: ignore[arg-type]
+        rows.extend(_rows(op))
+        ops.append(op)
+        assert op.pagination_info is not None
+        next_query = unquote(urlsplit(op.pagination_info.next_url).query)
+    return rows, ops
+
+
+class TestCursor:
+    @pytest.mark.parametrize(
+        "query_string",
+        ["page_size=3", "page_size=2&sort=desc(year)", "page_size=1&require=year&sort=asc(title)"],
+    )
+    @pytest.mark.parametrize("pushdown", [True, False])
+    def test_pages_return_every_row_once(self, endpoint: _Endpoint, query_string: str, pushdown: bool) -> None:  # noqa: FBT001
+        expected = _rows(_op(query_string.partition("&")[2], pushdown=False))
+        rows, ops = _walk(query_string, pushdown=pushdown)
+
+        assert sorted(rows, key=lambda row: row["id"]) == sorted(expected, key=lambda row: row["id"])
+        if "sort=" in query_string:
+            field = query_string.rpartition("(")[2].rstrip(")")
+            assert [row[field] for row in rows] == [row[field] for row in expected]
+        assert [op.pagination_info.page for op in ops if op.pagination_info] == list(range(1, len(ops) + 1))
+
+    def test_pages_start_after_the_last_row_instead_of_an_offset(self, endpoint: _Endpoint) -> None:
+        _, ops = _walk("page_size=3")
+        first, second, *_ = (query for query in endpoint.queries if "COUNT" not in query)
+        assert first.endswith("LIMIT 4")
+        assert " || " in second
+        assert second.endswith("LIMIT 4\nOFFSET 1")
+        assert ops[0].query_plan == ["pushdown: LIMIT 3 after the cursor"]
+
+    def test_identical_rows_straddling_pages_are_all_returned(self, endpoint: _Endpoint) -> None:
+        sparql = (
+            "PREFIX ex: <http://example.org/>\nSELECT ?year WHERE { ?work ex:id ?id OPTIONAL { ?work ex:year ?year } }"
+        )
+        rows, _ = _walk("page_size=1&sort=asc(year)", sparql=sparql, field_type="int(year)")
+        assert [row["year"] for row in rows] == ["", "9", "2012", "2015", "2018", "2018", "2021"]
+
+    def test_total_is_reported_only_when_known(self, endpoint: _Endpoint) -> None:
+        op = _op("page_size=3&cursor=*")
+        _rows(op)
+        assert not any("COUNT" in query for query in endpoint.queries)
+        assert op.pagination_info is not None
+        assert op.pagination_info.total_items is None
+        assert "total_items" not in op.pagination_info.next_url
+
+        op = _op("page_size=3&cursor=*&total_items=7")
+        _rows(op)
+        assert op.pagination_info is not None
+        assert op.pagination_info.next_url.endswith("&page_size=3&total_items=7")
+        assert op.pagination_info.first_url == "/works?cursor=*&page_size=3&total_items=7"
+
+    def test_last_page_has_no_next_link(self, endpoint: _Endpoint) -> None:
+        _, ops = _walk("page_size=7")
+        assert len(ops) == 1
+        assert ops[0].exec()[3]["Link"] == '</works?cursor=*&page_size=7>; rel="first"'
+
+    @pytest.mark.parametrize(
+        ("query_string", "message"),
+        [
+            ("cursor=*", "cursor requires page_size"),
+            ("cursor=*&page=2&page_size=2", "cursor cannot be combined with page"),
+            ("cursor=abc&page_size=2", "invalid cursor 'abc'"),
+        ],
+    )
+    def test_malformed_cursor_is_unprocessable(self, endpoint: _Endpoint, query_string: str, message: str) -> None:
+        status, body, _, _ = _op(query_string).exec()
+        assert (status, body) == (422, f"HTTP status code 422: {message}")
+
+    def test_cursor_of_another_paging_mode_is_unprocessable(self, endpoint: _Endpoint) -> None:
+        op = _op("page_size=2&cursor=*", pushdown=False)
+        _rows(op)
+        assert op.pagination_info is not None
+        offset_cursor = op.pagination_info.next_cursor
+        status, _, _, _ = _op(f"page_size=2&cursor={offset_cursor}").exec()
+        assert status == 422
+
+
+class TestDialectResultFormat:
+    TYPED_YEAR = QUERY.replace(
+        "OPTIONAL { ?work ex:year ?year }",
+        "OPTIONAL { ?work ex:year ?lexical BIND(<http://www.w3.org/2001/XMLSchema#integer>(?lexical) AS ?year) }",
+    )
+
+    def _exec(self, query_string: str, options: EndpointOptions) -> list[dict[str, str]]:
+        op_item = {"url": "/works", "sparql": self.TYPED_YEAR, "method": "get", "field_type": "str(id) str(title)"}
+        config = OperationConfig(
+            sparql_endpoint="http://ep/sparql", retry_wait=0, endpoint_options={"http://ep/sparql": options}
+        )
+        return _rows(Operation(f"/works?{query_string}", "/works", op_item, config))
+
+    @pytest.mark.parametrize("query_string", ["sort=desc(year)", "filter=year:>2014&sort=asc(year)"])
+    def test_a_dialect_keeps_the_results_of_csv(self, endpoint: _Endpoint, query_string: str) -> None:
+        expected = self._exec(query_string, EndpointOptions())
+        assert self._exec(query_string, build_endpoint_options({"dialect": "qlever"})) == expected
+
+    def test_infer_types_compares_undeclared_columns_by_datatype(self, endpoint: _Endpoint) -> None:
+        options = build_endpoint_options({"dialect": "qlever", "infer_types": "true"})
+        assert [row["year"] for row in self._exec("sort=desc(year)", options)] == [
+            "2021",
+            "2018",
+            "2018",
+            "2015",
+            "2012",
+            "9",
+            "",
+        ]
+
+
+def _chunked(query_string: str = "", **options: int) -> Operation:
+    op_item = {"url": "/works", "sparql": QUERY, "method": "get", "field_type": "str(id) str(title) int(year)"}
+    config = OperationConfig(
+        sparql_endpoint="http://ep/sparql",
+        retry_wait=0,
+        endpoint_options={"http://ep/sparql": EndpointOptions(**options)},
+    )
+    return Operation(f"/works?{query_string}", "/works", op_item, config)
+
+
+class TestChunkedFetching:
+    @pytest.mark.parametrize("query_string", ["", "sort=desc(year)", "page=2&page_size=3"])
+    def test_chunks_add_up_to_the_result(self, endpoint: _Endpoint, query_string: str) -> None:
+        expected = _rows(_op(query_string, pushdown=False))
+        endpoint.queries.clear()
+        assert _rows(_chunked(query_string, chunk_size=3)) == expected
+        assert [query.rsplit("\n", 2)[1:] for query in endpoint.queries] == [
+            ["LIMIT 3", "OFFSET 0"],
+            ["LIMIT 3", "OFFSET 3"],
+            ["LIMIT 3", "OFFSET 6"],
+        ]
+
+    def test_parallel_chunks_keep_their_order(self, endpoint: _Endpoint) -> None:
+        chunks = registry.value("ramose_query_chunks_total", endpoint="http://ep/sparql")
+        rows = _rows(_chunked(chunk_size=2, chunk_parallelism=3))
+        assert [row["id"] for row in rows] == ["w1", "w2", "w3", "w4", "w5", "w6", "w7"]
+        assert registry.value("ramose_query_chunks_total", endpoint="http://ep/sparql") == chunks + 4
+
+    def test_chunks_past_a_short_one_are_abandoned(self, endpoint: _Endpoint) -> None:
+        endpoint.held = "OFFSET 8"
+        started = time.monotonic()
+        rows = _rows(_chunked(chunk_size=4, chunk_parallelism=3))
+        assert time.monotonic() - started < 2
+        assert len(rows) == 7
+        assert sorted(query.rsplit("\n", 1)[1] for query in endpoint.queries) == ["OFFSET 0", "OFFSET 4", "OFFSET 8"]
+        endpoint.release.set()
+        deadline = time.monotonic() + 5
+        while not any(query.endswith("OFFSET 8") for query in endpoint.closed) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert any(query.endswith("OFFSET 8") for query in endpoint.closed)
+
+    def test_truncated_result_is_fetched_again_in_chunks(self, endpoint: _Endpoint) -> None:
+        endpoint.cap = 2
+        truncated = registry.value("ramose_truncated_results_total", endpoint="http://ep/sparql")
+        assert len(_rows(_chunked(max_rows=2))) == 7
+        assert endpoint.queries[0] == QUERY
+        assert endpoint.queries[1].endswith("LIMIT 2\nOFFSET 0")
+        assert registry.value("ramose_truncated_results_total", endpoint="http://ep/sparql") == truncated + 1
+
+    def test_flagged_result_is_fetched_again_with_truncation_headers(self, endpoint: _Endpoint) -> None:
+        endpoint.cap = 2
+        endpoint.flag = True
+        assert len(_rows(_chunked(max_rows=2, truncation_headers=True))) == 7
+        assert endpoint.queries[1].endswith("LIMIT 2\nOFFSET 0")
+
+    def test_result_of_exactly_max_rows_is_complete_with_truncation_headers(self, endpoint: _Endpoint) -> None:
+        endpoint.flag = True
+        truncated = registry.value("ramose_truncated_results_total", endpoint="http://ep/sparql")
+        assert len(_rows(_chunked(max_rows=7, truncation_headers=True))) == 7
+        assert endpoint.queries == [QUERY]
+        assert registry.value("ramose_truncated_results_total", endpoint="http://ep/sparql") == truncated
+
+    def test_chunks_shrink_to_the_cap_of_the_endpoint(self, endpoint: _Endpoint) -> None:
+        endpoint.cap = 2
+        assert len(_rows(_chunked(chunk_size=5, max_rows=2))) == 7
+        assert [query.rsplit("\n", 2)[1:] for query in endpoint.queries[:3]] == [
+            ["LIMIT 5", "OFFSET 0"],
+            ["LIMIT 2", "OFFSET 2"],
+            ["LIMIT 2", "OFFSET 4"],
+        ]
+
+    def test_query_that_cannot_be_chunked_is_sent_whole(self, endpoint: _Endpoint) -> None:
+        op_item = {"url": "/works", "sparql": QUERY.replace("ORDER BY ?id", "LIMIT 5"), "method": "get"}
+        config = OperationConfig(
+            sparql_endpoint="http://ep/sparql",
+            retry_wait=0,
+            endpoint_options={"http://ep/sparql": EndpointOptions(chunk_size=2)},
+        )
+        assert len(_rows(Operation("/works", "/works", op_item, config))) == 5
+        assert len(endpoint.queries) == 1
+
+    def test_multi_source_steps_are_chunked(self, endpoint: _Endpoint) -> None:
+        expected = _rows(_pipeline("", optimize=False))
+        endpoint.queries.clear()
+        options = {"http://ep/sparql": EndpointOptions(chunk_size=4)}
+        assert _rows(_pipeline("", optimize=False, endpoint_options=options)) == expected
+        assert sum("LIMIT 4" in query for query in endpoint.queries) == 3
+
+
+PIPELINE = """PREFIX ex: <http://example.org/>
+SELECT ?work ?year WHERE { ?work ex:id ?id . OPTIONAL { ?work ex:year ?year } }
+ORDER BY {order}
+@@page ?work default_size=3
+@@values ?work
+@@join ?work ?work
+PREFIX ex: <http://example.org/>
+SELECT ?work ?title WHERE { ?work ex:title ?title }"""
+
+
+def _pipeline(query_string: str, *, order: str = "?work", optimize: bool = True, **config: object) -> Operation:
+    op_item = {
+        "url": "/works",
+        "sparql": PIPELINE.replace("{order}", order),
+        "method": "get",
+        "field_type": "str(work) str(year) str(title)",
+    }
+    optimizations = frozenset({"page_pushdown"}) if optimize else frozenset()
+    return Operation(
+        f"/works?{query_string}",
+        "/works",
+        op_item,
+        OperationConfig(sparql_endpoint="http://ep/sparql", retry_wait=0, optimizations=optimizations, **config),  # type: ignore[arg-type]
+    )
+
+
+class TestPagePushdown:
+    @pytest.mark.parametrize("query_string", ["", "page=2", "page=3", "page=2&page_size=2"])
+    @pytest.mark.parametrize("order", ["?work", "DESC(?work)"])
+    def test_same_page_as_ramose_keeps(self, endpoint: _Endpoint, query_string: str, order: str) -> None:
+        expected = _pipeline(query_string, order=order, optimize=False)
+        expected_rows = _rows(expected)
+        pushed = _pipeline(query_string, order=order)
+
+        assert _rows(pushed) == expected_rows
+        assert pushed.pagination_info == expected.pagination_info
+        assert pushed.query_plan == ["page_pushdown: @@page ?work runs on http://ep/sparql"]
+
+    def test_following_steps_receive_only_the_keys_of_the_page(self, endpoint: _Endpoint) -> None:
+        op = _pipeline("page=3")
+        assert [row["work"] for row in _rows(op)] == ["http://example.org/w7"]
+        page, values = (query for query in endpoint.queries if "COUNT" not in query)
+        assert "SELECT DISTINCT ?work WHERE {" in page
+        assert "LIMIT 3\n    OFFSET 6" in page
+        assert "VALUES (?work) {\n  (<http://example.org/w7>)\n}" in values
+        assert op.pagination_info is not None
+        assert op.pagination_info.total_items == 7
+
+    def test_total_passed_back_by_the_client_skips_the_count(self, endpoint: _Endpoint) -> None:
+        op = _pipeline("page=2&total_items=7")
+        assert len(_rows(op)) == 3
+        assert not any("COUNT" in query for query in endpoint.queries)
+
+    def test_distinct_key_count_is_cached(self, endpoint: _Endpoint, tmp_path: Path) -> None:
+        cache = ResultCache(str(tmp_path))
+        for page in (1, 2):
+            _rows(_pipeline(f"page={page}", cache=cache))
+        assert sum("COUNT(DISTINCT ?work)" in query for query in endpoint.queries) == 1
+
+    def test_query_ordered_by_another_variable_pages_in_ramose(self, endpoint: _Endpoint) -> None:
+        expected_rows = _rows(_pipeline("page=2", order="?year", optimize=False))
+        op = _pipeline("page=2", order="?year")
+        assert _rows(op) == expected_rows
+        assert op.query_plan == [
+            "page: @@page ?work runs in RAMOSE (the query is ordered by something other than ?work)"
+        ]
+        assert not any("DISTINCT" in query for query in endpoint.queries)
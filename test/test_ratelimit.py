@@ -0,0 +1,180 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+from __future__ import annotations
+
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import TYPE_CHECKING
+from unittest.mock import patch
+
+import pytest
+
+from ramose import Operation, OperationConfig
+from ramose.endpoints import EndpointOptions, build_endpoint_options
+from ramose.metrics import registry
+from ramose.ratelimit import RateController, rate_controller, reset_rate_controllers, retry_after_seconds
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+ENDPOINT = "http://localhost/sparql"
+OP_ITEM = {
+    "url": "/test",
+    "sparql": "SELECT ?name WHERE { }",
+    "method": "get",
+    "field_type": "str(name)",
+}
+
+
+@pytest.fixture(autouse=True)
+def _fresh_controllers() -> Iterator[None]:
+    reset_rate_controllers()
+    yield
+    reset_rate_controllers()
+
+
+def _response(status_code: int = 200, retry_after: str | None = None) -> SimpleNamespace:
+    return SimpleNamespace(
+        status_code=status_code,
+        reason="OK" if status_code == 200 else "Too Many Requests",
+        encoding=None,
+        headers={"Retry-After": retry_after} if retry_after else {},
+        iter_content=lambda chunk_size: iter([b"name\nA\n"]),
+        close=lambda: None,
+    )
+
+
+def _op(options: EndpointOptions | None = None, **config: float) -> Operation:
+    endpoint_options = {ENDPOINT: options} if options else {}
+    return Operation(
+        "/test",
+        "/test",
+        OP_ITEM,
+        OperationConfig(sparql_endpoint=ENDPOINT, endpoint_options=endpoint_options, retry_wait=0, **config),  # type: ignore[arg-type]
+    )
+
+
+class TestRetryAfter:
+    def test_seconds_and_http_dates(self) -> None:
+        now = datetime(2026, 10, 19, 12, 0, 0, tzinfo=timezone.utc)
+        assert retry_after_seconds("120") == 120.0
+        assert retry_after_seconds("Mon, 19 Oct 2026 12:00:30 GMT", now) == 30.0
+        assert retry_after_seconds("Mon, 19 Oct 2026 11:00:00 GMT", now) == 0.0
+
+    def test_missing_or_invalid(self) -> None:
+        assert retry_after_seconds(None) is None
+        assert retry_after_seconds("soon") is None
+        assert retry_after_seconds("-5") is None
+
+
+class TestRateController:
+    def test_not_throttling_until_the_endpoint_pushes_back(self) -> None:
+        controller = RateController(ENDPOINT, min_rate=0.1, clock=lambda: 0.0)
+        assert [controller.reserve() for _ in range(10)] == [0.0] * 10
+        controller.succeeded()
+        assert controller.rate is None
+
+    def test_first_pushback_halves_the_rate_requests_were_sent_at(self) -> None:
+        controller = RateController(ENDPOINT, min_rate=0.1, clock=lambda: 0.0)
+        for _ in range(10):
+            controller.reserve()
+        decreases = registry.value("ramose_rate_decreases_total", endpoint=ENDPOINT)
+        controller.throttled()
+        assert controller.rate == 5.0
+        assert [controller.reserve() for _ in range(3)] == pytest.approx([0.0, 0.2, 0.4])
+        assert registry.value("ramose_rate_decreases_total", endpoint=ENDPOINT) == decreases + 1
+        assert registry.value("ramose_rate_limit", endpoint=ENDPOINT) == 0
+
+    def test_multiplicative_decrease_once_per_interval_down_to_min_rate(self) -> None:
+        now = [0.0]
+        controller = RateController(ENDPOINT, min_rate=0.5, max_rate=4, clock=lambda: now[0])
+        controller.throttled()
+        controller.throttled()
+        assert controller.rate == 2.0
+        for moment in (1.0, 2.0, 3.0):
+            now[0] = moment
+            controller.throttled()
+        assert controller.rate == 0.5
+
+    def test_additive_increase_up_to_max_rate(self) -> None:
+        controller = RateController(ENDPOINT, min_rate=0.1, max_rate=1.25, clock=lambda: 0.0)
+        assert controller.rate == 1.25
+        controller.throttled()
+        for _ in range(3):
+            controller.succeeded()
+        assert controller.rate == pytest.approx(0.925)
+        for _ in range(10):
+            controller.succeeded()
+        assert controller.rate == 1.25
+
+    def test_retry_after_holds_every_request(self) -> None:
+        controller = RateController(ENDPOINT, min_rate=1, clock=lambda: 0.0)
+        controller.throttled(retry_after=5)
+        assert controller.reserve() == 5.0
+        assert controller.reserve() > 5.0
+
+    def test_shared_per_endpoint_and_replaced_when_its_bounds_change(self) -> None:
+        options = EndpointOptions(adaptive_rate=True)
+        assert rate_controller(ENDPOINT, EndpointOptions()) is None
+        controller = rate_controller(ENDPOINT, options)
+        assert rate_controller(ENDPOINT, options) is controller
+        assert rate_controller(ENDPOINT, EndpointOptions(adaptive_rate=True, max_rate=5)) is not controller
+
+    def test_endpoint_options(self) -> None:
+        options = build_endpoint_options({"adaptive_rate": "true", "min_rate": "0.5", "max_rate": "10"})
+        assert (options.adaptive_rate, options.min_rate, options.max_rate) == (True, 0.5, 10.0)
+        with pytest.raises(ValueError, match="'min_rate' must be > 0"):
+            build_endpoint_options({"min_rate": "0"})
+
+
+class TestThrottledRequests:
+    @patch("ramose.operation.time.sleep")
+    @patch("ramose.operation._http_session")
+    def test_retry_waits_for_retry_after(self, mock_session: object, mock_sleep: object) -> None:
+        mock_session.get.side_effect = [_response(429, retry_after="3"), _response()]  # type: ignore[attr-defined]
+        throttled = registry.value("ramose_throttled_responses_total", endpoint=ENDPOINT)
+
+        sc, body, _, _ = _op().exec(method="get", content_type="text/csv")
+
+        assert (sc, body) == (200, "name\r\nA\r\n")
+        mock_sleep.assert_called_once_with(3.0)  # type: ignore[attr-defined]
+        assert registry.value("ramose_throttled_responses_total", endpoint=ENDPOINT) == throttled + 1
+
+    @patch("ramose.operation._http_session")
+    def test_long_retry_after_is_passed_on_without_retrying(self, mock_session: object) -> None:
+        mock_session.get.return_value = _response(429, retry_after="3600")  # type: ignore[attr-defined]
+
+        sc, msg, _, _ = _op().exec(method="get")
+
+        assert (sc, msg) == (429, "HTTP status code 429: Too Many Requests")
+        assert mock_session.get.call_count == 1  # type: ignore[attr-defined]
+
+    @patch("ramose.operation._http_session")
+    def test_controller_paces_requests_after_pushback(self, mock_session: object) -> None:
+        mock_session.get.return_value = _response()  # type: ignore[attr-defined]
+        op = _op(EndpointOptions(adaptive_rate=True, max_rate=20))
+
+        started = time.monotonic()
+        for _ in range(5):
+            assert op.exec(method="get")[0] == 200
+
+        assert time.monotonic() - started >= 0.15
+        assert registry.value("ramose_rate_limit", endpoint=ENDPOINT) == 20
+
+    @patch("ramose.operation._http_session")
+    def test_wait_past_the_deadline_returns_504(self, mock_session: object) -> None:
+        mock_session.get.return_value = _response()  # type: ignore[attr-defined]
+        options = EndpointOptions(adaptive_rate=True)
+        controller = rate_controller(ENDPOINT, options)
+        assert controller is not None
+        controller.throttled(retry_after=30)
+
+        started = time.monotonic()
+        sc, msg, _, _ = _op(options, timeout=1).exec(method="get")
+
+        assert (sc, msg) == (504, "HTTP status code 504: request deadline of 1s exceeded")
+        assert time.monotonic() - started < 0.5
+        mock_session.get.assert_not_called()  # type: ignore[attr-defined]
@@ -0,0 +1,309 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+from __future__ import annotations
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from typing import TYPE_CHECKING
+from unittest.mock import patch
+
+import pytest
+from requests.exceptions import ConnectionError as RequestsConnectionError
+
+from ramose import Operation, OperationConfig
+from ramose.endpoints import EndpointOptions
+from ramose.metrics import registry
+from ramose.replicas import (
+    LatencyWindow,
+    ReplicaHealth,
+    hedge_delay,
+    latency_window,
+    rank_replicas,
+    replica_health,
+    reset_latency_windows,
+    reset_replica_health,
+    split_replicas,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+OP_ITEM = {
+    "url": "/test",
+    "sparql": "SELECT ?name WHERE { }",
+    "method": "get",
+    "field_type": "str(name)",
+}
+
+
+class _StubEndpoint:
+    """A local SPARQL endpoint that answers every query with its own name after a fixed delay."""
+
+    def __init__(self, name: str, delay: float) -> None:
+        self.requests = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                stub.requests += 1
+                time.sleep(delay)
+                body = f"name\n{name}\n".encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/csv")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: object) -> None:  # noqa: A002
+                return
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/sparql"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def _fresh_latencies() -> Iterator[None]:
+    reset_latency_windows()
+    reset_replica_health()
+    yield
+    reset_latency_windows()
+    reset_replica_health()
+
+
+def _record(url: str, seconds: float, *, failed: bool = False, options: EndpointOptions | None = None) -> None:
+    health = replica_health(url)
+    health.start()
+    health.finish(seconds, failed=failed, options=options or EndpointOptions())
+
+
+@pytest.fixture
+def slow_and_fast() -> Iterator[tuple[_StubEndpoint, _StubEndpoint]]:
+    slow, fast = _StubEndpoint("slow", 1.0), _StubEndpoint("fast", 0.0)
+    yield slow, fast
+    slow.close()
+    fast.close()
+
+
+def _replicated_op(replicas: tuple[str, ...], options: EndpointOptions) -> Operation:
+    config = OperationConfig(
+        sparql_endpoint=replicas[0],
+        replicas={replicas[0]: replicas},
+        endpoint_options=dict.fromkeys(replicas, options),
+        retry_wait=0,
+    )
+    return Operation("/test", "/test", OP_ITEM, config)
+
+
+class TestSplitReplicas:
+    def test_urls_separated_by_pipes(self) -> None:
+        assert split_replicas(" http://a/sparql | http://b/sparql|") == ("http://a/sparql", "http://b/sparql")
+        assert split_replicas("http://a/sparql") == ("http://a/sparql",)
+
+
+class TestLatencyWindow:
+    def test_nearest_rank_percentile(self) -> None:
+        window = LatencyWindow()
+        assert window.percentile(95) is None
+        for ms in range(1, 101):
+            window.record(ms / 1000)
+        assert (window.percentile(50), window.percentile(95), window.percentile(100)) == (0.05, 0.095, 0.1)
+
+    def test_keeps_the_most_recent_samples(self) -> None:
+        window = LatencyWindow(size=2)
+        for seconds in (9.0, 1.0, 2.0):
+            window.record(seconds)
+        assert (len(window), window.percentile(100)) == (2, 2.0)
+
+    def test_hedge_delay_follows_the_percentile_once_there_are_enough_samples(self) -> None:
+        options = EndpointOptions(hedge_percentile=90, hedge_delay=0.5)
+        assert hedge_delay("http://a/sparql", EndpointOptions()) is None
+        assert hedge_delay("http://a/sparql", options) == 0.5
+        for ms in range(1, 21):
+            latency_window("http://a/sparql").record(ms / 1000)
+        assert hedge_delay("http://a/sparql", options) == 0.018
+
+
+class TestHedgedRequests:
+    def test_slow_primary_is_hedged_to_the_fast_replica(
+        self, slow_and_fast: tuple[_StubEndpoint, _StubEndpoint]
+    ) -> None:
+        slow, fast = slow_and_fast
+        # The slow replica has answered quickly so far, so it is picked first.
+        _record(slow.url, 0.01)
+        _record(fast.url, 0.1)
+        hedged = registry.value("ramose_hedged_requests_total", endpoint=slow.url)
+        wins = registry.value("ramose_hedge_wins_total", endpoint=slow.url)
+        op = _replicated_op((slow.url, fast.url), EndpointOptions(hedge_percentile=95, hedge_delay=0.05))
+
+        started = time.monotonic()
+        sc, body, _, _ = op.exec(method="get", content_type="text/csv")
+
+        assert (sc, body) == (200, "name\r\nfast\r\n")
+        assert time.monotonic() - started < 0.8
+        assert (slow.requests, fast.requests) == (1, 1)
+        assert registry.value("ramose_hedged_requests_total", endpoint=slow.url) == hedged + 1
+        assert registry.value("ramose_hedge_wins_total", endpoint=slow.url) == wins + 1
+
+    def test_fast_primary_is_not_hedged(self, slow_and_fast: tuple[_StubEndpoint, _StubEndpoint]) -> None:
+        slow, fast = slow_and_fast
+        _record(slow.url, 1.0)
+        op = _replicated_op((slow.url, fast.url), EndpointOptions(hedge_percentile=95, hedge_delay=0.5))
+
+        sc, body, _, _ = op.exec(method="get", content_type="text/csv")
+
+        assert (sc, body) == (200, "name\r\nfast\r\n")
+        assert (fast.requests, slow.requests) == (1, 0)
+        assert len(latency_window(slow.url)) == 1
+
+    def test_failed_primary_is_replaced_without_waiting_for_the_delay(
+        self, slow_and_fast: tuple[_StubEndpoint, _StubEndpoint]
+    ) -> None:
+        _, fast = slow_and_fast
+        _record(fast.url, 0.1)
+        op = _replicated_op(("http://127.0.0.1:9/sparql", fast.url), EndpointOptions(hedge_percentile=95))
+
+        started = time.monotonic()
+        sc, body, _, _ = op.exec(method="get", content_type="text/csv")
+
+        assert (sc, body) == (200, "name\r\nfast\r\n")
+        assert time.monotonic() - started < EndpointOptions().hedge_delay
+
+
+class TestReplicaFailover:
+    @patch("ramose.operation._http_session")
+    def test_next_replica_answers_when_the_first_fails(self, mock_session: object) -> None:
+        response = SimpleNamespace(status_code=200, reason="OK", encoding=None, close=lambda: None)
+        response.iter_content = lambda chunk_size: iter([b"name\nB\n"])
+
+        def get(url: str, **_kwargs: object) -> SimpleNamespace:
+            if url.startswith("http://a/"):
+                msg = "refused"
+                raise RequestsConnectionError(msg)
+            return response
+
+        mock_session.get.side_effect = get  # type: ignore[attr-defined]
+        _record("http://b/sparql", 0.1)
+        op = _replicated_op(("http://a/sparql", "http://b/sparql"), EndpointOptions(eject_error_rate=0))
+
+        sc, body, _, _ = op.exec(method="get", content_type="text/csv")
+
+        assert (sc, body) == (200, "name\r\nB\r\n")
+        assert [call.args[0].split("?")[0] for call in mock_session.get.call_args_list] == [  # type: ignore[attr-defined]
+            "http://a/sparql",
+            "http://a/sparql",
+            "http://a/sparql",
+            "http://b/sparql",
+        ]
+
+
+class TestReplicaHealth:
+    def test_moving_averages(self) -> None:
+        health = ReplicaHealth("http://a/sparql")
+        for seconds, failed in ((1.0, False), (2.0, True)):
+            health.start()
+            health.finish(seconds, failed=failed, options=EndpointOptions())
+        assert (health.latency, health.error_rate, health.in_flight) == (1.3, 0.3, 0)
+        health.start()
+        assert health.score() == pytest.approx(1.3 * 2 * 4)
+
+    @patch("ramose.operation._http_session")
+    def test_latency_covers_reading_the_body(self, mock_session: object) -> None:
+        def body(chunk_size: int) -> Iterator[bytes]:
+            yield b"name\n"
+            time.sleep(0.2)
+            yield b"A\n"
+
+        mock_session.get.return_value = SimpleNamespace(  # type: ignore[attr-defined]
+            status_code=200, reason="OK", encoding=None, headers={}, iter_content=body, close=lambda: None
+        )
+        replicas = ("http://a/sparql", "http://b/sparql")
+        op = _replicated_op(replicas, EndpointOptions())
+
+        assert op.exec(method="get", content_type="text/csv")[:2] == (200, "name\r\nA\r\n")
+        served = [replica_health(url) for url in replicas if replica_health(url).samples]
+        assert len(served) == 1
+        assert served[0].latency >= 0.2
+        assert served[0].in_flight == 0
+
+    def test_ejection_and_readmission_are_logged(self, caplog: pytest.LogCaptureFixture) -> None:
+        now = [0.0]
+        health = ReplicaHealth("http://a/sparql", clock=lambda: now[0])
+        options = EndpointOptions(eject_error_rate=0.5, eject_duration=10)
+        caplog.set_level("INFO", logger="ramose.replicas")
+        for _ in range(5):
+            health.start()
+            health.finish(0.1, failed=True, options=options)
+        assert health.ejected
+        assert "Ejecting replica http://a/sparql for 10s: error rate 100%" in caplog.text
+
+        now[0] = 10.0
+        assert not health.ejected
+        assert (health.error_rate, health.samples) == (0.0, 0)
+        assert "Readmitting replica http://a/sparql" in caplog.text
+
+    def test_no_ejection_below_the_threshold_or_when_disabled(self) -> None:
+        cases = [
+            (EndpointOptions(eject_error_rate=0.9), (True, False) * 5),
+            (EndpointOptions(eject_error_rate=0), (True,) * 10),
+        ]
+        for options, failures in cases:
+            health = ReplicaHealth("http://a/sparql")
+            for failed in failures:
+                health.start()
+                health.finish(0.1, failed=failed, options=options)
+            assert not health.ejected
+
+
+class TestRankReplicas:
+    def test_power_of_two_choices_prefers_the_faster_replica(self) -> None:
+        _record("http://a/sparql", 0.5)
+        _record("http://b/sparql", 0.1)
+        assert rank_replicas(["http://a/sparql", "http://b/sparql"]) == ["http://b/sparql", "http://a/sparql"]
+
+    def test_failing_replica_looks_slower(self) -> None:
+        _record("http://a/sparql", 0.01, failed=True)
+        _record("http://b/sparql", 0.05)
+        assert rank_replicas(["http://a/sparql", "http://b/sparql"])[0] == "http://b/sparql"
+
+    def test_queries_in_flight_spread_the_load(self) -> None:
+        _record("http://a/sparql", 0.1)
+        _record("http://b/sparql", 0.15)
+        replica_health("http://a/sparql").start()
+        assert rank_replicas(["http://a/sparql", "http://b/sparql"])[0] == "http://b/sparql"
+
+    def test_unknown_replicas_are_picked_at_random(self) -> None:
+        firsts = {rank_replicas(["http://a/sparql", "http://b/sparql", "http://c/sparql"])[0] for _ in range(200)}
+        assert firsts == {"http://a/sparql", "http://b/sparql", "http://c/sparql"}
+
+    def test_ejected_replicas_are_skipped_unless_all_are(self) -> None:
+        for _ in range(5):
+            _record("http://a/sparql", 0.1, failed=True)
+        assert rank_replicas(["http://a/sparql", "http://b/sparql"]) == ["http://b/sparql"]
+        for _ in range(5):
+            _record("http://b/sparql", 0.1, failed=True)
+        assert sorted(rank_replicas(["http://a/sparql", "http://b/sparql"])) == ["http://a/sparql", "http://b/sparql"]
+
+    def test_failing_replica_is_ejected_and_traffic_moves(
+        self, slow_and_fast: tuple[_StubEndpoint, _StubEndpoint]
+    ) -> None:
+        _, fast = slow_and_fast
+        down = "http://127.0.0.1:9/sparql"
+        # The replica that goes down had the best record, so it keeps being picked until it is ejected.
+        _record(down, 0.0001)
+        _record(fast.url, 0.5)
+        op = _replicated_op((down, fast.url), EndpointOptions())
+        for _ in range(2):
+            sc, body, _, _ = op.exec(method="get", content_type="text/csv")
+            assert (sc, body) == (200, "name\r\nfast\r\n")
+        assert replica_health(down).ejected
+        assert registry.value("ramose_replica_ejected", endpoint=down) == 1
+        assert rank_replicas((down, fast.url)) == [fast.url]
@@ -0,0 +1,123 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+from __future__ import annotations
+
+import json
+from datetime import datetime, timezone
+
+from ramose.results import ParsedResults, iter_lines, parse_csv, parse_json, parse_results, parse_tsv
+
+XSD = "http://www.w3.org/2001/XMLSchema#"
+
+
+def _json_chunks(variables: list[str], bindings: list[dict[str, dict[str, str]]]) -> list[bytes]:
+    body = json.dumps({"head": {"vars": variables}, "results": {"bindings": bindings}}).encode()
+    return [body[:10], body[10:]]
+
+
+class TestIterLines:
+    def test_lines_split_across_chunks(self) -> None:
+        chunks = [b"\xef\xbb\xbfname,age\r", b"\nAl", b"ice,30\r\nJos\xc3", b"\xa9,4"]
+        assert list(iter_lines(chunks)) == ["name,age\r\n", "Alice,30\r\n", "Jos\u00e9,4"]
+
+    def test_long_line_over_many_chunks(self) -> None:
+        assert list(iter_lines([b"a"] * 1000 + [b"\nb"])) == ["a" * 1000 + "\n", "b"]
+
+    def test_invalid_bytes_are_replaced(self) -> None:
+        assert list(iter_lines([b"name\n\xff\n"])) == ["name\n", "\ufffd\n"]
+
+
+class TestParseJson:
+    def test_terms_match_the_csv_results(self) -> None:
+        chunks = _json_chunks(
+            ["s", "label", "node", "missing"],
+            [
+                {
+                    "s": {"type": "uri", "value": "https://w3id.org/oc/meta/br/1"},
+                    "label": {"type": "literal", "value": "Title", "xml:lang": "en"},
+                    "node": {"type": "bnode", "value": "b0"},
+                }
+            ],
+        )
+        parsed = parse_json(chunks)
+        assert parsed.table == [
+            ["s", "label", "node", "missing"],
+            ["https://w3id.org/oc/meta/br/1", "Title", "_:b0", ""],
+        ]
+        assert parsed.column_types == {"s": None, "label": None, "node": None}
+
+    def test_typed_literals(self) -> None:
+        chunks = _json_chunks(
+            ["n", "date", "price"],
+            [
+                {
+                    "n": {"type": "literal", "value": "42", "datatype": XSD + "integer"},
+                    "date": {"type": "literal", "value": "2015-06-01T10:00:00Z", "datatype": XSD + "dateTime"},
+                    "price": {"type": "literal", "value": "2.5", "datatype": XSD + "decimal"},
+                },
+                {"n": {"type": "literal", "value": "7", "datatype": XSD + "long"}},
+            ],
+        )
+        parsed = parse_json(chunks)
+        assert parsed.table[1] == [
+            (42, "42"),
+            (datetime(2015, 6, 1, 10, tzinfo=timezone.utc), "2015-06-01T10:00:00Z"),
+            (2.5, "2.5"),
+        ]
+        assert parsed.table[2] == [(7, "7"), "", ""]
+        assert parsed.column_types == {"n": "int", "date": "datetime", "price": "float"}
+
+    def test_mixed_or_invalid_literals_leave_the_column_untyped(self) -> None:
+        chunks = _json_chunks(
+            ["n"],
+            [
+                {"n": {"type": "literal", "value": "1", "datatype": XSD + "integer"}},
+                {"n": {"type": "literal", "value": "abc", "datatype": XSD + "integer"}},
+            ],
+        )
+        parsed = parse_json(chunks)
+        assert parsed.table[2] == ["abc"]
+        assert parsed.column_types == {"n": None}
+
+    def test_untyped_parsing(self) -> None:
+        chunks = _json_chunks(["n"], [{"n": {"type": "literal", "value": "1", "datatype": XSD + "integer"}}])
+        assert parse_json(chunks, typed=False).table == [["n"], ["1"]]
+
+
+class TestParseTsv:
+    def test_terms(self) -> None:
+        chunks = [
+            b"?s\t?label\t?n\t?x\n",
+            b'<https://w3id.org/oc/meta/br/1>\t"A \\"quoted\\"\\ttitle"@en\t42\t_:b0\n',
+            b'<https://w3id.org/oc/meta/br/2>\t"caf\\u00E9"\t"7"^^<http://www.w3.org/2001/XMLSchema#integer>\t\n',
+        ]
+        parsed = parse_tsv(chunks)
+        assert parsed.table == [
+            ["s", "label", "n", "x"],
+            ["https://w3id.org/oc/meta/br/1", 'A "quoted"\ttitle', (42, "42"), "_:b0"],
+            ["https://w3id.org/oc/meta/br/2", "caf\u00e9", (7, "7"), ""],
+        ]
+        assert parsed.column_types == {"s": None, "label": None, "n": "int", "x": None}
+
+    def test_abbreviated_numbers(self) -> None:
+        parsed = parse_tsv([b"?a\t?b\t?c\n", b"1.5\t1e3\ttrue\n"])
+        assert parsed.table[1] == [(1.5, "1.5"), (1000.0, "1e3"), "true"]
+
+    def test_empty_response(self) -> None:
+        assert parse_tsv([]).table == [[]]
+
+
+class TestParsedResults:
+    def test_extend_merges_column_types(self) -> None:
+        first = ParsedResults([["a", "b"], ["1", "2"]], {"a": "int", "b": "int"})
+        first.extend(ParsedResults([["a", "b"], ["3", "4"]], {"a": "int", "b": "float"}))
+        assert first.table == [["a", "b"], ["1", "2"], ["3", "4"]]
+        assert first.column_types == {"a": "int", "b": None}
+
+    def test_csv_is_untyped(self) -> None:
+        parsed = parse_results("csv", [b"n\n", b"42\n"])
+        assert parsed.table == [["n"], ["42"]]
+        assert parsed.column_types == {}
+        assert parse_csv([b"n\n"]).table == [["n"]]